@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Memory-Aware Admission Control
+Scales analysis resources (engines, hash, concurrency, caches) from live memory readings.
+
+The controller turns MemoryMonitor snapshots into a pressure level and derives
+resource limits from it. Components either read the current limits when they
+start work (move concurrency, job admission) or are registered so they can be
+resized in place (engine pools, LRU caches) whenever the level changes.
+"""
+
+import inspect
+import os
+import time
+import threading
+import weakref
+from dataclasses import dataclass, asdict
+from enum import Enum
+from typing import Any, Callable, Dict, Optional
+
+from .cache_manager import LRUCache
+from .memory_monitor import MemoryMonitor, MemorySnapshot, get_memory_monitor
+
+
+class PressureLevel(Enum):
+    """Memory pressure levels, ordered from least to most constrained."""
+    NORMAL = "normal"
+    ELEVATED = "elevated"
+    CRITICAL = "critical"
+
+
+@dataclass
+class AdmissionLimits:
+    """Resource limits for a given pressure level."""
+    engine_pool_size: int
+    engine_hash_mb: int
+    move_concurrency: int
+    max_concurrent_jobs: int
+    cache_scale: float
+    admit_new_jobs: bool = True
+
+
+# Fraction of the baseline applied at each level
+_LEVEL_SCALE = {
+    PressureLevel.NORMAL: 1.0,
+    PressureLevel.ELEVATED: 0.5,
+    PressureLevel.CRITICAL: 0.25,
+}
+
+# Smallest useful Stockfish hash table (MB)
+MIN_ENGINE_HASH_MB = 16
+
+
+class MemoryAdmissionController:
+    """
+    Derives analysis resource limits from memory pressure.
+
+    Features:
+    - Pressure from system usage and (optionally) process RSS vs. a budget
+    - Hysteresis so limits do not flap around a threshold
+    - In-place resizing of registered engine pools and LRU caches
+    - Job admission: defers new batch jobs when memory is critical
+    - Works without a running monitor loop (samples on demand when stale)
+
+    Usage:
+        controller = MemoryAdmissionController(baseline)
+        controller.register_cache(cache)
+        limits = controller.current_limits()
+        if controller.can_admit_job(running_jobs):
+            ...
+    """
+
+    def __init__(
+        self,
+        baseline: AdmissionLimits,
+        monitor: Optional[MemoryMonitor] = None,
+        warning_threshold: float = 0.70,
+        critical_threshold: float = 0.85,
+        memory_budget_mb: Optional[float] = None,
+        hysteresis: float = 0.05,
+        sample_interval: float = 5.0
+    ):
+        """
+        Initialize the controller.
+
+        Args:
+            baseline: Limits applied when memory pressure is normal
+            monitor: MemoryMonitor used for snapshots (global monitor if None)
+            warning_threshold: Usage ratio that moves to ELEVATED
+            critical_threshold: Usage ratio that moves to CRITICAL
+            memory_budget_mb: Optional process RSS budget in MB
+            hysteresis: Ratio the usage must drop below a threshold before relaxing
+            sample_interval: Minimum seconds between on-demand samples
+
+        Raises:
+            ValueError: If thresholds are invalid
+        """
+        if not 0 < warning_threshold < critical_threshold <= 1.0:
+            raise ValueError("thresholds must satisfy 0 < warning < critical <= 1.0")
+        if memory_budget_mb is not None and memory_budget_mb <= 0:
+            raise ValueError("memory_budget_mb must be positive")
+
+        self.baseline = baseline
+        self.monitor = monitor
+        self.warning_threshold = warning_threshold
+        self.critical_threshold = critical_threshold
+        self.memory_budget_mb = memory_budget_mb
+        self.hysteresis = hysteresis
+        self.sample_interval = sample_interval
+
+        self._lock = threading.RLock()
+        self._level = PressureLevel.NORMAL
+        self._usage_ratio = 0.0
+        self._last_sample = 0.0
+        # Weak references: engines (and their caches) are created per worker/game
+        self._caches: list[tuple[weakref.ref, int]] = []
+        self._resizers: list[weakref.ref] = []
+        self._deferred_jobs = 0
+        self._level_changes = 0
+
+    def _get_monitor(self) -> MemoryMonitor:
+        if self.monitor is None:
+            self.monitor = get_memory_monitor()
+        return self.monitor
+
+    def usage_ratio(self, snapshot: MemorySnapshot) -> float:
+        """Usage ratio (0.0-1.0) for a snapshot, taking the worse of system and budget."""
+        ratio = snapshot.percent / 100.0
+        if self.memory_budget_mb:
+            ratio = max(ratio, snapshot.process_mb / self.memory_budget_mb)
+        return ratio
+
+    def _level_for_ratio(self, ratio: float) -> PressureLevel:
+        """Map a usage ratio to a level, relaxing only below threshold - hysteresis."""
+        current = self._level
+        if ratio >= self.critical_threshold:
+            return PressureLevel.CRITICAL
+        if ratio >= self.warning_threshold:
+            if current == PressureLevel.CRITICAL and ratio >= self.critical_threshold - self.hysteresis:
+                return PressureLevel.CRITICAL
+            return PressureLevel.ELEVATED
+        if current != PressureLevel.NORMAL and ratio >= self.warning_threshold - self.hysteresis:
+            return PressureLevel.ELEVATED
+        return PressureLevel.NORMAL
+
+    def limits_for(self, level: PressureLevel) -> AdmissionLimits:
+        """Compute the limits for a pressure level from the baseline."""
+        scale = _LEVEL_SCALE[level]
+        base = self.baseline
+        return AdmissionLimits(
+            engine_pool_size=max(1, int(base.engine_pool_size * scale)),
+            engine_hash_mb=max(MIN_ENGINE_HASH_MB, int(base.engine_hash_mb * scale)),
+            move_concurrency=max(1, int(base.move_concurrency * scale)),
+            max_concurrent_jobs=max(1, int(base.max_concurrent_jobs * scale)),
+            cache_scale=base.cache_scale * scale,
+            admit_new_jobs=level != PressureLevel.CRITICAL
+        )
+
+    def on_snapshot(self, snapshot: MemorySnapshot) -> PressureLevel:
+        """
+        Update the pressure level from a snapshot and apply limits on change.
+
+        Registered as a MemoryMonitor listener, and called by on-demand sampling.
+        """
+        ratio = self.usage_ratio(snapshot)
+        with self._lock:
+            self._usage_ratio = ratio
+            self._last_sample = snapshot.timestamp
+            new_level = self._level_for_ratio(ratio)
+            changed = new_level != self._level
+            if changed:
+                old_level = self._level
+                self._level = new_level
+                self._level_changes += 1
+
+        if changed:
+            print(f"[ADMISSION] Memory pressure {old_level.value} -> {new_level.value} (usage={ratio:.0%})")
+            self._apply(self.limits_for(new_level))
+        return new_level
+
+    def refresh(self, force: bool = False) -> PressureLevel:
+        """Sample memory if the last reading is older than sample_interval."""
+        if not force and time.time() - self._last_sample < self.sample_interval:
+            return self._level
+        try:
+            snapshot = self._get_monitor().get_current()
+        except Exception as e:
+            print(f"[ADMISSION] Could not sample memory: {e}")
+            return self._level
+        return self.on_snapshot(snapshot)
+
+    @property
+    def level(self) -> PressureLevel:
+        """Current pressure level (without sampling)."""
+        return self._level
+
+    def scale(self, value: int) -> int:
+        """Scale an arbitrary baseline count (e.g. worker processes) to the current level."""
+        return max(1, int(value * _LEVEL_SCALE[self.refresh()]))
+
+    def current_limits(self) -> AdmissionLimits:
+        """Refresh if stale and return the limits for the current level."""
+        return self.limits_for(self.refresh())
+
+    def can_admit_job(self, running_jobs: int) -> bool:
+        """
+        Decide whether a new batch job may start.
+
+        Jobs are deferred (not dropped) when memory is critical or the
+        level-adjusted concurrent job limit is reached.
+        """
+        limits = self.current_limits()
+        admitted = limits.admit_new_jobs and running_jobs < limits.max_concurrent_jobs
+        if not admitted:
+            with self._lock:
+                self._deferred_jobs += 1
+        return admitted
+
+    def register_cache(self, cache: LRUCache) -> None:
+        """Register an LRU cache to be resized with pressure; its current maxsize is the baseline."""
+        with self._lock:
+            self._prune()
+            if any(ref() is cache for ref, _ in self._caches):
+                return
+            self._caches.append((weakref.ref(cache), cache.maxsize))
+            scale = self.limits_for(self._level).cache_scale
+        if scale != 1.0:
+            cache.resize(max(1, int(cache.maxsize * scale)))
+
+    def register_resizer(self, resizer: Callable[[AdmissionLimits], None]) -> None:
+        """
+        Register a callback that applies new limits (e.g. an engine pool resize).
+
+        Bound methods are held weakly so registering does not keep the owner alive;
+        plain functions are held strongly.
+        """
+        if inspect.ismethod(resizer):
+            ref = weakref.WeakMethod(resizer)
+        else:
+            ref = lambda: resizer  # noqa: E731
+        with self._lock:
+            self._prune()
+            self._resizers.append(ref)
+            limits = self.limits_for(self._level)
+        if self._level != PressureLevel.NORMAL:
+            resizer(limits)
+
+    def _prune(self) -> None:
+        """Drop registrations whose owners were garbage collected. Caller holds the lock."""
+        self._caches = [(ref, size) for ref, size in self._caches if ref() is not None]
+        self._resizers = [ref for ref in self._resizers if ref() is not None]
+
+    def _apply(self, limits: AdmissionLimits) -> None:
+        """Push limits to registered caches and resizers."""
+        with self._lock:
+            self._prune()
+            caches = [(ref(), size) for ref, size in self._caches]
+            resizers = [ref() for ref in self._resizers]
+
+        evicted = 0
+        for cache, base_size in caches:
+            if cache is None:
+                continue
+            try:
+                evicted += cache.resize(max(1, int(base_size * limits.cache_scale)))
+            except Exception as e:
+                print(f"[ADMISSION] Could not resize cache '{cache.name}': {e}")
+        for resizer in resizers:
+            if resizer is None:
+                continue
+            try:
+                resizer(limits)
+            except Exception as e:
+                print(f"[ADMISSION] Resizer failed: {e}")
+        if evicted:
+            print(f"[ADMISSION] Evicted {evicted} cache entries to relieve memory pressure")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get controller state for metrics endpoints."""
+        with self._lock:
+            self._prune()
+            return {
+                "level": self._level.value,
+                "usage_ratio": round(self._usage_ratio, 4),
+                "memory_budget_mb": self.memory_budget_mb,
+                "limits": asdict(self.limits_for(self._level)),
+                "baseline": asdict(self.baseline),
+                "registered_caches": len(self._caches),
+                "registered_resizers": len(self._resizers),
+                "deferred_jobs": self._deferred_jobs,
+                "level_changes": self._level_changes,
+                "last_sample": self._last_sample
+            }
+
+
+def _default_baseline() -> AdmissionLimits:
+    """Baseline limits matching the existing fixed settings, overridable via env."""
+    return AdmissionLimits(
+        engine_pool_size=int(os.getenv("ADMISSION_ENGINE_POOL_SIZE", "8")),
+        engine_hash_mb=int(os.getenv("ADMISSION_ENGINE_HASH_MB", "96")),
+        move_concurrency=int(os.getenv("ADMISSION_MOVE_CONCURRENCY", "4")),
+        max_concurrent_jobs=int(os.getenv("ADMISSION_MAX_CONCURRENT_JOBS", "16")),
+        cache_scale=1.0
+    )
+
+
+# Global controller instance
+_admission_controller: Optional[MemoryAdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> MemoryAdmissionController:
+    """
+    Get or create the global admission controller.
+
+    Thresholds follow the memory monitor defaults; set ANALYSIS_MEMORY_BUDGET_MB
+    to also bound process RSS (useful in containers where system-wide usage
+    does not reflect the cgroup limit).
+
+    Returns:
+        MemoryAdmissionController instance
+    """
+    global _admission_controller
+
+    if _admission_controller is None:
+        with _controller_lock:
+            if _admission_controller is None:
+                budget = os.getenv("ANALYSIS_MEMORY_BUDGET_MB")
+                _admission_controller = MemoryAdmissionController(
+                    baseline=_default_baseline(),
+                    warning_threshold=float(os.getenv("ADMISSION_WARNING_THRESHOLD", "0.70")),
+                    critical_threshold=float(os.getenv("ADMISSION_CRITICAL_THRESHOLD", "0.85")),
+                    memory_budget_mb=float(budget) if budget else None
+                )
+                print(f"[ADMISSION] Initialized global controller (budget={budget or 'system'})")
+
+    return _admission_controller
@@ -11,6 +11,8 @@ from typing import Dict, List, Tuple, Optional, Set
 from dataclasses import dataclass
 from enum import Enum
 
+from .tactical_features import TacticalFeatures, get_tactical_features
+
 
 class TacticalPattern(Enum):
     """Tactical patterns that can be identified in chess positions."""
@@ -238,11 +240,23 @@ class AdvancedChessAnalyzer:
             pawn_structure_score=pawn_structure_score
         )
 
+    def _features_after(self, board: chess.Board, move: chess.Move) -> Optional[TacticalFeatures]:
+        """Tactical features of the position after the move (board may be before or after it)."""
+        if board.is_legal(move):
+            board_after = board.copy(stack=False)
+            board_after.push(move)
+            return get_tactical_features(board_after)
+        if board.piece_at(move.to_square):
+            return get_tactical_features(board)
+        return None
+
     def _creates_pin(self, board: chess.Board, move: chess.Move) -> bool:
         """Check if the move creates a pin."""
-        # This is a simplified implementation
-        # In practice, you'd need to check if the moved piece pins an opponent piece to their king
-        return False
+        # The moved piece pins an opponent piece to their king
+        features = self._features_after(board, move)
+        if features is None:
+            return False
+        return any(pin.pinner == move.to_square for color in chess.COLORS for pin in features.pins[color])
 
     def _breaks_pin(self, board: chess.Board, move: chess.Move) -> bool:
         """Check if the move breaks a pin."""
@@ -251,9 +265,9 @@ class AdvancedChessAnalyzer:
 
     def _creates_fork(self, board: chess.Board, move: chess.Move) -> bool:
         """Check if the move creates a fork."""
-        # This is a simplified implementation
-        # In practice, you'd check if the moved piece attacks multiple opponent pieces
-        return False
+        # The moved piece attacks multiple opponent pieces
+        features = self._features_after(board, move)
+        return features is not None and move.to_square in features.forks
 
     def _prevents_fork(self, board: chess.Board, move: chess.Move) -> bool:
         """Check if the move prevents a fork."""
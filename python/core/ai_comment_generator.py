@@ -18,9 +18,9 @@ Features:
 import os
 import re
 import hashlib
-import time
 import threading
 import asyncio
+import importlib.util
 from pathlib import Path
 from typing import Dict, Any, Optional
 from enum import Enum
@@ -28,27 +28,32 @@ import chess
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
-# Try to import Anthropic, but make it optional
-try:
-    from anthropic import Anthropic
-    ANTHROPIC_AVAILABLE = True
-except ImportError:
-    ANTHROPIC_AVAILABLE = False
-    Anthropic = None  # type: ignore
-
-# Try to import Google Generative AI (Gemini), but make it optional
-try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-    print(f"[AI] Google Generative AI package is available (version {genai.__version__})")
-except ImportError as e:
-    GEMINI_AVAILABLE = False
-    genai = None  # type: ignore
-    print(f"[AI] Error importing google.generativeai: {e}")
-except Exception as e:
-    GEMINI_AVAILABLE = False
-    genai = None  # type: ignore
-    print(f"[AI] Unexpected error importing google.generativeai: {e}")
+from .llm_scheduler import Priority, get_llm_scheduler, mark_transient_failure, register_retry_handler
+from .upstream_governor import parse_retry_after
+
+def _package_available(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+# Anthropic and Google Generative AI (Gemini) are optional. Importing them takes
+# about two seconds together, so at module load only check that they are
+# installed; each client imports its SDK when it is first initialized.
+ANTHROPIC_AVAILABLE = _package_available("anthropic")
+GEMINI_AVAILABLE = _package_available("google.generativeai")
+genai = None  # type: ignore  # google.generativeai, set by _import_genai()
+
+
+def _import_genai():
+    """Import google.generativeai on first use."""
+    global genai
+    if genai is None:
+        import google.generativeai as _genai
+        print(f"[AI] Google Generative AI package loaded (version {_genai.__version__})")
+        genai = _genai
+    return genai
 
 # Load environment variables from .env.local files
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -61,6 +66,59 @@ load_dotenv(BASE_DIR.parent / '.env.local', override=False)
 # Finally root .env (lowest priority)
 load_dotenv(BASE_DIR.parent / '.env', override=False)
 
+# Anthropic API base URL (the Anthropic SDK client reads the same variable)
+ANTHROPIC_BASE_URL = os.getenv("ANTHROPIC_BASE_URL", "https://api.anthropic.com").rstrip("/")
+
+# How long a batch request waits for the LLM scheduler before it is moved to
+# the retry queue; interactive requests (chat, profile style analysis) wait at
+# most CHAT_QUEUE_TIMEOUT
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", "60"))
+CHAT_QUEUE_TIMEOUT = 10.0
+
+# Comment cache shared by every generator instance in the process
+_comment_cache = None
+_comment_cache_lock = threading.Lock()
+
+
+def _get_comment_cache():
+    """Get the process-wide comment cache (created on first use)."""
+    global _comment_cache
+    if _comment_cache is None:
+        with _comment_cache_lock:
+            if _comment_cache is None:
+                # Cache key: hash of (FEN + move + quality + ELO_range)
+                # Cache size: 500 entries (common positions/moves)
+                # TTL: 24 hours (comments don't change for same position)
+                # Backed by the durable comment store (see core/comment_store.py),
+                # shared by all workers and kept across restarts
+                try:
+                    from .cache_manager import LRUCache
+                    from .comment_store import TieredCommentCache, get_comment_store
+                    _comment_cache = LRUCache(maxsize=500, ttl=86400, name="ai_comment_cache")
+                    store = get_comment_store()
+                    if store is not None:
+                        _comment_cache = TieredCommentCache(_comment_cache, store)
+                    print(f"[AI] Comment cache initialized (500 entries, 24h TTL, {store.backend if store else 'no'} durable store)")
+                except ImportError:
+                    # Fallback to simple dict if cache_manager not available
+                    _comment_cache = {}
+                    print("[AI] Cache manager not available, using simple dict cache")
+    return _comment_cache
+
+
+def _is_transient_error(error: Exception) -> bool:
+    """Whether a provider error may succeed on a later attempt (429, 5xx, timeout, connection)."""
+    status = getattr(error, 'status_code', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    if not isinstance(status, int):
+        status = getattr(error, 'code', None)  # google.api_core errors carry the HTTP status as code
+    if isinstance(status, int) and 400 <= status < 600:
+        return status == 429 or status >= 500
+    message = str(error).lower()
+    return any(marker in message for marker in (
+        "timeout", "timed out", "connection", "unavailable", "overloaded", "internal error",
+        "429", "500", "502", "503", "504", "529",
+    ))
+
 
 class AIProvider(Enum):
     """AI provider options."""
@@ -85,7 +143,6 @@ class AIConfig(BaseSettings):
     max_tokens: int = 120  # Keep comments concise (1-3 short sentences)
     temperature: float = 0.75  # Slightly reduced from 0.85 to reduce variability
     api_timeout: float = 30.0  # API call timeout in seconds
-    rate_limit_delay: float = 2.0  # Delay between AI API calls in seconds
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -172,51 +229,13 @@ class AIChessCommentGenerator:
             print(f"[AI] Could not initialize knowledge retriever: {e}")
             self.knowledge_retriever = None
 
-        # Rate limiting: track last API call time to prevent overwhelming the API
-        self._last_api_call_time = 0.0
-        self._rate_limit_lock = threading.Lock()
-        self._rate_limit_delay = self.config.rate_limit_delay
+        # Every LLM call goes through the process-wide scheduler of the provider:
+        # shared token bucket, interactive-first priorities, coalescing of
+        # identical in-flight requests and a persistent retry queue
+        self._scheduler = get_llm_scheduler(self.provider)
 
-        # Async rate limiting: token bucket rate limiter for parallel calls
-        # Provider-specific rate limits
-        try:
-            from .resilient_api_client import RateLimiter
-            if self.provider == AIProvider.GEMINI.value:
-                # Gemini limit: 15 requests per second (free tier)
-                capacity = 15
-                refill_rate = 15.0  # 15 requests per second
-                max_concurrent = 10  # Lower for Gemini
-                print(f"[AI] Async rate limiter initialized for Gemini (15 req/sec, 10 concurrent)")
-            else:
-                # Anthropic limit: 50 requests per minute
-                capacity = 50
-                refill_rate = 50.0 / 60.0  # Refill at 50/60 requests per second
-                max_concurrent = 15  # Max 15 concurrent calls
-                print(f"[AI] Async rate limiter initialized for Anthropic (50 req/min, 15 concurrent)")
-
-            self._async_rate_limiter = RateLimiter(
-                capacity=capacity,
-                refill_rate=refill_rate
-            )
-            # Semaphore to limit concurrent API calls (prevent overwhelming)
-            self._api_semaphore = asyncio.Semaphore(max_concurrent)
-        except ImportError:
-            self._async_rate_limiter = None
-            self._api_semaphore = None
-            print("[AI] RateLimiter not available, async parallel calls disabled")
-
-        # Initialize comment cache to avoid regenerating identical comments
-        # Cache key: hash of (FEN + move + quality + ELO_range)
-        # Cache size: 500 entries (common positions/moves)
-        # TTL: 24 hours (comments don't change for same position)
-        try:
-            from .cache_manager import LRUCache
-            self._comment_cache = LRUCache(maxsize=500, ttl=86400, name="ai_comment_cache")
-            print("[AI] Comment cache initialized (500 entries, 24h TTL)")
-        except ImportError:
-            # Fallback to simple dict if cache_manager not available
-            self._comment_cache = {}
-            print("[AI] Cache manager not available, using simple dict cache")
+        # Comments are reused for identical positions/moves across games and instances
+        self._comment_cache = _get_comment_cache()
 
         # Initialize provider-specific client
         if self.provider == AIProvider.GEMINI.value:
@@ -250,6 +269,8 @@ class AIChessCommentGenerator:
             print(f"[AI] AI_ENABLED from config: {self.config.ai_enabled}")
             print(f"[AI] API timeout: {self.config.api_timeout}s")
 
+            from anthropic import Anthropic
+
             # Initialize Anthropic client with httpx timeout configuration
             try:
                 import httpx
@@ -321,7 +342,7 @@ class AIChessCommentGenerator:
             print(f"[AI] API timeout: {self.config.api_timeout}s")
 
             # Configure Gemini API
-            genai.configure(api_key=api_key)
+            _import_genai().configure(api_key=api_key)
 
             # Initialize Gemini model
             self.client = genai.GenerativeModel(self.config.ai_model)
@@ -421,41 +442,20 @@ Write clear, educational comments that teach chess concepts."""
             else:
                 system_prompt = base_system_prompt
 
-            # Use the helper method with fallback
+            # Use the helper method with fallback; identical in-flight requests
+            # share one call, and a throttled request is replayed later
+            context = self._comment_context(move_analysis, move, is_user_move)
             comment = self._call_api_with_fallback(
                 prompt=prompt,
                 system=system_prompt,
                 max_tokens=self.config.max_tokens,
-                temperature=self.config.temperature
+                temperature=self.config.temperature,
+                key=cache_key,
+                retry=("comment", self._retry_payload(cache_key, prompt, system_prompt, context))
             )
 
             if comment:
-                # Get capture info for validation
-                board_before = move_analysis.get('board_before')
-                is_capture = False
-                captured_piece_name = None
-                if board_before and move:
-                    captured_piece = board_before.piece_at(move.to_square)
-                    if captured_piece:
-                        is_capture = True
-                        piece_names = {
-                            chess.PAWN: "pawn",
-                            chess.KNIGHT: "knight",
-                            chess.BISHOP: "bishop",
-                            chess.ROOK: "rook",
-                            chess.QUEEN: "queen",
-                            chess.KING: "king"
-                        }
-                        piece_name = piece_names.get(captured_piece.piece_type, "piece")
-                        color = "white" if captured_piece.color == chess.WHITE else "black"
-                        captured_piece_name = f"{color} {piece_name}"
-
-                move_san = move_analysis.get('move_san', '')
-                player_color = move_analysis.get('player_color', 'white')
-                # Clean, ensure grammar consistency, and validate comment
-                comment = self._clean_comment(comment, is_user_move, player_color)
-                comment = self._ensure_grammar_consistency(comment)
-                comment = self._validate_comment(comment, move_san, is_capture, is_user_move, captured_piece_name)
+                comment = self._finish_comment(comment, context)
                 print(f"[AI] Generated comment ({len(comment)} chars): {comment[:100]}...")
 
                 # Cache the comment for future use
@@ -485,7 +485,7 @@ Write clear, educational comments that teach chess concepts."""
     ) -> Optional[str]:
         """
         Async version of generate_comment for parallel execution.
-        Respects Anthropic rate limits (50 requests/minute) using token bucket rate limiter.
+        Respects the provider's rate limits through the shared LLM scheduler.
 
         Args:
             move_analysis: Dictionary containing move analysis data
@@ -503,12 +503,6 @@ Write clear, educational comments that teach chess concepts."""
         if not self.client:
             return None
 
-        # Check if async rate limiter is available
-        if not self._async_rate_limiter or not self._api_semaphore:
-            # Fallback to synchronous version if rate limiter not available
-            print("[AI] Async rate limiter not available, falling back to sync")
-            return self.generate_comment(move_analysis, board, move, is_user_move, player_elo)
-
         try:
             # Check cache first (same as sync version)
             cache_key = self._generate_cache_key(move_analysis, board, move, is_user_move, player_elo)
@@ -522,20 +516,11 @@ Write clear, educational comments that teach chess concepts."""
                 print(f"[AI] ✅ Cache hit! Reusing comment for {move_analysis.get('move_san', 'unknown')}")
                 return cached_comment
 
-            # Wait for rate limiter token (respects 50/minute limit, non-blocking)
-            token_acquired = await self._async_rate_limiter.wait_for_token(tokens=1, timeout=30.0)
-            if not token_acquired:
-                print(f"[AI] ⚠️  Rate limiter timeout for {move_analysis.get('move_san', 'unknown')}, skipping AI comment")
-                return None
-
-            # Use semaphore to limit concurrent calls
-            async with self._api_semaphore:
-                print(f"[AI] Building prompt for move {move_analysis.get('move_san', 'unknown')}, ELO: {player_elo}")
-                prompt = self._build_prompt(move_analysis, board, move, is_user_move, player_elo)
+            print(f"[AI] Building prompt for move {move_analysis.get('move_san', 'unknown')}, ELO: {player_elo}")
+            prompt = self._build_prompt(move_analysis, board, move, is_user_move, player_elo)
 
-                print(f"[AI] Calling Anthropic API (async) with model {self.config.ai_model}")
-                # Get enhanced system prompt with chess teaching methodology and Tal's authentic style
-                base_system_prompt = """You are Mikhail Tal, the Magician from Riga. You teach chess with the energy and passion that made you a World Champion. Your style is direct, engaging, and enthusiastic-you see the beauty in tactics and the power in creative play.
+            # Get enhanced system prompt with chess teaching methodology and Tal's authentic style
+            base_system_prompt = """You are Mikhail Tal, the Magician from Riga. You teach chess with the energy and passion that made you a World Champion. Your style is direct, engaging, and enthusiastic-you see the beauty in tactics and the power in creative play.
 
 **YOUR AUTHENTIC VOICE:**
 - Be energetic and direct-show genuine excitement about chess
@@ -555,53 +540,36 @@ Write clear, educational comments that teach chess concepts."""
 
 Never start comments with 'Ah,' 'Oh,' or similar interjections-begin directly with your commentary. Write with the energy and insight that made you the Magician from Riga."""
 
-                if self.knowledge_retriever:
-                    system_prompt = self.knowledge_retriever.get_enhanced_system_prompt(
-                        player_elo=player_elo,
-                        base_prompt=base_system_prompt
-                    )
-                else:
-                    system_prompt = base_system_prompt
-
-                # Use async API call
-                comment = await self._call_api_async(prompt, system_prompt)
-
-                if comment:
-                    # Get capture info for validation
-                    board_before = move_analysis.get('board_before')
-                    is_capture = False
-                    captured_piece_name = None
-                    if board_before and move:
-                        captured_piece = board_before.piece_at(move.to_square)
-                        if captured_piece:
-                            is_capture = True
-                            piece_names = {
-                                chess.PAWN: "pawn",
-                                chess.KNIGHT: "knight",
-                                chess.BISHOP: "bishop",
-                                chess.ROOK: "rook",
-                                chess.QUEEN: "queen",
-                                chess.KING: "king"
-                            }
-                            piece_name = piece_names.get(captured_piece.piece_type, "piece")
-                            color = "white" if captured_piece.color == chess.WHITE else "black"
-                            captured_piece_name = f"{color} {piece_name}"
-
-                    move_san = move_analysis.get('move_san', '')
-                    player_color = move_analysis.get('player_color', 'white')
-                    # Clean, ensure grammar consistency, and validate comment
-                    comment = self._clean_comment(comment, is_user_move, player_color)
-                    comment = self._ensure_grammar_consistency(comment)
-                    comment = self._validate_comment(comment, move_san, is_capture, is_user_move, captured_piece_name)
-                    print(f"[AI] Generated comment ({len(comment)} chars): {comment[:100]}...")
-
-                    # Cache the comment
-                    if hasattr(self._comment_cache, 'set'):
-                        self._comment_cache.set(cache_key, comment)
-                    elif isinstance(self._comment_cache, dict):
-                        self._comment_cache[cache_key] = comment
+            if self.knowledge_retriever:
+                system_prompt = self.knowledge_retriever.get_enhanced_system_prompt(
+                    player_elo=player_elo,
+                    base_prompt=base_system_prompt
+                )
+            else:
+                system_prompt = base_system_prompt
 
-                    return comment
+            # Wait for the provider's shared scheduler (rate, concurrency, priority)
+            print(f"[AI] Calling {self.provider} API (async) with model {self.config.ai_model}")
+            context = self._comment_context(move_analysis, move, is_user_move)
+            comment = await self._scheduler.call_async(
+                lambda: self._call_api_async(prompt, system_prompt),
+                priority=Priority.BATCH,
+                key=cache_key,
+                timeout=LLM_QUEUE_TIMEOUT,
+                retry=("comment", self._retry_payload(cache_key, prompt, system_prompt, context))
+            )
+
+            if comment:
+                comment = self._finish_comment(comment, context)
+                print(f"[AI] Generated comment ({len(comment)} chars): {comment[:100]}...")
+
+                # Cache the comment
+                if hasattr(self._comment_cache, 'set'):
+                    self._comment_cache.set(cache_key, comment)
+                elif isinstance(self._comment_cache, dict):
+                    self._comment_cache[cache_key] = comment
+
+                return comment
 
             print("[AI] Response had no content")
             return None
@@ -659,7 +627,7 @@ Never start comments with 'Ah,' 'Oh,' or similar interjections-begin directly wi
                 }
 
                 response = await async_client.post(
-                    "https://api.anthropic.com/v1/messages",
+                    f"{ANTHROPIC_BASE_URL}/v1/messages",
                     headers=headers,
                     json=payload
                 )
@@ -670,13 +638,18 @@ Never start comments with 'Ah,' 'Oh,' or similar interjections-begin directly wi
                         return data["content"][0].get("text", "")
                 elif response.status_code == 429:
                     print(f"[AI] Rate limit exceeded (429), skipping AI comment")
+                    self._scheduler.throttled(parse_retry_after(response.headers.get("retry-after")))
                     return None
                 else:
                     print(f"[AI] API call failed with status {response.status_code}: {response.text}")
+                    if response.status_code >= 500:
+                        mark_transient_failure()
                     return None
 
         except Exception as e:
             print(f"[AI] Error in async Anthropic API call: {e}")
+            if _is_transient_error(e):
+                mark_transient_failure()
             return None
 
     async def _call_gemini_api_async(self, prompt: str, system: str) -> Optional[str]:
@@ -713,8 +686,10 @@ Never start comments with 'Ah,' 'Oh,' or similar interjections-begin directly wi
             # Handle Gemini-specific errors
             if "429" in error_msg or "rate_limit" in error_msg.lower() or "quota" in error_msg.lower():
                 print(f"[AI] Rate limit/quota exceeded for Gemini. Skipping AI comment.")
-            elif "timeout" in error_msg.lower() or "timed out" in error_msg.lower():
-                print(f"[AI] API call timeout for Gemini. Skipping to prevent blocking.")
+                self._scheduler.throttled()
+            elif _is_transient_error(e):
+                print(f"[AI] Transient Gemini error. Skipping to prevent blocking.")
+                mark_transient_failure()
 
             return None
 
@@ -741,21 +716,14 @@ Never start comments with 'Ah,' 'Oh,' or similar interjections-begin directly wi
         print(f"[AI CHAT] Generating response via {self.provider}...")
 
         try:
-            # Apply rate limiting
-            if self._async_rate_limiter:
-                acquired = await self._async_rate_limiter.wait_for_token(timeout=10.0)
-                if not acquired:
-                    print("[AI CHAT] Rate limit: could not acquire token")
-                    return None
-
+            # A user is waiting: admitted ahead of queued batch comments.
             # For chat, use a dedicated Gemini call that handles system_instruction
             # via model instantiation (some SDK versions don't support it per-call)
-            result = None
-            if self._api_semaphore:
-                async with self._api_semaphore:
-                    result = await self._call_chat_api_async(prompt, system_prompt)
-            else:
-                result = await self._call_chat_api_async(prompt, system_prompt)
+            result = await self._scheduler.call_async(
+                lambda: self._call_chat_api_async(prompt, system_prompt),
+                priority=Priority.INTERACTIVE,
+                timeout=CHAT_QUEUE_TIMEOUT
+            )
 
             if result:
                 print(f"[AI CHAT] Got response ({len(result)} chars)")
@@ -1197,17 +1165,27 @@ Never start comments with 'Ah,' 'Oh,' or similar interjections-begin directly wi
         prompt: str,
         system: str,
         max_tokens: int = None,
-        temperature: float = None
+        temperature: float = None,
+        priority: Priority = Priority.BATCH,
+        key: Optional[str] = None,
+        retry: Optional[tuple] = None,
+        timeout: float = LLM_QUEUE_TIMEOUT
     ) -> Optional[str]:
         """
         Call AI API with automatic fallback (provider-specific).
-        Includes rate limiting to prevent overwhelming the API.
+        Waits for the provider's shared LLM scheduler, so concurrent games and
+        chat stay within the provider's rate limits together.
 
         Args:
             prompt: The user prompt
             system: The system prompt
             max_tokens: Maximum tokens (defaults to config value)
             temperature: Temperature (defaults to config value)
+            priority: Scheduler priority (batch comments by default)
+            key: Coalescing key (defaults to a hash of the request)
+            retry: (kind, payload) to queue for a later replay if the call is
+                throttled or fails
+            timeout: Seconds to wait for a scheduler slot
 
         Returns:
             Generated text or None if all attempts failed
@@ -1215,25 +1193,100 @@ Never start comments with 'Ah,' 'Oh,' or similar interjections-begin directly wi
         if not self.enabled or not self.client:
             return None
 
-        # Rate limiting: ensure we don't make API calls too fast
-        with self._rate_limit_lock:
-            current_time = time.time()
-            time_since_last_call = current_time - self._last_api_call_time
-            if time_since_last_call < self._rate_limit_delay:
-                sleep_time = self._rate_limit_delay - time_since_last_call
-                print(f"[AI] Rate limiting: waiting {sleep_time:.2f}s before API call")
-                time.sleep(sleep_time)
-            self._last_api_call_time = time.time()
-
         max_tokens = max_tokens or self.config.max_tokens
         temperature = temperature if temperature is not None else self.config.temperature
+        if key is None:
+            request = f"{self.provider}|{max_tokens}|{temperature}|{system}|{prompt}"
+            key = f"ai_request:{hashlib.md5(request.encode()).hexdigest()}"
+
+        return self._scheduler.call(
+            lambda: self._call_provider(prompt, system, max_tokens, temperature),
+            priority=priority,
+            key=key,
+            timeout=timeout,
+            retry=retry
+        )
 
-        # Route to provider-specific implementation
+    def _call_provider(self, prompt: str, system: str, max_tokens: int, temperature: float) -> Optional[str]:
+        """Call the configured provider directly (the caller holds a scheduler slot)."""
         if self.provider == AIProvider.GEMINI.value:
             return self._call_gemini_api(prompt, system, max_tokens, temperature)
         else:
             return self._call_anthropic_api(prompt, system, max_tokens, temperature)
 
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        """Retry-After of a provider SDK's 429 error, if it carries the response."""
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None)
+        return parse_retry_after(headers.get('retry-after')) if headers is not None else None
+
+    def _comment_context(self, move_analysis: Dict[str, Any], move: chess.Move, is_user_move: bool) -> Dict[str, Any]:
+        """Move facts used to clean and validate a generated comment (JSON-serializable)."""
+        # Get capture info for validation
+        board_before = move_analysis.get('board_before')
+        is_capture = False
+        captured_piece_name = None
+        if board_before and move:
+            captured_piece = board_before.piece_at(move.to_square)
+            if captured_piece:
+                is_capture = True
+                piece_names = {
+                    chess.PAWN: "pawn",
+                    chess.KNIGHT: "knight",
+                    chess.BISHOP: "bishop",
+                    chess.ROOK: "rook",
+                    chess.QUEEN: "queen",
+                    chess.KING: "king"
+                }
+                piece_name = piece_names.get(captured_piece.piece_type, "piece")
+                color = "white" if captured_piece.color == chess.WHITE else "black"
+                captured_piece_name = f"{color} {piece_name}"
+
+        return {
+            'move_san': move_analysis.get('move_san', ''),
+            'player_color': move_analysis.get('player_color', 'white'),
+            'is_user_move': is_user_move,
+            'is_capture': is_capture,
+            'captured_piece_name': captured_piece_name,
+        }
+
+    def _finish_comment(self, comment: str, context: Dict[str, Any]) -> str:
+        """Clean, ensure grammar consistency, and validate a raw comment."""
+        comment = self._clean_comment(comment, context['is_user_move'], context['player_color'])
+        comment = self._ensure_grammar_consistency(comment)
+        return self._validate_comment(comment, context['move_san'], context['is_capture'],
+                                      context['is_user_move'], context['captured_piece_name'])
+
+    def _retry_payload(self, cache_key: str, prompt: str, system: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'provider': self.provider,
+            'cache_key': cache_key,
+            'prompt': prompt,
+            'system': system,
+            'max_tokens': self.config.max_tokens,
+            'temperature': self.config.temperature,
+            'context': context,
+        }
+
+    def _retry_comment(self, payload: Dict[str, Any]) -> bool:
+        """Replay a queued move comment and store it in the comment cache."""
+        if not self.enabled or not self.client:
+            return False
+        if payload.get('provider', self.provider) != self.provider:
+            print(f"[AI] Cannot replay a {payload['provider']} comment with the {self.provider} client")
+            return False
+        comment = self._call_provider(payload['prompt'], payload['system'], payload['max_tokens'], payload['temperature'])
+        if not comment:
+            return False
+        comment = self._finish_comment(comment, payload['context'])
+        if hasattr(self._comment_cache, 'set'):
+            self._comment_cache.set(payload['cache_key'], comment)
+        elif isinstance(self._comment_cache, dict):
+            self._comment_cache[payload['cache_key']] = comment
+        print(f"[AI] Retried comment cached ({len(comment)} chars) for {payload['context'].get('move_san', 'unknown')}")
+        return True
+
     def _call_gemini_api(
         self,
         prompt: str,
@@ -1281,8 +1334,10 @@ Never start comments with 'Ah,' 'Oh,' or similar interjections-begin directly wi
             # Handle Gemini-specific errors
             if "429" in error_msg or "rate_limit" in error_msg.lower() or "quota" in error_msg.lower():
                 print(f"[AI] Rate limit/quota exceeded for Gemini. Skipping AI comment.")
-            elif "timeout" in error_msg.lower() or "timed out" in error_msg.lower():
-                print(f"[AI] API call timeout for Gemini. Skipping to prevent blocking.")
+                self._scheduler.throttled()
+            elif _is_transient_error(e):
+                print(f"[AI] Transient Gemini error. Skipping to prevent blocking.")
+                mark_transient_failure()
             else:
                 print(f"[AI] Please check your Gemini API key and account status.")
 
@@ -1392,6 +1447,7 @@ Never start comments with 'Ah,' 'Oh,' or similar interjections-begin directly wi
                 if "timeout" in error_msg.lower() or "timed out" in error_msg.lower():
                     print(f"[AI] ⚠️  API call timeout ({self.config.api_timeout}s) for model {model}. Skipping to prevent blocking analysis.")
                     print(f"[AI] 💡 This is expected if API is slow. Analysis will continue with template comments.")
+                    mark_transient_failure()
                     # Don't try other models if we're timing out - likely API issue
                     break
 
@@ -1406,11 +1462,14 @@ Never start comments with 'Ah,' 'Oh,' or similar interjections-begin directly wi
                     # Rate limit error - fail fast to prevent blocking
                     print(f"[AI] ⚠️  Rate limit exceeded (429) for model {model}. Skipping AI comment to prevent blocking analysis.")
                     print(f"[AI] 💡 Analysis will continue with template comments. This is expected when analyzing many games.")
+                    self._scheduler.throttled(self._retry_after(e))
                     # Don't try other models if we're rate limited - likely too many concurrent requests
                     break
                 else:
                     # For other errors, log but continue trying
                     print(f"[AI]   Model {model} failed with error: {error_msg}")
+                    if _is_transient_error(e):
+                        mark_transient_failure()
                     continue
 
         # All models failed
@@ -2099,12 +2158,16 @@ RULES:
 
 Focus on teaching chess concepts and helping players understand their playing style."""
 
-            # Use longer max_tokens for style analysis (more comprehensive content)
+            # Use longer max_tokens for style analysis (more comprehensive content).
+            # A user is waiting for the profile: admitted ahead of queued batch
+            # comments, and falls back to templates rather than wait long.
             result = self._call_api_with_fallback(
                 prompt=prompt,
                 system=system_prompt,
                 max_tokens=800,  # More tokens for comprehensive analysis
-                temperature=0.7  # Slightly lower for more consistent, analytical output
+                temperature=0.7,  # Slightly lower for more consistent, analytical output
+                priority=Priority.INTERACTIVE,
+                timeout=CHAT_QUEUE_TIMEOUT
             )
 
             if result:
@@ -2269,3 +2332,23 @@ Do not include any text outside the JSON. Start directly with {{."""
             'playing_patterns': "See style summary for details.",
             'improvement_focus': "See style summary for details."
         }
+
+
+# Generator that replays queued comments; created on the first replay, so
+# comments queued before a restart are replayed even if nothing else in this
+# process has built a generator yet
+_replay_generator = None
+_replay_generator_lock = threading.Lock()
+
+
+def _replay_queued_comment(payload: Dict[str, Any]) -> bool:
+    """Retry handler for queued move comments (registered once per process)."""
+    global _replay_generator
+    if _replay_generator is None:
+        with _replay_generator_lock:
+            if _replay_generator is None:
+                _replay_generator = AIChessCommentGenerator()
+    return _replay_generator._retry_comment(payload)
+
+
+register_retry_handler("comment", _replay_queued_comment)
@@ -1,13 +1,20 @@
 """
-AI Comment Service - Parallel Batch Processing
+AI Comment Service - Background Comment Generation
 
-This module handles async generation of AI comments in parallel batches
-to restore AI coaching comments without blocking analysis speed.
+This module handles async generation of AI comments to restore AI coaching
+comments without blocking analysis speed.
+
+All games share one bounded worker pool (AI_COMMENTS_MAX_WORKERS threads) and
+one coaching generator. The LLM calls inside are paced by the provider's
+process-wide scheduler (core/llm_scheduler.py), so comments are generated as
+fast as the provider allows, behind interactive coach chat.
 """
 
 import asyncio
 import os
-from typing import List, Dict, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
 from dataclasses import dataclass
 
 from .coaching_comment_generator import ChessCoachingGenerator, GamePhase
@@ -20,8 +27,7 @@ class CommentGenerationConfig:
     """Configuration for AI comment generation."""
     enabled: bool = True
     selective: bool = True  # Only significant moves (blunders, mistakes, brilliant, inaccuracies)
-    batch_size: int = 8  # Parallel batch size
-    rate_limit_delay: float = 2.0  # Seconds between batches
+    batch_size: int = 8  # Max moves of one game in flight (keeps the shared pool fair across games)
     max_retries: int = 2  # Max retries for failed comments
 
     @classmethod
@@ -31,11 +37,41 @@ class CommentGenerationConfig:
             enabled=os.getenv('AI_COMMENTS_ENABLED', 'true').lower() == 'true',
             selective=os.getenv('AI_COMMENTS_SELECTIVE', 'true').lower() == 'true',
             batch_size=int(os.getenv('AI_COMMENTS_BATCH_SIZE', '8')),
-            rate_limit_delay=float(os.getenv('AI_COMMENTS_RATE_LIMIT', '2.0')),
             max_retries=int(os.getenv('AI_COMMENTS_MAX_RETRIES', '2'))
         )
 
 
+# Threads generating comments for all games; LLM waits happen here rather than
+# in the event loop's default executor
+AI_COMMENTS_MAX_WORKERS = int(os.getenv('AI_COMMENTS_MAX_WORKERS', '16'))
+
+_comment_executor: Optional[ThreadPoolExecutor] = None
+_coaching_generator: Optional[ChessCoachingGenerator] = None
+_service_lock = threading.Lock()
+
+
+def _get_comment_executor() -> ThreadPoolExecutor:
+    """Get the process-wide comment worker pool (created on first use)."""
+    global _comment_executor
+    if _comment_executor is None:
+        with _service_lock:
+            if _comment_executor is None:
+                _comment_executor = ThreadPoolExecutor(
+                    max_workers=AI_COMMENTS_MAX_WORKERS, thread_name_prefix="ai-comments"
+                )
+    return _comment_executor
+
+
+def _get_coaching_generator() -> ChessCoachingGenerator:
+    """Get the coaching generator shared by all games (created on first use)."""
+    global _coaching_generator
+    if _coaching_generator is None:
+        with _service_lock:
+            if _coaching_generator is None:
+                _coaching_generator = ChessCoachingGenerator()
+    return _coaching_generator
+
+
 def _should_generate_ai_comment(move_analysis: MoveAnalysis, config: CommentGenerationConfig) -> bool:
     """
     Determine if AI comment should be generated for this move.
@@ -78,14 +114,21 @@ def _should_generate_ai_comment(move_analysis: MoveAnalysis, config: CommentGene
 
 async def generate_comments_parallel(
     game_analysis: GameAnalysis,
-    config: Optional[CommentGenerationConfig] = None
+    config: Optional[CommentGenerationConfig] = None,
+    comment_callback: Optional[Callable[[MoveAnalysis], None]] = None
 ) -> GameAnalysis:
     """
-    Generate AI comments in parallel batches for a game analysis.
+    Generate AI comments for a game analysis.
+
+    Moves are submitted to the shared comment pool as soon as one of the
+    game's batch_size slots is free; each move's comment is applied (and
+    streamed through comment_callback) as soon as it is ready.
 
     Args:
         game_analysis: The game analysis with moves to generate comments for
         config: Configuration for comment generation (defaults to env-based)
+        comment_callback: Optional callable invoked with each move as soon as its
+            comment is generated (used to stream comments to the client)
 
     Returns:
         Updated game_analysis with AI comments populated
@@ -100,8 +143,9 @@ async def generate_comments_parallel(
         return game_analysis
 
     print(f"[AI_COMMENTS] ✅ AI comments enabled, initializing generator...")
-    # Initialize coaching generator (includes AI comment generator)
-    generator = ChessCoachingGenerator()
+    # Shared coaching generator (includes AI comment generator); created off the event loop
+    loop = asyncio.get_running_loop()
+    generator = await loop.run_in_executor(_get_comment_executor(), _get_coaching_generator)
 
     if not generator.ai_generator:
         print("[AI_COMMENTS] ❌ AI generator not initialized (None)")
@@ -127,36 +171,25 @@ async def generate_comments_parallel(
 
     print(f"[AI_COMMENTS] Generating AI comments for {len(moves_to_comment)} moves (out of {len(game_analysis.moves_analysis)} total)")
 
-    # Process in parallel batches
-    total_batches = (len(moves_to_comment) + config.batch_size - 1) // config.batch_size
-
-    for batch_idx in range(0, len(moves_to_comment), config.batch_size):
-        batch = moves_to_comment[batch_idx:batch_idx + config.batch_size]
-        batch_num = (batch_idx // config.batch_size) + 1
-
-        print(f"[AI_COMMENTS] Processing batch {batch_num}/{total_batches} ({len(batch)} moves)")
-
-        # Generate comments in parallel for this batch
-        tasks = []
-        for move in batch:
-            task = _generate_single_comment(generator, move, game_analysis, config)
-            tasks.append(task)
+    # Bound this game's share of the pool; the scheduler bounds the provider calls
+    slots = asyncio.Semaphore(max(1, config.batch_size))
 
-        # Wait for all comments in batch to complete
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Process results and update moves
-        for move, result in zip(batch, results):
-            if isinstance(result, Exception):
-                print(f"[AI_COMMENTS] Error generating comment for move {move.move_san}: {result}")
+    async def comment_move(move: MoveAnalysis) -> None:
+        async with slots:
+            try:
+                await _generate_single_comment(generator, move, game_analysis, config)
+            except Exception as e:
+                print(f"[AI_COMMENTS] Error generating comment for move {move.move_san}: {e}")
                 # Keep empty comment fields on error
-            else:
-                # Result is already applied to move object (passed by reference)
-                pass
+                return
+        if comment_callback:
+            # Result is already applied to move object (passed by reference)
+            try:
+                comment_callback(move)
+            except Exception as e:
+                print(f"[AI_COMMENTS] Warning: comment callback failed for move {move.move_san}: {e}")
 
-        # Rate limit: Wait between batches (except last batch)
-        if batch_idx + config.batch_size < len(moves_to_comment):
-            await asyncio.sleep(config.rate_limit_delay)
+    await asyncio.gather(*(comment_move(move) for move in moves_to_comment))
 
     print(f"[AI_COMMENTS] ✅ Completed generating AI comments for {len(moves_to_comment)} moves")
     return game_analysis
@@ -248,10 +281,10 @@ async def _generate_single_comment(
         player_skill_level = "intermediate"  # Could be extracted from game_analysis if available
         is_user_move = move.is_user_move
 
-        # Generate coaching comment (run in thread pool since it's synchronous)
-        loop = asyncio.get_event_loop()
+        # Generate coaching comment (run in the shared comment pool since it's synchronous)
+        loop = asyncio.get_running_loop()
         coaching_result = await loop.run_in_executor(
-            None,
+            _get_comment_executor(),
             lambda: generator.generate_coaching_comment(
                 move_data,
                 board,
@@ -8,23 +8,40 @@ Supports Stockfish engine analysis with heuristic fallbacks.
 import os
 import sys
 import asyncio
+import contextvars
 import json
 import math
 import threading
+import time
 import logging
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Set, Tuple, Union
-from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
+from dataclasses import dataclass, field, fields as dataclass_fields
 from enum import Enum
 from contextlib import contextmanager
+from collections import deque
 import chess
 import chess.pgn
 import chess.engine
 import io
 from .coaching_comment_generator import ChessCoachingGenerator, GamePhase
 from .cache_manager import LRUCache, register_cache
+from .admission_controller import AdmissionLimits, get_admission_controller
+from .heuristic_evaluator import PIECE_VALUES, evaluate_board, evaluate_boards
+from .hot_path_logger import get_hot_logger
+from .stage_timing import count_stage, game_timing, record_stage, stage_span, timed_stage
+from .metrics_registry import get_metrics_registry
 
 logger = logging.getLogger(__name__)
+hot_log = get_hot_logger()
+
+_metrics = get_metrics_registry()
+_acquire_wait = _metrics.histogram(
+    "engine_pool_acquire_wait_seconds", "Time spent acquiring a pooled Stockfish engine", ["pool"]
+)
+_acquire_timeouts = _metrics.counter(
+    "engine_pool_acquire_timeouts_total", "Engine acquisitions that timed out", ["pool"]
+)
 
 # Try to import stockfish package, fall back to engine if not available
 try:
@@ -34,16 +51,6 @@ except ImportError:
     STOCKFISH_PACKAGE_AVAILABLE = False
     print("Warning: stockfish package not available, using chess.engine only")
 
-# Heuristic evaluation constants for fallback analysis
-PIECE_VALUES = {
-    'P': 100,
-    'N': 320,
-    'B': 330,
-    'R': 500,
-    'Q': 900,
-    'K': 0
-}
-
 
 class SyncEnginePool:
     """
@@ -55,9 +62,10 @@ class SyncEnginePool:
 
     For async FastAPI endpoint handlers, use StockfishEnginePool from engine_pool.py.
     """
-    def __init__(self, stockfish_path: str, max_size: int = 8, config: Optional[dict] = None):
+    def __init__(self, stockfish_path: str, max_size: int = 8, config: Optional[dict] = None, name: str = "sync"):
         self.stockfish_path = stockfish_path
         self.max_size = max_size
+        self.name = name
         self.config = config or {
             'Skill Level': 20,
             'UCI_LimitStrength': False,
@@ -67,11 +75,13 @@ class SyncEnginePool:
         self._pool: List[chess.engine.SimpleEngine] = []
         self._lock = threading.Lock()
         self._in_use: Set[chess.engine.SimpleEngine] = set()
+        self._engine_hash: Dict[chess.engine.SimpleEngine, Any] = {}
 
     @contextmanager
     def acquire(self):
         """Acquire an engine from the pool (synchronous context manager)."""
         engine = None
+        acquire_started = time.perf_counter()
         with self._lock:
             # Try to get an available engine
             for e in self._pool:
@@ -87,6 +97,7 @@ class SyncEnginePool:
                     engine.configure(self.config)
                     self._pool.append(engine)
                     self._in_use.add(engine)
+                    self._engine_hash[engine] = self.config.get('Hash')
                 except Exception as e:
                     print(f"⚠️  Failed to create engine: {e}")
                     raise
@@ -94,7 +105,6 @@ class SyncEnginePool:
         # Wait for available engine if at capacity
         if engine is None:
             # Simple wait loop - in practice, with 8 engines this should rarely happen
-            import time
             for _ in range(100):  # Wait up to 10 seconds
                 time.sleep(0.1)
                 with self._lock:
@@ -107,13 +117,72 @@ class SyncEnginePool:
                         break
 
             if engine is None:
+                _acquire_timeouts.labels(pool=self.name).inc()
                 raise RuntimeError("Could not acquire engine from pool (timeout)")
 
+        _acquire_wait.labels(pool=self.name).observe(time.perf_counter() - acquire_started)
         try:
             yield engine
         finally:
             with self._lock:
                 self._in_use.discard(engine)
+                # Apply any resize that happened while this engine was busy
+                if len(self._pool) > self.max_size:
+                    self._retire_engine(engine)
+                else:
+                    self._apply_hash(engine)
+
+    def _retire_engine(self, engine: chess.engine.SimpleEngine) -> None:
+        """Quit an idle engine and drop it from the pool. Caller holds the lock."""
+        try:
+            engine.quit()
+        except Exception:
+            pass
+        if engine in self._pool:
+            self._pool.remove(engine)
+        self._engine_hash.pop(engine, None)
+
+    def _apply_hash(self, engine: chess.engine.SimpleEngine) -> None:
+        """Reconfigure an idle engine whose hash size is stale. Caller holds the lock."""
+        target = self.config.get('Hash')
+        if target is None or self._engine_hash.get(engine) == target:
+            return
+        try:
+            engine.configure({'Hash': target})
+            self._engine_hash[engine] = target
+        except Exception as e:
+            print(f"⚠️  Failed to resize engine hash: {e}")
+            self._retire_engine(engine)
+
+    def resize(self, max_size: int, hash_mb: Optional[int] = None) -> None:
+        """
+        Adjust pool capacity and per-engine hash size at runtime.
+
+        Idle engines are trimmed or reconfigured immediately; busy engines are
+        handled when they are released back to the pool.
+        """
+        with self._lock:
+            self.max_size = max(1, int(max_size))
+            if hash_mb is not None:
+                self.config = {**self.config, 'Hash': int(hash_mb)}
+
+            idle = [e for e in self._pool if e not in self._in_use]
+            excess = len(self._pool) - self.max_size
+            for engine in idle[:max(0, excess)]:
+                self._retire_engine(engine)
+            for engine in self._pool:
+                if engine not in self._in_use:
+                    self._apply_hash(engine)
+
+    def stats(self) -> dict:
+        """Get pool statistics."""
+        with self._lock:
+            return {
+                "pool_size": len(self._pool),
+                "max_size": self.max_size,
+                "in_use": len(self._in_use),
+                "hash_mb": self.config.get('Hash')
+            }
 
     def close_all(self):
         """Close all engines in the pool."""
@@ -125,6 +194,55 @@ class SyncEnginePool:
                     pass
             self._pool.clear()
             self._in_use.clear()
+            self._engine_hash.clear()
+
+
+class ProbeBudget:
+    """
+    Rolling-window budget for the short Stockfish probes of basic analysis.
+
+    Allows up to `limit` probes per `window` seconds, scaled down by the
+    admission controller under memory pressure. Cached positions never consume
+    budget, and a request for several positions is granted all-or-nothing
+    (a move needs both its before and after evaluation).
+    """
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._lock = threading.Lock()
+        self._timestamps: deque = deque()
+        self._granted = 0
+        self._denied = 0
+
+    def _trim(self, now: float) -> None:
+        """Drop probes that left the window. Caller holds the lock."""
+        while self._timestamps and now - self._timestamps[0] >= self.window:
+            self._timestamps.popleft()
+
+    def try_acquire(self, count: int = 1) -> bool:
+        """Reserve budget for count probes; False if the window is exhausted."""
+        limit = get_admission_controller().scale(self.limit)
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            if len(self._timestamps) + count > limit:
+                self._denied += count
+                return False
+            self._timestamps.extend([now] * count)
+            self._granted += count
+            return True
+
+    def stats(self) -> dict:
+        """Get budget statistics."""
+        with self._lock:
+            self._trim(time.monotonic())
+            return {
+                "limit": self.limit,
+                "window_seconds": self.window,
+                "used": len(self._timestamps),
+                "granted": self._granted,
+                "denied": self._denied
+            }
 
 
 def get_rating_adjusted_brilliant_threshold(player_rating: Optional[int] = None) -> Dict[str, float]:
@@ -194,77 +312,6 @@ def get_rating_adjusted_brilliant_threshold(player_rating: Optional[int] = None)
         }
 
 
-PIECE_SQUARE_TABLES = {
-    'P': [
-         0,   0,   0,   0,   0,   0,   0,   0,
-         5,  10,  10, -20, -20,  10,  10,   5,
-         5,  -5, -10,   0,   0, -10,  -5,   5,
-         0,   0,   0,  20,  20,   0,   0,   0,
-         5,   5,  10,  25,  25,  10,   5,   5,
-        10,  10,  20,  30,  30,  20,  10,  10,
-        50,  50,  50,  55,  55,  50,  50,  50,
-         0,   0,   0,   0,   0,   0,   0,   0
-    ],
-    'N': [
-       -50, -40, -30, -30, -30, -30, -40, -50,
-       -40, -20,   0,   5,   5,   0, -20, -40,
-       -30,   5,  10,  15,  15,  10,   5, -30,
-       -30,   0,  15,  20,  20,  15,   0, -30,
-       -30,   5,  15,  20,  20,  15,   5, -30,
-       -30,   0,  10,  15,  15,  10,   0, -30,
-       -40, -20,   0,   0,   0,   0, -20, -40,
-       -50, -40, -30, -30, -30, -30, -40, -50
-    ],
-    'B': [
-       -20, -10, -10, -10, -10, -10, -10, -20,
-       -10,   5,   0,   0,   0,   0,   5, -10,
-       -10,  10,  10,  10,  10,  10,  10, -10,
-       -10,   0,  10,  10,  10,  10,   0, -10,
-       -10,   5,   5,  10,  10,   5,   5, -10,
-       -10,   0,   5,  10,  10,   5,   0, -10,
-       -10,   0,   0,   0,   0,   0,   0, -10,
-       -20, -10, -10, -10, -10, -10, -10, -20
-    ],
-    'R': [
-         0,   0,   0,   5,   5,   0,   0,   0,
-        -5,   0,   0,   0,   0,   0,   0,  -5,
-        -5,   0,   0,   0,   0,   0,   0,  -5,
-        -5,   0,   0,   0,   0,   0,   0,  -5,
-        -5,   0,   0,   0,   0,   0,   0,  -5,
-        -5,   0,   0,   0,   0,   0,   0,  -5,
-         5,  10,  10,  10,  10,  10,  10,   5,
-         0,   0,   0,   5,   5,   0,   0,   0
-    ],
-    'Q': [
-       -20, -10, -10,  -5,  -5, -10, -10, -20,
-       -10,   0,   0,   0,   0,   5,   0, -10,
-       -10,   0,   5,   5,   5,   5,   5, -10,
-        -5,   0,   5,   5,   5,   5,   0,  -5,
-         0,   0,   5,   5,   5,   5,   0,  -5,
-       -10,   5,   5,   5,   5,   5,   0, -10,
-       -10,   0,   5,   0,   0,   0,   0, -10,
-       -20, -10, -10,  -5,  -5, -10, -10, -20
-    ],
-    'K': [
-       -30, -40, -40, -50, -50, -40, -40, -30,
-       -30, -40, -40, -50, -50, -40, -40, -30,
-       -30, -40, -40, -50, -50, -40, -40, -30,
-       -30, -40, -40, -50, -50, -40, -40, -30,
-       -20, -30, -30, -40, -40, -30, -30, -20,
-       -10, -20, -20, -20, -20, -20, -20, -10,
-        20,  20,   0,   0,   0,   0,  20,  20,
-        20,  30,  10,   0,   0,  10,  30,  20
-    ]
-}
-
-MOBILITY_WEIGHT = 5
-KING_SAFETY_SHIELD_WEIGHT = 10
-KING_SAFETY_ATTACK_WEIGHT = 18
-KING_OPEN_FILE_PENALTY = 15
-KING_RING_ATTACK_PENALTY = 12
-PASSED_PAWN_BONUS = [0, 10, 20, 35, 60, 100, 160, 0]
-HANGING_PIECE_VALUE_MULTIPLIER = 0.6
-HANGING_PIECE_MIN_PENALTY = 40
 BASIC_MOVE_CANDIDATE_LIMIT = 5
 # Simplified Chess.com-aligned move classification thresholds
 # Merged categories for cleaner user experience:
@@ -278,9 +325,12 @@ BASIC_BLUNDER_THRESHOLD = 400  # Blunders (400+cp loss) - Chess.com standard
 SEE_MATERIAL_LOSS_TRIGGER = -40
 KING_SAFETY_DROP_TRIGGER = 25
 MOBILITY_DROP_TRIGGER = -2
-BASIC_ENGINE_PROBE_LIMIT = 12
+BASIC_ENGINE_PROBE_LIMIT = 12  # Probes allowed per BASIC_ENGINE_PROBE_WINDOW
+BASIC_ENGINE_PROBE_WINDOW = 10.0  # Seconds
 BASIC_ENGINE_PROBE_TIME = 0.08
 BASIC_ENGINE_PROBE_MULTIPV = 2
+BASIC_ENGINE_PROBE_POOL_SIZE = 2
+BASIC_ENGINE_PROBE_HASH_MB = 16  # Probes last 80ms; a big hash table only costs memory
 
 class AnalysisType(Enum):
     """Types of analysis available."""
@@ -305,6 +355,11 @@ class AnalysisConfig:
     use_endgame_tablebase: bool = True
     parallel_analysis: bool = False
     max_concurrent: int = 4
+    # Store only engine facts; coaching fields are generated when the game is first viewed
+    lazy_coaching: bool = False
+    # Search every move at exactly depth/time_limit instead of adaptive depth and
+    # phase-based time (reproducible engine work, e.g. for benchmarks)
+    fixed_limits: bool = False
 
 
     @classmethod
@@ -375,6 +430,14 @@ class MoveAnalysis:
     encouragement_level: int = 3
     move_quality: str = "acceptable"
     game_phase: str = "middlegame"
+    coaching_pending: bool = False  # Coaching fields deferred (see AnalysisConfig.lazy_coaching)
+
+# Fields of MoveAnalysis produced by the coaching generator
+COACHING_FIELDS = (
+    'coaching_comment', 'what_went_right', 'what_went_wrong', 'how_to_improve',
+    'tactical_insights', 'positional_insights', 'risks', 'benefits',
+    'learning_points', 'encouragement_level', 'move_quality', 'game_phase'
+)
 
 @dataclass
 class GameAnalysis:
@@ -427,6 +490,8 @@ class GameAnalysis:
     analysis_date: datetime
     processing_time_ms: int
     stockfish_depth: int
+    # Per-stage timing breakdown (see stage_timing.GameTimings.summary)
+    stage_timings: Dict[str, Any] = field(default_factory=dict)
 
 class ChessAnalysisEngine:
     """Unified chess analysis engine supporting multiple analysis types."""
@@ -440,6 +505,7 @@ class ChessAnalysisEngine:
         if self.stockfish_path:
             self._sync_engine_pool = SyncEnginePool(
                 stockfish_path=self.stockfish_path,
+                name="analysis",
                 max_size=8,  # Match max_concurrent
                 config={
                     'Skill Level': 20,
@@ -448,6 +514,22 @@ class ChessAnalysisEngine:
                     'Hash': 96
                 }
             )
+        # Separate small-hash engines for the 80ms probes of basic analysis, so a
+        # probe never pays for a process spawn or waits behind full analyses
+        self._probe_engine_pool = None
+        if self.stockfish_path:
+            self._probe_engine_pool = SyncEnginePool(
+                stockfish_path=self.stockfish_path,
+                name="probe",
+                max_size=BASIC_ENGINE_PROBE_POOL_SIZE,
+                config={
+                    'Skill Level': 20,
+                    'Threads': 1,
+                    'Hash': BASIC_ENGINE_PROBE_HASH_MB,
+                    'UCI_AnalyseMode': True
+                }
+            )
+        self._probe_budget = ProbeBudget(BASIC_ENGINE_PROBE_LIMIT, BASIC_ENGINE_PROBE_WINDOW)
         self._opening_database = self._load_opening_database()
 
         # Use LRU caches with size limits (1000 entries each, 5-min TTL)
@@ -465,8 +547,25 @@ class ChessAnalysisEngine:
         register_cache(self._basic_probe_cache)
         register_cache(self._position_cache)
 
+        # Let memory pressure shrink caches and the engine pool (and grow them back)
+        admission = get_admission_controller()
+        admission.register_cache(self._position_cache)
+        admission.register_cache(self._basic_eval_cache)
+        admission.register_cache(self._basic_move_cache)
+        admission.register_cache(self._basic_probe_cache)
+        if self._sync_engine_pool or self._probe_engine_pool:
+            admission.register_resizer(self._apply_admission_limits)
+
         self.coaching_generator = ChessCoachingGenerator()
 
+    def _apply_admission_limits(self, limits: AdmissionLimits) -> None:
+        """Resize the engine pool and hash tables to the admission controller's limits."""
+        if self._sync_engine_pool:
+            self._sync_engine_pool.resize(limits.engine_pool_size, limits.engine_hash_mb)
+        if self._probe_engine_pool:
+            # Probe engines keep their small hash; only their count follows memory pressure
+            self._probe_engine_pool.resize(min(BASIC_ENGINE_PROBE_POOL_SIZE, limits.engine_pool_size))
+
     def _find_stockfish_path(self, custom_path: Optional[str]) -> Optional[str]:
         """Find the best available Stockfish executable.
 
@@ -513,7 +612,9 @@ class ChessAnalysisEngine:
         return {
             "eval_cache": self._basic_eval_cache.stats(),
             "move_cache": self._basic_move_cache.stats(),
-            "probe_cache": self._basic_probe_cache.stats()
+            "probe_cache": self._basic_probe_cache.stats(),
+            "probe_budget": self._probe_budget.stats(),
+            "probe_engine_pool": self._probe_engine_pool.stats() if self._probe_engine_pool else None
         }
 
     def _load_opening_database(self) -> Dict:
@@ -547,141 +648,6 @@ class ChessAnalysisEngine:
         except ValueError:
             return board.fen()
 
-    def _count_legal_moves(self, board: chess.Board, color: chess.Color) -> int:
-        '''Count legal moves for a given color without mutating the original board.'''
-        board_copy = board.copy(stack=False)
-        board_copy.turn = color
-        return sum(1 for _ in board_copy.legal_moves)
-
-    def _pawn_shield_strength(self, board: chess.Board, color: chess.Color, king_square: chess.Square) -> float:
-        '''Measure pawn shield coverage in front of the king.'''
-        direction = 1 if color == chess.WHITE else -1
-        strength = 0.0
-        king_file = chess.square_file(king_square)
-        king_rank = chess.square_rank(king_square)
-        for file_offset in (-1, 0, 1):
-            target_file = king_file + file_offset
-            if not 0 <= target_file <= 7:
-                continue
-            for distance, weight in ((1, 1.0), (2, 0.5)):
-                target_rank = king_rank + direction * distance
-                if 0 <= target_rank <= 7:
-                    sq = chess.square(target_file, target_rank)
-                    piece = board.piece_at(sq)
-                    if piece and piece.piece_type == chess.PAWN and piece.color == color:
-                        strength += weight
-        return strength
-
-    def _king_open_file_penalty(self, board: chess.Board, color: chess.Color, king_square: chess.Square) -> int:
-        '''Count semi-open files near the king as a danger indicator.'''
-        files_to_check = {chess.square_file(king_square)}
-        for offset in (-1, 1):
-            f = chess.square_file(king_square) + offset
-            if 0 <= f <= 7:
-                files_to_check.add(f)
-        pawns = board.pieces(chess.PAWN, color)
-        penalty = 0
-        for f in files_to_check:
-            if not any(chess.square_file(square) == f for square in pawns):
-                penalty += 1
-        return penalty
-
-    def _king_ring_attackers(self, board: chess.Board, color: chess.Color, king_square: chess.Square) -> int:
-        '''Count opposing attackers in the king's immediate ring.'''
-        opponent = not color
-        attackers = 0
-        for sq in chess.SQUARES:
-            if chess.square_distance(sq, king_square) != 1:
-                continue
-            attackers += len(board.attackers(opponent, sq))
-        return attackers
-
-    def _king_safety_score(self, board: chess.Board, color: chess.Color) -> int:
-        '''Aggregate king safety heuristics for a single side.'''
-        king_square = board.king(color)
-        if king_square is None:
-            return 0
-        shield = self._pawn_shield_strength(board, color, king_square)
-        direct_attackers = len(board.attackers(not color, king_square))
-        ring_attackers = self._king_ring_attackers(board, color, king_square)
-        open_files = self._king_open_file_penalty(board, color, king_square)
-        score = int(shield * KING_SAFETY_SHIELD_WEIGHT)
-        score -= direct_attackers * KING_SAFETY_ATTACK_WEIGHT
-        score -= ring_attackers * KING_RING_ATTACK_PENALTY
-        score -= open_files * KING_OPEN_FILE_PENALTY
-        return score
-
-    def _passed_pawns(self, board: chess.Board, color: chess.Color):
-        '''Identify passed pawns and compute their bonus score.'''
-        direction = 1 if color == chess.WHITE else -1
-        opponent = not color
-        pawns = board.pieces(chess.PAWN, color)
-        passed = []
-        score = 0
-        for pawn_square in pawns:
-            file_idx = chess.square_file(pawn_square)
-            rank_idx = chess.square_rank(pawn_square)
-            is_blocked = False
-            for file_offset in (-1, 0, 1):
-                target_file = file_idx + file_offset
-                if not 0 <= target_file <= 7:
-                    continue
-                r = rank_idx + direction
-                while 0 <= r <= 7:
-                    sq = chess.square(target_file, r)
-                    piece = board.piece_at(sq)
-                    if piece and piece.piece_type == chess.PAWN and piece.color == opponent:
-                        is_blocked = True
-                        break
-                    r += direction
-                if is_blocked:
-                    break
-            if is_blocked:
-                continue
-            passed.append(pawn_square)
-            if color == chess.WHITE:
-                index = max(0, min(7, rank_idx))
-            else:
-                index = max(0, min(7, 7 - rank_idx))
-            score += PASSED_PAWN_BONUS[index]
-        return passed, score
-
-    def _identify_hanging_pieces(self, board: chess.Board, color: chess.Color):
-        '''Find friendly pieces that are insufficiently defended.'''
-        opponent = not color
-        results: List[Dict[str, Any]] = []
-        for square, piece in board.piece_map().items():
-            if piece.color != color or piece.piece_type == chess.KING:
-                continue
-            attackers = board.attackers(opponent, square)
-            if not attackers:
-                continue
-            defenders = board.attackers(color, square)
-            attacker_count = len(attackers)
-            defender_count = len(defenders)
-            min_attacker_value = min(PIECE_VALUES[board.piece_at(attacker_sq).symbol().upper()] for attacker_sq in attackers)
-            min_defender_value = min(PIECE_VALUES[board.piece_at(defender_sq).symbol().upper()] for defender_sq in defenders) if defenders else None
-            piece_value = PIECE_VALUES[piece.symbol().upper()]
-            hanging = defender_count == 0 or defender_count < attacker_count or (min_defender_value is not None and min_attacker_value < min_defender_value and min_attacker_value < piece_value)
-            if not hanging:
-                continue
-            results.append({
-                'square': chess.square_name(square),
-                'piece': piece.symbol(),
-                'value': piece_value,
-                'attackers': attacker_count,
-                'defenders': defender_count
-            })
-        return results
-
-    def _hanging_penalty(self, hanging_pieces: List[Dict[str, Any]]) -> int:
-        '''Translate hanging piece list into a score penalty.'''
-        penalty = 0
-        for entry in hanging_pieces:
-            value = entry.get('value', 100)
-            penalty += max(int(value * HANGING_PIECE_VALUE_MULTIPLIER), HANGING_PIECE_MIN_PENALTY)
-        return penalty
-
     def _evaluate_board_basic(self, board: chess.Board):
         '''Heuristic evaluation with feature breakdown for fallback analysis.'''
         cache_key = self._basic_cache_key(board)
@@ -689,103 +655,69 @@ class ChessAnalysisEngine:
         if cached is not None:
             return cached
 
-        material_white = 0
-        material_black = 0
-        pst_white = 0
-        pst_black = 0
-        for square, piece in board.piece_map().items():
-            value = PIECE_VALUES[piece.symbol().upper()]
-            table = PIECE_SQUARE_TABLES[piece.symbol().upper()]
-            if piece.color == chess.WHITE:
-                material_white += value
-                pst_white += table[square]
-            else:
-                material_black += value
-                pst_black += table[chess.square_mirror(square)]
-
-        material_score = material_white - material_black
-        pst_score = pst_white - pst_black
-
-        mobility_white = self._count_legal_moves(board, chess.WHITE)
-        mobility_black = self._count_legal_moves(board, chess.BLACK)
-        mobility_score = MOBILITY_WEIGHT * (mobility_white - mobility_black)
-
-        king_safety_white = self._king_safety_score(board, chess.WHITE)
-        king_safety_black = self._king_safety_score(board, chess.BLACK)
-        king_safety_score = king_safety_white - king_safety_black
-
-        passed_white, passed_white_score = self._passed_pawns(board, chess.WHITE)
-        passed_black, passed_black_score = self._passed_pawns(board, chess.BLACK)
-        passed_score = passed_white_score - passed_black_score
-
-        hanging_white = self._identify_hanging_pieces(board, chess.WHITE)
-        hanging_black = self._identify_hanging_pieces(board, chess.BLACK)
-        hanging_penalty_white = self._hanging_penalty(hanging_white)
-        hanging_penalty_black = self._hanging_penalty(hanging_black)
-        threat_score = hanging_penalty_black - hanging_penalty_white
-
-        total_score = material_score + pst_score + mobility_score + king_safety_score + passed_score + threat_score
-
-        features = {
-            'components': {
-                'material': material_score,
-                'piece_square': pst_score,
-                'mobility': mobility_score,
-                'king_safety': king_safety_score,
-                'passed_pawns': passed_score,
-                'threats': threat_score
-            },
-            'material': {'white': material_white, 'black': material_black},
-            'piece_square': {'white': pst_white, 'black': pst_black},
-            'mobility': {'white': mobility_white, 'black': mobility_black},
-            'king_safety': {'white': king_safety_white, 'black': king_safety_black},
-            'passed_pawns': {
-                'white': {
-                    'count': len(passed_white),
-                    'score': passed_white_score,
-                    'squares': [chess.square_name(s) for s in passed_white]
-                },
-                'black': {
-                    'count': len(passed_black),
-                    'score': passed_black_score,
-                    'squares': [chess.square_name(s) for s in passed_black]
-                }
-            },
-            'hanging_pieces': {
-                'white': hanging_white,
-                'black': hanging_black
-            }
-        }
-
-        result = (total_score, features)
+        result = evaluate_board(board)
         # Use LRU cache set method
         self._basic_eval_cache.set(cache_key, result)
         return result
 
+    def _evaluate_boards_basic(self, boards: List[chess.Board]):
+        '''Heuristic evaluation of many positions; uncached ones are scored in one batch.'''
+        keys = [self._basic_cache_key(board) for board in boards]
+        results = [self._basic_eval_cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            evaluated = evaluate_boards([boards[i] for i in missing])
+            for i, result in zip(missing, evaluated):
+                results[i] = result
+                self._basic_eval_cache.set(keys[i], result)
+        return results
+
     def _basic_move_candidates(self, board: chess.Board):
         '''Score legal moves using the heuristic evaluator and cache the results.'''
-        cache_key = f"{self._basic_cache_key(board)}|moves"
-        cached = self._basic_move_cache.get(cache_key)
-        if cached is not None:
-            return cached
-        candidates = []
-        color_to_move = board.turn
-        for move in board.legal_moves:
-            san = board.san(move)
-            board.push(move)
-            score, _ = self._evaluate_board_basic(board)
-            board.pop()
-            candidates.append({
-                'move': move,
-                'uci': move.uci(),
-                'san': san,
-                'score': score
-            })
-        reverse = color_to_move == chess.WHITE
-        candidates.sort(key=lambda item: item['score'], reverse=reverse)
-        # Use LRU cache set method
-        self._basic_move_cache.set(cache_key, candidates)
-        return candidates
+        return self._basic_move_candidates_batch([board])[0]
+
+    def _basic_move_candidates_batch(self, boards: List[chess.Board]):
+        '''Score the legal moves of several positions with one batched heuristic evaluation.'''
+        results: List[Optional[List[Dict[str, Any]]]] = [None] * len(boards)
+        pending = []
+        children: List[chess.Board] = []
+        for index, board in enumerate(boards):
+            cache_key = f"{self._basic_cache_key(board)}|moves"
+            cached = self._basic_move_cache.get(cache_key)
+            if cached is not None:
+                results[index] = cached
+                continue
+            moves = []
+            for move in board.legal_moves:
+                moves.append((move, board.san(move)))
+                board.push(move)
+                children.append(board.copy(stack=False))
+                board.pop()
+            pending.append((index, cache_key, board.turn, moves))
+
+        evaluations = iter(self._evaluate_boards_basic(children))
+        for index, cache_key, color_to_move, moves in pending:
+            candidates = [
+                {
+                    'move': move,
+                    'uci': move.uci(),
+                    'san': san,
+                    'score': next(evaluations)[0]
+                }
+                for move, san in moves
+            ]
+            reverse = color_to_move == chess.WHITE
+            candidates.sort(key=lambda item: item['score'], reverse=reverse)
+            # Use LRU cache set method
+            self._basic_move_cache.set(cache_key, candidates)
+            results[index] = candidates
+        return results
+
+    def _prime_basic_analysis(self, boards: List[chess.Board]) -> None:
+        '''Score every candidate move of every position (e.g. all plies of a game) in one batch.'''
+        self._basic_move_candidates_batch(boards)
+        # Positions themselves last, so they survive in the LRU eval cache
+        self._evaluate_boards_basic(boards)
 
     async def _maybe_probe_stockfish_basic(self, board: chess.Board, move: chess.Move, color_to_move: chess.Color) -> Optional[Dict[str, Any]]:
         """Optionally refine heuristics with a lightweight Stockfish probe."""
@@ -793,28 +725,28 @@ class ChessAnalysisEngine:
             return None
 
         before_key = f"{self._basic_cache_key(board)}|sf"
-        before_eval = self._basic_probe_cache.get(before_key)
-        if before_eval is None and self._basic_probe_cache.size() < BASIC_ENGINE_PROBE_LIMIT:
-            before_eval = await asyncio.to_thread(self._run_stockfish_probe, board.fen())
-            if before_eval:
-                # Use LRU cache set method (auto-trimming handled by LRU)
-                self._basic_probe_cache.set(before_key, before_eval)
-
+        before_fen = board.fen()
         board.push(move)
         try:
             after_key = f"{self._basic_cache_key(board)}|sf"
             after_fen = board.fen()
-            after_eval = self._basic_probe_cache.get(after_key)
-            if after_eval is None and self._basic_probe_cache.size() < BASIC_ENGINE_PROBE_LIMIT:
-                after_eval = await asyncio.to_thread(self._run_stockfish_probe, after_fen)
-                if after_eval:
-                    # Use LRU cache set method (auto-trimming handled by LRU)
-                    self._basic_probe_cache.set(after_key, after_eval)
         finally:
             board.pop()
 
-        before_eval = self._basic_probe_cache.get(before_key)
-        after_eval = self._basic_probe_cache.get(after_key)
+        before_eval = self._cached_probe(before_key, before_fen)
+        after_eval = self._cached_probe(after_key, after_fen)
+
+        # Probe the missing positions together on one pooled engine, within the probe budget
+        missing = [(key, fen) for key, fen, value in ((before_key, before_fen, before_eval), (after_key, after_fen, after_eval)) if value is None]
+        if missing and self._probe_budget.try_acquire(len(missing)):
+            results = await asyncio.to_thread(self._run_stockfish_probes, [fen for _, fen in missing])
+            for (key, _), result in zip(missing, results):
+                if result:
+                    # Use LRU cache set method (auto-trimming handled by LRU)
+                    self._basic_probe_cache.set(key, result)
+            before_eval = self._basic_probe_cache.get(before_key)
+            after_eval = self._basic_probe_cache.get(after_key)
+
         refined_loss = None
         if before_eval and after_eval and before_eval.get('type') == 'cp' and after_eval.get('type') == 'cp':
             if color_to_move == chess.WHITE:
@@ -828,32 +760,62 @@ class ChessAnalysisEngine:
             'loss': refined_loss
         }
 
+    def _cached_probe(self, probe_key: str, fen: str) -> Optional[Dict[str, Any]]:
+        """Probe result from the probe cache, or from a full analysis in the position cache."""
+        cached = self._basic_probe_cache.get(probe_key)
+        if cached is not None:
+            return cached
+        # Same depth window the full analysis path accepts for its own lookups
+        depth = self.config.depth
+        for try_depth in range(depth, max(0, depth - 5), -1):
+            entry = self._position_cache.get(f"{fen}|{try_depth}")
+            if entry is not None:
+                score, best_move, pv_uci = entry
+                probe = self._probe_result(score, pv_uci or ([best_move.uci()] if best_move else []))
+                self._basic_probe_cache.set(probe_key, probe)
+                return probe
+        return None
+
+    @staticmethod
+    def _probe_result(score: chess.engine.PovScore, pv_uci: List[str]) -> Dict[str, Any]:
+        """Convert an engine score and PV into the probe result format."""
+        perspective = score.pov(chess.WHITE)
+        best_move = pv_uci[0] if pv_uci else None
+        if perspective.is_mate():
+            return {'type': 'mate', 'value': perspective.mate(), 'best_move': best_move, 'pv': pv_uci}
+        return {'type': 'cp', 'value': perspective.score(), 'best_move': best_move, 'pv': pv_uci}
+
     def _run_stockfish_probe(self, fen: str) -> Optional[Dict[str, Any]]:
         """Run a very short Stockfish evaluation for the given FEN."""
-        if not self.stockfish_path:
-            return None
+        return self._run_stockfish_probes([fen])[0]
+
+    def _run_stockfish_probes(self, fens: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Run very short Stockfish evaluations for several FENs on one pooled engine.
+
+        Results are also stored in the position cache (keyed by the depth reached)
+        so full analyses of the same positions can reuse them.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(fens)
+        if not self._probe_engine_pool:
+            return results
         try:
-            with chess.engine.SimpleEngine.popen_uci(self.stockfish_path) as engine:
-                engine.configure({
-                    'Skill Level': 20,  # Maximum strength
-                    'Threads': 1,
-                    'Hash': 96,  # Better balance for Railway Hobby tier
-                    'UCI_AnalyseMode': True
-                })
+            with self._probe_engine_pool.acquire() as engine:
                 limit = chess.engine.Limit(time=BASIC_ENGINE_PROBE_TIME)
-                info = engine.analyse(chess.Board(fen), limit, multipv=BASIC_ENGINE_PROBE_MULTIPV)
-                primary = info[0] if isinstance(info, list) else info
-                score = primary.get('score', chess.engine.PovScore(chess.engine.Cp(0), chess.WHITE))
-                perspective = score.pov(chess.WHITE)
-                pv_moves = primary.get('pv', []) or []
-                # Store complete PV line for follow-up feature (not just first 3 moves)
-                pv_uci = [mv.uci() for mv in pv_moves]
-                best_move = pv_uci[0] if pv_uci else None
-                if perspective.is_mate():
-                    return {'type': 'mate', 'value': perspective.mate(), 'best_move': best_move, 'pv': pv_uci}
-                return {'type': 'cp', 'value': perspective.score(), 'best_move': best_move, 'pv': pv_uci}
-        except Exception:
-            return None
+                for index, fen in enumerate(fens):
+                    info = engine.analyse(chess.Board(fen), limit, multipv=BASIC_ENGINE_PROBE_MULTIPV)
+                    primary = info[0] if isinstance(info, list) else info
+                    score = primary.get('score', chess.engine.PovScore(chess.engine.Cp(0), chess.WHITE))
+                    pv_moves = primary.get('pv', []) or []
+                    # Store complete PV line for follow-up feature (not just first 3 moves)
+                    pv_uci = [mv.uci() for mv in pv_moves]
+                    results[index] = self._probe_result(score, pv_uci)
+                    depth = primary.get('depth')
+                    if depth:
+                        self._position_cache.set(f"{fen}|{depth}", (score, pv_moves[0] if pv_moves else None, pv_uci))
+        except Exception as e:
+            print(f"[BASIC PROBE] Stockfish probe failed: {e}")
+        return results
 
     def _static_exchange_evaluation(self, board: chess.Board, move: chess.Move) -> int:
         """Compatibility wrapper around python-chess SEE helpers."""
@@ -897,17 +859,40 @@ class ChessAnalysisEngine:
 
     async def analyze_game(self, pgn: str, user_id: str, platform: str,
                           analysis_type: Optional[AnalysisType] = None,
-                          game_id: Optional[str] = None) -> Optional[GameAnalysis]:
-        """Analyze a complete game from PGN."""
+                          game_id: Optional[str] = None,
+                          move_callback: Optional[Callable[[MoveAnalysis], None]] = None) -> Optional[GameAnalysis]:
+        """
+        Analyze a complete game from PGN.
+
+        Args:
+            move_callback: Optional callable invoked with each MoveAnalysis as soon as it is
+                classified (in completion order, not ply order) for streaming responses
+
+        Stage timings of the game are recorded into the process-wide stage
+        metrics and attached to the result as GameAnalysis.stage_timings.
+        """
+        with game_timing(game_id) as timings:
+            game_analysis = await self._analyze_game(pgn, user_id, platform, analysis_type, game_id, move_callback)
+            if game_analysis is not None:
+                timings.game_id = game_analysis.game_id
+                game_analysis.stage_timings = timings.summary()
+            return game_analysis
+
+    async def _analyze_game(self, pgn: str, user_id: str, platform: str,
+                            analysis_type: Optional[AnalysisType],
+                            game_id: Optional[str],
+                            move_callback: Optional[Callable[[MoveAnalysis], None]]) -> Optional[GameAnalysis]:
+        """Analyze a complete game from PGN (see analyze_game)."""
         analysis_type = analysis_type or self.config.analysis_type
         start_time = datetime.now()
 
         try:
             # Parse PGN
-            print(f"[GAME ANALYSIS] Parsing PGN for game_id: {game_id}, user: {user_id}, platform: {platform}")
-            print(f"[GAME ANALYSIS] PGN preview (first 200 chars): {pgn[:200] if pgn else 'None'}...")
+            hot_log.info("GAME ANALYSIS", "Parsing PGN", game_id=game_id, user=user_id, platform=platform)
+            hot_log.debug("GAME ANALYSIS", lambda: f"PGN preview (first 200 chars): {pgn[:200] if pgn else 'None'}...")
             pgn_io = io.StringIO(pgn)
-            game = chess.pgn.read_game(pgn_io)
+            with stage_span("pgn_parse"):
+                game = chess.pgn.read_game(pgn_io)
 
             if not game:
                 print(f"[GAME ANALYSIS] ❌ Failed to parse PGN - chess.pgn.read_game() returned None")
@@ -975,6 +960,7 @@ class ChessAnalysisEngine:
                     user_is_white = True
 
             # Collect all moves and board states first
+            collection_started = time.perf_counter()
             move_data = []
             for ply_index, move in enumerate(game.mainline_moves(), start=1):
                 # Validate move is legal before adding to move_data
@@ -997,22 +983,38 @@ class ChessAnalysisEngine:
                 })
                 board.push(move)
 
-            print(f"[GAME ANALYSIS] Successfully parsed {len(move_data)} moves from PGN")
+            record_stage("move_collection", (time.perf_counter() - collection_started) * 1000)
+            hot_log.debug("GAME ANALYSIS", "Successfully parsed %d moves from PGN", len(move_data))
 
             if not move_data:
                 print(f"[GAME ANALYSIS] ❌ No valid moves found in PGN")
                 return None
 
+            # Without an engine the whole game gets heuristic analysis; score every
+            # ply's candidate moves in one batch up front so each move is a cache hit
+            use_basic = not self.stockfish_path
+            if use_basic:
+                print(f"[GAME ANALYSIS] Stockfish unavailable, using heuristic analysis for {len(move_data)} moves")
+                self._prime_basic_analysis([data['board'] for data in move_data])
+
             # Analyze moves in parallel for better performance
             async def analyze_single_move(data):
-                move_analysis = await self.analyze_move(
-                    data['board'],
-                    data['move'],
-                    analysis_type,
-                    fullmove_number=data['fullmove_number'],
-                    is_user_move=data['is_user_move'],  # Pass is_user_move so greeting can be added immediately
-                    ply_index=data['ply_index']  # Pass ply_index so greeting can be added immediately
-                )
+                if use_basic:
+                    move_analysis = await self._analyze_move_basic(
+                        data['board'],
+                        data['move'],
+                        is_user_move=data['is_user_move'],
+                        ply_index=data['ply_index']
+                    )
+                else:
+                    move_analysis = await self.analyze_move(
+                        data['board'],
+                        data['move'],
+                        analysis_type,
+                        fullmove_number=data['fullmove_number'],
+                        is_user_move=data['is_user_move'],  # Pass is_user_move so greeting can be added immediately
+                        ply_index=data['ply_index']  # Pass ply_index so greeting can be added immediately
+                    )
                 move_analysis.player_color = data['player_color']
                 # is_user_move and ply_index already set in analyze_move
                 move_analysis.fullmove_number = data['fullmove_number']
@@ -1020,13 +1022,21 @@ class ChessAnalysisEngine:
 
             # Process moves in parallel with Railway Pro tier optimization
             # Railway Pro tier has 8 vCPU, but we use 4 concurrent workers to match
-            # the ThreadPoolExecutor capacity and avoid memory pressure
-            max_concurrent = 4  # Matches ThreadPoolExecutor(max_workers=4) at line 1977
+            # the ThreadPoolExecutor capacity and avoid memory pressure.
+            # The admission controller lowers this under memory pressure.
+            max_concurrent = get_admission_controller().current_limits().move_concurrency
             semaphore = asyncio.Semaphore(max_concurrent)
 
             async def analyze_with_semaphore(data):
                 async with semaphore:
-                    return await analyze_single_move(data)
+                    with stage_span("move"):
+                        move_analysis = await analyze_single_move(data)
+                if move_callback:
+                    try:
+                        move_callback(move_analysis)
+                    except Exception as e:
+                        print(f"[GAME ANALYSIS] Warning: move callback failed at ply {data['ply_index']}: {e}")
+                return move_analysis
 
             # Analyze all moves in parallel
             tasks = [analyze_with_semaphore(data) for data in move_data]
@@ -1126,7 +1136,10 @@ class ChessAnalysisEngine:
             # Fallback to heuristic analysis
             return await self._analyze_position_basic(fen)
 
-    async def _analyze_move_basic(self, board: chess.Board, move: chess.Move) -> MoveAnalysis:
+    async def _analyze_move_basic(self, board: chess.Board, move: chess.Move,
+                                  is_user_move: Optional[bool] = None,
+                                  ply_index: Optional[int] = None,
+                                  force_engine: bool = False) -> MoveAnalysis:
         """Basic move analysis using improved heuristics."""
         # Validate move is legal before proceeding
         # CRITICAL: Try to reconstruct move from board if it's not legal
@@ -1187,9 +1200,9 @@ class ChessAnalysisEngine:
         if is_capture_move:
             captured_square = chess.square_name(move.to_square)
             captured_piece = board.piece_at(move.to_square)
-            print(f"[MOVE_SAN DEBUG] Move {move.uci()} -> SAN: {move_san}, is_capture: {is_capture_move}, captured on {captured_square}: {captured_piece}")
+            hot_log.debug("MOVE_SAN", "Move %s -> SAN: %s, captured on %s: %s", move.uci(), move_san, captured_square, captured_piece)
             if 'x' not in move_san:
-                print(f"[MOVE_SAN ERROR] Capture move but no 'x' in SAN! move_san={move_san}, should include 'x'")
+                hot_log.error("MOVE_SAN", "Capture move but no 'x' in SAN! move_san=%s, should include 'x'", move_san)
 
         # Store FEN position before the move
         fen_before = board.fen()
@@ -1245,9 +1258,10 @@ class ChessAnalysisEngine:
 
         # DEBUG: Log hanging piece detection
         if new_hanging:
-            print(f"[HANGING DEBUG] Move {move_san}: Detected {len(new_hanging)} new hanging pieces:")
-            for h in new_hanging:
-                print(f"  - {h['piece']} on {h['square']} (attackers={h.get('attackers', 0)}, defenders={h.get('defenders', 0)})")
+            hot_log.debug("HANGING", lambda: f"Move {move_san}: Detected {len(new_hanging)} new hanging pieces: " + ", ".join(
+                f"{h['piece']} on {h['square']} (attackers={h.get('attackers', 0)}, defenders={h.get('defenders', 0)})"
+                for h in new_hanging
+            ))
 
         if color_to_move == chess.WHITE:
             delta = after_score - before_score
@@ -1640,12 +1654,20 @@ class ChessAnalysisEngine:
         # Middlegame: everything else
         return GamePhase.MIDDLEGAME
 
+    @timed_stage("coaching")
     def _enhance_move_analysis_with_coaching(self, move_analysis: MoveAnalysis, board: chess.Board,
                                            move: chess.Move, move_number: int,
                                            player_skill_level: str = "intermediate",
                                            is_user_move: bool = True,
-                                           force_engine: bool = False) -> MoveAnalysis:
+                                           force_engine: bool = False,
+                                           allow_deferred: bool = True) -> MoveAnalysis:
         """Enhance move analysis with comprehensive coaching comments."""
+        if allow_deferred and self.config.lazy_coaching and not force_engine:
+            # Batch analysis: keep engine facts only, enrich_coaching() fills in the rest on first view
+            move_analysis.game_phase = self._determine_game_phase(board, move_number).value
+            move_analysis.coaching_pending = True
+            return move_analysis
+
         try:
             # Determine game phase
             game_phase = self._determine_game_phase(board, move_number)
@@ -1674,7 +1696,7 @@ class ChessAnalysisEngine:
                 if captured:
                     piece_names = {chess.PAWN: 'pawn', chess.KNIGHT: 'knight', chess.BISHOP: 'bishop',
                                    chess.ROOK: 'rook', chess.QUEEN: 'queen', chess.KING: 'king'}
-                    print(f"[CAPTURE DEBUG] {move_analysis.move_san}: Captured {piece_names.get(captured.piece_type, 'piece')} on {chess.square_name(move.to_square)}")
+                    hot_log.debug("CAPTURE", lambda: f"{move_analysis.move_san}: Captured {piece_names.get(captured.piece_type, 'piece')} on {chess.square_name(move.to_square)}")
 
             # Safely access heuristic_details with null checks
             heuristic_details = move_analysis.heuristic_details or {}
@@ -1691,7 +1713,7 @@ class ChessAnalysisEngine:
             is_single_move_coaching = force_engine  # force_engine=True only from single-move coaching endpoint
             skip_ai_comments = not is_single_move_coaching
 
-            print(f"[COACHING] Checking AI comments: move_number={move_number}, is_user_move={is_user_move}, force_engine={force_engine}, skip_ai_comments={skip_ai_comments}")
+            hot_log.debug("COACHING", "Checking AI comments", move_number=move_number, is_user_move=is_user_move, force_engine=force_engine, skip_ai_comments=skip_ai_comments)
 
             # INSTANT GREETING: Always add instant Tal greeting for player's first move
             # This shows immediately, even before AI comments are generated
@@ -1723,11 +1745,11 @@ class ChessAnalysisEngine:
                 move_analysis.move_quality = "good"  # Default quality for greeting
                 move_analysis.game_phase = game_phase.value
                 move_analysis.encouragement_level = 5  # High encouragement for greeting
-                print(f"[INSTANT_GREETING] ✅ Added instant Tal greeting for first move (ply={ply_index}, fullmove={move_number}, is_user_move={is_user_move}, move_san={move_analysis.move_san}): {instant_greeting[:50]}...")
+                hot_log.info("INSTANT_GREETING", "Added instant Tal greeting for first move", ply=ply_index, fullmove=move_number, move_san=move_analysis.move_san)
             else:
                 # Only log if it's a user move with fullmove_number == 1 (to avoid spam)
                 if is_user_move and move_number == 1:
-                    print(f"[INSTANT_GREETING] ⚠️ Skipped greeting: is_user_move={is_user_move}, move_number={move_number}, ply_index={ply_index}, move_san={move_analysis.move_san}")
+                    hot_log.debug("INSTANT_GREETING", "Skipped greeting", move_number=move_number, ply_index=ply_index, move_san=move_analysis.move_san)
 
             # Always generate coaching comments using templates.
             # For batch analysis (skip_ai_comments=True), temporarily disable the AI
@@ -1778,6 +1800,43 @@ class ChessAnalysisEngine:
             # Return original analysis if coaching fails
             return move_analysis
 
+    def enrich_coaching(self, moves_analysis: List[Dict[str, Any]], player_skill_level: str = "intermediate") -> int:
+        """
+        Generate deferred coaching fields for stored moves (dicts from move_analyses.moves_analysis).
+
+        Moves are updated in place; only those marked coaching_pending are touched.
+        Boards are rebuilt from the stored fen_before, so the PGN is not needed.
+
+        Returns:
+            Number of moves enriched
+        """
+        move_fields = {f.name for f in dataclass_fields(MoveAnalysis)}
+        enriched = 0
+        for move_data in moves_analysis:
+            if not move_data.get('coaching_pending'):
+                continue
+            try:
+                board = chess.Board(move_data['fen_before'])
+                move = chess.Move.from_uci(move_data['move'])
+                move_analysis = MoveAnalysis(**{key: value for key, value in move_data.items() if key in move_fields})
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"[COACHING] Cannot enrich stored move {move_data.get('move_san')}: {e}")
+                continue
+
+            move_analysis.fullmove_number = board.fullmove_number
+            # Same move numbering the analysis paths pass to the coaching generator
+            move_number = (board.fullmove_number - 1) * 2 + (0 if board.turn == chess.WHITE else 1)
+            self._enhance_move_analysis_with_coaching(
+                move_analysis, board, move, move_number,
+                player_skill_level=player_skill_level,
+                is_user_move=move_analysis.is_user_move,
+                allow_deferred=False
+            )
+            move_data.update({name: getattr(move_analysis, name) for name in COACHING_FIELDS})
+            move_data['coaching_pending'] = False
+            enriched += 1
+        return enriched
+
     def _get_adaptive_depth(self, board: chess.Board, move: chess.Move) -> int:
         """
         Calculate optimal analysis depth based on position complexity.
@@ -2052,20 +2111,22 @@ class ChessAnalysisEngine:
 
                 # Enhance with coaching comments (including instant Tal greeting for first move)
                 actual_is_user_move = is_user_move if is_user_move is not None else True
-                print(f"[OPENING_BOOK] Calling _enhance_move_analysis_with_coaching with fullmove_number={fullmove_number}, is_user_move={actual_is_user_move}")
+                hot_log.debug("OPENING_BOOK", "Calling _enhance_move_analysis_with_coaching", fullmove_number=fullmove_number, is_user_move=actual_is_user_move)
                 return self._enhance_move_analysis_with_coaching(book_move_analysis, board, move, fullmove_number, is_user_move=actual_is_user_move, force_engine=force_engine)
 
         # Use adaptive depth based on position complexity (30% speedup on average)
         depth = self._get_adaptive_depth(board, move)
 
         # Override for deep analysis or based on config
-        if analysis_type == AnalysisType.DEEP:
+        if self.config.fixed_limits:
+            depth = self.config.depth
+        elif analysis_type == AnalysisType.DEEP:
             depth = max(depth, 20)
         elif self.config.depth != 14:  # User specified custom depth
             depth = self.config.depth
 
         # Use phase-based time limit for speed optimization (60-70% speedup)
-        if fullmove_number is not None:
+        if fullmove_number is not None and not self.config.fixed_limits:
             time_limit = self._get_phase_based_time_limit(fullmove_number)
         else:
             # Fallback to config time limit if fullmove_number not provided
@@ -2092,7 +2153,9 @@ class ChessAnalysisEngine:
                     # Fallback to creating new engine if pool not available
                     engine_context = chess.engine.SimpleEngine.popen_uci(self.stockfish_path)
 
+                acquire_started = time.perf_counter()
                 with engine_context as engine:
+                    record_stage("engine_acquire", (time.perf_counter() - acquire_started) * 1000)
                     # Configure engine if not from pool
                     if not self._sync_engine_pool:
                         engine.configure({
@@ -2115,11 +2178,14 @@ class ChessAnalysisEngine:
                     # Accept a cached eval from a slightly lower depth (within 4 levels)
                     # A depth-12 eval is still useful when we wanted depth-14 - the
                     # move classification thresholds (25/100/200/400cp) are wide enough
-                    if cached_result is None and depth > 10:
+                    if cached_result is not None:
+                        count_stage("position_cache.exact_hit")
+                    elif depth > 10:
                         for try_depth in range(depth - 1, max(9, depth - 5), -1):
                             fallback_key = f"{fen_before}|{try_depth}"
                             cached_result = self._position_cache.get(fallback_key)
                             if cached_result is not None:
+                                count_stage(f"position_cache.fallback_hit_{depth - try_depth}")
                                 break
 
                     if cached_result is not None:
@@ -2131,7 +2197,9 @@ class ChessAnalysisEngine:
                         # Get evaluation before move
                         # Use both depth and time limit - Stockfish stops at whichever is reached first
                         # This caps worst-case time for complex positions while still reaching full depth for simple ones
-                        info_before = engine.analyse(board, chess.engine.Limit(depth=depth, time=current_time_limit))
+                        count_stage("position_cache.miss")
+                        with stage_span("search_before"):
+                            info_before = engine.analyse(board, chess.engine.Limit(depth=depth, time=current_time_limit))
                         eval_before = info_before.get("score", chess.engine.PovScore(chess.engine.Cp(0), chess.WHITE))
                         best_move_before = info_before.get("pv", [None])[0]
                         # Capture the full PV for the best move line
@@ -2141,7 +2209,7 @@ class ChessAnalysisEngine:
                         # Store in cache for future transpositions
                         self._position_cache.set(cache_key, (eval_before, best_move_before, best_move_pv))
 
-                    print(f"[PV DEBUG] Captured {len(best_move_pv)} moves in best_move_pv for position")
+                    hot_log.debug("PV", "Captured %d moves in best_move_pv for position", len(best_move_pv))
                     player_color = board.turn
 
                     # Validate move is legal before proceeding
@@ -2215,7 +2283,8 @@ class ChessAnalysisEngine:
                         # This provides ~20-30% speedup without significant accuracy loss
                         after_depth = max(10, depth - 2)  # Reduce by 2 levels, minimum 10
                         after_time_limit = current_time_limit * 0.8  # Slightly less time for "after" evals
-                        info_after = engine.analyse(board, chess.engine.Limit(depth=after_depth, time=after_time_limit))
+                        with stage_span("search_after"):
+                            info_after = engine.analyse(board, chess.engine.Limit(depth=after_depth, time=after_time_limit))
                         eval_after = info_after.get("score", chess.engine.PovScore(chess.engine.Cp(0), chess.WHITE))
                         # Capture PV after move to check for mate sequences
                         pv_after_moves = info_after.get("pv", [])
@@ -2290,22 +2359,8 @@ class ChessAnalysisEngine:
                             move_san_debug = str(current_move)
                             move_uci_debug = str(current_move)
 
-                    # Write to log file for easier searching
-                    try:
-                        with open("brilliant_debug.log", "a", encoding="utf-8") as f:
-                            f.write(f"\n{'='*80}\n")
-                            f.write(f"MOVE: {move_san_debug} ({move_uci_debug})\n")
-                            f.write(f"{'='*80}\n")
-                    except Exception:
-                        pass
-
                     # DEBUG: Always log centipawn loss for ALL moves (before the check)
-                    print(f"[BRILLIANT DEBUG] {move_san_debug} ({move_uci_debug}): centipawn_loss={centipawn_loss:.1f}, best_cp={best_cp:.1f}, actual_cp={actual_cp:.1f}")
-                    try:
-                        with open("brilliant_debug.log", "a", encoding="utf-8") as f:
-                            f.write(f"[BRILLIANT DEBUG] {move_san_debug} ({move_uci_debug}): centipawn_loss={centipawn_loss:.1f}, best_cp={best_cp:.1f}, actual_cp={actual_cp:.1f}\n")
-                    except Exception:
-                        pass
+                    hot_log.debug("BRILLIANT", lambda: f"{move_san_debug} ({move_uci_debug}): centipawn_loss={centipawn_loss:.1f}, best_cp={best_cp:.1f}, actual_cp={actual_cp:.1f}")
 
                     # KEY INSIGHT: Chess.com allows higher centipawn loss for clear tactical sacrifices
                     # Check if this is a clear tactical sacrifice BEFORE filtering by centipawn_loss
@@ -2346,13 +2401,7 @@ class ChessAnalysisEngine:
                                             is_potential_clear_tactical = True
                                             tactical_sacrifice_threshold = 75  # Allow up to 75cp loss for clear tactical sacrifices (matches Nxe6 with 69cp loss)
 
-                                            debug_msg = f"[BRILLIANT DEBUG] {move_san_debug}: DETECTED CLEAR TACTICAL SACRIFICE (sacrifice_value={sacrifice_value}, can_be_captured=True) - allowing higher centipawn_loss threshold (75cp)"
-                                            print(debug_msg)
-                                            try:
-                                                with open("brilliant_debug.log", "a", encoding="utf-8") as f:
-                                                    f.write(debug_msg + "\n")
-                                            except Exception:
-                                                pass
+                                            hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: DETECTED CLEAR TACTICAL SACRIFICE (sacrifice_value={sacrifice_value}, can_be_captured=True) - allowing higher centipawn_loss threshold (75cp)")
 
                         # Always restore board state if we haven't already
                         if not board_restored:
@@ -2372,18 +2421,13 @@ class ChessAnalysisEngine:
                     if centipawn_loss <= tactical_sacrifice_threshold:  # Dynamic threshold: 10cp default, 60cp for clear tactical sacrifices
                         optimal_cp = best_cp
                         threshold_msg = f"WITHIN RANGE (threshold={tactical_sacrifice_threshold}cp)" if not is_potential_clear_tactical else f"WITHIN TACTICAL SACRIFICE RANGE (threshold={tactical_sacrifice_threshold}cp)"
-                        print(f"[BRILLIANT DEBUG] Checking {move_san_debug}: {threshold_msg}")
+                        hot_log.debug("BRILLIANT", lambda: f"Checking {move_san_debug}: {threshold_msg}")
 
                         # Get rating-adjusted thresholds (default to 1500 if not available)
                         # NOTE: Player rating context would improve threshold accuracy (future enhancement)
                         rating_thresholds = get_rating_adjusted_brilliant_threshold(player_rating=None)
                     else:
-                        print(f"[BRILLIANT DEBUG] {move_san_debug} SKIPPED: centipawn_loss={centipawn_loss:.1f} > {tactical_sacrifice_threshold} (too high for brilliant)")
-                        try:
-                            with open("brilliant_debug.log", "a", encoding="utf-8") as f:
-                                f.write(f"[BRILLIANT DEBUG] {move_san_debug} SKIPPED: centipawn_loss too high ({centipawn_loss:.1f} > {tactical_sacrifice_threshold})\n")
-                        except Exception:
-                            pass
+                        hot_log.debug("BRILLIANT", lambda: f"{move_san_debug} SKIPPED: centipawn_loss={centipawn_loss:.1f} > {tactical_sacrifice_threshold} (too high for brilliant)")
                         # Skip brilliant detection if centipawn loss is too high
                         is_brilliant = False
 
@@ -2425,16 +2469,16 @@ class ChessAnalysisEngine:
 
                         is_king_move = (moving_piece_type == chess.KING)
                         if is_king_move:
-                            print(f"[BRILLIANT DEBUG] {move_san_debug}: King move detected - rarely brilliant unless it's a sacrifice")
+                            hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: King move detected - rarely brilliant unless it's a sacrifice")
 
                         if move_gives_check:
-                            print(f"[BRILLIANT DEBUG] {move_san_debug}: Move gives check detected - will block if not a sacrifice")
+                            hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: Move gives check detected - will block if not a sacrifice")
 
                         if move_is_checkmate:
-                            print(f"[BRILLIANT DEBUG] {move_san_debug}: Move is immediate checkmate - will block unless it's a sacrifice")
+                            hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: Move is immediate checkmate - will block unless it's a sacrifice")
 
                         if is_forced_move:
-                            print(f"[BRILLIANT DEBUG] {move_san_debug}: Move appears forced (only {num_legal_moves_before} legal moves)")
+                            hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: Move appears forced (only {num_legal_moves_before} legal moves)")
 
                         # -----------------------------------------------------------------------
                         # CRITERION 1: Non-Obvious Move Detection
@@ -2480,7 +2524,8 @@ class ChessAnalysisEngine:
                                 # and time cap (multipv=3 is ~3x more expensive than single PV)
                                 multipv_depth = max(10, depth - 4)
                                 multipv_time_limit = current_time_limit * 1.5
-                                multipv_analysis = engine.analyse(board, chess.engine.Limit(depth=multipv_depth, time=multipv_time_limit), multipv=3)
+                                with stage_span("search_multipv"):
+                                    multipv_analysis = engine.analyse(board, chess.engine.Limit(depth=multipv_depth, time=multipv_time_limit), multipv=3)
 
                                 if len(multipv_analysis) >= 2:
                                     # Check if the played move is significantly better than alternatives
@@ -2559,7 +2604,7 @@ class ChessAnalysisEngine:
                                                 if mate_in_moves <= rating_thresholds['mate_in_moves']:
                                                     pv_contains_mate = True
                                                     mate_found = True
-                                                    print(f"[BRILLIANT DEBUG] {move_san_debug}: Found mate in PV at move {mate_in_moves} (PV line shows mate)")
+                                                    hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: Found mate in PV at move {mate_in_moves} (PV line shows mate)")
                                                     break
                                     except Exception:
                                         continue
@@ -2567,7 +2612,7 @@ class ChessAnalysisEngine:
                                 # High evaluation alone could just be winning material, not brilliant
                                 # Only check PV for actual mate sequences, not just high evaluations
                             except Exception as e:
-                                print(f"[BRILLIANT DEBUG] Error checking PV for mate: {e}")
+                                hot_log.debug("BRILLIANT", lambda: f"Error checking PV for mate: {e}")
 
                         forcing_mate_trigger = immediate_mate or pv_contains_mate
 
@@ -2674,21 +2719,15 @@ class ChessAnalysisEngine:
                                             reason.append("piece can't be captured (not a sacrifice, just winning material)")
                                         if sacrifice_value < 3:
                                             reason.append(f"insufficient sacrifice value ({sacrifice_value} < 3)")
-                                        print(f"[BRILLIANT DEBUG] {move_san_debug}: NOT clear tactical sacrifice - {', '.join(reason)}")
+                                        hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: NOT clear tactical sacrifice - {', '.join(reason)}")
 
                                     # DEBUG: Log sacrifice detection
                                     if board.is_capture(move):
-                                        debug_msg = (f"[BRILLIANT DEBUG] {move_san_debug}: is_potential_sacrifice={is_potential_sacrifice}, "
+                                        hot_log.debug("BRILLIANT", lambda: (f"{move_san_debug}: is_potential_sacrifice={is_potential_sacrifice}, "
                                               f"moving_piece_can_be_captured={moving_piece_can_be_captured}, "
                                               f"sacrifice_value={sacrifice_value}, "
                                               f"is_clear_tactical_sacrifice={is_clear_tactical_sacrifice}, "
-                                              f"sacrifice_detected={sacrifice_detected}")
-                                        print(debug_msg)
-                                        try:
-                                            with open("brilliant_debug.log", "a", encoding="utf-8") as f:
-                                                f.write(debug_msg + "\n")
-                                        except Exception:
-                                            pass
+                                              f"sacrifice_detected={sacrifice_detected}"))
 
                                     # Additional filter: If it's a Queen capture and Queen can't be captured, it's NOT a sacrifice
                                     # Queen captures that win material (forks/pins) are just good moves, not brilliant
@@ -2760,17 +2799,11 @@ class ChessAnalysisEngine:
                                         )
 
                                         # DEBUG: Log sacrifice trigger
-                                        debug_msg = (f"[BRILLIANT DEBUG] {move_san_debug}: sacrifice_trigger={sacrifice_trigger} "
+                                        hot_log.debug("BRILLIANT", lambda: (f"{move_san_debug}: sacrifice_trigger={sacrifice_trigger} "
                                               f"(sacrifice_detected={sacrifice_detected}, "
                                               f"not_already_crushing={not_already_crushing}, optimal_cp={optimal_cp:.1f}, "
                                               f"has_compensation={has_compensation}, actual_cp={actual_cp:.1f}, "
-                                              f"compensation_threshold={compensation_threshold:.1f})")
-                                        print(debug_msg)
-                                        try:
-                                            with open("brilliant_debug.log", "a", encoding="utf-8") as f:
-                                                f.write(debug_msg + "\n")
-                                        except Exception:
-                                            pass
+                                              f"compensation_threshold={compensation_threshold:.1f})"))
 
                             # Type 2: Non-Capture Sacrifices (moving piece to hanging square OR leaving other pieces hanging)
                             elif moving_value >= rating_thresholds['min_sacrifice_value']:  # Rating-adjusted minimum
@@ -2819,7 +2852,7 @@ class ChessAnalysisEngine:
                                                 other_pieces_hanging_value = max(other_pieces_hanging_value, piece_value)
                                                 was_hanging_before = square in pieces_hanging_before
                                                 status = "became hanging" if not was_hanging_before else "already hanging"
-                                                print(f"[BRILLIANT DEBUG] {move_san_debug}: Piece on {chess.square_name(square)} ({piece.symbol()}) is {status} after move")
+                                                hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: Piece on {chess.square_name(square)} ({piece.symbol()}) is {status} after move")
 
                                 board.pop()
 
@@ -2859,11 +2892,11 @@ class ChessAnalysisEngine:
                                             # In crushing positions (+400cp), require at least Rook (5 points) hanging for brilliant
                                             # Knight/Bishop hanging in crushing positions is likely just a good move, not brilliant
                                             not_already_crushing = False
-                                            print(f"[BRILLIANT DEBUG] {move_san_debug}: Position too winning (+{optimal_cp:.0f}cp) with only {other_pieces_hanging_value} points hanging - not brilliant")
+                                            hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: Position too winning (+{optimal_cp:.0f}cp) with only {other_pieces_hanging_value} points hanging - not brilliant")
                                         else:
                                             # The brilliance is in the tactical calculation, not whether position was already winning
                                             not_already_crushing = True  # Always allow if leaving significant pieces hanging with strong threat
-                                        print(f"[BRILLIANT DEBUG] {move_san_debug}: Leaving pieces hanging with strong threat - optimal_cp={optimal_cp:.1f}, pieces_value={other_pieces_hanging_value}")
+                                        hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: Leaving pieces hanging with strong threat - optimal_cp={optimal_cp:.1f}, pieces_value={other_pieces_hanging_value}")
                                     else:
                                         not_already_crushing = optimal_cp < rating_thresholds['max_position_cp']
 
@@ -2875,7 +2908,7 @@ class ChessAnalysisEngine:
                                     )
 
                                     # Debug output
-                                    print(f"[BRILLIANT DEBUG] {move_san_debug}: Sacrifice check - is_leaving_pieces_hanging={is_leaving_pieces_hanging}, move_creates_strong_threat={move_creates_strong_threat}, not_already_crushing={not_already_crushing}, has_compensation={has_compensation}, optimal_cp={optimal_cp:.1f}, actual_cp={actual_cp:.1f}")
+                                    hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: Sacrifice check - is_leaving_pieces_hanging={is_leaving_pieces_hanging}, move_creates_strong_threat={move_creates_strong_threat}, not_already_crushing={not_already_crushing}, has_compensation={has_compensation}, optimal_cp={optimal_cp:.1f}, actual_cp={actual_cp:.1f}")
 
                                     sacrifice_trigger = (
                                         not_already_crushing and
@@ -2883,20 +2916,20 @@ class ChessAnalysisEngine:
                                     )
 
                                     if sacrifice_trigger:
-                                        print(f"[BRILLIANT DEBUG] {move_san_debug}: Non-capture sacrifice detected - moving_piece_sacrifice={is_moving_piece_sacrifice}, leaving_pieces_hanging={is_leaving_pieces_hanging}, creates_strong_threat={move_creates_strong_threat}")
+                                        hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: Non-capture sacrifice detected - moving_piece_sacrifice={is_moving_piece_sacrifice}, leaving_pieces_hanging={is_leaving_pieces_hanging}, creates_strong_threat={move_creates_strong_threat}")
                                     else:
-                                        print(f"[BRILLIANT DEBUG] {move_san_debug}: Non-capture sacrifice FAILED - not_already_crushing={not_already_crushing}, has_compensation={has_compensation}")
+                                        hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: Non-capture sacrifice FAILED - not_already_crushing={not_already_crushing}, has_compensation={has_compensation}")
                                 else:
                                     # Piece can't be captured or doesn't hang - not a sacrifice
                                     sacrifice_trigger = False
                                     if not is_moving_piece_sacrifice and not is_leaving_pieces_hanging:
-                                        print(f"[BRILLIANT DEBUG] {move_san_debug}: Non-capture move - piece can't be captured (attackers={len(attackers)}, defenders={len(defenders)}), no other pieces hanging, not a sacrifice")
+                                        hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: Non-capture move - piece can't be captured (attackers={len(attackers)}, defenders={len(defenders)}), no other pieces hanging, not a sacrifice")
                                     elif is_leaving_pieces_hanging and not move_creates_strong_threat:
-                                        print(f"[BRILLIANT DEBUG] {move_san_debug}: Non-capture move - pieces hanging but no strong threat created, not a sacrifice")
+                                        hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: Non-capture move - pieces hanging but no strong threat created, not a sacrifice")
                             else:
                                 # Piece value too low to be a sacrifice
                                 sacrifice_trigger = False
-                                print(f"[BRILLIANT DEBUG] {move_san_debug}: Moving piece value ({moving_value}) < min_sacrifice_value ({rating_thresholds['min_sacrifice_value']}), not a sacrifice")
+                                hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: Moving piece value ({moving_value}) < min_sacrifice_value ({rating_thresholds['min_sacrifice_value']}), not a sacrifice")
 
                         # Restore board state
                         board.push(move)
@@ -2946,7 +2979,7 @@ class ChessAnalysisEngine:
                                         # For brilliant moves, require 3+ points net sacrifice (per Chess.com standards)
                                         # This prevents routine exchanges like Rxf2 (rook for knight = 2 points) from being marked brilliant
                                         sacrifice_points = moving_value - captured_value
-                                        print(f"[BRILLIANT DEBUG] {move_san_debug}: checking clear_tactical - moving_value={moving_value}, captured_value={captured_value}, sacrifice_points={sacrifice_points}")
+                                        hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: checking clear_tactical - moving_value={moving_value}, captured_value={captured_value}, sacrifice_points={sacrifice_points}")
                                         if moving_value > captured_value and sacrifice_points >= 3:
                                             board.push(move)
                                             to_square = move.to_square
@@ -2957,12 +2990,12 @@ class ChessAnalysisEngine:
                                                 # Piece can be captured if it's attacked (even if defended)
                                                 # For tactical sacrifices, equal attackers/defenders still counts as tactical
                                                 clear_tactical_sacrifice = len(attackers) > 0
-                                                print(f"[BRILLIANT DEBUG] {move_san_debug}: after checking attackers - attackers={len(attackers)}, clear_tactical_sacrifice={clear_tactical_sacrifice}")
+                                                hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: after checking attackers - attackers={len(attackers)}, clear_tactical_sacrifice={clear_tactical_sacrifice}")
                                             else:
-                                                print(f"[BRILLIANT DEBUG] {move_san_debug}: no piece at to_square after push")
+                                                hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: no piece at to_square after push")
                                             board.pop()
                                         else:
-                                            print(f"[BRILLIANT DEBUG] {move_san_debug}: not a sacrifice - moving_value={moving_value} <= captured_value={captured_value} OR sacrifice_points={sacrifice_points} < 3")
+                                            hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: not a sacrifice - moving_value={moving_value} <= captured_value={captured_value} OR sacrifice_points={sacrifice_points} < 3")
                             else:
                                 # Non-capture move - check if it leaves pieces hanging (like Bf6 leaving queen)
                                 # We already calculated this earlier in the non-capture sacrifice section
@@ -2995,7 +3028,7 @@ class ChessAnalysisEngine:
                                 # The key is: pieces hanging + strong threat = tactical sacrifice candidate
                                 if other_pieces_hanging_value >= 3 and move_creates_strong_threat_here:
                                     non_capture_hanging_pieces = True
-                                    print(f"[BRILLIANT DEBUG] {move_san_debug}: Non-capture leaves pieces hanging (value={other_pieces_hanging_value}) with strong threat - treating as clear tactical")
+                                    hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: Non-capture leaves pieces hanging (value={other_pieces_hanging_value}) with strong threat - treating as clear tactical")
                                 board.pop()
                             board.push(move)
 
@@ -3005,7 +3038,7 @@ class ChessAnalysisEngine:
                         # Queen captures that win material are NOT brilliant unless piece can also be captured
 
                         # DEBUG: Log clear tactical sacrifice detection
-                        print(f"[BRILLIANT DEBUG] {move_san_debug}: clear_tactical_sacrifice={clear_tactical_sacrifice}, "
+                        hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: clear_tactical_sacrifice={clear_tactical_sacrifice}, "
                               f"non_capture_hanging_pieces={non_capture_hanging_pieces}, "
                               f"centipawn_loss={centipawn_loss:.1f}")
 
@@ -3095,35 +3128,17 @@ class ChessAnalysisEngine:
                                         # For tactical sacrifices, require at least 2 legal moves (not forced)
                                         # Very lenient - even if there are only 2 moves, if one is a brilliant tactical sacrifice, mark it brilliant
                                         # Chess.com is lenient for tactical sacrifices
-                                        debug_msg = f"[BRILLIANT DEBUG] {move_san_debug}: non-obvious check - num_legal={num_legal}"
-                                        print(debug_msg)
-                                        try:
-                                            with open("brilliant_debug.log", "a", encoding="utf-8") as f:
-                                                f.write(debug_msg + "\n")
-                                        except Exception:
-                                            pass
+                                        hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: non-obvious check - num_legal={num_legal}")
                                         if num_legal < 2:
                                             brilliant_via_sacrifice = False
-                                            debug_msg = f"[BRILLIANT DEBUG] {move_san_debug}: BLOCKED by non-obvious check (num_legal={num_legal} < 2)"
-                                            print(debug_msg)
-                                            try:
-                                                with open("brilliant_debug.log", "a", encoding="utf-8") as f:
-                                                    f.write(debug_msg + "\n")
-                                            except Exception:
-                                                pass
+                                            hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: BLOCKED by non-obvious check (num_legal={num_legal} < 2)")
                                     except Exception as e:
-                                        debug_msg = f"[BRILLIANT DEBUG] {move_san_debug}: error in non-obvious check: {e}"
-                                        print(debug_msg)
-                                        try:
-                                            with open("brilliant_debug.log", "a", encoding="utf-8") as f:
-                                                f.write(debug_msg + "\n")
-                                        except Exception:
-                                            pass
+                                        hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: error in non-obvious check: {e}")
                             else:
                                 # Piece can't be captured - this is just winning material, not a sacrifice
                                 # Not brilliant (even if it's a fork/pin)
                                 brilliant_via_sacrifice = False
-                                print(f"[BRILLIANT DEBUG] {move_san_debug}: Piece can't be captured after move - not a sacrifice, just winning material (fork/pin)")
+                                hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: Piece can't be captured after move - not a sacrifice, just winning material (fork/pin)")
                         elif forcing_mate_trigger:
                             # Forced mate: must be best move (0-5cp) AND non-obvious
                             # Only mark as brilliant if:
@@ -3136,20 +3151,20 @@ class ChessAnalysisEngine:
                             if move_gives_check and not sacrifice_trigger:
                                 # Check that just wins material (fork/pin) - not brilliant even if it finds mate
                                 brilliant_via_sacrifice = False
-                                print(f"[BRILLIANT DEBUG] {move_san_debug}: BLOCKED - check that just wins material (fork/pin), not brilliant even if finds mate")
+                                hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: BLOCKED - check that just wins material (fork/pin), not brilliant even if finds mate")
                             elif sacrifice_trigger:
                                 # Sacrifice leading to mate is always brilliant (if non-obvious)
                                 brilliant_via_sacrifice = True
-                                print(f"[BRILLIANT DEBUG] {move_san_debug}: Sacrifice leading to mate detected - marking as brilliant")
+                                hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: Sacrifice leading to mate detected - marking as brilliant")
                             elif is_non_obvious and centipawn_loss <= 5:
                                 # Finding mate when there wasn't one before - but only if non-obvious
                                 # BUT: Must not be a check that just wins material
                                 if not move_gives_check:
                                     brilliant_via_sacrifice = True
-                                    print(f"[BRILLIANT DEBUG] {move_san_debug}: Found forced mate (non-obvious) - marking as brilliant")
+                                    hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: Found forced mate (non-obvious) - marking as brilliant")
                                 else:
                                     brilliant_via_sacrifice = False
-                                    print(f"[BRILLIANT DEBUG] {move_san_debug}: BLOCKED - check without sacrifice, not brilliant")
+                                    hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: BLOCKED - check without sacrifice, not brilliant")
                             else:
                                 brilliant_via_sacrifice = False
                         else:
@@ -3159,7 +3174,7 @@ class ChessAnalysisEngine:
                             if move_gives_check and not sacrifice_trigger:
                                 # Check that just wins material (fork/pin) - not brilliant
                                 brilliant_via_sacrifice = False
-                                print(f"[BRILLIANT DEBUG] {move_san_debug}: BLOCKED - check that just wins material (fork/pin), not brilliant")
+                                hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: BLOCKED - check that just wins material (fork/pin), not brilliant")
                             else:
                                 brilliant_via_sacrifice = sacrifice_trigger and centipawn_loss <= 5
 
@@ -3171,7 +3186,7 @@ class ChessAnalysisEngine:
                             # Only allow if it's a sacrifice leading to mate
                             if not (sacrifice_trigger and forcing_mate_trigger):
                                 is_brilliant = False
-                                print(f"[BRILLIANT DEBUG] {move_san_debug}: OVERRIDE - king move without sacrifice, not brilliant")
+                                hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: OVERRIDE - king move without sacrifice, not brilliant")
 
                         if brilliant_via_sacrifice and forcing_mate_trigger:
                             # Sacrifice for mate is brilliant even if slightly forced (3-4 legal moves)
@@ -3179,7 +3194,7 @@ class ChessAnalysisEngine:
                             if not is_brilliant:  # Only set if not already blocked
                                 is_brilliant = not is_forced_move and not (is_king_move and not sacrifice_trigger)
                             if is_brilliant:
-                                print(f"[BRILLIANT DEBUG] {move_san_debug}: Sacrifice for mate - allowing even with {num_legal_moves_before} legal moves")
+                                hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: Sacrifice for mate - allowing even with {num_legal_moves_before} legal moves")
                         else:
                             # For other brilliant moves, require non-obvious AND not forced AND not a king move
                             if not is_brilliant:  # Only set if not already blocked
@@ -3187,7 +3202,7 @@ class ChessAnalysisEngine:
 
                         if is_forced_move:
                             is_brilliant = False
-                            print(f"[BRILLIANT DEBUG] {move_san_debug}: OVERRIDE - forced move (only {num_legal_moves_before} legal moves), not brilliant")
+                            hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: OVERRIDE - forced move (only {num_legal_moves_before} legal moves), not brilliant")
 
                         # Final safety check: If move is a check that just wins material (not a sacrifice), it's not brilliant
                         # CRITICAL: Checks that fork/pin (win material) without sacrifice are NOT brilliant
@@ -3203,8 +3218,8 @@ class ChessAnalysisEngine:
                         if move_is_checkmate:
                             # Immediate checkmate is NOT brilliant - it's just the winning move
                             is_brilliant = False
-                            print(f"[BRILLIANT DEBUG] {move_san_debug}: FINAL OVERRIDE - immediate checkmate is not brilliant (just the winning move)")
-                            print(f"[BRILLIANT DEBUG] {move_san_debug}: move_is_checkmate={move_is_checkmate}, sacrifice_trigger={sacrifice_trigger}")
+                            hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: FINAL OVERRIDE - immediate checkmate is not brilliant (just the winning move)")
+                            hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: move_is_checkmate={move_is_checkmate}, sacrifice_trigger={sacrifice_trigger}")
 
                         if move_gives_check:
                             if not sacrifice_trigger:
@@ -3213,32 +3228,22 @@ class ChessAnalysisEngine:
                                 # moves but NOT brilliant sacrifices, regardless of whether they lead to mate
                                 # CRITICAL OVERRIDE: This must be the final word - checks without sacrifice are NEVER brilliant
                                 is_brilliant = False
-                                print(f"[BRILLIANT DEBUG] {move_san_debug}: FINAL OVERRIDE - check without sacrifice is not brilliant (even if finds mate)")
-                                print(f"[BRILLIANT DEBUG] {move_san_debug}: move_gives_check={move_gives_check}, sacrifice_trigger={sacrifice_trigger}, forcing_mate_trigger={forcing_mate_trigger}")
+                                hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: FINAL OVERRIDE - check without sacrifice is not brilliant (even if finds mate)")
+                                hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: move_gives_check={move_gives_check}, sacrifice_trigger={sacrifice_trigger}, forcing_mate_trigger={forcing_mate_trigger}")
                             else:
-                                print(f"[BRILLIANT DEBUG] {move_san_debug}: Check move allowed - it's a sacrifice (sacrifice_trigger={sacrifice_trigger})")
+                                hot_log.debug("BRILLIANT", lambda: f"{move_san_debug}: Check move allowed - it's a sacrifice (sacrifice_trigger={sacrifice_trigger})")
 
                         # DEBUG: Final result with clear summary
-                        status = "🌟 BRILLIANT! 🌟" if is_brilliant else "❌ NOT BRILLIANT"
-                        print(f"\n{'='*80}")
-                        print(f"[BRILLIANT SUMMARY] {move_san_debug} ({move_uci_debug}): {status}")
-                        print(f"  centipawn_loss={centipawn_loss:.1f}, actual_cp={actual_cp:.1f}")
-                        print(f"  brilliant_via_mate={brilliant_via_mate}, brilliant_via_sacrifice={brilliant_via_sacrifice}")
-                        print(f"  sacrifice_trigger={sacrifice_trigger}, clear_tactical_sacrifice={clear_tactical_sacrifice}")
-                        print(f"{'='*80}\n")
-
-                        # Write summary to log file
-                        try:
-                            with open("brilliant_debug.log", "a", encoding="utf-8") as f:
-                                f.write(f"RESULT: {status}\n")
-                                f.write(f"  centipawn_loss={centipawn_loss:.1f}\n")
-                                f.write(f"  actual_cp={actual_cp:.1f}, best_cp={best_cp:.1f}\n")
-                                f.write(f"  brilliant_via_mate={brilliant_via_mate}\n")
-                                f.write(f"  brilliant_via_sacrifice={brilliant_via_sacrifice}\n")
-                                f.write(f"  sacrifice_trigger={sacrifice_trigger}\n")
-                                f.write(f"  clear_tactical_sacrifice={clear_tactical_sacrifice}\n")
-                        except Exception:
-                            pass
+                        hot_log.debug(
+                            "BRILLIANT",
+                            "SUMMARY %s (%s): %s - centipawn_loss=%.1f, actual_cp=%.1f, best_cp=%.1f",
+                            move_san_debug, move_uci_debug, "BRILLIANT" if is_brilliant else "NOT BRILLIANT",
+                            centipawn_loss, actual_cp, best_cp,
+                            brilliant_via_mate=brilliant_via_mate,
+                            brilliant_via_sacrifice=brilliant_via_sacrifice,
+                            sacrifice_trigger=sacrifice_trigger,
+                            clear_tactical_sacrifice=clear_tactical_sacrifice
+                        )
 
                     # Convert evaluation to dict
                     # CRITICAL: For mate positions, use .mate() to get the mate value (positive = white wins, negative = black wins)
@@ -3329,7 +3334,7 @@ class ChessAnalysisEngine:
                     # DO NOT push the move here - _enhance_move_analysis_with_coaching expects board BEFORE the move
                     # Use captured is_user_move if provided, otherwise default to True
                     actual_is_user_move = captured_is_user_move if captured_is_user_move is not None else True
-                    print(f"[REGULAR_PATH] Calling _enhance_move_analysis_with_coaching with move_number={move_number}, is_user_move={actual_is_user_move}")
+                    hot_log.debug("REGULAR_PATH", "Calling _enhance_move_analysis_with_coaching", move_number=move_number, is_user_move=actual_is_user_move)
                     return self._enhance_move_analysis_with_coaching(move_analysis, board, current_move, move_number, is_user_move=actual_is_user_move, force_engine=captured_force_engine)
             except Exception as e:
                 error_msg = str(e)
@@ -3353,7 +3358,8 @@ class ChessAnalysisEngine:
         # Use 4 workers for Railway Pro tier (matches max_concurrent at line 944)
         try:
             with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-                result = await loop.run_in_executor(executor, run_stockfish_analysis)
+                # Copy the context so stage timings reach this game's timer
+                result = await loop.run_in_executor(executor, contextvars.copy_context().run, run_stockfish_analysis)
                 return result
         except Exception as e:
             error_msg = str(e)
@@ -3365,6 +3371,7 @@ class ChessAnalysisEngine:
             # Fallback to heuristic analysis
             return await self._analyze_move_basic(board, move)
 
+    @timed_stage("game_metrics")
     def _calculate_game_metrics(self, game_id: str, user_id: str, platform: str,
                                moves_analysis: List[MoveAnalysis],
                                analysis_type: AnalysisType) -> GameAnalysis:
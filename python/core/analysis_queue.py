@@ -16,6 +16,24 @@ import threading
 from concurrent.futures import ThreadPoolExecutor
 import uuid
 
+from .admission_controller import get_admission_controller
+from .job_store import JobStore, default_worker_id, get_job_store
+from .game_scheduler import FairShareScheduler
+from .hot_path_logger import get_hot_logger
+from .metrics_registry import get_metrics_registry
+from .progress_events import analysis_topic, get_progress_broker, job_topic
+
+hot_log = get_hot_logger()
+
+_metrics = get_metrics_registry()
+_jobs_submitted = _metrics.counter("analysis_jobs_submitted_total", "Batch analysis jobs submitted")
+_jobs_finished = _metrics.counter("analysis_jobs_finished_total", "Batch analysis jobs finished", ["status"])
+_job_queue_wait = _metrics.histogram("analysis_job_queue_wait_seconds", "Time jobs waited in the queue before starting")
+_job_duration = _metrics.histogram(
+    "analysis_job_duration_seconds", "Run time of finished jobs", ["status"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+)
+
 class AnalysisStatus(Enum):
     PENDING = "pending"
     RUNNING = "running"
@@ -34,6 +52,7 @@ class AnalysisJob:
     depth: int
     skill_level: int
     auth_user_id: Optional[str] = None  # Authenticated user UUID for usage tracking
+    account_tier: Optional[str] = None  # Payment tier, used for fair-share scheduling weight
     status: AnalysisStatus = AnalysisStatus.PENDING
     created_at: datetime = field(default_factory=datetime.now)
     started_at: Optional[datetime] = None
@@ -45,29 +64,110 @@ class AnalysisJob:
     error_message: Optional[str] = None
     result: Optional[Dict[str, Any]] = None
 
+def _to_timestamp(value: Optional[datetime]) -> Optional[float]:
+    return value.timestamp() if value else None
+
+def _from_timestamp(value: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(value) if value else None
+
+def _job_to_record(job: AnalysisJob) -> Dict[str, Any]:
+    """Convert a job to a job store record."""
+    return {
+        "job_id": job.job_id,
+        "user_id": job.user_id,
+        "platform": job.platform,
+        "analysis_type": job.analysis_type,
+        "game_limit": job.limit,
+        "depth": job.depth,
+        "skill_level": job.skill_level,
+        "auth_user_id": job.auth_user_id,
+        "account_tier": job.account_tier,
+        "status": job.status.value,
+        "current_phase": job.current_phase,
+        "progress_percentage": job.progress_percentage,
+        "total_games": job.total_games,
+        "analyzed_games": job.analyzed_games,
+        "error_message": job.error_message,
+        "result": job.result,
+        "created_at": _to_timestamp(job.created_at),
+        "started_at": _to_timestamp(job.started_at),
+        "completed_at": _to_timestamp(job.completed_at),
+    }
+
+def _job_from_record(record: Dict[str, Any]) -> AnalysisJob:
+    """Rebuild a job from a job store record."""
+    return AnalysisJob(
+        job_id=record["job_id"],
+        user_id=record["user_id"],
+        platform=record["platform"],
+        analysis_type=record["analysis_type"],
+        limit=record["game_limit"],
+        depth=record["depth"],
+        skill_level=record["skill_level"],
+        auth_user_id=record.get("auth_user_id"),
+        account_tier=record.get("account_tier"),
+        status=AnalysisStatus(record["status"]),
+        created_at=_from_timestamp(record.get("created_at")) or datetime.now(),
+        started_at=_from_timestamp(record.get("started_at")),
+        completed_at=_from_timestamp(record.get("completed_at")),
+        progress_percentage=record.get("progress_percentage") or 0,
+        current_phase=record.get("current_phase") or "queued",
+        total_games=record.get("total_games") or 0,
+        analyzed_games=record.get("analyzed_games") or 0,
+        error_message=record.get("error_message"),
+        result=record.get("result"),
+    )
+
+def _progress_key(job: AnalysisJob) -> str:
+    """Key used by the realtime progress endpoint and stream for a job's user."""
+    from .unified_api_server import _canonical_user_id
+    return f"{_canonical_user_id(job.user_id, job.platform)}_{job.platform.strip().lower()}"
+
 class AnalysisQueue:
     """
     Thread-safe analysis queue that manages analysis jobs and prevents
     resource exhaustion by limiting concurrent analysis processes.
+
+    When a JobStore is configured, jobs and their per-game work items are
+    persisted so queued and interrupted jobs resume after a restart. Each
+    job is leased to the node that submitted it; the lease is renewed while
+    the job is unfinished, and another node adopts the job only after the
+    lease has expired (its owner crashed or was stopped).
+
+    Games from all running jobs share one worker pool and are scheduled
+    fairly per user (weighted by tier), so a small job is not stuck behind
+    another user's large backfill.
     """
 
-    def __init__(self, max_concurrent_jobs: int = 2, max_workers_per_job: int = 4):
+    def __init__(
+        self,
+        max_concurrent_jobs: int = 2,
+        max_workers_per_job: int = 4,
+        store: Optional[JobStore] = None,
+        shared_workers: Optional[int] = None
+    ):
         """
         Initialize the analysis queue.
 
         Args:
             max_concurrent_jobs: Maximum number of analysis jobs running simultaneously
             max_workers_per_job: Maximum workers per job (reduced from 8 to 4)
+            store: Optional durable job store (None keeps jobs in memory only)
+            shared_workers: Size of the worker pool shared by all jobs (default max_workers_per_job)
         """
         self.max_concurrent_jobs = max_concurrent_jobs
         self.max_workers_per_job = max_workers_per_job
+        self.store = store
+        self.scheduler = FairShareScheduler(max_workers=shared_workers or max_workers_per_job)
         self.jobs: Dict[str, AnalysisJob] = {}
         self.queue: asyncio.Queue = asyncio.Queue()
         self.running_jobs: Dict[str, AnalysisJob] = {}
         self.running_tasks: Dict[str, asyncio.Task] = {}  # Track background tasks
         self.lock = threading.Lock()
         self.executor = ThreadPoolExecutor(max_workers=max_concurrent_jobs)
+        self.worker_id = default_worker_id()
         self._queue_processor_task: Optional[asyncio.Task] = None
+        self._lease_task: Optional[asyncio.Task] = None
         self._start_queue_processor()
 
     def _start_queue_processor(self):
@@ -83,6 +183,126 @@ class AnalysisQueue:
                 print("No event loop running, queue processor will start when server starts")
                 self._queue_processor_task = None
 
+    def _publish(self, job: AnalysisJob, event: str, data: Dict[str, Any], **counters) -> Dict[str, Any]:
+        """
+        Push a progress event to the user's and the job's SSE streams.
+
+        Returns:
+            The payload, with throughput/ETA filled in when counters were given
+        """
+        try:
+            broker = get_progress_broker()
+            payload = broker.publish(analysis_topic(_progress_key(job)), event, data, **counters)
+            broker.publish(job_topic(job.job_id), event, {**payload, "job_id": job.job_id})
+            return payload
+        except Exception as e:
+            print(f"[QUEUE] Warning: Could not publish {event} event for job {job.job_id}: {e}")
+            return data
+
+    def _persist(self, job: AnalysisJob) -> None:
+        """Write the job's current state to the durable store (if configured)."""
+        if self.store is None:
+            return
+        try:
+            self.store.save_job(_job_to_record(job))
+        except Exception as e:
+            print(f"[QUEUE] Warning: Could not persist job {job.job_id}: {e}")
+
+    def _acquire(self, job: AnalysisJob) -> bool:
+        """Take or keep this node's lease on a job; True when the store is unavailable."""
+        if self.store is None:
+            return True
+        try:
+            return self.store.acquire_job(job.job_id, self.worker_id)
+        except Exception as e:
+            print(f"[QUEUE] Warning: Could not lease job {job.job_id}: {e}")
+            return True
+
+    def _release(self, job: AnalysisJob) -> None:
+        """Give up this node's lease on a finished job."""
+        if self.store is None:
+            return
+        try:
+            self.store.release_jobs(self.worker_id, job.job_id)
+        except Exception as e:
+            print(f"[QUEUE] Warning: Could not release job {job.job_id}: {e}")
+
+    async def recover_jobs(self) -> int:
+        """
+        Adopt unfinished jobs that no live node owns and re-queue them.
+
+        Covers this node's own jobs after a restart and jobs of a node that
+        crashed or was stopped. Jobs whose owner still renews its lease are
+        left alone. Running jobs restart from their remaining work items, so
+        games that were already analyzed are not analyzed again.
+
+        Returns:
+            Number of jobs recovered
+        """
+        if self.store is None:
+            return 0
+        try:
+            records = await asyncio.to_thread(self.store.load_orphaned_jobs)
+        except Exception as e:
+            print(f"[QUEUE] Warning: Could not load unfinished jobs: {e}")
+            return 0
+
+        recovered = 0
+        for record in records:
+            with self.lock:
+                if record["job_id"] in self.jobs:
+                    continue
+            # Another node may adopt the same job at the same time; only one lease succeeds
+            try:
+                acquired = await asyncio.to_thread(self.store.acquire_job, record["job_id"], self.worker_id)
+            except Exception as e:
+                print(f"[QUEUE] Warning: Could not lease job {record['job_id']}: {e}")
+                continue
+            if not acquired:
+                continue
+            with self.lock:
+                job = _job_from_record(record)
+                job.status = AnalysisStatus.PENDING
+                job.current_phase = "queued"
+                self.jobs[job.job_id] = job
+            await asyncio.to_thread(self._persist, job)
+            await self.queue.put(job)
+            recovered += 1
+
+        if recovered:
+            print(f"[QUEUE] Recovered {recovered} unfinished job(s) from the job store")
+        return recovered
+
+    async def maintain_leases(self, interval: Optional[float] = None):
+        """Background task: renew this node's job leases and adopt jobs whose owner stopped renewing."""
+        interval = interval or self.store.lease_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.store.renew_job_leases, self.worker_id)
+                await self.recover_jobs()
+            except Exception as e:
+                print(f"[QUEUE] Warning: Could not renew job leases: {e}")
+
+    def start_lease_maintenance(self) -> None:
+        """Start renewing job leases (no-op without a job store)."""
+        if self.store is not None and (self._lease_task is None or self._lease_task.done()):
+            self._lease_task = asyncio.create_task(self.maintain_leases())
+
+    async def release_leases(self) -> None:
+        """Stop renewing and give up all of this node's job leases, so peers adopt its jobs at once."""
+        if self._lease_task is not None:
+            self._lease_task.cancel()
+            self._lease_task = None
+        if self.store is None:
+            return
+        try:
+            released = await asyncio.to_thread(self.store.release_jobs, self.worker_id)
+            if released:
+                print(f"[QUEUE] Released {released} job lease(s)")
+        except Exception as e:
+            print(f"[QUEUE] Warning: Could not release job leases: {e}")
+
     async def _process_queue(self):
         """Background task that processes the analysis queue."""
         while True:
@@ -90,6 +310,11 @@ class AnalysisQueue:
                 # Wait for a job to be available
                 job = await self.queue.get()
 
+                # Skip cancelled jobs
+                if job.status == AnalysisStatus.CANCELLED:
+                    print(f"[QUEUE] Skipping cancelled job {job.job_id}")
+                    continue
+
                 # Check if we can start this job (respect max concurrent limit)
                 if len(self.running_jobs) >= self.max_concurrent_jobs:
                     # Put the job back and wait
@@ -97,16 +322,20 @@ class AnalysisQueue:
                     await asyncio.sleep(1)  # Wait 1 second before checking again
                     continue
 
-                # Skip cancelled jobs
-                if job.status == AnalysisStatus.CANCELLED:
-                    print(f"[QUEUE] Skipping cancelled job {job.job_id}")
+                # Defer the job while memory pressure is too high to start it safely
+                if not get_admission_controller().can_admit_job(len(self.running_jobs)):
+                    if job.current_phase != "deferred":
+                        job.current_phase = "deferred"
+                        hot_log.info("QUEUE", "Deferring job %s due to memory pressure", job.job_id)
+                    await self.queue.put(job)
+                    await asyncio.sleep(5)  # Memory takes longer than a slot to free up
                     continue
 
                 # Start the job in the background (non-blocking)
                 # This allows the queue processor to continue processing other jobs
                 task = asyncio.create_task(self._start_job_wrapper(job))
                 self.running_tasks[job.job_id] = task  # Keep reference to prevent GC
-                print(f"[QUEUE] Started job {job.job_id} in background, continuing queue processing...")
+                hot_log.debug("QUEUE", "Started job %s in background, continuing queue processing...", job.job_id)
 
             except Exception as e:
                 print(f"Error in queue processor: {e}")
@@ -126,14 +355,22 @@ class AnalysisQueue:
             # Clean up task reference
             if job.job_id in self.running_tasks:
                 del self.running_tasks[job.job_id]
-                print(f"[QUEUE] Cleaned up task reference for job {job.job_id}")
+                hot_log.debug("QUEUE", "Cleaned up task reference for job %s", job.job_id)
 
     async def _start_job(self, job: AnalysisJob):
         """Start a single analysis job."""
+        # Check the lease first: another node may have adopted the job while it was queued here
+        if not await asyncio.to_thread(self._acquire, job):
+            with self.lock:
+                self.jobs.pop(job.job_id, None)
+            print(f"[QUEUE] Job {job.job_id} is owned by another node, not starting it here")
+            return
+
         with self.lock:
             job.status = AnalysisStatus.RUNNING
             job.started_at = datetime.now()
             job.current_phase = "starting"
+            _job_queue_wait.observe((job.started_at - job.created_at).total_seconds())
             self.running_jobs[job.job_id] = job
 
             # Update in-memory progress to starting
@@ -152,10 +389,13 @@ class AnalysisQueue:
                     "current_phase": "starting",
                     "estimated_time_remaining": None
                 }
+                self._publish(job, "progress", analysis_progress[progress_key])
                 print(f"[QUEUE] Initialized progress for key '{progress_key}'")
             except Exception as e:
                 print(f"Warning: Could not update in-memory progress on start: {e}")
 
+        await asyncio.to_thread(self._persist, job)
+
         try:
             # Run the analysis in a thread pool to avoid blocking
             loop = asyncio.get_event_loop()
@@ -174,9 +414,15 @@ class AnalysisQueue:
                 job.result = result
                 if job.job_id in self.running_jobs:
                     del self.running_jobs[job.job_id]
+            self._record_finished(job)
+
+            # Completion is recorded once, so a job resumed after a restart
+            # (or finished by another node) is not billed twice
+            first_completion = await asyncio.to_thread(self._mark_completed, job)
+            await asyncio.to_thread(self._release, job)
 
             # Increment usage for authenticated users when batch analysis completes
-            if job.auth_user_id:
+            if job.auth_user_id and first_completion:
                 try:
                     from .unified_api_server import usage_tracker
                     if usage_tracker:
@@ -211,6 +457,7 @@ class AnalysisQueue:
                     "estimated_time_remaining": None
                 }
                 analysis_progress[progress_key] = progress_snapshot
+                self._publish(job, "completed", progress_snapshot)
                 print(f"[QUEUE] Job {job.job_id} complete. Stored progress for key '{progress_key}': {progress_snapshot}")
             except Exception as e:
                 print(f"Warning: Could not update in-memory progress on completion: {e}")
@@ -224,8 +471,36 @@ class AnalysisQueue:
                 job.current_phase = "failed"
                 if job.job_id in self.running_jobs:
                     del self.running_jobs[job.job_id]
+            self._record_finished(job)
+            await asyncio.to_thread(self._persist, job)
+            await asyncio.to_thread(self._release, job)
+            self._publish(job, "failed", {
+                "analyzed_games": job.analyzed_games,
+                "total_games": job.total_games,
+                "is_complete": True,
+                "current_phase": "failed",
+                "error_message": job.error_message
+            })
             print(f"Analysis job {job.job_id} failed: {e}")
 
+    @staticmethod
+    def _record_finished(job: AnalysisJob) -> None:
+        """Count a finished job and record its run time."""
+        status = job.status.value
+        _jobs_finished.labels(status=status).inc()
+        if job.started_at and job.completed_at:
+            _job_duration.labels(status=status).observe((job.completed_at - job.started_at).total_seconds())
+
+    def _mark_completed(self, job: AnalysisJob) -> bool:
+        """Persist job completion; returns False if it had already been completed."""
+        if self.store is None:
+            return True
+        try:
+            return self.store.mark_job_completed(job.job_id, _job_to_record(job))
+        except Exception as e:
+            print(f"[QUEUE] Warning: Could not persist completion of job {job.job_id}: {e}")
+            return True
+
     def _run_analysis_job(self, job: AnalysisJob) -> Dict[str, Any]:
         """
         Run the actual analysis job.
@@ -235,8 +510,16 @@ class AnalysisQueue:
             # Import here to avoid circular imports
             from .parallel_analysis_engine import ParallelAnalysisEngine
 
-            # Create analysis engine with reduced worker count
-            parallel_engine = ParallelAnalysisEngine(max_workers=self.max_workers_per_job)
+            # Games are queued on the shared pool under this user's fair share;
+            # a job may use every idle worker (the scheduler throttles under memory pressure)
+            share_key = job.auth_user_id or f"{job.user_id}:{job.platform}"
+            job_executor = self.scheduler.executor_for(
+                job.job_id, share_key, self.scheduler.weight_for(job.account_tier)
+            )
+            parallel_engine = ParallelAnalysisEngine(
+                max_workers=self.scheduler.max_workers,
+                job_executor=job_executor
+            )
 
             # Create progress callback
             def update_progress(completed: int, total: int, percentage: int):
@@ -279,13 +562,30 @@ class AnalysisQueue:
                                 "current_phase": phase,
                                 "estimated_time_remaining": None
                             }
+                            # Publishing fills in per-stage throughput and the ETA
+                            progress_data = self._publish(
+                                job, "progress", progress_data, completed=completed, total=total, stage=phase
+                            )
                             analysis_progress[progress_key] = progress_data
-                            print(f"[QUEUE] ✅ Progress update for job {job.job_id} -> key '{progress_key}': analyzed={completed}/{total}, phase={phase}, percentage={percentage}%")
+                            hot_log.info("QUEUE", "Progress update", job_id=job.job_id, key=progress_key, analyzed=f"{completed}/{total}", phase=phase, percentage=percentage)
                         except Exception as e:
                             print(f"[QUEUE] ❌ ERROR: Could not update in-memory progress: {e}")
                             import traceback
                             traceback.print_exc()
 
+                        self._persist(job)
+
+            # Per-game completion events
+            def on_game_finished(game_result: Dict[str, Any]):
+                analysis = game_result.get('analysis') or {}
+                self._publish(job, "game", {
+                    "game_id": game_result.get('game_id'),
+                    "success": game_result.get('success', False),
+                    "accuracy": analysis.get('accuracy'),
+                    "total_moves": analysis.get('total_moves'),
+                    "error": game_result.get('error') or game_result.get('message')
+                })
+
             # Run analysis (this is synchronous within the thread)
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
@@ -298,7 +598,10 @@ class AnalysisQueue:
                     limit=job.limit,
                     depth=job.depth,
                     skill_level=job.skill_level,
-                    progress_callback=update_progress
+                    progress_callback=update_progress,
+                    job_store=self.store,
+                    job_id=job.job_id,
+                    game_callback=on_game_finished
                 )
             )
 
@@ -317,7 +620,8 @@ class AnalysisQueue:
         limit: int = 5,
         depth: int = 14,
         skill_level: int = 20,
-        auth_user_id: Optional[str] = None
+        auth_user_id: Optional[str] = None,
+        account_tier: Optional[str] = None
     ) -> str:
         """
         Submit a new analysis job to the queue.
@@ -345,22 +649,35 @@ class AnalysisQueue:
             limit=limit,
             depth=depth,
             skill_level=skill_level,
-            auth_user_id=auth_user_id
+            auth_user_id=auth_user_id,
+            account_tier=account_tier
         )
 
         with self.lock:
             self.jobs[job_id] = job
 
+        await asyncio.to_thread(self._persist, job)
+        await asyncio.to_thread(self._acquire, job)
+
         # Add to queue
         await self.queue.put(job)
+        _jobs_submitted.inc()
 
         print(f"[QUEUE] Analysis job {job_id} submitted for {user_id} on {platform}")
         return job_id
 
     def get_job_status(self, job_id: str) -> Optional[AnalysisJob]:
-        """Get the status of a specific job."""
+        """Get the status of a specific job (from the job store if not in memory)."""
         with self.lock:
-            return self.jobs.get(job_id)
+            job = self.jobs.get(job_id)
+        if job is None and self.store is not None:
+            try:
+                record = self.store.get_job(job_id)
+                if record:
+                    job = _job_from_record(record)
+            except Exception as e:
+                print(f"[QUEUE] Warning: Could not load job {job_id} from the job store: {e}")
+        return job
 
     def get_all_jobs(self) -> Dict[str, AnalysisJob]:
         """Get all jobs (for admin/debugging purposes)."""
@@ -376,6 +693,9 @@ class AnalysisQueue:
                     job.status = AnalysisStatus.CANCELLED
                     job.completed_at = datetime.now()
                     job.current_phase = "cancelled"
+                    self._record_finished(job)
+                    self._persist(job)
+                    self._publish(job, "cancelled", {"current_phase": "cancelled", "is_complete": True})
                     return True
         return False
 
@@ -387,6 +707,7 @@ class AnalysisQueue:
             completed = sum(1 for job in self.jobs.values() if job.status == AnalysisStatus.COMPLETED)
             failed = sum(1 for job in self.jobs.values() if job.status == AnalysisStatus.FAILED)
 
+            admission = get_admission_controller()
             return {
                 "pending_jobs": pending,
                 "running_jobs": running,
@@ -394,7 +715,11 @@ class AnalysisQueue:
                 "failed_jobs": failed,
                 "max_concurrent_jobs": self.max_concurrent_jobs,
                 "max_workers_per_job": self.max_workers_per_job,
-                "queue_size": self.queue.qsize()
+                "queue_size": self.queue.qsize(),
+                "memory_pressure": admission.level.value,
+                "admitted_concurrent_jobs": admission.limits_for(admission.level).max_concurrent_jobs,
+                "job_store": self.store.backend if self.store else None,
+                "scheduler": self.scheduler.get_stats()
             }
 
 # Global queue instance
@@ -405,7 +730,9 @@ def get_analysis_queue() -> AnalysisQueue:
     global _analysis_queue
     if _analysis_queue is None:
         _analysis_queue = AnalysisQueue(
-            max_concurrent_jobs=4,  # Increased from 2 to 4 for Railway Pro (8 GB RAM)
-            max_workers_per_job=8   # Increased from 4 to 8 (Railway Pro has 8 vCPU)
+            max_concurrent_jobs=16,  # Jobs only queue games on the shared pool, so many can be active
+            max_workers_per_job=8,  # Increased from 4 to 8 (Railway Pro has 8 vCPU)
+            store=get_job_store(),
+            shared_workers=8        # One pool for all jobs: 8 vCPU on Railway Pro
         )
     return _analysis_queue
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Cross-Process Cache Invalidation
+Propagates analytics cache invalidations between the server processes of one
+node (uvicorn workers, service groups behind the gateway).
+
+Each process keeps its own in-memory analytics cache. When a process changes a
+user's data (saves an analysis, finishes an import) it invalidates its own
+entries and appends the scope to a shared SQLite log; every other process
+polls the log and drops its entries for that scope. Invalidations therefore
+reach all processes within one poll interval.
+
+Usage:
+    log = create_invalidation_log("sqlite:///data/cache_invalidations.db")
+    log.publish("alice:lichess")
+    for scope in log.poll():        # In other processes
+        invalidate_local(scope)
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+# Rows older than this are pruned; a process that has not polled for that
+# long has long since expired the affected cache entries
+RETENTION_SECONDS = 3600.0
+
+
+class SharedInvalidationLog:
+    """Append-only log of invalidated cache scopes in a local SQLite file."""
+
+    def __init__(self, path: str, busy_timeout: float = 0.5):
+        """
+        Open the log and start reading at its current end.
+
+        Args:
+            path: Database file path
+            busy_timeout: Seconds to wait for another process's write
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.origin = f"{socket.gethostname()}:{os.getpid()}"
+        self._local = threading.local()
+        self._published = 0
+        self._received = 0
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_invalidations ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, scope TEXT NOT NULL, "
+            "origin TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM cache_invalidations").fetchone()[0]
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def publish(self, scope: str) -> None:
+        """Tell the other processes to drop their entries for scope."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO cache_invalidations (scope, origin, created_at) VALUES (?, ?, ?)",
+            (scope, self.origin, now)
+        )
+        self._published += 1
+        if self._published % 256 == 0:
+            conn.execute("DELETE FROM cache_invalidations WHERE created_at < ?", (now - RETENTION_SECONDS,))
+
+    def poll(self) -> List[str]:
+        """Scopes invalidated by other processes since the last poll (deduplicated, in order)."""
+        rows = self._conn().execute(
+            "SELECT id, scope, origin FROM cache_invalidations WHERE id > ? ORDER BY id",
+            (self._last_id,)
+        ).fetchall()
+        if not rows:
+            return []
+        self._last_id = rows[-1][0]
+        scopes = list(dict.fromkeys(scope for _, scope, origin in rows if origin != self.origin))
+        self._received += len(scopes)
+        return scopes
+
+    def stats(self) -> dict:
+        return {"path": self.path, "published": self._published, "received": self._received}
+
+
+def create_invalidation_log(url: Optional[str]) -> Optional[SharedInvalidationLog]:
+    """
+    Create a log from a URL.
+
+    Args:
+        url: sqlite:///path/to/file.db, or off/None to disable propagation
+
+    Raises:
+        ValueError: If the URL scheme is not supported
+    """
+    if not url or url.lower() in ("off", "none", "memory"):
+        return None
+    if url.startswith("sqlite:///"):
+        return SharedInvalidationLog(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported cache invalidation URL: {url.split(':', 1)[0]}://")
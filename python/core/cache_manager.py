@@ -187,6 +187,35 @@ class LRUCache:
         with self._lock:
             return len(self._cache)
 
+    def resize(self, maxsize: int) -> int:
+        """
+        Change the maximum size, evicting least recently used entries if needed.
+
+        Args:
+            maxsize: New maximum number of entries (min 1, max 1000000)
+
+        Returns:
+            Number of entries evicted
+
+        Raises:
+            ValueError: If maxsize is invalid
+        """
+        if not isinstance(maxsize, int) or maxsize < 1:
+            raise ValueError("maxsize must be a positive integer")
+        if maxsize > 1000000:
+            raise ValueError("maxsize cannot exceed 1,000,000 (memory safety)")
+
+        with self._lock:
+            self.maxsize = maxsize
+            evicted = 0
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+                evicted += 1
+
+        if evicted:
+            logger.debug(f"Resized LRU cache '{self.name}' to {maxsize} (evicted {evicted})")
+        return evicted
+
     def stats(self) -> dict:
         """
         Get cache statistics.
@@ -6,10 +6,11 @@ based on position context, move analysis, and player skill level.
 It formats the knowledge for injection into AI prompts.
 """
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Any
 import chess
 from .chess_knowledge_base import ChessKnowledgeBase, SkillLevel
 from .advanced_chess_analysis import AdvancedChessAnalyzer, TacticalPattern, PositionalConcept
+from .tactical_features import get_tactical_features
 
 
 class ChessKnowledgeRetriever:
@@ -267,61 +268,20 @@ class ChessKnowledgeRetriever:
 
     def _detect_pins(self, board: chess.Board) -> bool:
         """Detect if there are pins in the position."""
-        # Look for pieces on same rank/file/diagonal with king/queen
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if not piece:
-                continue
-
-            # Check if this piece could be pinning something
-            if piece.piece_type in [chess.BISHOP, chess.ROOK, chess.QUEEN]:
-                # Get squares this piece attacks
-                attacks = board.attacks(square)
-                for attacked_sq in attacks:
-                    attacked_piece = board.piece_at(attacked_sq)
-                    if attacked_piece and attacked_piece.color != piece.color:
-                        # Check if there's a more valuable piece behind
-                        direction = self._get_direction(square, attacked_sq)
-                        if direction:
-                            behind_sq = attacked_sq + direction
-                            if chess.square_name(behind_sq) in chess.SQUARE_NAMES:
-                                behind_piece = board.piece_at(behind_sq)
-                                if behind_piece and behind_piece.color == attacked_piece.color:
-                                    if behind_piece.piece_type > attacked_piece.piece_type or behind_piece.piece_type == chess.KING:
-                                        return True
+        # Look for a slider attacking a piece with a more valuable piece (or the king) behind it
+        for xray in get_tactical_features(board).xrays:
+            slider = board.piece_at(xray.slider)
+            attacked_piece = board.piece_at(xray.front)
+            behind_piece = board.piece_at(xray.behind)
+            if attacked_piece.color != slider.color and behind_piece.color == attacked_piece.color:
+                if behind_piece.piece_type > attacked_piece.piece_type or behind_piece.piece_type == chess.KING:
+                    return True
         return False
 
-    def _get_direction(self, from_sq: int, to_sq: int) -> Optional[int]:
-        """Get direction vector between two squares."""
-        from_rank, from_file = divmod(from_sq, 8)
-        to_rank, to_file = divmod(to_sq, 8)
-
-        rank_diff = to_rank - from_rank
-        file_diff = to_file - from_file
-
-        if rank_diff == 0 and file_diff != 0:  # Same rank
-            return 1 if file_diff > 0 else -1
-        elif file_diff == 0 and rank_diff != 0:  # Same file
-            return 8 if rank_diff > 0 else -8
-        elif abs(rank_diff) == abs(file_diff):  # Diagonal
-            return (8 if rank_diff > 0 else -8) + (1 if file_diff > 0 else -1)
-        return None
-
     def _detect_forks(self, board: chess.Board, move: chess.Move) -> bool:
         """Detect if a piece is forking (attacking 2+ pieces)."""
         # Check if the moved piece attacks 2+ enemy pieces
-        moved_piece = board.piece_at(move.to_square)
-        if not moved_piece:
-            return False
-
-        attacks = board.attacks(move.to_square)
-        attacked_pieces = []
-        for attacked_sq in attacks:
-            piece = board.piece_at(attacked_sq)
-            if piece and piece.color != moved_piece.color:
-                attacked_pieces.append(piece)
-
-        return len(attacked_pieces) >= 2
+        return move.to_square in get_tactical_features(board).forks
 
     def _detect_center_control(self, board: chess.Board, move: chess.Move) -> bool:
         """Detect if move involves center control (d4, d5, e4, e5)."""
@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+"""
+Durable AI Comment Store
+Keeps generated move comments across processes and restarts, so a position
+that has been commented once is never sent to the LLM again.
+
+Backends:
+- SQLite (default, local file shared by every worker on the node)
+- Postgres (production, shared by all nodes) via psycopg2, selected with a
+  postgres:// URL
+
+Features:
+- Keyed by the generator's cache key (position + move + quality + ELO bucket)
+- Bounded by stored bytes with least-recently-used eviction; the byte total
+  is kept by triggers, so checking it never scans the table, and eviction
+  deletes in bounded batches
+- A hit is a single read: recency updates are buffered and written in one
+  transaction per batch
+- Postgres connections come from a small thread-safe pool
+- Hit/miss counter for the comment hit rate
+- Tiered in front of the per-process LRU cache, which keeps hot entries
+  without a database round trip
+
+Usage:
+    store = create_comment_store("sqlite:///data/ai_comments.db")
+    cache = TieredCommentCache(LRUCache(maxsize=500, ttl=86400), store)
+    comment = cache.get(cache_key)
+    cache.set(cache_key, comment)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .metrics_registry import get_metrics_registry
+
+# Try to import psycopg2 for the Postgres backend, but make it optional
+try:
+    import psycopg2
+    import psycopg2.pool
+    POSTGRES_AVAILABLE = True
+except ImportError:
+    POSTGRES_AVAILABLE = False
+    psycopg2 = None  # type: ignore
+
+_metrics = get_metrics_registry()
+_store_results = _metrics.counter(
+    "ai_comment_store_total", "Durable AI comment store lookups", ["backend", "result"]
+)
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS ai_comments (
+        key TEXT PRIMARY KEY,
+        comment TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0,
+        created_at DOUBLE PRECISION NOT NULL,
+        last_used DOUBLE PRECISION NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_ai_comments_last_used ON ai_comments (last_used)",
+)
+
+# Running byte total of the stored comments, kept by triggers of each backend
+_SIZE_TABLE = (
+    "CREATE TABLE IF NOT EXISTS ai_comment_store_size (id INTEGER PRIMARY KEY CHECK (id = 0), bytes BIGINT NOT NULL)"
+)
+
+_SQLITE_SIZE_SCHEMA = (
+    _SIZE_TABLE,
+    "INSERT OR IGNORE INTO ai_comment_store_size (id, bytes) SELECT 0, COALESCE(SUM(size), 0) FROM ai_comments",
+    """
+    CREATE TRIGGER IF NOT EXISTS ai_comments_size_insert AFTER INSERT ON ai_comments
+    BEGIN UPDATE ai_comment_store_size SET bytes = bytes + NEW.size WHERE id = 0; END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS ai_comments_size_delete AFTER DELETE ON ai_comments
+    BEGIN UPDATE ai_comment_store_size SET bytes = bytes - OLD.size WHERE id = 0; END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS ai_comments_size_update AFTER UPDATE OF size ON ai_comments
+    BEGIN UPDATE ai_comment_store_size SET bytes = bytes + NEW.size - OLD.size WHERE id = 0; END
+    """,
+)
+
+_POSTGRES_SIZE_SCHEMA = (
+    _SIZE_TABLE,
+    "INSERT INTO ai_comment_store_size (id, bytes) SELECT 0, COALESCE(SUM(size), 0) FROM ai_comments "
+    "ON CONFLICT (id) DO NOTHING",
+    """
+    CREATE OR REPLACE FUNCTION ai_comments_track_size() RETURNS trigger AS $$
+    BEGIN
+        UPDATE ai_comment_store_size
+        SET bytes = bytes
+            + (CASE WHEN TG_OP = 'DELETE' THEN 0 ELSE NEW.size END)
+            - (CASE WHEN TG_OP = 'INSERT' THEN 0 ELSE OLD.size END)
+        WHERE id = 0;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'ai_comments_size') THEN
+            CREATE TRIGGER ai_comments_size AFTER INSERT OR DELETE OR UPDATE OF size ON ai_comments
+            FOR EACH ROW EXECUTE PROCEDURE ai_comments_track_size();
+        END IF;
+    END
+    $$
+    """,
+)
+
+# Keys deleted per statement when evicting
+_EVICT_BATCH = 500
+
+
+class CommentStore:
+    """
+    Size-bounded store of generated comments shared between processes.
+
+    Database errors propagate; TieredCommentCache treats a failing store as
+    a miss.
+    """
+
+    backend = "base"
+    size_schema: Sequence[str] = ()
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, evict_every: int = 64,
+                 touch_batch: int = 64, touch_interval: float = 30.0):
+        """
+        Initialize the store.
+
+        Args:
+            max_bytes: Comment bytes kept before evicting
+            evict_every: Writes between size checks
+            touch_batch: Buffered hits that trigger a recency write
+            touch_interval: Seconds after which buffered hits are written anyway
+        """
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+        self.max_bytes = max_bytes
+        self.evict_every = max(1, evict_every)
+        self.touch_batch = max(1, touch_batch)
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+        self._writes = 0
+        # Hits per key not yet written, with the time of the last hit
+        self._touches: Dict[str, List[float]] = {}
+        self._touches_since = time.monotonic()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evicted": 0}
+
+    # --- Backend hooks -------------------------------------------------
+
+    def _connect(self):
+        raise NotImplementedError
+
+    def _release(self, conn) -> None:
+        pass
+
+    def _begin(self, cursor) -> None:
+        """Open a transaction for several statements (implicit unless overridden)."""
+
+    def _sql(self, query: str) -> str:
+        """Translate the shared '?' placeholder style for the backend."""
+        return query
+
+    # --- Helpers -------------------------------------------------------
+
+    def _execute(self, query: str, params: Sequence[Any] = (), fetch: bool = False):
+        """Run a single statement in its own transaction."""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(self._sql(query), tuple(params))
+            rows = cursor.fetchall() if fetch else None
+            rowcount = cursor.rowcount
+            conn.commit()
+            return rows if fetch else rowcount
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._release(conn)
+
+    def _transaction(self, statements: Sequence[Tuple[str, Sequence[Any]]]) -> None:
+        """Run several statements in one transaction."""
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            self._begin(cursor)
+            for query, params in statements:
+                cursor.execute(self._sql(query), tuple(params))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._release(conn)
+
+    def initialize(self) -> None:
+        """Create the table, index and byte total if they do not exist."""
+        self._transaction([(statement, ()) for statement in (*_SCHEMA, *self.size_schema)])
+
+    def _total(self) -> int:
+        rows = self._execute("SELECT bytes FROM ai_comment_store_size WHERE id = 0", fetch=True)
+        return rows[0][0] if rows else 0
+
+    # --- Comments ------------------------------------------------------
+
+    def get(self, key: str) -> Optional[str]:
+        """Stored comment for key, or None."""
+        rows = self._execute("SELECT comment FROM ai_comments WHERE key = ?", (key,), fetch=True)
+        if not rows:
+            self._stats["misses"] += 1
+            _store_results.labels(backend=self.backend, result="miss").inc()
+            return None
+        self._stats["hits"] += 1
+        _store_results.labels(backend=self.backend, result="hit").inc()
+        self._touch(key)
+        return rows[0][0]
+
+    def _touch(self, key: str) -> None:
+        """Buffer a hit; write the buffer once it is large or old enough."""
+        now = time.time()
+        with self._lock:
+            touch = self._touches.setdefault(key, [0, now])
+            touch[0] += 1
+            touch[1] = now
+            due = (len(self._touches) >= self.touch_batch
+                   or time.monotonic() - self._touches_since >= self.touch_interval)
+        if due:
+            try:
+                self.flush_touches()
+            except Exception as e:
+                # Only costs recency information for eviction
+                print(f"[AI_COMMENT_STORE] Could not record comment hits: {e}")
+
+    def flush_touches(self) -> int:
+        """Write buffered hits (hit counts and last use) in one transaction."""
+        with self._lock:
+            touches, self._touches = self._touches, {}
+            self._touches_since = time.monotonic()
+        if touches:
+            self._transaction([
+                ("UPDATE ai_comments SET last_used = ?, hits = hits + ? WHERE key = ?", (last_used, hits, key))
+                for key, (hits, last_used) in touches.items()
+            ])
+        return len(touches)
+
+    def set(self, key: str, comment: str) -> None:
+        """Store or replace the comment for key."""
+        now = time.time()
+        self._execute(
+            "INSERT INTO ai_comments (key, comment, size, hits, created_at, last_used) "
+            "VALUES (?, ?, ?, 0, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET comment = excluded.comment, size = excluded.size, "
+            "last_used = excluded.last_used",
+            (key, comment, len(comment.encode("utf-8")), now, now)
+        )
+        self._stats["writes"] += 1
+        self._writes += 1
+        if self._writes % self.evict_every == 0:
+            self.evict()
+
+    def evict(self) -> int:
+        """Drop least recently used comments down to 90% of the budget once over it."""
+        if self._total() <= self.max_bytes:
+            return 0
+        # Recent hits decide which comments are least recently used
+        self.flush_touches()
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        while True:
+            excess = self._total() - target
+            if excess <= 0:
+                break
+            rows = self._execute(
+                "SELECT key, size FROM ai_comments ORDER BY last_used LIMIT ?", (_EVICT_BATCH,), fetch=True
+            )
+            if not rows:
+                break
+            victims: List[str] = []
+            for key, size in rows:
+                if excess <= 0:
+                    break
+                victims.append(key)
+                excess -= size
+            self._execute(f"DELETE FROM ai_comments WHERE key IN ({', '.join('?' for _ in victims)})", victims)
+            evicted += len(victims)
+        self._stats["evicted"] += evicted
+        return evicted
+
+    def clear(self) -> int:
+        return self._execute("DELETE FROM ai_comments")
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._execute("SELECT COUNT(*) FROM ai_comments", fetch=True)[0][0]
+        size = self._total()
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "backend": self.backend,
+            "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class SQLiteCommentStore(CommentStore):
+    """SQLite-backed comment store shared by the processes of one node."""
+
+    backend = "sqlite"
+    size_schema = _SQLITE_SIZE_SCHEMA
+
+    def __init__(self, path: str, **kwargs):
+        """
+        Initialize the SQLite store and create the schema.
+
+        Args:
+            path: Database file path
+        """
+        super().__init__(**kwargs)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._local = threading.local()
+        self.initialize()
+
+    def _connect(self):
+        # One autocommit connection per thread, kept open between lookups
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _begin(self, cursor) -> None:
+        # Autocommit connection: open the write transaction explicitly
+        cursor.execute("BEGIN IMMEDIATE")
+
+
+class PostgresCommentStore(CommentStore):
+    """Postgres-backed comment store shared by all nodes."""
+
+    backend = "postgres"
+    size_schema = _POSTGRES_SIZE_SCHEMA
+
+    def __init__(self, dsn: str, pool_size: int = 4, **kwargs):
+        """
+        Initialize the Postgres store and create the schema.
+
+        Args:
+            dsn: libpq connection string or postgres:// URL
+            pool_size: Connections kept open for concurrent lookups
+
+        Raises:
+            RuntimeError: If psycopg2 is not installed
+        """
+        if not POSTGRES_AVAILABLE:
+            raise RuntimeError("psycopg2 is required for the Postgres comment store (pip install psycopg2-binary)")
+        super().__init__(**kwargs)
+        self.dsn = dsn
+        pool_size = max(1, pool_size)
+        self._pool = psycopg2.pool.ThreadedConnectionPool(1, pool_size, dsn)
+        # The pool raises instead of waiting when every connection is in use
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self.initialize()
+
+    def _connect(self):
+        self._slots.acquire()
+        try:
+            return self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, conn) -> None:
+        try:
+            # Connections the server dropped are discarded; the pool opens a new one
+            self._pool.putconn(conn, close=bool(conn.closed))
+        finally:
+            self._slots.release()
+
+    def _sql(self, query: str) -> str:
+        return query.replace("?", "%s")
+
+
+def create_comment_store(url: Optional[str], **kwargs) -> Optional[CommentStore]:
+    """
+    Create a comment store from a URL.
+
+    Args:
+        url: sqlite:///path/to/file.db, postgres(ql)://user:pass@host/db,
+            or off/None to keep comments in memory only
+
+    Returns:
+        CommentStore instance, or None when the store is disabled
+
+    Raises:
+        ValueError: If the URL scheme is not supported
+    """
+    if not url or url.lower() in ("off", "none", "memory"):
+        return None
+    if url.startswith("sqlite:///"):
+        return SQLiteCommentStore(url[len("sqlite:///"):], **kwargs)
+    if url.startswith(("postgres://", "postgresql://")):
+        return PostgresCommentStore(url, **kwargs)
+    raise ValueError(f"Unsupported comment store URL: {url.split(':', 1)[0]}://")
+
+
+class TieredCommentCache:
+    """
+    In-process LRU cache in front of the durable store.
+
+    Has the get/set interface of LRUCache, so the generator uses it the same
+    way. Comments found in the store are copied into the local cache; store
+    errors are logged and treated as misses.
+    """
+
+    def __init__(self, local, store: CommentStore):
+        self.local = local
+        self.store = store
+
+    def get(self, key: str, default: Any = None) -> Any:
+        comment = self.local.get(key)
+        if comment is not None:
+            return comment
+        try:
+            comment = self.store.get(key)
+        except Exception as e:
+            print(f"[AI_COMMENT_STORE] Read failed: {e}")
+            return default
+        if comment is None:
+            return default
+        self.local.set(key, comment)
+        return comment
+
+    def set(self, key: str, value: str) -> None:
+        self.local.set(key, value)
+        try:
+            self.store.set(key, value)
+        except Exception as e:
+            # Losing a write only costs a future LLM request
+            print(f"[AI_COMMENT_STORE] Write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"local": self.local.stats(), "store": self.store.stats()}
+
+
+# Global store instance
+_comment_store: Optional[CommentStore] = None
+_comment_store_initialized = False
+_store_lock = threading.Lock()
+
+
+def get_comment_store() -> Optional[CommentStore]:
+    """
+    Get the global comment store, configured from AI_COMMENT_STORE_URL.
+
+    Defaults to a SQLite file next to the server; point it at the production
+    database with a postgres:// URL, or set AI_COMMENT_STORE_URL=off to keep
+    comments in the per-process cache only. AI_COMMENT_STORE_MAX_MB bounds the
+    stored comment bytes. A store that cannot be opened is disabled rather than
+    blocking comment generation.
+
+    Returns:
+        CommentStore instance, or None when the store is disabled or unavailable
+    """
+    global _comment_store, _comment_store_initialized
+
+    if not _comment_store_initialized:
+        with _store_lock:
+            if not _comment_store_initialized:
+                default_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "ai_comments.db")
+                url = os.getenv("AI_COMMENT_STORE_URL", f"sqlite:///{default_path}")
+                try:
+                    _comment_store = create_comment_store(
+                        url,
+                        max_bytes=int(float(os.getenv("AI_COMMENT_STORE_MAX_MB", "64")) * 1024 * 1024)
+                    )
+                    if _comment_store is not None:
+                        print(f"[AI_COMMENT_STORE] Using {_comment_store.backend} comment store")
+                except Exception as e:
+                    print(f"[AI_COMMENT_STORE] Could not open comment store, comments stay per process: {e}")
+                    _comment_store = None
+                _comment_store_initialized = True
+
+    return _comment_store
@@ -18,8 +18,18 @@ from typing import Optional
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
 
+from .metrics_registry import get_metrics_registry
+
 logger = logging.getLogger(__name__)
 
+_metrics = get_metrics_registry()
+_acquire_wait = _metrics.histogram(
+    "engine_pool_acquire_wait_seconds", "Time spent acquiring a pooled Stockfish engine", ["pool"]
+)
+_acquire_timeouts = _metrics.counter(
+    "engine_pool_acquire_timeouts_total", "Engine acquisitions that timed out", ["pool"]
+)
+
 
 @dataclass
 class EngineInfo:
@@ -143,6 +153,7 @@ class StockfishEnginePool:
             RuntimeError: If pool is shutting down
         """
         engine_info = None
+        acquire_started = time.perf_counter()
 
         async with self._lock:
             # Prevent new engine creation during shutdown
@@ -175,6 +186,7 @@ class StockfishEnginePool:
         wait_start = time.time()
         while engine_info is None:
             if time.time() - wait_start > 30.0:
+                _acquire_timeouts.labels(pool="async").inc()
                 raise RuntimeError(
                     f"Timed out waiting for engine from pool after 30s "
                     f"(pool size: {self.max_size})"
@@ -192,6 +204,7 @@ class StockfishEnginePool:
                         engine_info = info
                         break
 
+        _acquire_wait.labels(pool="async").observe(time.perf_counter() - acquire_started)
         try:
             yield engine_info.engine
         finally:
@@ -0,0 +1,311 @@
+"""
+Entitlement Resolver
+Resolves what a user is entitled to (auth user, linked usernames, tier,
+subscription status, tier limits and current 24-hour usage) in a single
+database round trip and caches the result briefly.
+
+Features:
+- One RPC (get_user_entitlements) instead of the user_profiles ->
+  authenticated_users lookup chain plus a check_usage_limits call
+- Short-TTL cache shared by premium checks and usage-limit checks
+- Invalidation on usage increments and subscription changes, optionally
+  forwarded to the other server processes (on_invalidate)
+- Fallback to table queries while the RPC migration is not applied
+
+Usage:
+    entitlements = EntitlementService(supabase_service)
+    entitlement = await entitlements.resolve(auth_user_id)
+    if entitlement.is_premium: ...
+    can_proceed, stats = entitlement.usage_check('import')
+    entitlements.invalidate(auth_user_id)
+"""
+
+import asyncio
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .cache_manager import TTLDict
+
+logger = logging.getLogger(__name__)
+
+# Seconds a resolved entitlement is reused. Usage increments and subscription
+# changes invalidate explicitly, so this only bounds staleness from writes made
+# elsewhere (other workers, the Stripe dashboard, SQL).
+ENTITLEMENT_TTL = float(os.getenv('ENTITLEMENT_CACHE_TTL', '30'))
+
+PREMIUM_TIERS = ('pro', 'pro_monthly', 'pro_yearly', 'enterprise')
+ACTIVE_SUBSCRIPTION_STATUSES = ('active', 'trialing')
+
+_UUID_PATTERN = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.IGNORECASE)
+
+
+def is_auth_user_id(user_id: str) -> bool:
+    """True if user_id looks like an auth user UUID rather than a platform username."""
+    return bool(user_id) and bool(_UUID_PATTERN.match(user_id))
+
+
+@dataclass
+class Entitlement:
+    """Resolved entitlements of one user."""
+    found: bool
+    auth_user_id: Optional[str] = None
+    account_tier: str = 'free'
+    subscription_status: Optional[str] = None
+    subscription_end_date: Optional[str] = None
+    linked_usernames: Dict[str, str] = field(default_factory=dict)
+    import_limit: Optional[int] = None
+    analysis_limit: Optional[int] = None
+    current_imports: int = 0
+    current_analyses: int = 0
+    reset_at: Optional[str] = None
+
+    @classmethod
+    def from_row(cls, data: Dict[str, Any]) -> 'Entitlement':
+        """Build from the get_user_entitlements JSON."""
+        linked = {}
+        if data.get('chess_com_username'):
+            linked['chess.com'] = data['chess_com_username']
+        if data.get('lichess_username'):
+            linked['lichess'] = data['lichess_username']
+        auth_user_id = data.get('auth_user_id')
+        return cls(
+            found=bool(data.get('found')),
+            auth_user_id=str(auth_user_id) if auth_user_id else None,
+            account_tier=data.get('account_tier') or 'free',
+            subscription_status=data.get('subscription_status'),
+            subscription_end_date=data.get('subscription_end_date'),
+            linked_usernames=linked,
+            import_limit=data.get('import_limit'),
+            analysis_limit=data.get('analysis_limit'),
+            current_imports=data.get('current_imports') or 0,
+            current_analyses=data.get('current_analyses') or 0,
+            reset_at=data.get('reset_at'),
+        )
+
+    @property
+    def is_premium(self) -> bool:
+        """Premium tier with an active (or trialing) subscription."""
+        return (
+            self.found
+            and self.account_tier in PREMIUM_TIERS
+            and self.subscription_status in ACTIVE_SUBSCRIPTION_STATUSES
+        )
+
+    def remaining(self, action_type: str) -> Optional[int]:
+        """Remaining imports/analyses in the current window (None = unlimited)."""
+        limit, used = self._limit_and_usage(action_type)
+        return None if limit is None else max(0, limit - used)
+
+    def _limit_and_usage(self, action_type: str) -> Tuple[Optional[int], int]:
+        if action_type == 'import':
+            return self.import_limit, self.current_imports
+        return self.analysis_limit, self.current_analyses
+
+    def usage_check(self, action_type: str) -> Tuple[bool, Dict]:
+        """
+        Same decision and stats as the check_usage_limits RPC.
+
+        Args:
+            action_type: 'import' or 'analyze'
+
+        Returns:
+            Tuple of (can_proceed: bool, stats: dict)
+        """
+        if not self.found:
+            return True, {
+                'can_proceed': True,
+                'is_anonymous': True,
+                'reason': 'Anonymous users have temporary unlimited access'
+            }
+
+        limit, used = self._limit_and_usage(action_type)
+        if limit is None:
+            return True, {'can_proceed': True, 'is_unlimited': True, 'account_tier': self.account_tier}
+
+        can_proceed = used < limit
+        reason = None
+        if not can_proceed:
+            label = 'Import' if action_type == 'import' else 'Analysis'
+            reason = f'{label} limit reached: {used}/{limit}'
+        return can_proceed, {
+            'can_proceed': can_proceed,
+            'account_tier': self.account_tier,
+            'current_imports': self.current_imports,
+            'current_analyses': self.current_analyses,
+            'import_limit': self.import_limit,
+            'analysis_limit': self.analysis_limit,
+            'reset_at': self.reset_at,
+            'reason': reason
+        }
+
+
+class EntitlementService:
+    """
+    Resolves and caches user entitlements.
+
+    Entries are keyed by auth user id, or by platform and username for
+    username lookups; invalidate() drops every entry of an auth user.
+    Users that are not found are not cached, so a fresh signup or account
+    link is visible immediately.
+    """
+
+    # Target passed to on_invalidate by invalidate_all()
+    ALL = "*"
+
+    def __init__(
+        self,
+        supabase_client,
+        ttl: float = ENTITLEMENT_TTL,
+        on_invalidate: Optional[Callable[[str], None]] = None
+    ):
+        """
+        Initialize entitlement service.
+
+        Args:
+            supabase_client: Supabase client instance (should use service role key)
+            ttl: Seconds a resolved entitlement is reused
+            on_invalidate: Called with the auth user id (or ALL) after each
+                local invalidation, to forward it to other processes
+
+        Raises:
+            ValueError: If supabase_client is None
+        """
+        if supabase_client is None:
+            raise ValueError("Supabase client is required")
+        self.supabase = supabase_client
+        self.cache = TTLDict(ttl=ttl, name="entitlements")
+        self.on_invalidate = on_invalidate
+        self._rpc_available = True
+
+    @staticmethod
+    def _key(user_id: str, platform: Optional[str]) -> str:
+        return user_id if is_auth_user_id(user_id) else f"{platform}:{user_id}"
+
+    async def resolve(self, user_id: str, platform: Optional[str] = None) -> Entitlement:
+        """
+        Entitlements of an auth user id, or of the auth user linked to a username.
+
+        Args:
+            user_id: Auth user UUID, or platform username (canonical form)
+            platform: Platform of a username (ignored for UUIDs)
+
+        Returns:
+            Entitlement (found=False if no authenticated user matches)
+        """
+        if not is_auth_user_id(user_id) and not platform:
+            return Entitlement(found=False)
+
+        key = self._key(user_id, platform)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        if self._rpc_available:
+            try:
+                entitlement = await self._resolve_rpc(user_id, platform)
+            except Exception as e:
+                if 'get_user_entitlements' not in str(e) and 'PGRST202' not in str(e):
+                    raise
+                logger.warning(f"[ENTITLEMENTS] get_user_entitlements unavailable, using table queries: {e}")
+                self._rpc_available = False
+                entitlement = await self._resolve_tables(user_id, platform)
+        else:
+            entitlement = await self._resolve_tables(user_id, platform)
+
+        if entitlement.found:
+            self.cache.set(key, entitlement)
+        return entitlement
+
+    async def _resolve_rpc(self, user_id: str, platform: Optional[str]) -> Entitlement:
+        result = await asyncio.to_thread(
+            lambda: self.supabase.rpc(
+                'get_user_entitlements',
+                {'p_user_id': user_id, 'p_platform': platform}
+            ).execute()
+        )
+        return Entitlement.from_row(result.data or {})
+
+    async def _resolve_tables(self, user_id: str, platform: Optional[str]) -> Entitlement:
+        """Same lookup as get_user_entitlements with individual table queries."""
+        auth_user_id = user_id
+        if not is_auth_user_id(user_id):
+            profile = await asyncio.to_thread(
+                lambda: self.supabase.table('user_profiles').select('auth_user_id')
+                .eq('platform', platform).eq('user_id', user_id).limit(1).execute()
+            )
+            if not profile.data or not profile.data[0].get('auth_user_id'):
+                return Entitlement(found=False)
+            auth_user_id = profile.data[0]['auth_user_id']
+
+        user_result = await asyncio.to_thread(
+            lambda: self.supabase.table('authenticated_users').select(
+                'account_tier, subscription_status, subscription_end_date, chess_com_username, lichess_username'
+            ).eq('id', auth_user_id).execute()
+        )
+        if not user_result.data:
+            return Entitlement(found=False, auth_user_id=auth_user_id)
+        row = {'found': True, 'auth_user_id': auth_user_id, **user_result.data[0]}
+
+        for tier_id in (row.get('account_tier'), 'free'):
+            tier_result = await asyncio.to_thread(
+                lambda tier_id=tier_id: self.supabase.table('payment_tiers').select(
+                    'import_limit, analysis_limit'
+                ).eq('id', tier_id).execute()
+            )
+            if tier_result.data:
+                row.update(tier_result.data[0])
+                break
+
+        usage_result = await asyncio.to_thread(
+            lambda: self.supabase.rpc(
+                'check_usage_limits',
+                {'p_user_id': auth_user_id, 'p_action_type': 'import'}
+            ).execute()
+        )
+        usage = usage_result.data or {}
+        row['current_imports'] = usage.get('current_imports', 0)
+        row['current_analyses'] = usage.get('current_analyses', 0)
+        row['reset_at'] = usage.get('reset_at')
+        return Entitlement.from_row(row)
+
+    def peek(self, user_id: str, platform: Optional[str] = None) -> Optional[Entitlement]:
+        """Cached entitlement without resolving (None if not cached)."""
+        return self.cache.get(self._key(user_id, platform))
+
+    def invalidate(self, auth_user_id: str, propagate: bool = True) -> int:
+        """
+        Drop cached entitlements of an auth user (also those resolved by username).
+
+        Args:
+            auth_user_id: Auth user whose entries are dropped
+            propagate: Forward to on_invalidate (False when applying another process's invalidation)
+        """
+        if not auth_user_id:
+            return 0
+        keys = [
+            key for key, entitlement in self.cache.items()
+            if key == auth_user_id or entitlement.auth_user_id == auth_user_id
+        ]
+        for key in keys:
+            self.cache.delete(key)
+        if propagate:
+            self._forward(auth_user_id)
+        return len(keys)
+
+    def invalidate_all(self, propagate: bool = True) -> int:
+        """Drop every cached entitlement (e.g. after a Stripe webhook)."""
+        cleared = self.cache.clear()
+        if propagate:
+            self._forward(self.ALL)
+        return cleared
+
+    def _forward(self, target: str) -> None:
+        if self.on_invalidate is None:
+            return
+        try:
+            self.on_invalidate(target)
+        except Exception as e:
+            logger.warning(f"Could not forward entitlement invalidation for {target}: {e}")
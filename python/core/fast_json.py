@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Fast JSON Responses
+Serializes large analytics payloads once and serves the encoded bytes.
+
+FastAPI encodes a returned dict by walking it with jsonable_encoder (and
+validating it against response_model) before dumping it to JSON, on every
+request, including cache hits. For payloads that are already cached, that walk
+dominates the request's CPU time. This module lets endpoints skip it:
+
+- dumps() encodes with orjson when installed, or compact stdlib json otherwise
+- EncodedPayload keeps a cached value together with its memoized JSON body and
+  gzip body, so each is produced at most once per cache entry
+- EncodedJSONResponse serves those bytes directly (pre-compressed when the
+  client accepts gzip), bypassing FastAPI's encoder
+- FastJSONResponse is a drop-in JSONResponse rendered with dumps()
+
+Usage:
+    payload = EncodedPayload(result)
+    return EncodedJSONResponse.from_payload(payload, request)
+"""
+
+import datetime
+import decimal
+import enum
+import gzip
+import json
+import math
+import os
+import threading
+import uuid
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# Bodies at least this large are gzipped for clients that accept it
+GZIP_MIN_BYTES = int(os.getenv("RESPONSE_GZIP_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+
+
+def _default(value: Any) -> Any:
+    """Encode the non-JSON types that show up in analytics payloads."""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _has_non_finite(value: Any) -> bool:
+    """Whether a NaN or infinite float is nested anywhere in value."""
+    if isinstance(value, float):
+        return not math.isfinite(value)
+    if isinstance(value, dict):
+        return any(_has_non_finite(item) for item in value.values())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return any(_has_non_finite(item) for item in value)
+    return False
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Encode obj as compact UTF-8 JSON.
+
+    Pydantic models are dumped in JSON mode, matching what FastAPI sends for a
+    response_model. Non-finite floats raise ValueError, as they do in
+    Starlette's JSONResponse.
+    """
+    if isinstance(obj, BaseModel):
+        obj = obj.model_dump(mode="json")
+    if ORJSON_AVAILABLE:
+        try:
+            body = orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # orjson rejects some inputs stdlib json accepts (e.g. ints over 64 bits)
+            pass
+        else:
+            # orjson writes NaN and Infinity as null; only look for them when it did
+            if b"null" in body and _has_non_finite(obj):
+                raise ValueError("Out of range float values are not JSON compliant")
+            return body
+    return json.dumps(
+        obj, default=_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def accepts_gzip(request: Optional[Any]) -> bool:
+    """Whether the request's Accept-Encoding allows gzip."""
+    if request is None:
+        return False
+    return "gzip" in request.headers.get("accept-encoding", "").lower()
+
+
+class EncodedPayload:
+    """
+    A cached value with its lazily encoded JSON and gzip bodies.
+
+    The value stays available for callers that post-process cached data; the
+    encodings are computed on first use and reused for the entry's lifetime.
+    """
+
+    __slots__ = ("data", "_body", "_gzip_body", "_lock")
+
+    def __init__(self, data: Any):
+        self.data = data
+        self._body: Optional[bytes] = None
+        self._gzip_body: Optional[bytes] = None
+        self._lock = threading.Lock()
+
+    @property
+    def body(self) -> bytes:
+        if self._body is None:
+            with self._lock:
+                if self._body is None:
+                    self._body = dumps(self.data)
+        return self._body
+
+    @property
+    def gzip_body(self) -> bytes:
+        if self._gzip_body is None:
+            body = self.body
+            with self._lock:
+                if self._gzip_body is None:
+                    self._gzip_body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        return self._gzip_body
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the encodings produced so far."""
+        return len(self._body or b"") + len(self._gzip_body or b"")
+
+
+class EncodedJSONResponse(Response):
+    """JSON response whose body is already encoded."""
+
+    media_type = "application/json"
+
+    @classmethod
+    def from_payload(cls, payload: EncodedPayload, request: Optional[Any] = None) -> "EncodedJSONResponse":
+        """Serve a payload, pre-compressed if it is large and the client accepts gzip."""
+        body = payload.body
+        if len(body) >= GZIP_MIN_BYTES and accepts_gzip(request):
+            # Content-Encoding makes GZipMiddleware pass the body through untouched
+            return cls(
+                content=payload.gzip_body,
+                headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+            )
+        return cls(content=body)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps() (orjson when available)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
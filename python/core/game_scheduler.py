@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Fair-Share Game Scheduler
+Schedules individual games from all running analysis jobs onto one shared worker pool.
+
+Each job submits its games under a share key (the user). Workers pick the next
+game by stride scheduling: every share key advances a virtual clock by
+1/weight per dispatched game and the key with the lowest clock goes next.
+A 5-game job therefore interleaves with a 500-game backfill instead of
+waiting behind it, and paid tiers get a proportionally larger share.
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .admission_controller import get_admission_controller
+
+# Relative share of workers per account tier (anonymous/unknown users get 1.0)
+DEFAULT_TIER_WEIGHTS: Dict[str, float] = {
+    "free": 1.0,
+    "pro_monthly": 2.0,
+    "pro_yearly": 2.0,
+}
+
+# (job_id, fn, args, result future)
+_WorkItem = Tuple[str, Callable[..., Any], Tuple[Any, ...], Future]
+
+
+class FairShareScheduler:
+    """
+    Shares one process pool across analysis jobs with weighted fair queuing.
+
+    Features:
+    - Per-user stride scheduling (small jobs are not starved by backfills)
+    - Tier weights (paid tiers get a larger share)
+    - Work conserving: idle workers pull games from any job
+    - Worker count follows memory admission control
+    - Per-job cancellation of queued games
+    - Recreates the pool if a worker process dies
+
+    Usage:
+        scheduler = FairShareScheduler(max_workers=8)
+        executor = scheduler.executor_for(job_id, share_key="user-1", weight=2.0)
+        future = executor.submit(analyze_game_worker, game_data)
+        executor.shutdown()  # drops this job's queued games
+    """
+
+    def __init__(self, max_workers: int, tier_weights: Optional[Dict[str, float]] = None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_workers: Size of the shared worker pool
+            tier_weights: Overrides for DEFAULT_TIER_WEIGHTS
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        self.tier_weights = {**DEFAULT_TIER_WEIGHTS, **(tier_weights or {})}
+
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._queues: Dict[str, Deque[_WorkItem]] = {}
+        self._weights: Dict[str, float] = {}
+        self._pass: Dict[str, float] = {}
+        self._virtual_time = 0.0
+        self._running = 0
+        self._dispatched: Dict[str, int] = {}
+
+    def weight_for(self, account_tier: Optional[str]) -> float:
+        """Scheduling weight for an account tier."""
+        if not account_tier:
+            return 1.0
+        return self.tier_weights.get(account_tier, 1.0)
+
+    def executor_for(self, job_id: str, share_key: str, weight: float = 1.0) -> "JobExecutor":
+        """Executor-like view of the shared pool for a single job."""
+        return JobExecutor(self, job_id, share_key, weight)
+
+    def submit(self, share_key: str, weight: float, job_id: str, fn: Callable[..., Any], *args: Any) -> Future:
+        """
+        Queue a game for the shared pool.
+
+        Args:
+            share_key: Fair-share bucket (normally the user)
+            weight: Relative share for the bucket (> 0)
+            job_id: Owning job, used for cancellation
+            fn: Picklable worker function
+            *args: Arguments for fn
+
+        Returns:
+            Future resolved with fn's result
+        """
+        if weight <= 0:
+            raise ValueError("weight must be positive")
+        future: Future = Future()
+        with self._lock:
+            queue = self._queues.get(share_key)
+            if queue is None:
+                queue = self._queues[share_key] = deque()
+            if not queue:
+                # A returning user starts at the current virtual time so it
+                # cannot claim a burst for the time it was idle
+                self._pass[share_key] = max(self._pass.get(share_key, 0.0), self._virtual_time)
+            self._weights[share_key] = weight
+            queue.append((job_id, fn, args, future))
+        self._dispatch()
+        return future
+
+    def cancel_job(self, job_id: str) -> int:
+        """
+        Drop a job's queued (not yet started) games.
+
+        Returns:
+            Number of games cancelled
+        """
+        cancelled: List[Future] = []
+        with self._lock:
+            for share_key, queue in self._queues.items():
+                kept = deque(item for item in queue if item[0] != job_id)
+                cancelled.extend(item[3] for item in queue if item[0] == job_id)
+                self._queues[share_key] = kept
+        for future in cancelled:
+            future.cancel()
+        return len(cancelled)
+
+    def _next_item(self) -> Optional[Tuple[str, _WorkItem]]:
+        """Pop the next game by lowest pass value. Caller holds the lock."""
+        active = [key for key, queue in self._queues.items() if queue]
+        if not active:
+            return None
+        share_key = min(active, key=lambda key: self._pass[key])
+        self._virtual_time = self._pass[share_key]
+        self._pass[share_key] += 1.0 / self._weights[share_key]
+        return share_key, self._queues[share_key].popleft()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Shared pool, created lazily. Caller holds the lock."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _dispatch(self) -> None:
+        """Start queued games while worker slots are free."""
+        # Fewer concurrent games under memory pressure; the pool itself keeps its size
+        limit = min(self.max_workers, get_admission_controller().scale(self.max_workers))
+        while True:
+            with self._lock:
+                if self._running >= limit:
+                    return
+                picked = self._next_item()
+                if picked is None:
+                    return
+                share_key, (job_id, fn, args, future) = picked
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self._running += 1
+                self._dispatched[share_key] = self._dispatched.get(share_key, 0) + 1
+                executor = self._get_executor()
+
+            try:
+                pool_future = executor.submit(fn, *args)
+            except Exception as e:
+                self._finish(executor, e)
+                future.set_exception(e)
+                continue
+            # Attached outside the lock: the callback runs inline if the game already finished
+            pool_future.add_done_callback(
+                lambda done, target=future, pool=executor: self._on_done(done, target, pool)
+            )
+
+    def _on_done(self, pool_future: Future, future: Future, executor: ProcessPoolExecutor) -> None:
+        """Forward a finished game's outcome and start the next one."""
+        error = CancelledError() if pool_future.cancelled() else pool_future.exception()
+        self._finish(executor, error)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(pool_future.result())
+        self._dispatch()
+
+    def _finish(self, executor: ProcessPoolExecutor, error: Optional[BaseException]) -> None:
+        """Release a worker slot, replacing the pool if a worker process died."""
+        with self._lock:
+            self._running -= 1
+            if isinstance(error, BrokenProcessPool) and self._executor is executor:
+                print(f"[SCHEDULER] Worker pool broken, recreating: {error}")
+                self._executor = None
+                executor.shutdown(wait=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get scheduler statistics for monitoring endpoints."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "running_games": self._running,
+                "queued_games": sum(len(queue) for queue in self._queues.values()),
+                "active_users": sum(1 for queue in self._queues.values() if queue),
+                "queued_by_user": {key: len(queue) for key, queue in self._queues.items() if queue},
+                "dispatched_by_user": dict(self._dispatched),
+            }
+
+    def shutdown(self) -> None:
+        """Cancel queued games and stop the shared pool."""
+        with self._lock:
+            queues, self._queues = self._queues, {}
+            executor, self._executor = self._executor, None
+        for queue in queues.values():
+            for item in queue:
+                item[3].cancel()
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+class JobExecutor:
+    """
+    A single job's view of the shared pool.
+
+    Mirrors the parts of the concurrent.futures executor API that the parallel
+    engine uses, so it can replace a per-job ProcessPoolExecutor.
+    """
+
+    def __init__(self, scheduler: FairShareScheduler, job_id: str, share_key: str, weight: float = 1.0):
+        self.scheduler = scheduler
+        self.job_id = job_id
+        self.share_key = share_key
+        self.weight = weight
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """Queue fn(*args) under this job's share key."""
+        return self.scheduler.submit(self.share_key, self.weight, self.job_id, fn, *args)
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Drop this job's queued games; the shared pool keeps running."""
+        self.scheduler.cancel_job(self.job_id)
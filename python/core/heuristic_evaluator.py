@@ -0,0 +1,570 @@
+#!/usr/bin/env python3
+"""
+Bitboard Heuristic Evaluator
+Fast position evaluation for the basic (no-engine) analysis path.
+
+Works directly on python-chess bitboard masks instead of square-by-square
+lookups and legal-move generation:
+- Material and piece-square scores are summed over piece masks
+- The shared tactical features of a position (core/tactical_features.py:
+  attack masks, pins, hanging pieces) feed mobility, king safety and threats
+- Mobility counts legal moves with popcounts (pins and king safety included)
+  instead of generating Move objects on a board copy
+- Many positions at once (all candidate moves, all plies of a game) get their
+  material, piece-square, passed-pawn and pawn-shield terms from a few NumPy
+  operations on a (N x 12 x 64) occupancy tensor
+
+The feature breakdown is identical to the original per-square evaluator.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import chess
+
+from .tactical_features import TacticalFeatures, get_tactical_features
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Heuristic evaluation constants for fallback analysis
+PIECE_VALUES = {
+    'P': 100,
+    'N': 320,
+    'B': 330,
+    'R': 500,
+    'Q': 900,
+    'K': 0
+}
+
+PIECE_SQUARE_TABLES = {
+    'P': [
+         0,   0,   0,   0,   0,   0,   0,   0,
+         5,  10,  10, -20, -20,  10,  10,   5,
+         5,  -5, -10,   0,   0, -10,  -5,   5,
+         0,   0,   0,  20,  20,   0,   0,   0,
+         5,   5,  10,  25,  25,  10,   5,   5,
+        10,  10,  20,  30,  30,  20,  10,  10,
+        50,  50,  50,  55,  55,  50,  50,  50,
+         0,   0,   0,   0,   0,   0,   0,   0
+    ],
+    'N': [
+       -50, -40, -30, -30, -30, -30, -40, -50,
+       -40, -20,   0,   5,   5,   0, -20, -40,
+       -30,   5,  10,  15,  15,  10,   5, -30,
+       -30,   0,  15,  20,  20,  15,   0, -30,
+       -30,   5,  15,  20,  20,  15,   5, -30,
+       -30,   0,  10,  15,  15,  10,   0, -30,
+       -40, -20,   0,   0,   0,   0, -20, -40,
+       -50, -40, -30, -30, -30, -30, -40, -50
+    ],
+    'B': [
+       -20, -10, -10, -10, -10, -10, -10, -20,
+       -10,   5,   0,   0,   0,   0,   5, -10,
+       -10,  10,  10,  10,  10,  10,  10, -10,
+       -10,   0,  10,  10,  10,  10,   0, -10,
+       -10,   5,   5,  10,  10,   5,   5, -10,
+       -10,   0,   5,  10,  10,   5,   0, -10,
+       -10,   0,   0,   0,   0,   0,   0, -10,
+       -20, -10, -10, -10, -10, -10, -10, -20
+    ],
+    'R': [
+         0,   0,   0,   5,   5,   0,   0,   0,
+        -5,   0,   0,   0,   0,   0,   0,  -5,
+        -5,   0,   0,   0,   0,   0,   0,  -5,
+        -5,   0,   0,   0,   0,   0,   0,  -5,
+        -5,   0,   0,   0,   0,   0,   0,  -5,
+        -5,   0,   0,   0,   0,   0,   0,  -5,
+         5,  10,  10,  10,  10,  10,  10,   5,
+         0,   0,   0,   5,   5,   0,   0,   0
+    ],
+    'Q': [
+       -20, -10, -10,  -5,  -5, -10, -10, -20,
+       -10,   0,   0,   0,   0,   5,   0, -10,
+       -10,   0,   5,   5,   5,   5,   5, -10,
+        -5,   0,   5,   5,   5,   5,   0,  -5,
+         0,   0,   5,   5,   5,   5,   0,  -5,
+       -10,   5,   5,   5,   5,   5,   0, -10,
+       -10,   0,   5,   0,   0,   0,   0, -10,
+       -20, -10, -10,  -5,  -5, -10, -10, -20
+    ],
+    'K': [
+       -30, -40, -40, -50, -50, -40, -40, -30,
+       -30, -40, -40, -50, -50, -40, -40, -30,
+       -30, -40, -40, -50, -50, -40, -40, -30,
+       -30, -40, -40, -50, -50, -40, -40, -30,
+       -20, -30, -30, -40, -40, -30, -30, -20,
+       -10, -20, -20, -20, -20, -20, -20, -10,
+        20,  20,   0,   0,   0,   0,  20,  20,
+        20,  30,  10,   0,   0,  10,  30,  20
+    ]
+}
+
+MOBILITY_WEIGHT = 5
+KING_SAFETY_SHIELD_WEIGHT = 10
+KING_SAFETY_ATTACK_WEIGHT = 18
+KING_OPEN_FILE_PENALTY = 15
+KING_RING_ATTACK_PENALTY = 12
+PASSED_PAWN_BONUS = [0, 10, 20, 35, 60, 100, 160, 0]
+HANGING_PIECE_VALUE_MULTIPLIER = 0.6
+HANGING_PIECE_MIN_PENALTY = 40
+
+# Lookup tables indexed by piece type / color / square
+_VALUE_BY_TYPE = [0] + [PIECE_VALUES[chess.piece_symbol(t).upper()] for t in chess.PIECE_TYPES]
+_PST_BY_COLOR: Dict[chess.Color, List[List[int]]] = {
+    chess.WHITE: [[0] * 64] + [PIECE_SQUARE_TABLES[chess.piece_symbol(t).upper()] for t in chess.PIECE_TYPES],
+    chess.BLACK: [[0] * 64] + [
+        [PIECE_SQUARE_TABLES[chess.piece_symbol(t).upper()][chess.square_mirror(sq)] for sq in chess.SQUARES]
+        for t in chess.PIECE_TYPES
+    ],
+}
+_BACK_RANKS = chess.BB_RANK_1 | chess.BB_RANK_8
+
+
+def _front_span(color: chess.Color, square: chess.Square) -> chess.Bitboard:
+    """Squares ahead of a pawn on its own and adjacent files."""
+    file_idx = chess.square_file(square)
+    rank_idx = chess.square_rank(square)
+    ranks = range(rank_idx + 1, 8) if color == chess.WHITE else range(rank_idx - 1, -1, -1)
+    mask = chess.BB_EMPTY
+    for f in (file_idx - 1, file_idx, file_idx + 1):
+        if 0 <= f <= 7:
+            for r in ranks:
+                mask |= chess.BB_SQUARES[chess.square(f, r)]
+    return mask
+
+
+def _shield_squares(color: chess.Color, king_square: chess.Square) -> List[Tuple[chess.Bitboard, float]]:
+    """Pawn shield squares in front of a king with their weights."""
+    direction = 1 if color == chess.WHITE else -1
+    king_file = chess.square_file(king_square)
+    king_rank = chess.square_rank(king_square)
+    squares = []
+    for file_offset in (-1, 0, 1):
+        target_file = king_file + file_offset
+        if not 0 <= target_file <= 7:
+            continue
+        for distance, weight in ((1, 1.0), (2, 0.5)):
+            target_rank = king_rank + direction * distance
+            if 0 <= target_rank <= 7:
+                squares.append((chess.BB_SQUARES[chess.square(target_file, target_rank)], weight))
+    return squares
+
+
+def _king_files(king_square: chess.Square) -> List[chess.Bitboard]:
+    """File masks of the king's file and its neighbours."""
+    king_file = chess.square_file(king_square)
+    return [chess.BB_FILES[f] for f in (king_file - 1, king_file, king_file + 1) if 0 <= f <= 7]
+
+
+_PASSED_SPANS = {color: [_front_span(color, sq) for sq in chess.SQUARES] for color in chess.COLORS}
+_SHIELDS = {color: [_shield_squares(color, sq) for sq in chess.SQUARES] for color in chess.COLORS}
+_KING_FILES = [_king_files(sq) for sq in chess.SQUARES]
+
+
+class MaterialScore(NamedTuple):
+    """Material and piece-square totals per side."""
+    material_white: int
+    material_black: int
+    pst_white: int
+    pst_black: int
+
+
+def material_score(board: chess.Board) -> MaterialScore:
+    """Full material and piece-square count for a position."""
+    totals = [0, 0, 0, 0]  # material black, material white, pst black, pst white
+    for color in chess.COLORS:
+        tables = _PST_BY_COLOR[color]
+        for piece_type in chess.PIECE_TYPES:
+            mask = board.pieces_mask(piece_type, color)
+            if not mask:
+                continue
+            totals[color] += _VALUE_BY_TYPE[piece_type] * chess.popcount(mask)
+            table = tables[piece_type]
+            totals[2 + color] += sum(table[sq] for sq in chess.scan_forward(mask))
+    return MaterialScore(totals[1], totals[0], totals[3], totals[2])
+
+
+def _count_legal_moves_slow(board: chess.Board, color: chess.Color) -> int:
+    """Count legal moves by generation (positions in check or without a king)."""
+    board_copy = board.copy(stack=False)
+    board_copy.turn = color
+    return sum(1 for _ in board_copy.legal_moves)
+
+
+def _count_with_turn(board: chess.Board, color: chess.Color, generator_name: str) -> int:
+    """Count moves from a python-chess generator as if color were to move."""
+    turn = board.turn
+    board.turn = color
+    try:
+        return sum(1 for _ in getattr(board, generator_name)())
+    finally:
+        board.turn = turn
+
+
+def _pawn_move_count(board: chess.Board, color: chess.Color, pawns: chess.Bitboard,
+                     allowed: chess.Bitboard = chess.BB_ALL) -> int:
+    """Count pawn pushes and captures (promotions count four times), like python-chess."""
+    empty = ~board.occupied & chess.BB_ALL
+    if color == chess.WHITE:
+        single = (pawns << 8) & empty
+        double = (single << 8) & empty & (chess.BB_RANK_3 | chess.BB_RANK_4)
+    else:
+        single = (pawns >> 8) & empty
+        double = (single >> 8) & empty & (chess.BB_RANK_6 | chess.BB_RANK_5)
+    single &= allowed
+    double &= allowed
+
+    count = chess.popcount(single) + 3 * chess.popcount(single & _BACK_RANKS) + chess.popcount(double)
+    them = board.occupied_co[not color]
+    for sq in chess.scan_forward(pawns):
+        captures = chess.BB_PAWN_ATTACKS[color][sq] & them & allowed
+        count += chess.popcount(captures) + 3 * chess.popcount(captures & _BACK_RANKS)
+    return count
+
+
+def _attacker_values(board: chess.Board, features: TacticalFeatures, color: chess.Color, square: chess.Square) -> List[int]:
+    """Piece values of color's pieces attacking square."""
+    return [_VALUE_BY_TYPE[board.piece_type_at(sq)] for sq in chess.scan_forward(features.attackers(color, square))]
+
+
+def count_legal_moves(board: chess.Board, color: chess.Color, features: Optional[TacticalFeatures] = None) -> int:
+    """
+    Count legal moves for color (as if it were to move) without generating moves.
+
+    Matches sum(1 for _ in board.legal_moves) on a copy with board.turn = color.
+    """
+    own = board.occupied_co[color]
+    king_mask = board.kings & own
+    if not king_mask:
+        return _count_legal_moves_slow(board, color)
+    king = chess.msb(king_mask)
+    features = features or get_tactical_features(board)
+    enemy_attacks = features.attacked[not color]
+    if enemy_attacks & chess.BB_SQUARES[king]:
+        # Evasions are rare and subtle; defer to python-chess
+        return _count_legal_moves_slow(board, color)
+
+    # Pinned pieces mapped to the line they may move along
+    pins = {pin.pinned: chess.ray(pin.king, pin.pinner) for pin in features.pins[color]}
+    pinned = chess.BB_EMPTY
+    for sq in pins:
+        pinned |= chess.BB_SQUARES[sq]
+
+    count = chess.popcount(features.attacks[king] & ~own & ~enemy_attacks & chess.BB_ALL)
+    for sq in chess.scan_forward(own & ~board.pawns & ~board.kings):
+        targets = features.attacks[sq] & ~own
+        if sq in pins:
+            targets &= pins[sq]
+        count += chess.popcount(targets & chess.BB_ALL)
+
+    pawns = own & board.pawns
+    count += _pawn_move_count(board, color, pawns & ~pinned)
+    for sq in chess.scan_forward(pawns & pinned):
+        count += _pawn_move_count(board, color, chess.BB_SQUARES[sq], pins[sq])
+
+    if board.has_castling_rights(color):
+        count += _count_with_turn(board, color, "generate_castling_moves")
+    if board.ep_square is not None and chess.BB_PAWN_ATTACKS[not color][board.ep_square] & pawns:
+        count += _count_with_turn(board, color, "generate_legal_ep")
+    return count
+
+
+def shield_strength(board: chess.Board, color: chess.Color) -> float:
+    """Pawn shield coverage in front of color's king (1.0 per adjacent-rank pawn, 0.5 one rank further)."""
+    king_square = board.king(color)
+    if king_square is None:
+        return 0.0
+    pawns = board.pawns & board.occupied_co[color]
+    shield = 0.0
+    for mask, weight in _SHIELDS[color][king_square]:
+        if pawns & mask:
+            shield += weight
+    return shield
+
+
+def _king_safety(board: chess.Board, features: TacticalFeatures, color: chess.Color, shield: float) -> int:
+    """Pawn shield, attackers and open files around color's king."""
+    king_square = board.king(color)
+    if king_square is None:
+        return 0
+    opponent = not color
+    pawns = board.pawns & board.occupied_co[color]
+    direct_attackers = features.attacker_count(opponent, king_square)
+    ring_attackers = features.attack_count(opponent, chess.BB_KING_ATTACKS[king_square])
+    open_files = sum(1 for file_mask in _KING_FILES[king_square] if not pawns & file_mask)
+    score = int(shield * KING_SAFETY_SHIELD_WEIGHT)
+    score -= direct_attackers * KING_SAFETY_ATTACK_WEIGHT
+    score -= ring_attackers * KING_RING_ATTACK_PENALTY
+    score -= open_files * KING_OPEN_FILE_PENALTY
+    return score
+
+
+def passed_pawns(board: chess.Board, color: chess.Color) -> Tuple[List[chess.Square], int]:
+    """Passed pawns of color and their bonus score."""
+    enemy_pawns = board.pawns & board.occupied_co[not color]
+    spans = _PASSED_SPANS[color]
+    passed = []
+    score = 0
+    for square in chess.scan_forward(board.pawns & board.occupied_co[color]):
+        if enemy_pawns & spans[square]:
+            continue
+        passed.append(square)
+        rank_idx = chess.square_rank(square)
+        score += PASSED_PAWN_BONUS[rank_idx if color == chess.WHITE else 7 - rank_idx]
+    return passed, score
+
+
+def _hanging_pieces(board: chess.Board, features: TacticalFeatures, color: chess.Color) -> List[Dict[str, Any]]:
+    """
+    Friendly pieces that are insufficiently defended.
+
+    The hanging pieces of the tactical features (more attackers than
+    defenders), plus defended pieces that lose an exchange to a cheaper
+    attacker.
+    """
+    opponent = not color
+    results: List[Dict[str, Any]] = []
+    outnumbered = features.hanging[color]
+    candidates = board.occupied_co[color] & ~board.kings & features.attacked[opponent]
+    # Descending square order, like board.piece_map()
+    for square in chess.scan_reversed(candidates):
+        attackers = _attacker_values(board, features, opponent, square)
+        defenders = _attacker_values(board, features, color, square)
+        piece_type = board.piece_type_at(square)
+        piece_value = _VALUE_BY_TYPE[piece_type]
+        min_attacker_value = min(attackers)
+        hanging = square in outnumbered or (
+            defenders and min_attacker_value < min(defenders) and min_attacker_value < piece_value
+        )
+        if not hanging:
+            continue
+        results.append({
+            'square': chess.square_name(square),
+            'piece': chess.Piece(piece_type, color).symbol(),
+            'value': piece_value,
+            'attackers': len(attackers),
+            'defenders': len(defenders)
+        })
+    return results
+
+
+def hanging_penalty(hanging: List[Dict[str, Any]]) -> int:
+    """Translate a hanging piece list into a score penalty."""
+    penalty = 0
+    for entry in hanging:
+        value = entry.get('value', 100)
+        penalty += max(int(value * HANGING_PIECE_VALUE_MULTIPLIER), HANGING_PIECE_MIN_PENALTY)
+    return penalty
+
+
+class StaticTerms(NamedTuple):
+    """Pawn-structure and material terms that need no attack information."""
+    material: MaterialScore
+    passed_white: List[chess.Square]
+    passed_white_score: int
+    passed_black: List[chess.Square]
+    passed_black_score: int
+    shield_white: float
+    shield_black: float
+
+
+def static_terms(board: chess.Board) -> StaticTerms:
+    """Static terms of a single position."""
+    passed_white, passed_white_score = passed_pawns(board, chess.WHITE)
+    passed_black, passed_black_score = passed_pawns(board, chess.BLACK)
+    return StaticTerms(
+        material_score(board),
+        passed_white, passed_white_score,
+        passed_black, passed_black_score,
+        shield_strength(board, chess.WHITE),
+        shield_strength(board, chess.BLACK),
+    )
+
+
+def evaluate_board(board: chess.Board) -> Tuple[int, Dict[str, Any]]:
+    """
+    Heuristic evaluation with feature breakdown (white's perspective, centipawns).
+
+    Args:
+        board: Position to evaluate
+
+    Returns:
+        Tuple of (total score, features dict)
+    """
+    return _evaluate_with_static_terms(board, static_terms(board))
+
+
+def _evaluate_with_static_terms(board: chess.Board, terms: StaticTerms) -> Tuple[int, Dict[str, Any]]:
+    """Add the attack-based terms to precomputed static terms and build the features dict."""
+    material_white, material_black, pst_white, pst_black = terms.material
+    material_score_total = material_white - material_black
+    pst_score = pst_white - pst_black
+
+    features = get_tactical_features(board)
+
+    mobility_white = count_legal_moves(board, chess.WHITE, features)
+    mobility_black = count_legal_moves(board, chess.BLACK, features)
+    mobility_score = MOBILITY_WEIGHT * (mobility_white - mobility_black)
+
+    king_safety_white = _king_safety(board, features, chess.WHITE, terms.shield_white)
+    king_safety_black = _king_safety(board, features, chess.BLACK, terms.shield_black)
+    king_safety_score = king_safety_white - king_safety_black
+
+    passed_white, passed_white_score = terms.passed_white, terms.passed_white_score
+    passed_black, passed_black_score = terms.passed_black, terms.passed_black_score
+    passed_score = passed_white_score - passed_black_score
+
+    hanging_white = _hanging_pieces(board, features, chess.WHITE)
+    hanging_black = _hanging_pieces(board, features, chess.BLACK)
+    threat_score = hanging_penalty(hanging_black) - hanging_penalty(hanging_white)
+
+    total_score = material_score_total + pst_score + mobility_score + king_safety_score + passed_score + threat_score
+
+    features = {
+        'components': {
+            'material': material_score_total,
+            'piece_square': pst_score,
+            'mobility': mobility_score,
+            'king_safety': king_safety_score,
+            'passed_pawns': passed_score,
+            'threats': threat_score
+        },
+        'material': {'white': material_white, 'black': material_black},
+        'piece_square': {'white': pst_white, 'black': pst_black},
+        'mobility': {'white': mobility_white, 'black': mobility_black},
+        'king_safety': {'white': king_safety_white, 'black': king_safety_black},
+        'passed_pawns': {
+            'white': {
+                'count': len(passed_white),
+                'score': passed_white_score,
+                'squares': [chess.square_name(s) for s in passed_white]
+            },
+            'black': {
+                'count': len(passed_black),
+                'score': passed_black_score,
+                'squares': [chess.square_name(s) for s in passed_black]
+            }
+        },
+        'hanging_pieces': {
+            'white': hanging_white,
+            'black': hanging_black
+        }
+    }
+    return total_score, features
+
+
+# Batch evaluation -----------------------------------------------------------------
+# Occupancy planes: white P N B R Q K, then black P N B R Q K
+_PLANES = [(color, piece_type) for color in (chess.WHITE, chess.BLACK) for piece_type in chess.PIECE_TYPES]
+
+if NUMPY_AVAILABLE:
+    _NP_VALUES = np.array([_VALUE_BY_TYPE[piece_type] for _, piece_type in _PLANES], dtype=np.float64)
+    _NP_PST = np.array([_PST_BY_COLOR[color][piece_type] for color, piece_type in _PLANES], dtype=np.float64)
+    # [pawn square, square]: 1 where square is in the pawn's front span
+    _NP_PASSED_SPANS = {
+        color: np.array([[1.0 if _PASSED_SPANS[color][s] & chess.BB_SQUARES[t] else 0.0 for t in chess.SQUARES]
+                         for s in chess.SQUARES], dtype=np.float64)
+        for color in chess.COLORS
+    }
+    _NP_PASSED_BONUS = {
+        color: np.array([PASSED_PAWN_BONUS[chess.square_rank(s) if color == chess.WHITE else 7 - chess.square_rank(s)]
+                         for s in chess.SQUARES], dtype=np.float64)
+        for color in chess.COLORS
+    }
+    # [king square, square]: shield weight of a friendly pawn on square
+    _NP_SHIELDS = {color: np.zeros((64, 64), dtype=np.float64) for color in chess.COLORS}
+    for _color in chess.COLORS:
+        for _king in chess.SQUARES:
+            for _mask, _weight in _SHIELDS[_color][_king]:
+                _NP_SHIELDS[_color][_king, chess.lsb(_mask)] = _weight
+
+
+def encode_boards(boards: Sequence[chess.Board]) -> "np.ndarray":
+    """
+    Encode positions as a (N x 12 x 64) occupancy tensor.
+
+    Planes are white P, N, B, R, Q, K followed by black; square index follows python-chess (a1 = 0).
+    """
+    rows = []
+    for board in boards:
+        white, black = board.occupied_co[chess.WHITE], board.occupied_co[chess.BLACK]
+        pieces = (board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings)
+        rows.append([mask & white for mask in pieces] + [mask & black for mask in pieces])
+    masks = np.array(rows, dtype='<u8').reshape(len(boards), len(_PLANES))
+    bits = np.unpackbits(masks.view(np.uint8), axis=1, bitorder='little')
+    return bits.reshape(len(boards), len(_PLANES), 64)
+
+
+def batch_static_terms(boards: Sequence[chess.Board]) -> List[StaticTerms]:
+    """
+    Static terms of many positions with vectorized NumPy operations.
+
+    Falls back to per-position computation when NumPy is not installed.
+    """
+    if not boards:
+        return []
+    if not NUMPY_AVAILABLE:
+        return [static_terms(board) for board in boards]
+
+    count = len(boards)
+    # Float matrices so the products run through BLAS; all sums stay far below 2**53
+    planes = encode_boards(boards).astype(np.float64)
+    material = planes.sum(axis=2) * _NP_VALUES                                            # (N, 12)
+    pst = np.einsum('npk,pk->np', planes, _NP_PST, optimize=True)                         # (N, 12)
+
+    white_pawns, black_pawns = planes[:, 0], planes[:, 6]
+    white_kings, black_kings = planes[:, 5], planes[:, 11]
+    # Enemy pawns inside each pawn's front span; zero means passed
+    passed_white = white_pawns * (black_pawns @ _NP_PASSED_SPANS[chess.WHITE].T == 0)
+    passed_black = black_pawns * (white_pawns @ _NP_PASSED_SPANS[chess.BLACK].T == 0)
+    passed_white_score = passed_white @ _NP_PASSED_BONUS[chess.WHITE]
+    passed_black_score = passed_black @ _NP_PASSED_BONUS[chess.BLACK]
+    # Shield weights for each board's king square (0 when the king is missing)
+    shield_white = (_NP_SHIELDS[chess.WHITE][white_kings.argmax(axis=1)] * white_pawns).sum(axis=1) * white_kings.any(axis=1)
+    shield_black = (_NP_SHIELDS[chess.BLACK][black_kings.argmax(axis=1)] * black_pawns).sum(axis=1) * black_kings.any(axis=1)
+
+    material_white = material[:, :6].sum(axis=1).astype(np.int64).tolist()
+    material_black = material[:, 6:].sum(axis=1).astype(np.int64).tolist()
+    pst_white = pst[:, :6].sum(axis=1).astype(np.int64).tolist()
+    pst_black = pst[:, 6:].sum(axis=1).astype(np.int64).tolist()
+    passed_white_score = passed_white_score.astype(np.int64).tolist()
+    passed_black_score = passed_black_score.astype(np.int64).tolist()
+    shield_white = shield_white.tolist()
+    shield_black = shield_black.tolist()
+
+    passed_white_squares: List[List[chess.Square]] = [[] for _ in range(count)]
+    passed_black_squares: List[List[chess.Square]] = [[] for _ in range(count)]
+    for squares, passed in ((passed_white_squares, passed_white), (passed_black_squares, passed_black)):
+        rows, cols = np.nonzero(passed)
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            squares[row].append(col)
+
+    return [
+        StaticTerms(
+            MaterialScore(material_white[i], material_black[i], pst_white[i], pst_black[i]),
+            passed_white_squares[i], passed_white_score[i],
+            passed_black_squares[i], passed_black_score[i],
+            shield_white[i], shield_black[i],
+        )
+        for i in range(count)
+    ]
+
+
+def evaluate_boards(boards: Sequence[chess.Board]) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    Evaluate many positions; same results as evaluate_board for each.
+
+    Args:
+        boards: Positions to evaluate (e.g. every candidate move of every ply in a game)
+
+    Returns:
+        List of (total score, features dict), in input order
+    """
+    return [
+        _evaluate_with_static_terms(board, terms)
+        for board, terms in zip(boards, batch_static_terms(boards))
+    ]
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Hot-Path Logger
+Structured, sampled, non-blocking logging for per-move and per-game code paths.
+
+The analysis hot path used to print on every move, game, task and progress
+update. Under batch load the string formatting and blocking stdout writes
+were a measurable share of CPU time. This logger makes that volume configurable:
+- Per-category levels (e.g. PV, COACHING, BRILLIANT, QUEUE)
+- Sampling (emit a fraction of a category's records)
+- Rate limiting (at most N records per second per category)
+- Lazy formatting: suppressed records are never formatted; emitted records
+  are formatted and written by a background thread
+- Bounded buffer: when the sink falls behind the oldest records are dropped
+  instead of blocking analysis
+
+Records render as "[CATEGORY] message key=value ..." (or one JSON object per
+line), so existing log searches keep working.
+
+Configuration (environment):
+- HOT_LOG_LEVEL: default level for all categories (default INFO)
+- HOT_LOG_LEVELS: per-category levels, e.g. "PV=DEBUG,BRILLIANT=WARNING"
+- HOT_LOG_SAMPLE: per-category sampling rates, e.g. "COACHING=0.01"
+- HOT_LOG_RATE: per-category records per second, e.g. "QUEUE=5"
+- HOT_LOG_FORMAT: "text" (default) or "json"
+- HOT_LOG_FILE: append to this file instead of stdout
+- HOT_LOG_QUEUE_SIZE: buffered records before dropping (default 10000)
+"""
+
+import atexit
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, TextIO, Tuple, Union
+
+DEBUG = logging.DEBUG
+INFO = logging.INFO
+WARNING = logging.WARNING
+ERROR = logging.ERROR
+
+_LEVEL_NAMES = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "WARN": WARNING, "ERROR": ERROR, "OFF": logging.CRITICAL + 10}
+
+# A message is a format string (with %-style args) or a callable producing the text
+Message = Union[str, Callable[[], str]]
+
+# (timestamp, level, category, message, args, fields)
+_Record = Tuple[float, int, str, str, Tuple[Any, ...], Dict[str, Any]]
+
+
+def _parse_level(value: str, default: int = INFO) -> int:
+    value = (value or "").strip().upper()
+    if value.isdigit():
+        return int(value)
+    return _LEVEL_NAMES.get(value, default)
+
+
+def _parse_mapping(spec: str, convert: Callable[[str], Any]) -> Dict[str, Any]:
+    """Parse "A=1,B=2" into {"A": convert("1"), ...}; malformed entries are skipped."""
+    result = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        key, _, value = item.partition("=")
+        try:
+            result[key.strip().upper()] = convert(value.strip())
+        except ValueError:
+            print(f"[HOT_LOG] Ignoring invalid setting: {item.strip()}")
+    return result
+
+
+class _TokenBucket:
+    """Allows `rate` records per second with bursts of up to `rate`."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class HotPathLogger:
+    """
+    Category-based logger for hot code paths.
+
+    Features:
+    - Level check is a dict lookup; nothing is formatted for suppressed records
+    - Sampling and per-category rate limits
+    - Background writer thread with a bounded buffer
+    - Text or JSON lines output
+    - Safe across fork (the writer thread restarts in child processes)
+
+    Usage:
+        hot_log = get_hot_logger()
+        hot_log.debug("PV", "Captured %d moves in best_move_pv", len(pv))
+        hot_log.info("QUEUE", "Progress update", job_id=job_id, completed=done)
+        hot_log.debug("BRILLIANT", lambda: f"{san}: {expensive_summary()}")
+
+    Arguments are formatted on the writer thread, so pass immutable values
+    (numbers, strings); use a callable message for anything else.
+    """
+
+    def __init__(
+        self,
+        default_level: int = INFO,
+        levels: Optional[Dict[str, int]] = None,
+        sample_rates: Optional[Dict[str, float]] = None,
+        rate_limits: Optional[Dict[str, float]] = None,
+        output_format: str = "text",
+        stream: Optional[TextIO] = None,
+        max_queue_size: int = 10000
+    ):
+        """
+        Initialize the logger.
+
+        Args:
+            default_level: Level for categories without an override
+            levels: Per-category levels
+            sample_rates: Per-category fraction of records to emit (0.0-1.0)
+            rate_limits: Per-category maximum records per second
+            output_format: "text" or "json"
+            stream: Output stream (default: stdout at write time)
+            max_queue_size: Buffered records before the oldest are dropped
+        """
+        self.default_level = default_level
+        self.output_format = output_format
+        self.stream = stream
+        self.max_queue_size = max_queue_size
+        self._levels: Dict[str, int] = {}
+        self._sample_rates: Dict[str, float] = {}
+        self._buckets: Dict[str, _TokenBucket] = {}
+        self._counters = {"emitted": 0, "suppressed": 0, "sampled_out": 0, "rate_limited": 0, "dropped": 0}
+        self._buffer: Deque[_Record] = deque()
+        self._condition = threading.Condition()
+        self._pending = 0
+        self._writer: Optional[threading.Thread] = None
+        self._pid = os.getpid()
+        self.configure(levels=levels, sample_rates=sample_rates, rate_limits=rate_limits)
+
+    @classmethod
+    def from_env(cls) -> "HotPathLogger":
+        """Create a logger configured from the HOT_LOG_* environment variables."""
+        stream = None
+        log_file = os.getenv("HOT_LOG_FILE")
+        if log_file:
+            try:
+                stream = open(log_file, "a", encoding="utf-8")
+            except OSError as e:
+                print(f"[HOT_LOG] Cannot open {log_file}, logging to stdout: {e}")
+        return cls(
+            default_level=_parse_level(os.getenv("HOT_LOG_LEVEL", "INFO")),
+            levels=_parse_mapping(os.getenv("HOT_LOG_LEVELS", ""), _parse_level),
+            sample_rates=_parse_mapping(os.getenv("HOT_LOG_SAMPLE", ""), float),
+            rate_limits=_parse_mapping(os.getenv("HOT_LOG_RATE", ""), float),
+            output_format=os.getenv("HOT_LOG_FORMAT", "text").lower(),
+            stream=stream,
+            max_queue_size=int(os.getenv("HOT_LOG_QUEUE_SIZE", "10000"))
+        )
+
+    def configure(
+        self,
+        levels: Optional[Dict[str, int]] = None,
+        sample_rates: Optional[Dict[str, float]] = None,
+        rate_limits: Optional[Dict[str, float]] = None
+    ) -> None:
+        """Update per-category levels, sampling rates and rate limits at runtime."""
+        with self._condition:
+            self._levels.update({key.upper(): value for key, value in (levels or {}).items()})
+            self._sample_rates.update({key.upper(): value for key, value in (sample_rates or {}).items()})
+            for key, rate in (rate_limits or {}).items():
+                if rate > 0:
+                    self._buckets[key.upper()] = _TokenBucket(rate)
+                else:
+                    self._buckets.pop(key.upper(), None)
+
+    def enabled(self, category: str, level: int = DEBUG) -> bool:
+        """Whether records of this category and level pass the level filter."""
+        return level >= self._levels.get(category, self.default_level)
+
+    def log(self, level: int, category: str, message: Message, *args: Any, **fields: Any) -> None:
+        """Record a message if the category's level, sampling and rate limit allow it."""
+        if level < self._levels.get(category, self.default_level):
+            self._counters["suppressed"] += 1
+            return
+        sample_rate = self._sample_rates.get(category)
+        if sample_rate is not None and level < WARNING and random.random() >= sample_rate:
+            self._counters["sampled_out"] += 1
+            return
+        bucket = self._buckets.get(category)
+        if bucket is not None and level < WARNING:
+            with self._condition:
+                allowed = bucket.take()
+            if not allowed:
+                self._counters["rate_limited"] += 1
+                return
+        if callable(message):
+            try:
+                message = message()
+            except Exception as e:
+                message = f"<log message failed: {e}>"
+        self._enqueue((time.time(), level, category, message, args, fields))
+
+    def debug(self, category: str, message: Message, *args: Any, **fields: Any) -> None:
+        self.log(DEBUG, category, message, *args, **fields)
+
+    def info(self, category: str, message: Message, *args: Any, **fields: Any) -> None:
+        self.log(INFO, category, message, *args, **fields)
+
+    def warning(self, category: str, message: Message, *args: Any, **fields: Any) -> None:
+        self.log(WARNING, category, message, *args, **fields)
+
+    def error(self, category: str, message: Message, *args: Any, **fields: Any) -> None:
+        self.log(ERROR, category, message, *args, **fields)
+
+    def _enqueue(self, record: _Record) -> None:
+        with self._condition:
+            if self._pid != os.getpid():
+                # Forked worker process: the parent's writer thread does not exist here
+                self._pid = os.getpid()
+                self._writer = None
+                self._buffer.clear()
+                self._pending = 0
+            if len(self._buffer) >= self.max_queue_size:
+                self._buffer.popleft()
+                self._pending -= 1
+                self._counters["dropped"] += 1
+            self._buffer.append(record)
+            self._pending += 1
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run_writer, name="hot-path-logger", daemon=True)
+                self._writer.start()
+            self._condition.notify()
+
+    def _format(self, record: _Record) -> str:
+        timestamp, level, category, message, args, fields = record
+        if args:
+            try:
+                message = message % args
+            except (TypeError, ValueError):
+                message = f"{message} {args}"
+        if self.output_format == "json":
+            return json.dumps({
+                "ts": round(timestamp, 3),
+                "level": logging.getLevelName(level),
+                "category": category,
+                "message": message,
+                **fields
+            }, default=str)
+        if fields:
+            message = f"{message} " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return f"[{category}] {message}"
+
+    def _run_writer(self) -> None:
+        """Format and write buffered records in batches."""
+        while True:
+            with self._condition:
+                while not self._buffer:
+                    self._condition.wait()
+                batch = list(self._buffer)
+                self._buffer.clear()
+            lines = []
+            for record in batch:
+                try:
+                    lines.append(self._format(record))
+                except Exception as e:
+                    lines.append(f"[HOT_LOG] Failed to format record: {e}")
+            try:
+                stream = self.stream or sys.stdout
+                stream.write("\n".join(lines) + "\n")
+                stream.flush()
+            except Exception:
+                pass
+            with self._condition:
+                self._pending -= len(batch)
+                self._counters["emitted"] += len(batch)
+                self._condition.notify_all()
+
+    def flush(self, timeout: float = 2.0) -> bool:
+        """Wait until buffered records are written. Returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._pending > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._writer is None:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Get logger statistics for monitoring endpoints."""
+        with self._condition:
+            return {
+                **self._counters,
+                "buffered": len(self._buffer),
+                "default_level": logging.getLevelName(self.default_level),
+                "levels": {key: logging.getLevelName(value) for key, value in self._levels.items()},
+                "sample_rates": dict(self._sample_rates),
+                "rate_limits": {key: bucket.rate for key, bucket in self._buckets.items()},
+            }
+
+
+# Global logger instance
+_hot_logger: Optional[HotPathLogger] = None
+_logger_lock = threading.Lock()
+
+
+def get_hot_logger() -> HotPathLogger:
+    """Get or create the global hot-path logger."""
+    global _hot_logger
+
+    if _hot_logger is None:
+        with _logger_lock:
+            if _hot_logger is None:
+                _hot_logger = HotPathLogger.from_env()
+                atexit.register(_hot_logger.flush)
+
+    return _hot_logger
@@ -0,0 +1,637 @@
+#!/usr/bin/env python3
+"""
+Durable Job Store for the Analysis Queue
+Persists analysis jobs and their per-game work items so they survive restarts.
+
+Backends:
+- SQLite (default, local file) via the standard library
+- Postgres (production) via psycopg2, selected with a postgres:// URL
+
+Work items are claimed with a lease. A worker renews its leases with heartbeats
+while it analyzes; items whose lease expires (crashed worker, deploy) become
+claimable again by any worker on any node. Completion is idempotent, so a game
+finished twice only counts once.
+
+Jobs are owned the same way: the node that submits (or recovers) a job holds a
+job lease and renews it while the job is queued or running. Other nodes adopt
+an unfinished job only once its lease has expired, so a live node's jobs are
+never run twice.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Try to import psycopg2 for the Postgres backend, but make it optional
+try:
+    import psycopg2
+    POSTGRES_AVAILABLE = True
+except ImportError:
+    POSTGRES_AVAILABLE = False
+    psycopg2 = None  # type: ignore
+
+
+# Work item states
+ITEM_PENDING = "pending"
+ITEM_LEASED = "leased"
+ITEM_DONE = "done"
+ITEM_FAILED = "failed"
+
+# Job states that should be resumed after a restart
+UNFINISHED_JOB_STATUSES = ("pending", "running")
+
+JOB_COLUMNS = (
+    "job_id", "user_id", "platform", "analysis_type", "game_limit", "depth",
+    "skill_level", "auth_user_id", "account_tier", "status", "current_phase", "progress_percentage",
+    "total_games", "analyzed_games", "error_message", "result",
+    "created_at", "started_at", "completed_at", "updated_at",
+)
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS analysis_jobs (
+        job_id TEXT PRIMARY KEY,
+        user_id TEXT NOT NULL,
+        platform TEXT NOT NULL,
+        analysis_type TEXT NOT NULL,
+        game_limit INTEGER NOT NULL,
+        depth INTEGER NOT NULL,
+        skill_level INTEGER NOT NULL,
+        auth_user_id TEXT,
+        account_tier TEXT,
+        status TEXT NOT NULL,
+        current_phase TEXT,
+        progress_percentage INTEGER NOT NULL DEFAULT 0,
+        total_games INTEGER NOT NULL DEFAULT 0,
+        analyzed_games INTEGER NOT NULL DEFAULT 0,
+        error_message TEXT,
+        result TEXT,
+        created_at DOUBLE PRECISION NOT NULL,
+        started_at DOUBLE PRECISION,
+        completed_at DOUBLE PRECISION,
+        updated_at DOUBLE PRECISION NOT NULL,
+        owner TEXT,
+        owner_expires_at DOUBLE PRECISION
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS analysis_work_items (
+        job_id TEXT NOT NULL,
+        game_id TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL,
+        lease_owner TEXT,
+        lease_expires_at DOUBLE PRECISION,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        result TEXT,
+        updated_at DOUBLE PRECISION NOT NULL,
+        PRIMARY KEY (job_id, game_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_analysis_jobs_status ON analysis_jobs (status)",
+    "CREATE INDEX IF NOT EXISTS idx_analysis_work_items_claim ON analysis_work_items (status, lease_expires_at)",
+)
+
+# Columns added after the first release; applied to existing stores on startup
+_MIGRATIONS = (
+    "ALTER TABLE analysis_jobs ADD COLUMN owner TEXT",
+    "ALTER TABLE analysis_jobs ADD COLUMN owner_expires_at DOUBLE PRECISION",
+)
+
+
+# Random suffix so a restarted process that reuses a PID (common in containers)
+# never mistakes the leases of its crashed predecessor for its own
+_WORKER_NONCE = uuid.uuid4().hex[:8]
+
+
+def default_worker_id() -> str:
+    """Identifier for this worker process, unique across nodes and restarts."""
+    return f"{socket.gethostname()}:{os.getpid()}:{_WORKER_NONCE}"
+
+
+class JobStore:
+    """
+    Persistent store for analysis jobs and per-game work items.
+
+    Features:
+    - Jobs upserted on every state change (resumable progress)
+    - Per-game work items with leases and heartbeats
+    - Expired leases are reclaimed, so work moves to surviving workers
+    - Idempotent item and job completion
+    - Shared SQL for SQLite and Postgres (only claiming differs)
+
+    Usage:
+        store = SQLiteJobStore("analysis_jobs.db")
+        store.save_job(record)
+        store.add_work_items(job_id, [(game_id, payload)])
+        items = store.claim_work_items(worker_id, job_id=job_id, limit=4)
+        store.heartbeat(worker_id)
+        store.complete_work_item(job_id, game_id, result)
+    """
+
+    backend = "base"
+
+    def __init__(self, lease_seconds: float = 120.0, max_attempts: int = 3):
+        """
+        Initialize the store.
+
+        Args:
+            lease_seconds: How long a claimed work item stays reserved without a heartbeat
+            max_attempts: Claims allowed per work item before it is marked failed
+        """
+        if lease_seconds <= 0:
+            raise ValueError("lease_seconds must be positive")
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+    # --- Backend hooks -------------------------------------------------
+
+    def _connect(self):
+        raise NotImplementedError
+
+    def _sql(self, query: str) -> str:
+        """Translate the shared '?' placeholder style for the backend."""
+        return query
+
+    def _claim(self, cursor, worker_id: str, job_id: Optional[str], limit: int, now: float) -> List[Tuple]:
+        raise NotImplementedError
+
+    # --- Helpers -------------------------------------------------------
+
+    def _execute(self, query: str, params: Sequence[Any] = (), fetch: bool = False):
+        """Run a single statement in its own transaction."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(self._sql(query), tuple(params))
+                rows = cursor.fetchall() if fetch else None
+                rowcount = cursor.rowcount
+                conn.commit()
+                return rows if fetch else rowcount
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self._release(conn)
+
+    def _release(self, conn) -> None:
+        conn.close()
+
+    def _columns(self, table: str) -> List[str]:
+        """Column names of a table."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(f"SELECT * FROM {table} WHERE 1 = 0")
+                columns = [description[0] for description in cursor.description]
+                conn.commit()
+                return columns
+            finally:
+                self._release(conn)
+
+    def initialize(self) -> None:
+        """Create tables and indexes if they do not exist."""
+        for statement in _SCHEMA:
+            self._execute(statement)
+        columns = self._columns("analysis_jobs")
+        for statement in _MIGRATIONS:
+            column = statement.split("ADD COLUMN ", 1)[1].split()[0]
+            if column not in columns:
+                self._execute(statement)
+
+    # --- Jobs ----------------------------------------------------------
+
+    def save_job(self, record: Dict[str, Any]) -> None:
+        """
+        Insert or update a job record.
+
+        Args:
+            record: Mapping with the JOB_COLUMNS keys (result may be any JSON value)
+        """
+        values = dict(record)
+        values["result"] = json.dumps(values.get("result")) if values.get("result") is not None else None
+        values["updated_at"] = time.time()
+        columns = ", ".join(JOB_COLUMNS)
+        placeholders = ", ".join("?" for _ in JOB_COLUMNS)
+        updates = ", ".join(f"{col} = excluded.{col}" for col in JOB_COLUMNS if col != "job_id")
+        self._execute(
+            f"INSERT INTO analysis_jobs ({columns}) VALUES ({placeholders}) "
+            f"ON CONFLICT (job_id) DO UPDATE SET {updates}",
+            [values.get(col) for col in JOB_COLUMNS]
+        )
+
+    def mark_job_completed(self, job_id: str, record: Dict[str, Any]) -> bool:
+        """
+        Transition a job to completed exactly once.
+
+        Returns:
+            True if this call completed the job, False if it was already completed
+        """
+        rowcount = self._execute(
+            "UPDATE analysis_jobs SET status = 'completed', updated_at = ? "
+            "WHERE job_id = ? AND status <> 'completed'",
+            (time.time(), job_id)
+        )
+        # A job that was never persisted (store unavailable at submit) completes here for the first time
+        first_completion = rowcount > 0 or self.get_job(job_id) is None
+        self.save_job(record)
+        return first_completion
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job record by id."""
+        rows = self._execute(
+            f"SELECT {', '.join(JOB_COLUMNS)} FROM analysis_jobs WHERE job_id = ?",
+            (job_id,), fetch=True
+        )
+        return self._job_from_row(rows[0]) if rows else None
+
+    def load_unfinished_jobs(self) -> List[Dict[str, Any]]:
+        """Get jobs that were pending or running, oldest first."""
+        placeholders = ", ".join("?" for _ in UNFINISHED_JOB_STATUSES)
+        rows = self._execute(
+            f"SELECT {', '.join(JOB_COLUMNS)} FROM analysis_jobs "
+            f"WHERE status IN ({placeholders}) ORDER BY created_at",
+            UNFINISHED_JOB_STATUSES, fetch=True
+        )
+        return [self._job_from_row(row) for row in rows]
+
+    def load_orphaned_jobs(self) -> List[Dict[str, Any]]:
+        """Get unfinished jobs that no live node owns (lease expired or never taken), oldest first."""
+        placeholders = ", ".join("?" for _ in UNFINISHED_JOB_STATUSES)
+        rows = self._execute(
+            f"SELECT {', '.join(JOB_COLUMNS)} FROM analysis_jobs "
+            f"WHERE status IN ({placeholders}) AND (owner IS NULL OR owner_expires_at < ?) "
+            "ORDER BY created_at",
+            (*UNFINISHED_JOB_STATUSES, time.time()), fetch=True
+        )
+        return [self._job_from_row(row) for row in rows]
+
+    # --- Job ownership -------------------------------------------------
+
+    def acquire_job(self, job_id: str, worker_id: str) -> bool:
+        """
+        Take (or keep) the lease on a job.
+
+        Succeeds if the job is unowned, its owner's lease has expired, or the
+        worker already owns it.
+
+        Returns:
+            True if worker_id now owns the job
+        """
+        now = time.time()
+        rowcount = self._execute(
+            "UPDATE analysis_jobs SET owner = ?, owner_expires_at = ? "
+            "WHERE job_id = ? AND (owner IS NULL OR owner = ? OR owner_expires_at < ?)",
+            (worker_id, now + self.lease_seconds, job_id, worker_id, now)
+        )
+        return rowcount > 0
+
+    def renew_job_leases(self, worker_id: str) -> int:
+        """
+        Extend the leases on the unfinished jobs a worker owns.
+
+        Returns:
+            Number of job leases renewed
+        """
+        placeholders = ", ".join("?" for _ in UNFINISHED_JOB_STATUSES)
+        return self._execute(
+            f"UPDATE analysis_jobs SET owner_expires_at = ? WHERE owner = ? AND status IN ({placeholders})",
+            (time.time() + self.lease_seconds, worker_id, *UNFINISHED_JOB_STATUSES)
+        )
+
+    def release_jobs(self, worker_id: str, job_id: Optional[str] = None) -> int:
+        """Give up a worker's job leases (job finished, or graceful shutdown so peers adopt at once)."""
+        query = "UPDATE analysis_jobs SET owner = NULL, owner_expires_at = NULL WHERE owner = ?"
+        params: List[Any] = [worker_id]
+        if job_id is not None:
+            query += " AND job_id = ?"
+            params.append(job_id)
+        return self._execute(query, params)
+
+    @staticmethod
+    def _job_from_row(row: Sequence[Any]) -> Dict[str, Any]:
+        record = dict(zip(JOB_COLUMNS, row))
+        if record.get("result"):
+            record["result"] = json.loads(record["result"])
+        return record
+
+    # --- Work items ----------------------------------------------------
+
+    def add_work_items(self, job_id: str, items: Sequence[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        Register per-game work items for a job. Existing items are left untouched.
+
+        Args:
+            job_id: Owning job
+            items: (game_id, payload) pairs; payload is what a worker needs to analyze the game
+
+        Returns:
+            Number of new items inserted
+        """
+        now = time.time()
+        inserted = 0
+        for game_id, payload in items:
+            inserted += max(0, self._execute(
+                "INSERT INTO analysis_work_items (job_id, game_id, payload, status, attempts, updated_at) "
+                "VALUES (?, ?, ?, ?, 0, ?) ON CONFLICT (job_id, game_id) DO NOTHING",
+                (job_id, str(game_id), json.dumps(payload), ITEM_PENDING, now)
+            ))
+        return inserted
+
+    def has_work_items(self, job_id: str) -> bool:
+        """Whether work items were already registered for a job."""
+        rows = self._execute(
+            "SELECT 1 FROM analysis_work_items WHERE job_id = ? LIMIT 1", (job_id,), fetch=True
+        )
+        return bool(rows)
+
+    def claim_work_items(
+        self,
+        worker_id: str,
+        job_id: Optional[str] = None,
+        limit: int = 1
+    ) -> List[Dict[str, Any]]:
+        """
+        Lease up to `limit` claimable items (pending, or leased with an expired lease).
+
+        Items that have used up max_attempts are marked failed instead of claimed.
+
+        Args:
+            worker_id: Lease owner
+            job_id: Restrict to one job (None claims from any job)
+            limit: Maximum number of items to claim
+
+        Returns:
+            Claimed items as dicts with job_id, game_id, payload and attempts
+        """
+        if limit <= 0:
+            return []
+        now = time.time()
+        self._execute(
+            "UPDATE analysis_work_items SET status = ?, lease_owner = NULL, updated_at = ?, "
+            "result = ? WHERE status = ? AND lease_expires_at < ? AND attempts >= ?",
+            (ITEM_FAILED, now, json.dumps({"success": False, "message": "Lease expired too many times"}),
+             ITEM_LEASED, now, self.max_attempts)
+        )
+        with self._lock:
+            conn = self._connect()
+            try:
+                rows = self._claim(conn.cursor(), worker_id, job_id, limit, now)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self._release(conn)
+        return [
+            {"job_id": row[0], "game_id": row[1], "payload": json.loads(row[2]), "attempts": row[3]}
+            for row in rows
+        ]
+
+    def heartbeat(self, worker_id: str, job_id: Optional[str] = None) -> int:
+        """
+        Extend the leases held by a worker.
+
+        Returns:
+            Number of leases renewed
+        """
+        query = "UPDATE analysis_work_items SET lease_expires_at = ?, updated_at = ? WHERE status = ? AND lease_owner = ?"
+        now = time.time()
+        params: List[Any] = [now + self.lease_seconds, now, ITEM_LEASED, worker_id]
+        if job_id is not None:
+            query += " AND job_id = ?"
+            params.append(job_id)
+        return self._execute(query, params)
+
+    def complete_work_item(self, job_id: str, game_id: str, result: Dict[str, Any]) -> bool:
+        """
+        Record the outcome of a work item. Idempotent: finished items are not overwritten.
+
+        Returns:
+            True if this call recorded the outcome
+        """
+        status = ITEM_DONE if result.get("success") else ITEM_FAILED
+        rowcount = self._execute(
+            "UPDATE analysis_work_items SET status = ?, result = ?, lease_owner = NULL, "
+            "lease_expires_at = NULL, updated_at = ? "
+            "WHERE job_id = ? AND game_id = ? AND status NOT IN (?, ?)",
+            (status, json.dumps(result), time.time(), job_id, str(game_id), ITEM_DONE, ITEM_FAILED)
+        )
+        return rowcount > 0
+
+    def release_work_items(self, worker_id: str, job_id: Optional[str] = None) -> int:
+        """Return a worker's leased items to pending (graceful shutdown or cancellation)."""
+        query = (
+            "UPDATE analysis_work_items SET status = ?, lease_owner = NULL, lease_expires_at = NULL, "
+            "attempts = CASE WHEN attempts > 0 THEN attempts - 1 ELSE 0 END, updated_at = ? "
+            "WHERE status = ? AND lease_owner = ?"
+        )
+        params: List[Any] = [ITEM_PENDING, time.time(), ITEM_LEASED, worker_id]
+        if job_id is not None:
+            query += " AND job_id = ?"
+            params.append(job_id)
+        return self._execute(query, params)
+
+    def work_item_counts(self, job_id: str) -> Dict[str, int]:
+        """Count a job's work items by status."""
+        rows = self._execute(
+            "SELECT status, COUNT(*) FROM analysis_work_items WHERE job_id = ? GROUP BY status",
+            (job_id,), fetch=True
+        )
+        counts = {ITEM_PENDING: 0, ITEM_LEASED: 0, ITEM_DONE: 0, ITEM_FAILED: 0}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def get_work_results(self, job_id: str) -> List[Dict[str, Any]]:
+        """Results of a job's finished (done or failed) work items."""
+        rows = self._execute(
+            "SELECT result FROM analysis_work_items WHERE job_id = ? AND status IN (?, ?) ORDER BY updated_at",
+            (job_id, ITEM_DONE, ITEM_FAILED), fetch=True
+        )
+        return [json.loads(row[0]) for row in rows if row[0]]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics for monitoring endpoints."""
+        job_rows = self._execute("SELECT status, COUNT(*) FROM analysis_jobs GROUP BY status", fetch=True)
+        item_rows = self._execute("SELECT status, COUNT(*) FROM analysis_work_items GROUP BY status", fetch=True)
+        return {
+            "backend": self.backend,
+            "lease_seconds": self.lease_seconds,
+            "jobs": {status: count for status, count in job_rows},
+            "work_items": {status: count for status, count in item_rows},
+        }
+
+
+class SQLiteJobStore(JobStore):
+    """SQLite-backed job store for single-node and local deployments."""
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, **kwargs):
+        """
+        Initialize the SQLite store and create the schema.
+
+        Args:
+            path: Database file path (":memory:" is not supported; use a temp file)
+        """
+        super().__init__(**kwargs)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.initialize()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _claim(self, cursor, worker_id: str, job_id: Optional[str], limit: int, now: float) -> List[Tuple]:
+        # BEGIN IMMEDIATE takes the write lock up front so two processes cannot claim the same rows
+        cursor.execute("BEGIN IMMEDIATE")
+        query = (
+            "SELECT job_id, game_id FROM analysis_work_items "
+            "WHERE (status = ? OR (status = ? AND lease_expires_at < ?))"
+        )
+        params: List[Any] = [ITEM_PENDING, ITEM_LEASED, now]
+        if job_id is not None:
+            query += " AND job_id = ?"
+            params.append(job_id)
+        query += " ORDER BY updated_at LIMIT ?"
+        params.append(limit)
+        keys = cursor.execute(query, params).fetchall()
+
+        rows = []
+        for key_job_id, game_id in keys:
+            cursor.execute(
+                "UPDATE analysis_work_items SET status = ?, lease_owner = ?, lease_expires_at = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE job_id = ? AND game_id = ?",
+                (ITEM_LEASED, worker_id, now + self.lease_seconds, now, key_job_id, game_id)
+            )
+            rows.extend(cursor.execute(
+                "SELECT job_id, game_id, payload, attempts FROM analysis_work_items WHERE job_id = ? AND game_id = ?",
+                (key_job_id, game_id)
+            ).fetchall())
+        return rows
+
+
+class PostgresJobStore(JobStore):
+    """Postgres-backed job store, shared by workers on multiple nodes."""
+
+    backend = "postgres"
+
+    def __init__(self, dsn: str, **kwargs):
+        """
+        Initialize the Postgres store and create the schema.
+
+        Args:
+            dsn: libpq connection string or postgres:// URL
+
+        Raises:
+            RuntimeError: If psycopg2 is not installed
+        """
+        if not POSTGRES_AVAILABLE:
+            raise RuntimeError("psycopg2 is required for the Postgres job store (pip install psycopg2-binary)")
+        super().__init__(**kwargs)
+        self.dsn = dsn
+        self._conn = None
+        self.initialize()
+
+    def _connect(self):
+        # One connection reused under the store lock; reopened if the server dropped it
+        if self._conn is None or self._conn.closed:
+            self._conn = psycopg2.connect(self.dsn)
+        return self._conn
+
+    def _release(self, conn) -> None:
+        pass
+
+    def _sql(self, query: str) -> str:
+        return query.replace("?", "%s")
+
+    def _claim(self, cursor, worker_id: str, job_id: Optional[str], limit: int, now: float) -> List[Tuple]:
+        # SKIP LOCKED lets concurrent workers claim disjoint rows without blocking each other
+        job_filter = "AND job_id = %s" if job_id is not None else ""
+        params: List[Any] = [ITEM_LEASED, worker_id, now + self.lease_seconds, now, ITEM_PENDING, ITEM_LEASED, now]
+        if job_id is not None:
+            params.append(job_id)
+        params.append(limit)
+        cursor.execute(
+            "UPDATE analysis_work_items SET status = %s, lease_owner = %s, lease_expires_at = %s, "
+            "attempts = attempts + 1, updated_at = %s "
+            "WHERE (job_id, game_id) IN ("
+            "  SELECT job_id, game_id FROM analysis_work_items "
+            "  WHERE (status = %s OR (status = %s AND lease_expires_at < %s)) "
+            f"  {job_filter} ORDER BY updated_at LIMIT %s FOR UPDATE SKIP LOCKED"
+            ") RETURNING job_id, game_id, payload, attempts",
+            params
+        )
+        return cursor.fetchall()
+
+
+def create_job_store(url: str, **kwargs) -> JobStore:
+    """
+    Create a job store from a URL.
+
+    Args:
+        url: sqlite:///path/to/file.db or postgres(ql)://user:pass@host/db
+
+    Returns:
+        JobStore instance
+
+    Raises:
+        ValueError: If the URL scheme is not supported
+    """
+    if url.startswith("sqlite:///"):
+        return SQLiteJobStore(url[len("sqlite:///"):], **kwargs)
+    if url.startswith(("postgres://", "postgresql://")):
+        return PostgresJobStore(url, **kwargs)
+    raise ValueError(f"Unsupported job store URL: {url.split(':', 1)[0]}://")
+
+
+# Global store instance
+_job_store: Optional[JobStore] = None
+_job_store_initialized = False
+_store_lock = threading.Lock()
+
+
+def get_job_store() -> Optional[JobStore]:
+    """
+    Get the global job store, configured from ANALYSIS_JOB_STORE_URL.
+
+    Defaults to a SQLite file next to the server; set ANALYSIS_JOB_STORE_URL=off
+    to keep jobs in memory only. A store that cannot be opened falls back to
+    in-memory jobs rather than blocking startup.
+
+    Returns:
+        JobStore instance, or None when persistence is disabled or unavailable
+    """
+    global _job_store, _job_store_initialized
+
+    if not _job_store_initialized:
+        with _store_lock:
+            if not _job_store_initialized:
+                default_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "analysis_jobs.db")
+                url = os.getenv("ANALYSIS_JOB_STORE_URL", f"sqlite:///{default_path}")
+                if url.lower() not in ("", "off", "none", "memory"):
+                    try:
+                        _job_store = create_job_store(
+                            url,
+                            lease_seconds=float(os.getenv("ANALYSIS_JOB_LEASE_SECONDS", "120"))
+                        )
+                        print(f"[JOB_STORE] Using {_job_store.backend} job store")
+                    except Exception as e:
+                        print(f"[JOB_STORE] Could not open job store, jobs will not survive restarts: {e}")
+                        _job_store = None
+                _job_store_initialized = True
+
+    return _job_store
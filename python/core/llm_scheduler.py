@@ -0,0 +1,612 @@
+#!/usr/bin/env python3
+"""
+LLM Request Scheduler
+Process-wide admission for every call to an LLM provider (move comments,
+coaching, style analysis, coach chat).
+
+Every generator instance and every concurrent game shares one scheduler per
+provider, so the provider's limits hold for the whole process:
+- Token bucket: requests are admitted at the provider's rate, with a burst
+- Concurrency limit: bounds requests in flight
+- Priorities: interactive requests (coach chat, a user is waiting) are admitted
+  before batch requests (background move comments), and batch requests before
+  replays from the retry queue
+- Coalescing: a request whose key matches one already in flight waits for that
+  request's result instead of calling the provider again
+- Throttling: a 429 pauses admission for Retry-After seconds (a default
+  backoff when the header is missing)
+- Retry queue: batch requests that are rejected (queue timeout) or fail
+  transiently (429, 5xx, timeout; the provider call flags these with
+  mark_transient_failure()) are stored per provider in a local SQLite file
+  and replayed with exponential backoff, so their results still reach the
+  comment cache after a throttling burst or a restart. Replay handlers are
+  registered once per request kind with register_retry_handler().
+
+Callers may run on the event loop (call_async) or in worker threads (call).
+
+Usage:
+    scheduler = get_llm_scheduler("anthropic")
+    text = await scheduler.call_async(lambda: client.chat(prompt), priority=Priority.INTERACTIVE)
+    text = scheduler.call(lambda: client.complete(prompt), key=cache_key,
+                          retry=("comment", payload))
+    register_retry_handler("comment", replay_comment)
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .metrics_registry import get_metrics_registry
+
+_metrics = get_metrics_registry()
+_llm_wait = _metrics.histogram(
+    "llm_scheduler_wait_seconds", "Time LLM requests waited for admission", ["provider", "priority"]
+)
+_llm_requests = _metrics.counter(
+    "llm_scheduler_requests_total", "LLM requests by outcome", ["provider", "outcome"]
+)
+
+_DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# Set by the provider call when its failure is worth replaying; calls made
+# through call() / call_async() each start with a cleared flag
+_transient_failure: contextvars.ContextVar[bool] = contextvars.ContextVar("llm_transient_failure", default=False)
+
+# Replay functions by request kind, shared by every provider's scheduler
+_retry_handlers: Dict[str, Callable[[Dict[str, Any]], bool]] = {}
+
+
+def mark_transient_failure() -> None:
+    """Flag the failure of the current provider call as transient (429, 5xx, timeout)."""
+    _transient_failure.set(True)
+
+
+def register_retry_handler(kind: str, handler: Callable[[Dict[str, Any]], bool]) -> None:
+    """
+    Set the function that replays queued requests of a kind (once per process).
+
+    The handler runs with an admission slot of the request's provider held,
+    so it must call the provider directly (not through a scheduler). It
+    returns True once the request succeeded.
+    """
+    _retry_handlers[kind] = handler
+
+
+class Priority(IntEnum):
+    """Admission order; lower values are admitted first."""
+    INTERACTIVE = 0
+    BATCH = 1
+    RETRY = 2
+
+
+class RetryQueue:
+    """Batch LLM requests waiting to be replayed, in a local SQLite file."""
+
+    def __init__(self, path: str, busy_timeout: float = 1.0):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_retries ("
+            "key TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, next_attempt_at REAL NOT NULL, created_at REAL NOT NULL, "
+            "provider TEXT NOT NULL DEFAULT '')"
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(llm_retries)")}
+        if "provider" not in columns:
+            # Requests queued before providers were recorded can be replayed by any provider
+            conn.execute("ALTER TABLE llm_retries ADD COLUMN provider TEXT NOT NULL DEFAULT ''")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def push(self, kind: str, key: str, payload: Dict[str, Any], delay: float, provider: str = "") -> bool:
+        """Store a request for a provider unless one with the same key is already queued."""
+        now = time.time()
+        cursor = self._conn().execute(
+            "INSERT OR IGNORE INTO llm_retries (key, kind, payload, attempts, next_attempt_at, created_at, provider) "
+            "VALUES (?, ?, ?, 0, ?, ?, ?)",
+            (key, kind, json.dumps(payload), now + delay, now, provider)
+        )
+        return cursor.rowcount > 0
+
+    def claim(self, limit: int, lease: float = 300.0, provider: Optional[str] = None) -> List[Tuple[str, str, Dict[str, Any], int]]:
+        """
+        Take up to limit due requests, oldest first, as (key, kind, payload, attempts).
+
+        With a provider, only that provider's requests (and ones queued
+        without a provider) are taken. Claimed requests are hidden from other
+        processes for lease seconds; the claimant removes or reschedules them.
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if provider is None:
+                rows = conn.execute(
+                    "SELECT key, kind, payload, attempts FROM llm_retries WHERE next_attempt_at <= ? "
+                    "ORDER BY next_attempt_at LIMIT ?",
+                    (now, limit)
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT key, kind, payload, attempts FROM llm_retries "
+                    "WHERE next_attempt_at <= ? AND provider IN (?, '') "
+                    "ORDER BY next_attempt_at LIMIT ?",
+                    (now, provider, limit)
+                ).fetchall()
+            conn.executemany(
+                "UPDATE llm_retries SET next_attempt_at = ? WHERE key = ?",
+                [(now + lease, row[0]) for row in rows]
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [(key, kind, json.loads(payload), attempts) for key, kind, payload, attempts in rows]
+
+    def reschedule(self, key: str, attempts: int, delay: float) -> None:
+        self._conn().execute(
+            "UPDATE llm_retries SET attempts = ?, next_attempt_at = ? WHERE key = ?",
+            (attempts, time.time() + delay, key)
+        )
+
+    def remove(self, key: str) -> None:
+        self._conn().execute("DELETE FROM llm_retries WHERE key = ?", (key,))
+
+    def providers(self) -> List[str]:
+        """Providers with queued requests."""
+        rows = self._conn().execute("SELECT DISTINCT provider FROM llm_retries WHERE provider != ''").fetchall()
+        return [row[0] for row in rows]
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM llm_retries").fetchone()[0]
+
+
+class LLMScheduler:
+    """Shared token bucket, priority queue and coalescing for one LLM provider."""
+
+    def __init__(
+        self,
+        provider: str,
+        rate: float,
+        burst: int,
+        max_concurrency: int,
+        default_backoff: float = 30.0,
+        retry_queue: Optional[RetryQueue] = None,
+        retry_delay: float = 60.0,
+        max_retry_attempts: int = 5,
+        poll_interval: float = 0.05,
+        clock: Callable[[], float] = time.monotonic,
+        retry_handlers: Optional[Dict[str, Callable[[Dict[str, Any]], bool]]] = None,
+    ):
+        if rate <= 0 or burst < 1 or max_concurrency < 1:
+            raise ValueError(f"LLM scheduler {provider}: need rate > 0, burst >= 1, max_concurrency >= 1")
+        self.provider = provider
+        self.rate = float(rate)
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.default_backoff = default_backoff
+        self.retry_queue = retry_queue
+        self.retry_delay = retry_delay
+        self.max_retry_attempts = max_retry_attempts
+        self.poll_interval = poll_interval
+        self.clock = clock
+
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._in_flight = 0
+        self._waiters: List[Tuple[int, int]] = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._pending: Dict[str, Future] = {}
+        # The process-wide handlers unless a test supplies its own
+        self._retry_handlers = _retry_handlers if retry_handlers is None else retry_handlers
+        self._stats = {"admitted": 0, "rejected": 0, "coalesced": 0, "throttled": 0,
+                       "retries_queued": 0, "retries_succeeded": 0, "retries_dropped": 0}
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+
+    def _refill(self, now: float) -> None:
+        # While paused after a 429, _updated lies in the future and nothing refills
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def _enqueue(self, priority: Priority) -> Tuple[int, int]:
+        entry = (int(priority), next(self._sequence))
+        heapq.heappush(self._waiters, entry)
+        return entry
+
+    def _withdraw(self, entry: Tuple[int, int]) -> None:
+        self._waiters.remove(entry)
+        heapq.heapify(self._waiters)
+        # The next waiter may be admissible now
+        self._cond.notify_all()
+
+    def _try_admit(self, entry: Tuple[int, int]) -> Tuple[bool, Optional[float]]:
+        """
+        Admit entry if it is first in line and a slot is free (call with _cond held).
+
+        Returns:
+            (admitted, seconds until it could be admitted, or None if that
+            depends on other requests finishing)
+        """
+        if self._waiters[0] != entry or self._in_flight >= self.max_concurrency:
+            return False, None
+        now = self.clock()
+        self._refill(now)
+        if now < self._blocked_until:
+            return False, self._blocked_until - now
+        if self._tokens < 1:
+            return False, (1 - self._tokens) / self.rate
+        heapq.heappop(self._waiters)
+        self._tokens -= 1
+        self._in_flight += 1
+        self._stats["admitted"] += 1
+        # The next waiter may be admissible too (burst, free concurrency)
+        self._cond.notify_all()
+        return True, 0.0
+
+    def acquire(self, priority: Priority = Priority.BATCH, timeout: Optional[float] = None) -> bool:
+        """Wait in a worker thread until admitted; False if not admitted within timeout."""
+        started = self.clock()
+        with self._cond:
+            entry = self._enqueue(priority)
+            while True:
+                admitted, wait = self._try_admit(entry)
+                if admitted:
+                    _llm_wait.labels(provider=self.provider, priority=priority.name.lower()).observe(self.clock() - started)
+                    return True
+                remaining = None if timeout is None else timeout - (self.clock() - started)
+                if remaining is not None and remaining <= 0:
+                    self._withdraw(entry)
+                    return False
+                waits = [w for w in (wait, remaining) if w is not None]
+                self._cond.wait(min(waits) if waits else None)
+
+    async def acquire_async(self, priority: Priority = Priority.BATCH, timeout: Optional[float] = None) -> bool:
+        """Wait on the event loop until admitted; False if not admitted within timeout."""
+        started = self.clock()
+        with self._cond:
+            entry = self._enqueue(priority)
+        admitted = False
+        try:
+            while True:
+                with self._cond:
+                    admitted, wait = self._try_admit(entry)
+                if admitted:
+                    _llm_wait.labels(provider=self.provider, priority=priority.name.lower()).observe(self.clock() - started)
+                    return True
+                remaining = None if timeout is None else timeout - (self.clock() - started)
+                if remaining is not None and remaining <= 0:
+                    return False
+                # Releases from other threads cannot wake the loop, so poll while others hold slots
+                waits = [w for w in (wait if wait is not None else self.poll_interval, remaining) if w is not None]
+                await asyncio.sleep(min(waits))
+        finally:
+            if not admitted:
+                with self._cond:
+                    self._withdraw(entry)
+
+    def release(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def throttled(self, retry_after: Optional[float] = None) -> None:
+        """Pause admission after the provider answered 429 (a transient failure)."""
+        mark_transient_failure()
+        with self._cond:
+            now = self.clock()
+            self._refill(now)
+            pause = retry_after if retry_after is not None else self.default_backoff
+            if now + pause > self._blocked_until:
+                self._blocked_until = now + pause
+                # Resume with one token, one interval apart instead of in a burst
+                self._updated = self._blocked_until
+                self._tokens = 1.0
+            self._stats["throttled"] += 1
+        _llm_requests.labels(provider=self.provider, outcome="throttled").inc()
+        print(f"[LLM_SCHEDULER] {self.provider} throttled; pausing requests for {pause:.1f}s")
+
+    # ------------------------------------------------------------------
+    # Calls
+    # ------------------------------------------------------------------
+
+    def _join(self, key: Optional[str]) -> Tuple[Optional[Future], bool]:
+        """(future for key, whether this caller owns the request)."""
+        if key is None:
+            return None, True
+        with self._cond:
+            future = self._pending.get(key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                _llm_requests.labels(provider=self.provider, outcome="coalesced").inc()
+                return future, False
+            future = self._pending[key] = Future()
+            return future, True
+
+    def _finish(self, key: Optional[str], future: Optional[Future], result: Any = None, error: Optional[BaseException] = None) -> None:
+        if future is None:
+            return
+        with self._cond:
+            self._pending.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _on_result(self, result: Any, transient: bool, retry: Optional[Tuple[str, Dict[str, Any]]], key: Optional[str]) -> None:
+        outcome = "ok" if result is not None else "failed"
+        _llm_requests.labels(provider=self.provider, outcome=outcome).inc()
+        # A rejected prompt (400, invalid request) would fail the same way on every replay
+        if result is None and transient and retry is not None:
+            self.queue_retry(retry[0], key, retry[1])
+
+    def _on_rejected(self, retry: Optional[Tuple[str, Dict[str, Any]]], key: Optional[str]) -> None:
+        with self._cond:
+            self._stats["rejected"] += 1
+        _llm_requests.labels(provider=self.provider, outcome="rejected").inc()
+        if retry is not None:
+            self.queue_retry(retry[0], key, retry[1])
+
+    def call(
+        self,
+        fn: Callable[[], Any],
+        priority: Priority = Priority.BATCH,
+        key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        retry: Optional[Tuple[str, Dict[str, Any]]] = None,
+    ) -> Any:
+        """
+        Run a blocking provider call once admitted (from a worker thread).
+
+        Args:
+            fn: The provider call; returns None on failure, after
+                mark_transient_failure() if the failure is worth a retry
+            priority: Admission priority
+            key: Coalescing key; concurrent calls with the same key share one result
+            timeout: Seconds to wait for admission
+            retry: (kind, payload) to store in the retry queue if the call is
+                rejected or fails transiently
+
+        Returns:
+            fn's result, or None if not admitted in time
+        """
+        future, owner = self._join(key)
+        if not owner:
+            return future.result()
+        try:
+            if not self.acquire(priority, timeout):
+                self._on_rejected(retry, key)
+                result = None
+            else:
+                flag = _transient_failure.set(False)
+                try:
+                    result = fn()
+                    transient = _transient_failure.get()
+                finally:
+                    _transient_failure.reset(flag)
+                    self.release()
+                self._on_result(result, transient, retry, key)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def call_async(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        priority: Priority = Priority.BATCH,
+        key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        retry: Optional[Tuple[str, Dict[str, Any]]] = None,
+    ) -> Any:
+        """Async variant of call(); fn returns an awaitable."""
+        future, owner = self._join(key)
+        if not owner:
+            return await asyncio.wrap_future(future)
+        try:
+            if not await self.acquire_async(priority, timeout):
+                self._on_rejected(retry, key)
+                result = None
+            else:
+                flag = _transient_failure.set(False)
+                try:
+                    result = await fn()
+                    transient = _transient_failure.get()
+                finally:
+                    _transient_failure.reset(flag)
+                    self.release()
+                self._on_result(result, transient, retry, key)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    # ------------------------------------------------------------------
+    # Retry queue
+    # ------------------------------------------------------------------
+
+    def queue_retry(self, kind: str, key: Optional[str], payload: Dict[str, Any]) -> None:
+        if self.retry_queue is None or key is None:
+            return
+        try:
+            if self.retry_queue.push(kind, key, payload, self.retry_delay, provider=self.provider):
+                with self._cond:
+                    self._stats["retries_queued"] += 1
+        except sqlite3.Error as e:
+            print(f"[LLM_SCHEDULER] Could not queue retry for {key}: {e}")
+
+    def process_retries(self, limit: int = 10, admission_timeout: float = 1.0) -> int:
+        """
+        Replay due requests from the retry queue (blocking; run in a worker thread).
+
+        Replays only take slots that no interactive or batch request is
+        waiting for. Failed replays back off exponentially and are dropped
+        after max_retry_attempts.
+
+        Returns:
+            Number of requests that succeeded
+        """
+        if self.retry_queue is None:
+            return 0
+        succeeded = 0
+        claimed = self.retry_queue.claim(limit, provider=self.provider)
+        for index, (key, kind, payload, attempts) in enumerate(claimed):
+            handler = self._retry_handlers.get(kind)
+            if handler is None or not self.acquire(Priority.RETRY, admission_timeout):
+                # Not replayable here now; hand the rest back for the next round
+                for other_key, _, _, other_attempts in claimed[index:]:
+                    self.retry_queue.reschedule(other_key, other_attempts, self.retry_delay)
+                break
+            try:
+                ok = handler(payload)
+            except Exception as e:
+                print(f"[LLM_SCHEDULER] Retry of {key} failed: {e}")
+                ok = False
+            finally:
+                self.release()
+            if ok:
+                self.retry_queue.remove(key)
+                succeeded += 1
+                with self._cond:
+                    self._stats["retries_succeeded"] += 1
+            elif attempts + 1 >= self.max_retry_attempts:
+                self.retry_queue.remove(key)
+                with self._cond:
+                    self._stats["retries_dropped"] += 1
+                print(f"[LLM_SCHEDULER] Dropping {kind} request {key} after {attempts + 1} attempts")
+            else:
+                self.retry_queue.reschedule(key, attempts + 1, self.retry_delay * 2 ** (attempts + 1))
+        return succeeded
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            now = self.clock()
+            self._refill(now)
+            stats = {
+                **self._stats,
+                "rate": self.rate,
+                "tokens": round(self._tokens, 2),
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiters),
+                "blocked_for": round(max(0.0, self._blocked_until - now), 2),
+            }
+        if self.retry_queue is not None:
+            try:
+                stats["retry_queue"] = len(self.retry_queue)
+            except sqlite3.Error:
+                pass
+        return stats
+
+
+def create_retry_queue(url: Optional[str]) -> Optional[RetryQueue]:
+    """
+    Create a retry queue from a URL.
+
+    Args:
+        url: sqlite:///path/to/file.db, or off/None to drop rejected requests
+
+    Raises:
+        ValueError: If the URL scheme is not supported
+    """
+    if not url or url.lower() in ("off", "none", "memory"):
+        return None
+    if url.startswith("sqlite:///"):
+        return RetryQueue(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported LLM retry queue URL: {url.split(':', 1)[0]}://")
+
+
+# Defaults per provider: (rate in requests/s, burst, max_concurrency).
+# Anthropic: 50 requests per minute; Gemini free tier: 15 requests per second.
+_PROVIDER_DEFAULTS = {
+    "anthropic": (50.0 / 60.0, 50, 15),
+    "gemini": (15.0, 15, 10),
+}
+
+_schedulers: Dict[str, LLMScheduler] = {}
+_schedulers_lock = threading.Lock()
+_retry_queue: Optional[RetryQueue] = None
+_retry_queue_created = False
+
+
+def _shared_retry_queue() -> Optional[RetryQueue]:
+    global _retry_queue, _retry_queue_created
+    if not _retry_queue_created:
+        _retry_queue_created = True
+        url = os.getenv("LLM_RETRY_QUEUE_PATH", f"sqlite:///{os.path.join(_DEFAULT_DATA_DIR, 'llm_retries.db')}")
+        try:
+            _retry_queue = create_retry_queue(url)
+        except Exception as e:
+            print(f"[LLM_SCHEDULER] Retry queue disabled: {e}")
+    return _retry_queue
+
+
+def get_llm_scheduler(provider: str) -> LLMScheduler:
+    """
+    Get the process-wide scheduler of a provider ('anthropic' or 'gemini').
+
+    Configured from LLM_<PROVIDER>_RATE (requests per second),
+    LLM_<PROVIDER>_BURST and LLM_<PROVIDER>_MAX_CONCURRENCY; the retry queue
+    from LLM_RETRY_QUEUE_PATH.
+    """
+    provider = provider.lower()
+    scheduler = _schedulers.get(provider)
+    if scheduler is None:
+        with _schedulers_lock:
+            scheduler = _schedulers.get(provider)
+            if scheduler is None:
+                prefix = f"LLM_{provider.upper()}"
+                rate, burst, concurrency = _PROVIDER_DEFAULTS.get(provider, _PROVIDER_DEFAULTS["anthropic"])
+                scheduler = _schedulers[provider] = LLMScheduler(
+                    provider,
+                    rate=float(os.getenv(f"{prefix}_RATE", str(rate))),
+                    burst=int(os.getenv(f"{prefix}_BURST", str(burst))),
+                    max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", str(concurrency))),
+                    retry_queue=_shared_retry_queue(),
+                )
+                print(f"[LLM_SCHEDULER] {provider}: {scheduler.rate:.2f} req/s, burst {scheduler.burst}, "
+                      f"{scheduler.max_concurrency} concurrent")
+    return scheduler
+
+
+def process_pending_retries(limit: int = 10) -> int:
+    """
+    Replay due retries of every provider with queued requests.
+
+    Schedulers are created for providers found in the queue, so requests
+    stored before a restart are replayed before anything in this process has
+    asked for that provider.
+    """
+    providers = set(_schedulers)
+    queue = _shared_retry_queue()
+    if queue is not None:
+        try:
+            providers.update(queue.providers())
+        except sqlite3.Error as e:
+            print(f"[LLM_SCHEDULER] Could not list queued providers: {e}")
+    return sum(get_llm_scheduler(provider).process_retries(limit) for provider in sorted(providers))
@@ -7,7 +7,7 @@ Monitors memory usage and provides alerts/metrics.
 import asyncio
 import time
 import psutil
-from typing import Optional
+from typing import Callable, Optional
 from dataclasses import dataclass, field
 
 
@@ -74,6 +74,30 @@ class MemoryMonitor:
         self._peak: Optional[MemorySnapshot] = None
         self._warning_count = 0
         self._critical_count = 0
+        self._listeners: list[Callable[[MemorySnapshot], None]] = []
+
+    def add_listener(self, callback: Callable[[MemorySnapshot], None]) -> None:
+        """
+        Register a callback invoked with every periodic snapshot.
+
+        Args:
+            callback: Function receiving the new MemorySnapshot
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[MemorySnapshot], None]) -> None:
+        """Unregister a snapshot callback."""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify_listeners(self, snapshot: MemorySnapshot) -> None:
+        """Deliver a snapshot to listeners, isolating their failures."""
+        for callback in list(self._listeners):
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"[MEMORY] Listener error: {e}")
 
     def _take_snapshot(self) -> MemorySnapshot:
         """Take a memory snapshot."""
@@ -139,6 +163,8 @@ class MemoryMonitor:
                         if len(self._snapshots) % 10 == 0:
                             print(f"[MEMORY] ✅ Healthy: {snapshot}")
 
+                    self._notify_listeners(snapshot)
+
                 except asyncio.CancelledError:
                     print("[MEMORY] Monitor task cancelled")
                     break
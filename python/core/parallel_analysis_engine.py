@@ -6,12 +6,17 @@ Parallel analysis engine using multiprocessing for true parallel game analysis.
 import asyncio
 import multiprocessing
 import os
+import time
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from .analysis_engine import ChessAnalysisEngine, AnalysisType, AnalysisConfig
 from .config import get_config
+from .job_store import JobStore, ITEM_PENDING, ITEM_LEASED, ITEM_DONE, ITEM_FAILED, default_worker_id
+from .game_scheduler import JobExecutor
+from .hot_path_logger import get_hot_logger
+from .stage_timing import game_timing, get_stage_metrics
 from supabase import create_client, Client
 
 def get_supabase_client() -> Client:
@@ -20,6 +25,8 @@ def get_supabase_client() -> Client:
     # Use service role key for backend operations that need full database access
     return create_client(config.database.url, config.database.service_role_key)
 
+hot_log = get_hot_logger()
+
 async def _save_analysis_to_database(analysis, analysis_type_enum):
     """Save analysis results to database."""
     try:
@@ -44,7 +51,7 @@ def analyze_game_worker(game_data: Dict[str, Any]) -> Dict[str, Any]:
     depth = game_data.get('depth', 14)
     skill_level = game_data.get('skill_level', 20)
 
-    print(f"[Game {game_id}] Starting parallel analysis at {datetime.now().strftime('%H:%M:%S.%f')[:-3]} (PID: {os.getpid()})")
+    hot_log.debug("GAME", "Starting parallel analysis", game_id=game_id, pid=os.getpid())
 
     try:
         # Create engine in this process with config stockfish path
@@ -60,10 +67,14 @@ def analyze_game_worker(game_data: Dict[str, Any]) -> Dict[str, Any]:
         effective_depth = 6 if app_env == 'dev' else (depth or 14)
         effective_skill = 6 if app_env == 'dev' else (skill_level or 20)
 
+        # Batch games defer coaching text to the first view of the game (see enrich_coaching)
+        lazy_coaching = os.getenv('BATCH_LAZY_COACHING', 'true').lower() == 'true'
+
         config = AnalysisConfig(
             analysis_type=analysis_type_enum,
             depth=effective_depth,
-            skill_level=effective_skill
+            skill_level=effective_skill,
+            lazy_coaching=lazy_coaching
         )
         engine.config = config
 
@@ -81,20 +92,22 @@ def analyze_game_worker(game_data: Dict[str, Any]) -> Dict[str, Any]:
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
 
-        analysis = loop.run_until_complete(
-            engine.analyze_game(
-                game_id=game_id,
-                user_id=user_id,
-                platform=platform,
-                pgn=pgn,
-                analysis_type=analysis_type_enum
+        # Time analysis and persistence as one game; the parent process merges the breakdown
+        with game_timing(game_id) as timings:
+            analysis = loop.run_until_complete(
+                engine.analyze_game(
+                    game_id=game_id,
+                    user_id=user_id,
+                    platform=platform,
+                    pgn=pgn,
+                    analysis_type=analysis_type_enum
+                )
             )
-        )
 
-        if analysis:
             # Save analysis to database
-            save_success = loop.run_until_complete(_save_analysis_to_database(analysis, analysis_type_enum))
+            save_success = bool(analysis) and loop.run_until_complete(_save_analysis_to_database(analysis, analysis_type_enum))
 
+        if analysis:
             result = {
                 'game_id': game_id,
                 'success': True,
@@ -107,13 +120,12 @@ def analyze_game_worker(game_data: Dict[str, Any]) -> Dict[str, Any]:
                     'total_moves': analysis.total_moves,
                     'processing_time_ms': analysis.processing_time_ms
                 },
-                'saved_to_db': save_success
+                'saved_to_db': save_success,
+                'stage_timings': timings.summary()
             }
-            print(f"[Game {game_id}] Completed - Accuracy: {analysis.accuracy:.1f}% at {datetime.now().strftime('%H:%M:%S.%f')[:-3]} (PID: {os.getpid()})")
-            if save_success:
-                print(f"   Saved to database successfully")
-            else:
-                print(f"   Failed to save to database")
+            hot_log.info("GAME", "Completed - Accuracy: %.1f%%", analysis.accuracy, game_id=game_id, pid=os.getpid(), saved_to_db=save_success)
+            if not save_success:
+                hot_log.warning("GAME", "Failed to save to database", game_id=game_id)
         else:
             result = {
                 'game_id': game_id,
@@ -139,12 +151,13 @@ class ParallelAnalysisEngine:
     Parallel analysis engine that uses multiprocessing for true parallel game analysis.
     """
 
-    def __init__(self, max_workers: int = None):
+    def __init__(self, max_workers: int = None, job_executor: Optional[JobExecutor] = None):
         """
         Initialize parallel analysis engine.
 
         Args:
             max_workers: Maximum number of parallel processes. If None, auto-calculates based on CPU count.
+            job_executor: Optional slice of a shared fair-share pool used instead of a per-call process pool
         """
         if max_workers is None:
             # Dynamic worker count optimized for Railway Hobby tier
@@ -153,8 +166,15 @@ class ParallelAnalysisEngine:
             self.max_workers = max(1, min(6, cpu_count))  # Up to 6 workers for Railway Hobby tier
         else:
             self.max_workers = max_workers
+        self.job_executor = job_executor
         self.supabase = get_supabase_client()
 
+    def _create_executor(self):
+        """Per-call process pool, or this job's view of the shared fair-share pool."""
+        if self.job_executor is not None:
+            return self.job_executor
+        return ProcessPoolExecutor(max_workers=self.max_workers)
+
     async def analyze_games_parallel(
         self,
         user_id: str,
@@ -163,7 +183,10 @@ class ParallelAnalysisEngine:
         limit: int = 5,
         depth: int = 14,
         skill_level: int = 20,
-        progress_callback=None
+        progress_callback=None,
+        job_store: Optional[JobStore] = None,
+        job_id: Optional[str] = None,
+        game_callback=None
     ) -> Dict[str, Any]:
         """
         Analyze multiple games in parallel using multiprocessing.
@@ -175,6 +198,9 @@ class ParallelAnalysisEngine:
             limit: Maximum number of games to analyze
             depth: Stockfish depth
             skill_level: Stockfish skill level
+            job_store: Optional durable store; games become leased work items
+            job_id: Queue job the work items belong to (required with job_store)
+            game_callback: Optional callable receiving each game's result as soon as it finishes
 
         Returns:
             Dictionary with analysis results and statistics
@@ -193,10 +219,20 @@ class ParallelAnalysisEngine:
             except Exception as e:
                 print(f"[PARALLEL ENGINE] Warning: Could not update progress at fetch start: {e}")
 
-        # Get games from database
-        games = await self._fetch_games(user_id, platform, limit)
+        durable = job_store is not None and job_id is not None
+        resuming = durable and await asyncio.to_thread(job_store.has_work_items, job_id)
 
-        if not games:
+        # Get games from database (a resumed job already has its games as work items)
+        if resuming:
+            counts = await asyncio.to_thread(job_store.work_item_counts, job_id)
+            games = []
+            total_games = sum(counts.values())
+            print(f"[PARALLEL ENGINE] Resuming job {job_id}: {counts[ITEM_DONE] + counts[ITEM_FAILED]}/{total_games} games already finished")
+        else:
+            games = await self._fetch_games(user_id, platform, limit)
+            total_games = len(games)
+
+        if not total_games:
             return {
                 'success': False,
                 'message': f'No games found for {user_id} on {platform}',
@@ -206,12 +242,12 @@ class ParallelAnalysisEngine:
                 'total_time': 0
             }
 
-        print(f"Found {len(games)} games to analyze")
+        print(f"Found {total_games} games to analyze")
 
         # Update progress with total games found - this moves us past "starting" phase
         if progress_callback:
             try:
-                progress_callback(0, len(games), 0)  # Update total_games, phase will change to "analyzing"
+                progress_callback(0, total_games, 0)  # Update total_games, phase will change to "analyzing"
             except Exception as e:
                 print(f"[PARALLEL ENGINE] Warning: Could not update progress after fetch: {e}")
 
@@ -229,7 +265,14 @@ class ParallelAnalysisEngine:
             })
 
         # Analyze games in parallel
-        results = await self._analyze_games_parallel(game_data_list, progress_callback)
+        if durable:
+            if game_data_list:
+                await asyncio.to_thread(
+                    job_store.add_work_items, job_id, [(g['id'], g) for g in game_data_list]
+                )
+            results = await self._analyze_work_items(job_store, job_id, progress_callback, game_callback)
+        else:
+            results = await self._analyze_games_parallel(game_data_list, progress_callback, game_callback)
 
         end_time = datetime.now()
         total_time = (end_time - start_time).total_seconds()
@@ -249,21 +292,21 @@ class ParallelAnalysisEngine:
 
         result = {
             'success': True,
-            'message': f'Parallel analysis completed for {len(successful_analyses)}/{len(games)} games',
-            'total_games': len(games),
+            'message': f'Parallel analysis completed for {len(successful_analyses)}/{total_games} games',
+            'total_games': total_games,
             'analyzed_games': len(successful_analyses),
             'failed_games': len(failed_analyses),
             'average_accuracy': avg_accuracy,
             'total_moves_analyzed': total_moves,
             'total_time': total_time,
             'time_per_game': total_time / len(successful_analyses) if successful_analyses else 0,
-            'speedup': (len(games) * 90) / total_time if total_time > 0 else 0,  # Assume 90s per game sequential
+            'speedup': (total_games * 90) / total_time if total_time > 0 else 0,  # Assume 90s per game sequential
             'results': results
         }
 
         print(f"PARALLEL ANALYSIS COMPLETE:")
         print(f"   Total time: {total_time:.1f}s")
-        print(f"   Games analyzed: {len(successful_analyses)}/{len(games)}")
+        print(f"   Games analyzed: {len(successful_analyses)}/{total_games}")
         print(f"   Average accuracy: {avg_accuracy:.1f}%")
         print(f"   Speedup: {result['speedup']:.1f}x")
 
@@ -379,7 +422,84 @@ class ParallelAnalysisEngine:
             traceback.print_exc()
             return []
 
-    async def _analyze_games_parallel(self, game_data_list: List[Dict[str, Any]], progress_callback=None) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _notify_game(game_callback, result: Dict[str, Any]) -> None:
+        """Report a single finished game (per-game progress events)."""
+        timings = result.get('stage_timings')
+        if timings and timings.get('pid') != os.getpid():
+            # Analyzed in a worker process: its stage metrics live there
+            get_stage_metrics().record_game(timings)
+        if game_callback:
+            try:
+                game_callback(result)
+            except Exception as callback_error:
+                print(f"[PARALLEL ENGINE] ERROR in game callback: {callback_error}")
+
+    async def _analyze_work_items(self, job_store: JobStore, job_id: str, progress_callback=None, game_callback=None) -> List[Dict[str, Any]]:
+        """
+        Analyze a job's stored work items with leases and heartbeats.
+
+        Items are claimed as worker slots free up, leases are renewed while games
+        are analyzed, and each outcome is recorded as soon as it is known. Items
+        leased by a worker that died are reclaimed once their lease expires, so
+        the job finishes even if another node started it.
+
+        Returns:
+            Results for every finished work item of the job (including earlier runs)
+        """
+        worker_id = default_worker_id()
+        heartbeat_interval = job_store.lease_seconds / 3
+        last_heartbeat = time.time()
+        running = {}
+
+        print(f"DURABLE PROCESSING: Job {job_id} on worker {worker_id} with {self.max_workers} workers")
+        executor = self._create_executor()
+        try:
+            while True:
+                free_slots = self.max_workers - len(running)
+                if free_slots > 0:
+                    items = await asyncio.to_thread(job_store.claim_work_items, worker_id, job_id, free_slots)
+                    for item in items:
+                        running[executor.submit(analyze_game_worker, item['payload'])] = item
+
+                done_futures = [f for f in running if f.done()]
+                for future in done_futures:
+                    item = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"[PARALLEL ENGINE] Error getting result for game {item['game_id']}: {e}")
+                        result = {'game_id': item['game_id'], 'success': False, 'message': str(e)}
+                    if await asyncio.to_thread(job_store.complete_work_item, job_id, item['game_id'], result):
+                        self._notify_game(game_callback, result)
+
+                if done_futures or not running:
+                    counts = await asyncio.to_thread(job_store.work_item_counts, job_id)
+                    total_tasks = sum(counts.values())
+                    finished = counts[ITEM_DONE] + counts[ITEM_FAILED]
+                    if done_futures and progress_callback and total_tasks:
+                        try:
+                            progress_callback(finished, total_tasks, 20 + int((finished / total_tasks) * 70))  # 20-90%
+                        except Exception as callback_error:
+                            print(f"[PARALLEL ENGINE] ERROR in progress callback: {callback_error}")
+                    if not running and counts[ITEM_PENDING] + counts[ITEM_LEASED] == 0:
+                        break
+
+                if running and time.time() - last_heartbeat >= heartbeat_interval:
+                    await asyncio.to_thread(job_store.heartbeat, worker_id, job_id)
+                    last_heartbeat = time.time()
+
+                if not done_futures:
+                    # Idle workers wait longer: remaining items are leased by another worker
+                    await asyncio.sleep(0.1 if running else 1.0)
+        finally:
+            executor.shutdown(wait=False)
+            # Hand back anything still leased (cancellation/shutdown) so it can be resumed
+            await asyncio.to_thread(job_store.release_work_items, worker_id, job_id)
+
+        return await asyncio.to_thread(job_store.get_work_results, job_id)
+
+    async def _analyze_games_parallel(self, game_data_list: List[Dict[str, Any]], progress_callback=None, game_callback=None) -> List[Dict[str, Any]]:
         """Analyze games in parallel using ProcessPoolExecutor with async execution to avoid blocking."""
         results = []
 
@@ -393,7 +513,7 @@ class ParallelAnalysisEngine:
             loop = asyncio.get_event_loop()
 
             # Create executor
-            executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            executor = self._create_executor()
 
             try:
                 # Submit all tasks to ProcessPoolExecutor
@@ -425,15 +545,15 @@ class ParallelAnalysisEngine:
                             result = await loop.run_in_executor(None, future.result)
                             results.append(result)
                             completed_count += 1
-                            print(f"[PARALLEL ENGINE] Task completed: {result.get('game_id', 'unknown')} - Success: {result.get('success', False)} ({completed_count}/{total_tasks})")
+                            self._notify_game(game_callback, result)
+                            hot_log.info("PARALLEL ENGINE", "Task completed", game_id=result.get('game_id', 'unknown'), success=result.get('success', False), completed=completed_count, total=total_tasks)
 
                             # Update progress if callback provided
                             if progress_callback:
                                 try:
                                     progress_percentage = 20 + int((completed_count / total_tasks) * 70)  # 20-90%
-                                    print(f"[PARALLEL ENGINE] Calling progress callback: {completed_count}/{total_tasks} ({progress_percentage}%)")
+                                    hot_log.debug("PARALLEL ENGINE", "Calling progress callback: %d/%d (%d%%)", completed_count, total_tasks, progress_percentage)
                                     progress_callback(completed_count, total_tasks, progress_percentage)
-                                    print(f"[PARALLEL ENGINE] Progress callback completed successfully")
                                 except Exception as callback_error:
                                     print(f"[PARALLEL ENGINE] ERROR in progress callback: {callback_error}")
                                     import traceback
@@ -446,12 +566,13 @@ class ParallelAnalysisEngine:
                                 'success': False,
                                 'message': str(e)
                             })
+                            self._notify_game(game_callback, results[-1])
 
                             # Update progress even for failed games
                             if progress_callback:
                                 try:
                                     progress_percentage = 20 + int((completed_count / total_tasks) * 70)  # 20-90%
-                                    print(f"[PARALLEL ENGINE] Calling progress callback for failed game: {completed_count}/{total_tasks} ({progress_percentage}%)")
+                                    hot_log.debug("PARALLEL ENGINE", "Calling progress callback for failed game: %d/%d (%d%%)", completed_count, total_tasks, progress_percentage)
                                     progress_callback(completed_count, total_tasks, progress_percentage)
                                 except Exception as callback_error:
                                     print(f"[PARALLEL ENGINE] ERROR in progress callback (failed game): {callback_error}")
@@ -481,7 +602,8 @@ class ParallelAnalysisEngine:
                     result = await loop.run_in_executor(None, analyze_game_worker, game_data)
                     results.append(result)
                     completed_count = i + 1
-                    print(f"Sequential task completed: {result.get('game_id', 'unknown')} - Success: {result.get('success', False)} ({completed_count}/{len(game_data_list)})")
+                    self._notify_game(game_callback, result)
+                    hot_log.info("PARALLEL ENGINE", "Sequential task completed", game_id=result.get('game_id', 'unknown'), success=result.get('success', False), completed=completed_count, total=len(game_data_list))
 
                     # Update progress if callback provided
                     if progress_callback:
@@ -497,5 +619,6 @@ class ParallelAnalysisEngine:
                         'success': False,
                         'message': str(e)
                     })
+                    self._notify_game(game_callback, results[-1])
 
         return results
@@ -12,6 +12,8 @@ from typing import Dict, List, Optional, Tuple, Set, Any
 from enum import Enum
 import math
 
+from .tactical_features import get_tactical_features
+
 
 class TacticalPattern(Enum):
     """Specific tactical patterns that can be detected."""
@@ -180,13 +182,14 @@ class PositionAnalyzer:
         if not moved_piece:
             return pins
 
-        # Check if the moved piece is pinning something
-        for square in chess.SQUARES:
+        # Only pins whose pinner is the moved piece; pins that already existed are not the move's
+        for pin in get_tactical_features(board).pins[not moved_piece.color]:
+            if pin.pinner != move.to_square:
+                continue
+            square = pin.pinned
             piece = board.piece_at(square)
-            if piece and piece.color != moved_piece.color:
-                # Check if this piece is pinned by the moved piece
-                if self._is_pinned(board, square, moved_piece.color):
-                    pins.append(TacticalPatternInfo(
+            if piece:
+                pins.append(TacticalPatternInfo(
                         pattern=TacticalPattern.PIN,
                         pieces_involved=[move.to_square, square],
                         target_squares=[square],
@@ -204,12 +207,10 @@ class PositionAnalyzer:
             return forks
 
         # Check if the moved piece is attacking multiple enemy pieces
-        attacked_pieces = []
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece and piece.color != moved_piece.color:
-                if board.is_attacked_by(moved_piece.color, square):
-                    attacked_pieces.append((square, piece))
+        attacked_pieces = [
+            (square, board.piece_at(square))
+            for square in get_tactical_features(board).attacked_pieces(moved_piece.color)
+        ]
 
         if len(attacked_pieces) >= 2:
             total_value = sum(self.piece_values[piece.piece_type] for _, piece in attacked_pieces)
@@ -233,26 +234,22 @@ class PositionAnalyzer:
         if not moved_piece:
             return skewers
 
-        # Check for skewers along the same line
-        directions = [8, -8, 1, -1, 9, 7, -7, -9]  # N, S, E, W, NE, NW, SE, SW
-        for direction in directions:
-            line_pieces = self._get_pieces_on_line(board, move.to_square, direction)
-            if len(line_pieces) >= 2:
-                # Check if we can skewer (attack through a piece)
-                enemy_pieces = [p for p in line_pieces if board.piece_at(p) and board.piece_at(p).color != moved_piece.color]
-                if len(enemy_pieces) >= 2:
-                    # Check if the first piece is less valuable than the second
-                    first_piece = board.piece_at(enemy_pieces[0])
-                    second_piece = board.piece_at(enemy_pieces[1])
-                    if first_piece and second_piece:
-                        if self.piece_values[first_piece.piece_type] < self.piece_values[second_piece.piece_type]:
-                            skewers.append(TacticalPatternInfo(
-                                pattern=TacticalPattern.SKEWER,
-                                pieces_involved=[move.to_square, enemy_pieces[0], enemy_pieces[1]],
-                                target_squares=[enemy_pieces[1]],
-                                description=f"{chess.piece_name(moved_piece.piece_type).title()} on {chess.square_name(move.to_square)} skewers {chess.piece_name(first_piece.piece_type)} and {chess.piece_name(second_piece.piece_type)}",
-                                impact_score=self.piece_values[second_piece.piece_type]
-                            ))
+        # Check for skewers along the moved piece's lines (attack through a piece)
+        for xray in get_tactical_features(board).xrays:
+            if xray.slider != move.to_square:
+                continue
+            first_piece = board.piece_at(xray.front)
+            second_piece = board.piece_at(xray.behind)
+            if first_piece and second_piece and first_piece.color != moved_piece.color and second_piece.color != moved_piece.color:
+                # Check if the first piece is less valuable than the second
+                if self.piece_values[first_piece.piece_type] < self.piece_values[second_piece.piece_type]:
+                    skewers.append(TacticalPatternInfo(
+                        pattern=TacticalPattern.SKEWER,
+                        pieces_involved=[move.to_square, xray.front, xray.behind],
+                        target_squares=[xray.behind],
+                        description=f"{chess.piece_name(moved_piece.piece_type).title()} on {chess.square_name(move.to_square)} skewers {chess.piece_name(first_piece.piece_type)} and {chess.piece_name(second_piece.piece_type)}",
+                        impact_score=self.piece_values[second_piece.piece_type]
+                    ))
 
         return skewers
 
@@ -300,12 +297,7 @@ class PositionAnalyzer:
             return double_attacks
 
         # Check if the moved piece attacks multiple targets
-        attacked_squares = []
-        for square in chess.SQUARES:
-            if board.is_attacked_by(moved_piece.color, square):
-                piece = board.piece_at(square)
-                if piece and piece.color != moved_piece.color:
-                    attacked_squares.append(square)
+        attacked_squares = get_tactical_features(board).attacked_pieces(moved_piece.color)
 
         if len(attacked_squares) >= 2:
             total_value = sum(self.piece_values[board.piece_at(sq).piece_type] for sq in attacked_squares if board.piece_at(sq))
@@ -403,12 +395,10 @@ class PositionAnalyzer:
                 if distance <= 2:
                     safety += 10
 
-        # Check for enemy attacks on king
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece and piece.color != board.turn:
-                if board.is_attacked_by(piece.color, king_square):
-                    safety -= 20
+        # Check for enemy attacks on king (penalty scales with the enemy piece count)
+        features = get_tactical_features(board)
+        if features.attacked[not board.turn] & chess.BB_SQUARES[king_square]:
+            safety -= 20 * chess.popcount(board.occupied_co[not board.turn])
 
         return safety
 
@@ -431,46 +421,24 @@ class PositionAnalyzer:
 
     def _get_attacked_pieces(self, board: chess.Board, move: chess.Move) -> List[chess.Square]:
         """Get pieces attacked by the moved piece."""
-        attacked = []
         moved_piece = board.piece_at(move.to_square)
         if not moved_piece:
-            return attacked
-
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece and piece.color != moved_piece.color:
-                if board.is_attacked_by(moved_piece.color, square):
-                    attacked.append(square)
-
-        return attacked
+            return []
+        return get_tactical_features(board).attacked_pieces(moved_piece.color)
 
     def _get_defended_pieces(self, board: chess.Board, move: chess.Move) -> List[chess.Square]:
         """Get pieces defended by the moved piece."""
-        defended = []
         moved_piece = board.piece_at(move.to_square)
         if not moved_piece:
-            return defended
-
-        for square in chess.SQUARES:
-            piece = board.piece_at(square)
-            if piece and piece.color == moved_piece.color:
-                if board.is_attacked_by(moved_piece.color, square):
-                    defended.append(square)
-
-        return defended
+            return []
+        return get_tactical_features(board).defended_pieces(moved_piece.color)
 
     def _get_controlled_squares(self, board: chess.Board, move: chess.Move) -> List[chess.Square]:
         """Get squares controlled by the moved piece."""
-        controlled = []
         moved_piece = board.piece_at(move.to_square)
         if not moved_piece:
-            return controlled
-
-        for square in chess.SQUARES:
-            if board.is_attacked_by(moved_piece.color, square):
-                controlled.append(square)
-
-        return controlled
+            return []
+        return get_tactical_features(board).controlled_squares(moved_piece.color)
 
     def _detect_mate_threat(self, board: chess.Board) -> bool:
         """Detect if there's a mate threat."""
@@ -492,62 +460,6 @@ class PositionAnalyzer:
         return descriptions
 
     # Helper methods
-    def _is_pinned(self, board: chess.Board, square: chess.Square, color: chess.Color) -> bool:
-        """Check if a piece is pinned."""
-        piece = board.piece_at(square)
-        if not piece:
-            return False
-
-        # Check if removing this piece would expose the king to check
-        temp_board = board.copy()
-        temp_board.remove_piece_at(square)
-        return temp_board.is_check()
-
-    def _get_pieces_on_line(self, board: chess.Board, start_square: chess.Square, direction: int) -> List[chess.Square]:
-        """Get all pieces on a line from a starting square."""
-        pieces = []
-        current = start_square
-
-        while True:
-            try:
-                # Calculate next square based on direction
-                if direction == 8:  # North
-                    next_square = current + 8
-                elif direction == -8:  # South
-                    next_square = current - 8
-                elif direction == 1:  # East
-                    next_square = current + 1
-                elif direction == -1:  # West
-                    next_square = current - 1
-                elif direction == 9:  # Northeast
-                    next_square = current + 9
-                elif direction == 7:  # Northwest
-                    next_square = current + 7
-                elif direction == -7:  # Southeast
-                    next_square = current - 7
-                elif direction == -9:  # Southwest
-                    next_square = current - 9
-                else:
-                    break
-
-                # Check if square is valid
-                if not (0 <= next_square < 64):
-                    break
-
-                # Check if we're still on the same rank/file (for rook moves)
-                if direction in [1, -1] and chess.square_rank(next_square) != chess.square_rank(current):
-                    break
-                if direction in [8, -8] and chess.square_file(next_square) != chess.square_file(current):
-                    break
-
-                current = next_square
-                if board.piece_at(current):
-                    pieces.append(current)
-            except Exception:
-                break
-
-        return pieces
-
     def _move_cleared_path(self, board: chess.Board, move: chess.Move, attacker_square: chess.Square, target_square: chess.Square) -> bool:
         """Check if a move cleared the path for an attack."""
         # This is a simplified check - in practice, you'd need more sophisticated path analysis
@@ -572,37 +484,13 @@ class PositionAnalyzer:
         Detect hanging (undefended or insufficiently defended) pieces.
         Returns list of (square, piece, value) tuples.
         """
+        # Piece is hanging if more attackers than defenders
         hanging_pieces = []
-
-        for square in chess.SQUARES:
+        for square in get_tactical_features(board).hanging[color]:
             piece = board.piece_at(square)
-            if piece and piece.color == color:
-                # Check if piece is attacked by opponent
-                if board.is_attacked_by(not color, square):
-                    # Count attackers and defenders
-                    attackers = self._count_attackers(board, square, not color)
-                    defenders = self._count_attackers(board, square, color)
-
-                    # Piece is hanging if more attackers than defenders
-                    if attackers > defenders:
-                        hanging_pieces.append((square, piece, self.piece_values[piece.piece_type]))
-
+            hanging_pieces.append((square, piece, self.piece_values[piece.piece_type]))
         return hanging_pieces
 
-    def _count_attackers(self, board: chess.Board, square: chess.Square, color: chess.Color) -> int:
-        """Count number of pieces of given color attacking a square."""
-        count = 0
-        for attacker_square in chess.SQUARES:
-            piece = board.piece_at(attacker_square)
-            if piece and piece.color == color:
-                if board.is_attacked_by(color, square):
-                    # Check if this specific piece attacks the square
-                    temp_board = board.copy()
-                    temp_board.remove_piece_at(attacker_square)
-                    if not temp_board.is_attacked_by(color, square):
-                        count += 1
-        return count
-
     def detect_lost_material(self, board_before: chess.Board, board_after: chess.Board, move: chess.Move) -> Optional[Tuple[str, int]]:
         """
         Detect if material was lost due to the move (not through capture).
@@ -632,19 +520,12 @@ class PositionAnalyzer:
         if not moved_piece:
             return threats
 
-        # Check for attacked pieces
-        for square in chess.SQUARES:
+        # Check for attacked pieces that are insufficiently defended
+        for square in get_tactical_features(board).hanging[not moved_piece.color]:
             target_piece = board.piece_at(square)
-            if target_piece and target_piece.color != moved_piece.color:
-                if board.is_attacked_by(moved_piece.color, square):
-                    # Check if piece is defended
-                    defenders = self._count_attackers(board, square, target_piece.color)
-                    attackers = self._count_attackers(board, square, moved_piece.color)
-
-                    if attackers > defenders:
-                        piece_name = chess.piece_name(target_piece.piece_type)
-                        square_name = chess.square_name(square)
-                        threats.append(f"your {piece_name} on {square_name} is now under attack and insufficiently defended")
+            piece_name = chess.piece_name(target_piece.piece_type)
+            square_name = chess.square_name(square)
+            threats.append(f"your {piece_name} on {square_name} is now under attack and insufficiently defended")
 
         return threats
 
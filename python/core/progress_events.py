@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Progress Event Broker
+Pushes analysis and import progress to clients as server-sent events (SSE).
+
+Producers (the analysis queue, import progress helpers) publish events from
+any thread; each SSE connection subscribes to the topics it cares about and
+receives events on the server's event loop. Progress events are enriched with
+per-stage throughput and an ETA so clients do not have to derive them from
+repeated polls.
+
+Topics:
+- analysis:{canonical_user_id}_{platform}
+- import:{canonical_user_id}_{platform}
+- job:{job_id}
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from .cache_manager import LRUCache, register_cache
+
+# Events that end a job stream
+TERMINAL_JOB_EVENTS = ("completed", "failed", "cancelled")
+
+
+def analysis_topic(progress_key: str) -> str:
+    return f"analysis:{progress_key}"
+
+
+def import_topic(progress_key: str) -> str:
+    return f"import:{progress_key}"
+
+
+def job_topic(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+class _RateTracker:
+    """Completed-count samples for one topic, used for throughput and ETA."""
+
+    def __init__(self, window: float):
+        self.window = window
+        self.stage: Optional[str] = None
+        self.stage_started = time.time()
+        self.samples: Deque[Tuple[float, int]] = deque()
+
+    def record(self, completed: int, total: int, stage: Optional[str]) -> Dict[str, Any]:
+        now = time.time()
+        if stage != self.stage:
+            # Throughput is per stage: fetching and analyzing run at very different rates
+            self.stage = stage
+            self.stage_started = now
+            self.samples.clear()
+        if self.samples and completed < self.samples[-1][1]:
+            self.samples.clear()
+        self.samples.append((now, completed))
+        while len(self.samples) > 2 and now - self.samples[0][0] > self.window:
+            self.samples.popleft()
+
+        rate = None
+        eta = None
+        first_time, first_completed = self.samples[0]
+        if now > first_time and completed > first_completed:
+            rate = (completed - first_completed) / (now - first_time)
+            if total > completed:
+                eta = int((total - completed) / rate)
+        return {
+            "stage": stage,
+            "stage_elapsed_seconds": round(now - self.stage_started, 1),
+            "throughput_per_minute": round(rate * 60, 2) if rate else None,
+            "estimated_time_remaining": eta if total else None,
+        }
+
+
+class ProgressSubscription:
+    """A single client's view of the broker: a bounded event queue on its event loop."""
+
+    def __init__(self, topics: Iterable[str], loop: asyncio.AbstractEventLoop, max_queue_size: int):
+        self.topics: Set[str] = set(topics)
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.dropped = 0
+
+    def _offer(self, event: Dict[str, Any]) -> None:
+        """Enqueue on the subscriber's loop; slow clients lose the oldest events."""
+        if self.queue.full():
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Next event, or None if nothing arrived within timeout."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class ProgressBroker:
+    """
+    Thread-safe publish/subscribe hub for progress events.
+
+    Features:
+    - Publish from worker threads, deliver on each subscriber's event loop
+    - Last event per topic replayed to new subscribers
+    - Per-stage throughput and ETA for counter-based progress
+    - Bounded subscriber queues (slow clients cannot grow memory)
+
+    Usage:
+        broker = get_progress_broker()
+        broker.publish(job_topic(job_id), "game", {"game_id": "abc"})
+        subscription = broker.subscribe([job_topic(job_id)])
+        event = await subscription.get(timeout=15)
+        broker.unsubscribe(subscription)
+    """
+
+    def __init__(self, max_queue_size: int = 100, rate_window: float = 120.0):
+        """
+        Initialize the broker.
+
+        Args:
+            max_queue_size: Events buffered per subscriber before dropping the oldest
+            rate_window: Seconds of samples used for throughput and ETA
+        """
+        self.max_queue_size = max_queue_size
+        self.rate_window = rate_window
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[str, List[ProgressSubscription]] = {}
+        self._ids = itertools.count(1)
+        self._published = 0
+        self._last_events = LRUCache(maxsize=2000, ttl=3600, name="progress_last_events")
+        self._rates = LRUCache(maxsize=2000, ttl=3600, name="progress_rates")
+        # Publishers run in worker threads; one tracker per topic, updated one at a time
+        self._rates_lock = threading.Lock()
+        register_cache(self._last_events)
+        register_cache(self._rates)
+
+    def subscribe(self, topics: Iterable[str]) -> ProgressSubscription:
+        """
+        Subscribe to topics. Must be called from the event loop that will consume events.
+
+        The most recent event of each topic is delivered first, so a client that
+        connects mid-job sees the current state immediately.
+        """
+        subscription = ProgressSubscription(topics, asyncio.get_running_loop(), self.max_queue_size)
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscriptions.setdefault(topic, []).append(subscription)
+        for topic in subscription.topics:
+            last = self._last_events.get(topic)
+            if last is not None:
+                subscription._offer(last)
+        return subscription
+
+    def unsubscribe(self, subscription: ProgressSubscription) -> None:
+        """Remove a subscription from all of its topics."""
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscriptions.get(topic)
+                if subscribers and subscription in subscribers:
+                    subscribers.remove(subscription)
+                    if not subscribers:
+                        del self._subscriptions[topic]
+
+    def publish(
+        self,
+        topic: str,
+        event: str,
+        data: Dict[str, Any],
+        completed: Optional[int] = None,
+        total: Optional[int] = None,
+        stage: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Publish an event to a topic. Safe to call from any thread.
+
+        Args:
+            topic: Topic name (see module docstring)
+            event: SSE event type (e.g. "progress", "game", "completed")
+            data: JSON-serializable payload
+            completed: Optional completed count; enables throughput/ETA fields
+            total: Optional total count for the ETA
+            stage: Optional stage name; throughput restarts when it changes
+
+        Returns:
+            The payload, enriched with throughput/ETA fields when counts were given
+        """
+        payload = dict(data)
+        if completed is not None:
+            with self._rates_lock:
+                tracker = self._rates.get(topic)
+                if tracker is None:
+                    tracker = _RateTracker(self.rate_window)
+                    self._rates.set(topic, tracker)
+                payload.update(tracker.record(completed, total or 0, stage))
+
+        message = {
+            "id": next(self._ids),
+            "topic": topic,
+            "event": event,
+            "data": payload,
+            "timestamp": time.time(),
+        }
+        self._last_events.set(topic, message)
+
+        with self._lock:
+            self._published += 1
+            subscribers = list(self._subscriptions.get(topic, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._offer, message)
+            except RuntimeError:
+                # Subscriber's loop already closed (client gone); it will be unsubscribed
+                pass
+        return payload
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get broker statistics for monitoring endpoints."""
+        with self._lock:
+            subscriptions = {id(s) for subs in self._subscriptions.values() for s in subs}
+            return {
+                "topics": len(self._subscriptions),
+                "subscribers": len(subscriptions),
+                "published_events": self._published,
+            }
+
+
+def format_sse(message: Dict[str, Any]) -> str:
+    """Encode a broker message as an SSE frame."""
+    data = json.dumps(message["data"], default=str)
+    return f"id: {message['id']}\nevent: {message['event']}\ndata: {data}\n\n"
+
+
+async def sse_stream(
+    broker: "ProgressBroker",
+    topics: Iterable[str],
+    is_disconnected: Callable[[], Awaitable[bool]],
+    keepalive_seconds: float = 15.0,
+    close_on: Iterable[str] = ()
+):
+    """
+    Async generator of SSE frames for a StreamingResponse.
+
+    Args:
+        broker: Broker to subscribe to
+        topics: Topics to stream
+        is_disconnected: Coroutine function reporting client disconnects (Request.is_disconnected)
+        keepalive_seconds: Idle interval after which a comment frame keeps proxies from closing the stream
+        close_on: Event types that end the stream after being sent
+    """
+    terminal = set(close_on)
+    subscription = broker.subscribe(topics)
+    try:
+        # Tell EventSource how long to wait before reconnecting
+        yield "retry: 3000\n\n"
+        while True:
+            message = await subscription.get(timeout=keepalive_seconds)
+            if await is_disconnected():
+                break
+            if message is None:
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(message)
+            if message["event"] in terminal:
+                break
+    finally:
+        broker.unsubscribe(subscription)
+
+
+# Global broker instance
+_progress_broker: Optional[ProgressBroker] = None
+_broker_lock = threading.Lock()
+
+
+def get_progress_broker() -> ProgressBroker:
+    """Get or create the global progress broker."""
+    global _progress_broker
+
+    if _progress_broker is None:
+        with _broker_lock:
+            if _progress_broker is None:
+                _progress_broker = ProgressBroker()
+
+    return _progress_broker
@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+Shared Rate Limiter
+Constant-time request rate limiting (GCRA) with state shared by all worker
+processes on a node.
+
+The generic cell rate algorithm keeps one number per key: the theoretical
+arrival time (TAT) of the next request. A policy of `limit` requests per
+`window` seconds allows a burst of `limit` and then one request every
+window / limit seconds. Checking and updating a key is O(1) in time and
+space, unlike a list of timestamps that is filtered on every request.
+
+Features:
+- RateLimitPolicy (limit per window) and RateLimitDecision (remaining,
+  retry_after) for Retry-After / X-RateLimit-* headers
+- In-memory store (single process) and SQLite store (one small table in a
+  WAL-mode file, shared by uvicorn workers and restarts)
+- Peek without consuming (check now, record after the work succeeded)
+- ahit() runs blocking stores in a worker thread, so a busy SQLite lock
+  never stalls the event loop
+- RateLimitMiddleware applies per-route policies before routing
+- Store errors fail open, like the usage limit checks
+
+Usage:
+    limiter = get_rate_limiter()
+    policy = RateLimitPolicy("analysis", limit=5, window=60)
+    decision = await limiter.ahit(f"analysis:{user_id}", policy)
+    if not decision.allowed:
+        raise RateLimitError(...)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from .metrics_registry import get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+_metrics = get_metrics_registry()
+_decisions = _metrics.counter("rate_limit_decisions_total", "Rate limit checks by policy and outcome", ["policy", "outcome"])
+
+# Expired keys are swept after this many updates (amortized O(1) per request)
+SWEEP_EVERY = 1024
+
+
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    """Allow `limit` requests per `window` seconds per key."""
+    name: str
+    limit: int
+    window: float = 60.0
+
+    def __post_init__(self):
+        if self.limit < 1 or self.window <= 0:
+            raise ValueError(f"Invalid rate limit policy {self.name}: {self.limit}/{self.window}s")
+
+    @property
+    def interval(self) -> float:
+        """Seconds one request occupies (emission interval)."""
+        return self.window / self.limit
+
+
+@dataclass
+class RateLimitDecision:
+    """Outcome of one rate limit check."""
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float = 0.0
+    reset_after: float = 0.0
+
+    def headers(self) -> Dict[str, str]:
+        """X-RateLimit-* headers (plus Retry-After when rejected)."""
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(int(self.reset_after + 0.999)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, int(self.retry_after + 0.999)))
+        return headers
+
+
+def gcra(tat: Optional[float], now: float, policy: RateLimitPolicy, cost: int = 1) -> Tuple[RateLimitDecision, float]:
+    """
+    One GCRA step.
+
+    Args:
+        tat: Stored theoretical arrival time of the key (None if unseen)
+        now: Current time in seconds
+        policy: Policy to apply
+        cost: Requests this call counts as
+
+    Returns:
+        Tuple of (decision, TAT to store if the request is consumed)
+    """
+    interval = policy.interval
+    tat = now if tat is None or tat < now else tat
+    new_tat = tat + cost * interval
+    allow_at = new_tat - policy.window
+    # Small epsilon so float rounding never rejects the last request of a burst
+    if allow_at > now + 1e-9:
+        return RateLimitDecision(False, policy.limit, 0, allow_at - now, tat - now), tat
+    remaining = int((now - allow_at) / interval + 1e-9)
+    return RateLimitDecision(True, policy.limit, remaining, 0.0, new_tat - now), new_tat
+
+
+class RateLimitStore:
+    """Storage of one TAT per key. update() must be atomic per key."""
+
+    backend = ""
+    # Whether update() can wait on I/O or another process's lock
+    blocking = False
+
+    def update(self, key: str, step: Callable[[Optional[float]], Tuple[RateLimitDecision, Optional[float]]]) -> RateLimitDecision:
+        """Apply step(stored TAT) atomically and store the TAT it returns (None = leave unchanged)."""
+        raise NotImplementedError
+
+    def reset(self, key: Optional[str] = None) -> int:
+        """Forget one key (or all keys). Returns the number of keys removed."""
+        raise NotImplementedError
+
+    def size(self) -> int:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryRateLimitStore(RateLimitStore):
+    """Per-process store (each worker limits on its own)."""
+
+    backend = "memory"
+
+    def __init__(self):
+        self._tats: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._updates = 0
+
+    def update(self, key, step):
+        with self._lock:
+            decision, new_tat = step(self._tats.get(key))
+            if new_tat is not None:
+                self._tats[key] = new_tat
+            self._updates += 1
+            if self._updates % SWEEP_EVERY == 0:
+                now = time.time()
+                for expired in [k for k, tat in self._tats.items() if tat <= now]:
+                    del self._tats[expired]
+            return decision
+
+    def reset(self, key=None):
+        with self._lock:
+            if key is None:
+                count = len(self._tats)
+                self._tats.clear()
+                return count
+            return 1 if self._tats.pop(key, None) is not None else 0
+
+    def size(self):
+        with self._lock:
+            return len(self._tats)
+
+
+class SQLiteRateLimitStore(RateLimitStore):
+    """
+    Store in a local SQLite file, shared by every worker process on the node.
+
+    Each update is one short BEGIN IMMEDIATE transaction on a single row.
+    Durability is relaxed (synchronous=OFF): losing the last updates in an OS
+    crash only resets some limits early.
+    """
+
+    backend = "sqlite"
+    blocking = True
+
+    def __init__(self, path: str, busy_timeout: float = 0.5):
+        """
+        Initialize the SQLite store and create the table.
+
+        Args:
+            path: Database file path
+            busy_timeout: Seconds to wait for another worker's transaction
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._updates = 0
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL) WITHOUT ROWID")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode; transactions are opened explicitly
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def update(self, key, step):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            decision, new_tat = step(row[0] if row else None)
+            if new_tat is not None:
+                conn.execute(
+                    "INSERT INTO rate_limits (key, tat) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                    (key, new_tat)
+                )
+            self._updates += 1
+            if self._updates % SWEEP_EVERY == 0:
+                conn.execute("DELETE FROM rate_limits WHERE tat <= ?", (time.time(),))
+            conn.execute("COMMIT")
+            return decision
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def reset(self, key=None):
+        conn = self._conn()
+        if key is None:
+            return conn.execute("DELETE FROM rate_limits").rowcount
+        return conn.execute("DELETE FROM rate_limits WHERE key = ?", (key,)).rowcount
+
+    def size(self):
+        return self._conn().execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RateLimiter:
+    """GCRA rate limiter over a RateLimitStore."""
+
+    def __init__(self, store: Optional[RateLimitStore] = None, clock: Callable[[], float] = time.time):
+        # Wall clock: the SQLite store is shared between processes
+        self.store = store or MemoryRateLimitStore()
+        self.clock = clock
+        self._store_errors = 0
+
+    def hit(self, key: str, policy: RateLimitPolicy, cost: int = 1, consume: bool = True) -> RateLimitDecision:
+        """
+        Check (and by default count) a request against a policy.
+
+        Args:
+            key: Limited subject, e.g. "analysis:{user_id}:{platform}"
+            policy: Policy to apply
+            cost: Requests this call counts as
+            consume: False to only check; record later with another hit()
+
+        Returns:
+            RateLimitDecision (allowed when the store is unavailable)
+        """
+        now = self.clock()
+
+        def step(tat):
+            decision, new_tat = gcra(tat, now, policy, cost)
+            return decision, new_tat if decision.allowed and consume else None
+
+        try:
+            decision = self.store.update(f"{policy.name}:{key}", step)
+        except Exception as e:
+            self._store_errors += 1
+            logger.warning(f"[RATE_LIMIT] {self.store.backend} store unavailable, allowing request: {e}")
+            return RateLimitDecision(True, policy.limit, policy.limit)
+        if consume:
+            _decisions.labels(policy=policy.name, outcome="allowed" if decision.allowed else "rejected").inc()
+        return decision
+
+    async def ahit(self, key: str, policy: RateLimitPolicy, cost: int = 1, consume: bool = True) -> RateLimitDecision:
+        """
+        hit() for async callers.
+
+        A blocking store is called in a worker thread: its transaction may
+        wait up to the busy timeout for another worker's lock, which must not
+        hold up every other request on the event loop.
+        """
+        if not self.store.blocking:
+            return self.hit(key, policy, cost, consume)
+        return await asyncio.to_thread(self.hit, key, policy, cost, consume)
+
+    def reset(self, key: Optional[str] = None, policy: Optional[RateLimitPolicy] = None) -> int:
+        """Forget a key of a policy, or every key when called without arguments."""
+        if key is None:
+            return self.store.reset()
+        return self.store.reset(f"{policy.name}:{key}" if policy else key)
+
+    def stats(self) -> Dict[str, object]:
+        try:
+            keys = self.store.size()
+        except Exception:
+            keys = None
+        return {"backend": self.store.backend, "keys": keys, "store_errors": self._store_errors}
+
+
+@dataclass(frozen=True)
+class RouteRateLimit:
+    """A policy applied by RateLimitMiddleware to requests whose path matches."""
+    pattern: str
+    policy: RateLimitPolicy
+    methods: Sequence[str] = ("POST",)
+
+    def matches(self, method: str, path: str) -> bool:
+        return method in self.methods and re.match(self.pattern, path) is not None
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing per-route policies before the request is routed.
+
+    identify(scope) returns the limited subject (e.g. "user:{sub}" or
+    "ip:{address}"). Rejected requests get a 429 with Retry-After and never
+    reach the handler.
+
+    Usage:
+        app.add_middleware(RateLimitMiddleware, limiter=limiter, routes=routes, identify=identify)
+    """
+
+    def __init__(self, app, limiter: RateLimiter, routes: Sequence[RouteRateLimit], identify: Callable[[dict], str]):
+        self.app = app
+        self.limiter = limiter
+        self.identify = identify
+        # Compile once; routes are checked in order and the first match applies
+        self.routes = [(re.compile(route.pattern), frozenset(route.methods), route.policy) for route in routes]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"]
+        policy = next((policy for pattern, methods, policy in self.routes
+                       if method in methods and pattern.match(path)), None)
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        decision = await self.limiter.ahit(self.identify(scope), policy)
+        if not decision.allowed:
+            await self._reject(send, decision)
+            return
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(send, decision: RateLimitDecision) -> None:
+        body = json.dumps({
+            "error": {
+                "code": "RATE_LIMIT_ERROR",
+                "message": "Rate limit exceeded. Please wait before retrying.",
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            }
+        }).encode()
+        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        headers.extend((name.lower().encode(), value.encode()) for name, value in decision.headers().items())
+        await send({"type": "http.response.start", "status": 429, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+def create_rate_limit_store(url: str) -> RateLimitStore:
+    """
+    Create a store from a URL.
+
+    Args:
+        url: sqlite:///path/to/file.db or memory
+
+    Raises:
+        ValueError: If the URL scheme is not supported
+    """
+    if url.lower() in ("", "memory", "off", "none"):
+        return MemoryRateLimitStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteRateLimitStore(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported rate limit store URL: {url.split(':', 1)[0]}://")
+
+
+# Global limiter instance
+_rate_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Get the global rate limiter, configured from RATE_LIMIT_STORE_URL.
+
+    Defaults to a SQLite file next to the server so all uvicorn workers share
+    limits; set RATE_LIMIT_STORE_URL=memory for per-process limits. A store
+    that cannot be opened falls back to memory rather than blocking startup.
+    """
+    global _rate_limiter
+
+    if _rate_limiter is None:
+        with _limiter_lock:
+            if _rate_limiter is None:
+                default_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "rate_limits.db")
+                url = os.getenv("RATE_LIMIT_STORE_URL", f"sqlite:///{default_path}")
+                try:
+                    store = create_rate_limit_store(url)
+                except Exception as e:
+                    print(f"[RATE_LIMIT] Could not open rate limit store ({e}); using in-memory limits")
+                    store = MemoryRateLimitStore()
+                print(f"[RATE_LIMIT] Using {store.backend} rate limit store")
+                _rate_limiter = RateLimiter(store)
+    return _rate_limiter
@@ -524,6 +524,7 @@ class ReliableAnalysisPersistence:
                 'encouragement_level': move.encouragement_level,
                 'move_quality': move.move_quality,
                 'game_phase': move.game_phase,
+                'coaching_pending': getattr(move, 'coaching_pending', False),  # Coaching generated on first view
                 'analysis_time_ms': move.analysis_time_ms,
                 'is_user_move': move.is_user_move,
                 'player_color': move.player_color,
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Request Trace Recording
+Records API traffic as a JSON-lines trace that the offline load generator
+(scripts/loadtest/replay_load.py) replays against a local server.
+
+Each line is one request:
+    {"t": 1.234, "method": "GET", "path": "/api/v1/match-history/u1/lichess",
+     "query": "limit=20", "endpoint": "/api/v1/match-history/{user_id}/{platform}",
+     "user": "u1", "body": null, "status": 200}
+
+- t: seconds since the first recorded request (replay keeps the spacing)
+- endpoint: matched route template, so latencies group per endpoint
+- user: unverified "sub" claim of the bearer token; the replayer mints a token
+  for it. Tokens and other headers are never written.
+- body: JSON request bodies up to MAX_BODY_BYTES (other bodies are dropped)
+
+Recording is off unless REQUEST_TRACE_FILE is set.
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# Larger bodies (e.g. bulk PGN uploads) are not recorded
+MAX_BODY_BYTES = 64 * 1024
+
+
+@dataclass
+class TraceEntry:
+    """One recorded request."""
+    t: float
+    method: str
+    path: str
+    query: str = ""
+    endpoint: Optional[str] = None
+    user: Optional[str] = None
+    body: Any = None
+    status: Optional[int] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def label(self) -> str:
+        """Grouping key for latency reports."""
+        return f"{self.method} {self.endpoint or self.path}"
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TraceEntry":
+        known = {name: data[name] for name in ("t", "method", "path", "query", "endpoint", "user", "body", "status") if name in data}
+        known["extra"] = {key: value for key, value in data.items() if key not in known}
+        return cls(**known)
+
+
+def load_trace(path: str) -> List[TraceEntry]:
+    """Read a JSON-lines trace (blank lines and # comments are skipped), sorted by t."""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                entries.append(TraceEntry.from_dict(json.loads(line)))
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"{path}:{line_number}: invalid trace entry: {e}") from e
+    return sorted(entries, key=lambda entry: entry.t)
+
+
+def _token_subject(headers: List[tuple]) -> Optional[str]:
+    for name, value in headers:
+        if name == b"authorization" and value.lower().startswith(b"bearer "):
+            try:
+                from jose import jwt
+                return jwt.get_unverified_claims(value[7:].decode("latin-1")).get("sub")
+            except Exception:
+                return None
+    return None
+
+
+class RequestTraceMiddleware:
+    """
+    ASGI middleware appending every HTTP request to a trace file.
+
+    Usage:
+        app.add_middleware(RequestTraceMiddleware, path="traces/prod-sample.jsonl")
+    """
+
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+        self._lock = threading.Lock()
+        self._started: Optional[float] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        now = time.monotonic()
+        if self._started is None:
+            self._started = now
+        chunks: List[bytes] = []
+        size = 0
+        status: Dict[str, int] = {}
+
+        async def recording_receive():
+            nonlocal size
+            message = await receive()
+            if message["type"] == "http.request" and size <= MAX_BODY_BYTES:
+                body = message.get("body", b"")
+                size += len(body)
+                chunks.append(body)
+            return message
+
+        async def recording_send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, recording_receive, recording_send)
+        finally:
+            self._write(scope, now - self._started, chunks if size <= MAX_BODY_BYTES else [], status.get("code"))
+
+    def _write(self, scope, offset: float, chunks: List[bytes], status: Optional[int]) -> None:
+        headers = scope.get("headers", [])
+        body = None
+        content_type = dict(headers).get(b"content-type", b"")
+        if chunks and content_type.startswith(b"application/json"):
+            try:
+                body = json.loads(b"".join(chunks))
+            except ValueError:
+                body = None
+        route = scope.get("route")
+        entry = {
+            "t": round(offset, 3),
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": scope.get("query_string", b"").decode("latin-1"),
+            "endpoint": getattr(route, "path", None),
+            "user": _token_subject(headers),
+            "body": body,
+            "status": status,
+        }
+        line = json.dumps(entry, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+
+
+def trace_file_from_env() -> Optional[str]:
+    """Trace output path if recording is enabled (REQUEST_TRACE_FILE)."""
+    return os.getenv("REQUEST_TRACE_FILE") or None
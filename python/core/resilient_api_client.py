@@ -5,7 +5,7 @@ Resilient API Client for External Chess Platform APIs
 This module provides a robust client for making API calls to Lichess and Chess.com
 with the following features:
 - Connection pooling (reusable HTTP sessions)
-- Rate limiting (token bucket algorithm)
+- Rate limiting (shared adaptive governor per platform, see upstream_governor.py)
 - Response caching (in-memory with TTL)
 - Retry logic with exponential backoff
 - Request deduplication (prevent concurrent duplicate requests)
@@ -15,6 +15,7 @@ with the following features:
 import asyncio
 import aiohttp
 import httpx
+import os
 import time
 from typing import Dict, Optional, Any, Tuple
 from dataclasses import dataclass, field
@@ -24,6 +25,24 @@ import hashlib
 import json
 from urllib.parse import quote
 
+from .metrics_registry import get_metrics_registry
+from .upstream_governor import get_upstream_governor
+
+# Upstream base URLs (overridable to point at local fixture servers, see scripts/loadtest)
+LICHESS_BASE_URL = os.getenv("LICHESS_BASE_URL", "https://lichess.org").rstrip("/")
+CHESSCOM_API_BASE_URL = os.getenv("CHESSCOM_API_BASE_URL", "https://api.chess.com").rstrip("/")
+
+_metrics = get_metrics_registry()
+_upstream_requests = _metrics.counter(
+    "upstream_requests_total", "Upstream API request attempts by outcome", ["platform", "outcome"]
+)
+_upstream_latency = _metrics.histogram(
+    "upstream_request_seconds", "Latency of upstream API request attempts", ["platform"]
+)
+_upstream_cache = _metrics.counter(
+    "upstream_cache_lookups_total", "Upstream response cache lookups", ["result"]
+)
+
 
 class CircuitState(Enum):
     """Circuit breaker states"""
@@ -165,15 +184,12 @@ class ResilientAPIClient:
         self._aiohttp_session: Optional[aiohttp.ClientSession] = None
         self._httpx_client: Optional[httpx.AsyncClient] = None
 
-        # Rate limiters
-        self.lichess_limiter = RateLimiter(
-            capacity=lichess_rate_limit * 2,  # Burst capacity
-            refill_rate=lichess_rate_limit
-        )
-        self.chesscom_limiter = RateLimiter(
-            capacity=chesscom_rate_limit * 2,
-            refill_rate=chesscom_rate_limit
-        )
+        # Rate limiters: the process-wide governors, shared with game imports and
+        # other fetches so validation traffic counts against the same budget
+        # (lichess_rate_limit/chesscom_rate_limit are kept for compatibility;
+        # the governors adapt their own rates)
+        self.lichess_limiter = get_upstream_governor("lichess")
+        self.chesscom_limiter = get_upstream_governor("chess.com")
 
         # Circuit breakers
         self.lichess_circuit = CircuitBreaker(
@@ -211,10 +227,12 @@ class ResilientAPIClient:
             entry = self.cache[cache_key]
             if datetime.now() < entry.expires_at:
                 print(f"[CACHE] Cache hit for {cache_key[:8]}...")
+                _upstream_cache.labels(result="hit").inc()
                 return entry.data
             else:
                 # Expired, remove
                 del self.cache[cache_key]
+        _upstream_cache.labels(result="miss").inc()
         return None
 
     def _set_cache(self, cache_key: str, data: Any):
@@ -271,14 +289,18 @@ class ResilientAPIClient:
         request_func,
         max_retries: int,
         circuit_breaker: CircuitBreaker,
+        platform: str = "unknown",
     ) -> Any:
         """Execute request with retry logic and exponential backoff"""
         last_exception = None
 
         for attempt in range(max_retries + 1):
+            started = time.perf_counter()
+            outcome = "error"
             try:
                 # Check circuit breaker
                 if not circuit_breaker.can_attempt():
+                    outcome = "circuit_open"
                     raise Exception(
                         f"Circuit breaker is {circuit_breaker.state.value}, "
                         "service temporarily unavailable"
@@ -289,9 +311,12 @@ class ResilientAPIClient:
 
                 # Success!
                 circuit_breaker.record_success()
+                _upstream_latency.labels(platform=platform).observe(time.perf_counter() - started)
+                _upstream_requests.labels(platform=platform, outcome="success").inc()
                 return result
 
             except asyncio.TimeoutError as e:
+                _upstream_requests.labels(platform=platform, outcome="timeout").inc()
                 last_exception = e
                 circuit_breaker.record_failure()
                 if attempt < max_retries:
@@ -300,6 +325,8 @@ class ResilientAPIClient:
                     await asyncio.sleep(backoff)
 
             except (aiohttp.ClientError, httpx.RequestError) as e:
+                _upstream_latency.labels(platform=platform).observe(time.perf_counter() - started)
+                _upstream_requests.labels(platform=platform, outcome="network_error").inc()
                 last_exception = e
                 circuit_breaker.record_failure()
                 if attempt < max_retries:
@@ -309,6 +336,7 @@ class ResilientAPIClient:
 
             except Exception as e:
                 # Don't retry on non-network errors
+                _upstream_requests.labels(platform=platform, outcome=outcome).inc()
                 circuit_breaker.record_failure()
                 raise
 
@@ -349,8 +377,9 @@ class ResilientAPIClient:
             # Make request with retry
             async def request_func():
                 session = await self.get_aiohttp_session()
-                url = f"https://lichess.org/api/user/{username}"
+                url = f"{LICHESS_BASE_URL}/api/user/{username}"
                 async with session.get(url) as response:
+                    self.lichess_limiter.observe(response.status, response.headers)
                     if response.status == 200:
                         return (True, "User found on Lichess")
                     elif response.status == 404:
@@ -363,7 +392,8 @@ class ResilientAPIClient:
             result = await self._make_request_with_retry(
                 request_func,
                 self.max_retries,
-                self.lichess_circuit
+                self.lichess_circuit,
+                platform="lichess"
             )
 
             # Cache and return
@@ -424,11 +454,12 @@ class ResilientAPIClient:
                 # URL encode the username, but keep hyphens and underscores safe (they're valid in URLs)
                 # This handles special characters while preserving common username characters
                 encoded_username = quote(canonical_username, safe='-_')
-                url = f"https://api.chess.com/pub/player/{encoded_username}"
+                url = f"{CHESSCOM_API_BASE_URL}/pub/player/{encoded_username}"
                 headers = {
                     'User-Agent': 'ChessAnalytics/1.0 (Contact: your-email@example.com)'
                 }
                 response = await client.get(url, headers=headers)
+                self.chesscom_limiter.observe(response.status_code, response.headers)
 
                 if response.status_code == 200:
                     return (True, "User found on Chess.com")
@@ -442,7 +473,8 @@ class ResilientAPIClient:
             result = await self._make_request_with_retry(
                 request_func,
                 self.max_retries,
-                self.chesscom_circuit
+                self.chesscom_circuit,
+                platform="chess.com"
             )
 
             # Cache and return
@@ -471,6 +503,8 @@ class ResilientAPIClient:
             "chesscom_circuit": self.chesscom_circuit.get_state_info(),
             "lichess_tokens": round(self.lichess_limiter.tokens, 2),
             "chesscom_tokens": round(self.chesscom_limiter.tokens, 2),
+            "lichess_governor": self.lichess_limiter.stats(),
+            "chesscom_governor": self.chesscom_limiter.stats(),
         }
 
 
@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+Service Group Gateway
+Runs the API as independently scalable process groups behind one local gateway.
+
+All groups run the same application (main:app) with the same configuration;
+SERVICE_GROUP tells each process which group it serves, so it only starts the
+background work that group owns. The gateway routes every request by path:
+
+- engine: Stockfish work (analyze, analyze-position-quick, coach/play-move),
+  the analysis queue with its job and progress routes, and stage timings
+- imports: the import pipeline and every route that calls Lichess/Chess.com,
+  so one upstream rate governor paces all of them; the other groups fetch
+  single games through its /proxy/game/ route
+- analytics: everything else (read-mostly analytics, coach, auth, payments)
+
+A burst of imports or analyses then saturates its own processes, not the event
+loop that serves dashboard reads, and each group gets its own worker count.
+Progress streams combine analysis (engine) and import events, so the gateway
+merges the two upstream SSE streams. GET /health reports every group, and
+GET /metrics merges every group's metrics with a service_group label.
+
+Cross-process state: rate limits, jobs, the upstream HTTP cache and analytics
+and entitlement cache invalidations go through the shared SQLite stores in
+python/data. Progress events are published in-process, so the groups that
+publish them (engine, imports) always run a single worker.
+
+Configuration (environment):
+- SERVICE_GATEWAY_BASE_PORT: first internal port (default 8101, one per group)
+- GATEWAY_<GROUP>_WORKERS / GATEWAY_<GROUP>_PORT: per-group overrides (engine
+  and imports always run one worker)
+
+Usage:
+    python -m core.service_gateway --port $PORT
+    # or: python main.py --gateway --port $PORT
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import httpx
+
+PYTHON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_GROUP = "analytics"
+
+# (group, path patterns); paths not matched by any pattern go to DEFAULT_GROUP
+GROUP_ROUTES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("engine", (
+        r"^/api/v1/analyze(-position-quick)?$",
+        r"^/api/v1/coach/play-move$",
+        r"^/api/v1/(progress|progress-realtime)/",
+        r"^/api/v1/debug/progress$",
+        r"^/api/v1/(job-status|job-stream|job)/",
+        r"^/api/v1/queue-stats$",
+        r"^/api/v1/metrics/stages$",
+    )),
+    ("imports", (
+        r"^/api/v1/(import-games-smart|import-games|import/games|discover-games|import-more-games|cancel-import)$",
+        r"^/api/v1/import-(progress|status)/",
+        r"^/api/v1/(validate-user|check-user-exists)$",
+        r"^/proxy/(chess-com|game)/",
+    )),
+)
+
+# Streams whose events come from several groups
+FAN_IN_ROUTES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    (r"^/api/v1/progress-stream/", ("engine", "imports")),
+)
+
+# (group, default workers): engine processes each hold a Stockfish pool;
+# one imports process keeps upstream pacing in a single governor
+GROUP_DEFAULTS: Tuple[Tuple[str, int], ...] = (("engine", 1), ("imports", 1), ("analytics", 2))
+
+# Groups that publish progress events to the in-process broker; a second
+# worker would serve streams that never receive the first worker's events
+SINGLE_WORKER_GROUPS = frozenset({"engine", "imports"})
+
+# Merged from every group instead of routed to one
+METRICS_PATH = "/metrics"
+
+# Not forwarded in either direction (RFC 9110 section 7.6.1)
+HOP_BY_HOP_HEADERS = frozenset({
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade", "host",
+})
+
+_COMPILED_ROUTES = [(group, re.compile(pattern)) for group, patterns in GROUP_ROUTES for pattern in patterns]
+_COMPILED_FAN_IN = [(re.compile(pattern), groups) for pattern, groups in FAN_IN_ROUTES]
+
+
+@dataclass(frozen=True)
+class ServiceGroup:
+    """One group of identical worker processes."""
+    name: str
+    port: int
+    workers: int = 1
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+
+def route_group(path: str) -> str:
+    """Name of the group that serves path."""
+    for group, pattern in _COMPILED_ROUTES:
+        if pattern.search(path):
+            return group
+    return DEFAULT_GROUP
+
+
+def fan_in_groups(path: str) -> Optional[Tuple[str, ...]]:
+    """Groups whose event streams are merged for path, if it is a fan-in route."""
+    for pattern, groups in _COMPILED_FAN_IN:
+        if pattern.search(path):
+            return groups
+    return None
+
+
+def load_service_groups() -> List[ServiceGroup]:
+    """Groups with ports and worker counts from the environment."""
+    base_port = int(os.getenv("SERVICE_GATEWAY_BASE_PORT", "8101"))
+    groups = []
+    for index, (name, workers) in enumerate(GROUP_DEFAULTS):
+        prefix = f"GATEWAY_{name.upper()}"
+        workers = int(os.getenv(f"{prefix}_WORKERS", str(workers)))
+        if name in SINGLE_WORKER_GROUPS and workers != 1:
+            print(f"[GATEWAY] Ignoring {prefix}_WORKERS={workers}: the '{name}' group keeps progress events in-process")
+            workers = 1
+        groups.append(ServiceGroup(
+            name=name,
+            port=int(os.getenv(f"{prefix}_PORT", str(base_port + index))),
+            workers=workers,
+        ))
+    return groups
+
+
+def merge_metrics(texts: Dict[str, str]) -> str:
+    """
+    Merge the Prometheus text output of several groups into one exposition.
+
+    Every sample gets a service_group label; each metric family keeps one
+    HELP/TYPE header with the samples of all groups after it.
+    """
+    families: Dict[str, Tuple[List[str], List[str]]] = {}
+    for group, text in texts.items():
+        family = None
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            if line.startswith("#"):
+                parts = line.split(None, 3)
+                if len(parts) >= 3 and parts[1] in ("HELP", "TYPE"):
+                    family = parts[2]
+                    headers, _ = families.setdefault(family, ([], []))
+                    if line not in headers:
+                        headers.append(line)
+                continue
+            positions = [i for i in (line.find("{"), line.find(" ")) if i >= 0]
+            if not positions:
+                continue
+            name_end = min(positions)
+            name = line[:name_end]
+            key = family if family is not None and name.startswith(family) else name
+            label = f'service_group="{group}"'
+            if line[name_end] == "{":
+                rest = line[name_end + 1:]
+                sample = f"{name}{{{label}{'' if rest.startswith('}') else ','}{rest}"
+            else:
+                sample = f"{name}{{{label}}}{line[name_end:]}"
+            families.setdefault(key, ([], []))[1].append(sample)
+    lines = []
+    for headers, samples in families.values():
+        lines.extend(headers)
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+# ----------------------------------------------------------------------
+# Process supervision
+# ----------------------------------------------------------------------
+
+class GroupSupervisor:
+    """Starts one uvicorn server per group and restarts it if it exits."""
+
+    def __init__(self, groups: Sequence[ServiceGroup], app: str = "main:app", max_backoff: float = 30.0):
+        self.groups = list(groups)
+        self.app = app
+        self.max_backoff = max_backoff
+        self._processes: Dict[str, subprocess.Popen] = {}
+        self._restarts: Dict[str, int] = {group.name: 0 for group in self.groups}
+        self._next_start: Dict[str, float] = {}
+        self._monitor_task: Optional[asyncio.Task] = None
+
+    def _spawn(self, group: ServiceGroup) -> subprocess.Popen:
+        env = dict(os.environ, SERVICE_GROUP=group.name)
+        command = [
+            sys.executable, "-m", "uvicorn", self.app,
+            "--host", "127.0.0.1", "--port", str(group.port),
+            "--workers", str(group.workers), "--proxy-headers",
+        ]
+        print(f"[GATEWAY] Starting group '{group.name}' on port {group.port} ({group.workers} worker(s))")
+        return subprocess.Popen(command, cwd=PYTHON_DIR, env=env)
+
+    def start(self) -> None:
+        for group in self.groups:
+            self._processes[group.name] = self._spawn(group)
+        self._monitor_task = asyncio.create_task(self._monitor())
+
+    async def _monitor(self) -> None:
+        while True:
+            await asyncio.sleep(1.0)
+            now = time.monotonic()
+            for group in self.groups:
+                process = self._processes.get(group.name)
+                if process is None or process.poll() is None:
+                    continue
+                if group.name not in self._next_start:
+                    backoff = min(self.max_backoff, 2 ** self._restarts[group.name])
+                    print(f"[GATEWAY] Group '{group.name}' exited with code {process.returncode}; restarting in {backoff:.0f}s")
+                    self._next_start[group.name] = now + backoff
+                elif now >= self._next_start.pop(group.name):
+                    self._restarts[group.name] += 1
+                    self._processes[group.name] = self._spawn(group)
+
+    async def stop(self, timeout: float = 20.0) -> None:
+        if self._monitor_task:
+            self._monitor_task.cancel()
+        for process in self._processes.values():
+            if process.poll() is None:
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in self._processes.values():
+            while process.poll() is None and time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+            if process.poll() is None:
+                process.kill()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            name: {
+                "pid": process.pid,
+                "running": process.poll() is None,
+                "restarts": self._restarts[name],
+            }
+            for name, process in self._processes.items()
+        }
+
+
+# ----------------------------------------------------------------------
+# Gateway
+# ----------------------------------------------------------------------
+
+class ServiceGateway:
+    """
+    ASGI reverse proxy in front of the service groups.
+
+    Request and response bodies are streamed, so SSE and long analyses pass
+    through unchanged; a client disconnect closes the upstream request.
+    """
+
+    def __init__(
+        self,
+        groups: Sequence[ServiceGroup],
+        supervisor: Optional[GroupSupervisor] = None,
+        clients: Optional[Dict[str, httpx.AsyncClient]] = None,
+        health_timeout: float = 2.0,
+    ):
+        self.groups = {group.name: group for group in groups}
+        self.supervisor = supervisor
+        self.health_timeout = health_timeout
+        self._clients = clients or {}
+        self._stats = {name: {"requests": 0, "unavailable": 0} for name in self.groups}
+
+    def _client(self, group: str) -> httpx.AsyncClient:
+        client = self._clients.get(group)
+        if client is None:
+            # No read timeout: analyses and progress streams stay open for minutes
+            client = self._clients[group] = httpx.AsyncClient(
+                base_url=self.groups[group].base_url,
+                timeout=httpx.Timeout(connect=5.0, read=None, write=60.0, pool=None),
+                limits=httpx.Limits(max_connections=None, max_keepalive_connections=64),
+            )
+        return client
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        path = scope["path"]
+        if path == "/health":
+            await self._health(send)
+            return
+        if path == METRICS_PATH:
+            await self._metrics(scope, receive, send)
+            return
+        groups = fan_in_groups(path)
+        if groups:
+            await self._fan_in(groups, scope, receive, send)
+        else:
+            await self._proxy(route_group(path), scope, receive, send)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if self.supervisor:
+                    self.supervisor.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.supervisor:
+                    await self.supervisor.stop()
+                for client in self._clients.values():
+                    await client.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    # ------------------------------------------------------------------
+    # Forwarding
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    @staticmethod
+    def _request_headers(scope) -> List[Tuple[bytes, bytes]]:
+        headers = [(name, value) for name, value in scope["headers"] if name.decode("latin-1") not in HOP_BY_HOP_HEADERS]
+        client = scope.get("client")
+        if client:
+            forwarded = dict(scope["headers"]).get(b"x-forwarded-for")
+            value = client[0].encode("latin-1")
+            headers = [(name, v) for name, v in headers if name != b"x-forwarded-for"]
+            headers.append((b"x-forwarded-for", forwarded + b", " + value if forwarded else value))
+        host = dict(scope["headers"]).get(b"host")
+        if host:
+            headers.append((b"x-forwarded-host", host))
+        headers.append((b"x-forwarded-proto", scope.get("scheme", "http").encode("latin-1")))
+        return headers
+
+    @staticmethod
+    def _response_headers(response: httpx.Response) -> List[Tuple[bytes, bytes]]:
+        return [(name, value) for name, value in response.headers.raw if name.lower().decode("latin-1") not in HOP_BY_HOP_HEADERS]
+
+    async def _open(self, group: str, scope, body: bytes) -> Optional[httpx.Response]:
+        self._stats[group]["requests"] += 1
+        target = scope["path"] + (("?" + scope["query_string"].decode("latin-1")) if scope.get("query_string") else "")
+        client = self._client(group)
+        request = client.build_request(scope["method"], target, headers=self._request_headers(scope), content=body)
+        try:
+            return await client.send(request, stream=True)
+        except httpx.TransportError as e:
+            self._stats[group]["unavailable"] += 1
+            print(f"[GATEWAY] Group '{group}' unavailable for {scope['method']} {scope['path']}: {e!r}")
+            return None
+
+    @staticmethod
+    async def _send_unavailable(send, groups: Iterable[str]) -> None:
+        body = json.dumps({"detail": f"Service group unavailable: {', '.join(groups)}"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [(b"content-type", b"application/json"), (b"retry-after", b"1")],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    async def _until_disconnect(receive) -> None:
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    async def _stream(self, pump, receive) -> None:
+        """Run pump until it finishes or the client disconnects."""
+        pump_task = asyncio.create_task(pump)
+        disconnect_task = asyncio.create_task(self._until_disconnect(receive))
+        try:
+            done, _ = await asyncio.wait({pump_task, disconnect_task}, return_when=asyncio.FIRST_COMPLETED)
+            if pump_task in done:
+                pump_task.result()
+        finally:
+            for task in (pump_task, disconnect_task):
+                task.cancel()
+
+    async def _proxy(self, group: str, scope, receive, send) -> None:
+        body = await self._read_body(receive)
+        response = await self._open(group, scope, body)
+        if response is None:
+            await self._send_unavailable(send, [group])
+            return
+
+        async def pump():
+            await send({"type": "http.response.start", "status": response.status_code, "headers": self._response_headers(response)})
+            async for chunk in response.aiter_raw():
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+
+        try:
+            await self._stream(pump(), receive)
+        finally:
+            await response.aclose()
+
+    async def _fan_in(self, groups: Sequence[str], scope, receive, send) -> None:
+        body = await self._read_body(receive)
+        opened = await asyncio.gather(*(self._open(group, scope, body) for group in groups))
+        responses = [response for response in opened if response is not None]
+        if not responses:
+            await self._send_unavailable(send, groups)
+            return
+
+        events: asyncio.Queue = asyncio.Queue()
+
+        async def read_events(response: httpx.Response):
+            buffer = b""
+            try:
+                async for chunk in response.aiter_raw():
+                    buffer += chunk
+                    while b"\n\n" in buffer:
+                        event, buffer = buffer.split(b"\n\n", 1)
+                        await events.put(event + b"\n\n")
+                if buffer.strip():
+                    await events.put(buffer)
+            finally:
+                await events.put(None)
+
+        async def pump():
+            first = responses[0]
+            # The merged body is longer than any single upstream body
+            headers = [(name, value) for name, value in self._response_headers(first) if name.lower() != b"content-length"]
+            await send({"type": "http.response.start", "status": first.status_code, "headers": headers})
+            readers = [asyncio.create_task(read_events(response)) for response in responses]
+            try:
+                remaining = len(readers)
+                while remaining:
+                    event = await events.get()
+                    if event is None:
+                        remaining -= 1
+                        continue
+                    await send({"type": "http.response.body", "body": event, "more_body": True})
+                await send({"type": "http.response.body", "body": b""})
+            finally:
+                for reader in readers:
+                    reader.cancel()
+
+        try:
+            await self._stream(pump(), receive)
+        finally:
+            for response in responses:
+                await response.aclose()
+
+    async def _metrics(self, scope, receive, send) -> None:
+        body = await self._read_body(receive)
+        names = list(self.groups)
+        opened = await asyncio.gather(*(self._open(name, scope, body) for name in names))
+        texts = {}
+        try:
+            for name, response in zip(names, opened):
+                if response is not None and response.status_code == 200:
+                    texts[name] = (await response.aread()).decode("utf-8", errors="replace")
+        finally:
+            for response in opened:
+                if response is not None:
+                    await response.aclose()
+        if not texts:
+            await self._send_unavailable(send, names)
+            return
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"text/plain; version=0.0.4; charset=utf-8")],
+        })
+        await send({"type": "http.response.body", "body": merge_metrics(texts).encode()})
+
+    # ------------------------------------------------------------------
+    # Health
+    # ------------------------------------------------------------------
+
+    async def _group_health(self, group: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            response = await self._client(group).get("/health", timeout=self.health_timeout)
+            status = "up" if response.status_code == 200 else "down"
+            return {"status": status, "http_status": response.status_code,
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 1)}
+        except httpx.HTTPError as e:
+            return {"status": "down", "error": type(e).__name__}
+
+    async def health(self) -> Tuple[int, Dict[str, Any]]:
+        """Gateway health: up if every group answers, degraded if some do."""
+        names = list(self.groups)
+        results = dict(zip(names, await asyncio.gather(*(self._group_health(name) for name in names))))
+        processes = self.supervisor.stats() if self.supervisor else {}
+        for name, result in results.items():
+            result.update(self.groups[name].__dict__, **self._stats[name])
+            if name in processes:
+                result["process"] = processes[name]
+        up = sum(result["status"] == "up" for result in results.values())
+        status = "healthy" if up == len(names) else ("degraded" if up else "unavailable")
+        return (200 if up else 503), {
+            "status": status,
+            "service": "unified-chess-analysis-gateway",
+            "groups": results,
+        }
+
+    async def _health(self, send) -> None:
+        status_code, payload = await self.health()
+        await send({"type": "http.response.start", "status": status_code, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": json.dumps(payload).encode()})
+
+
+def run_gateway(host: str = "0.0.0.0", port: int = 8000) -> None:
+    """Start every service group and serve the gateway in front of them."""
+    import uvicorn
+
+    groups = load_service_groups()
+    if port in {group.port for group in groups}:
+        raise ValueError(f"Gateway port {port} collides with a service group port")
+    gateway = ServiceGateway(groups, supervisor=GroupSupervisor(groups))
+    print(f"[GATEWAY] Serving on {host}:{port}: " + ", ".join(f"{g.name}={g.port}x{g.workers}" for g in groups))
+    uvicorn.run(gateway, host=host, port=port, log_level="info")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the API as service groups behind a local gateway")
+    parser.add_argument("--host", default="0.0.0.0", help="Host to bind to")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")), help="Port to bind to")
+    args = parser.parse_args()
+    run_gateway(args.host, args.port)
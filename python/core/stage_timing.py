@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Stage Timing
+Per-stage timing spans for game analysis, aggregated into histograms.
+
+GameAnalysis.processing_time_ms says how long a game took, not why. Spans
+around each stage of analyze_game record where the time went:
+- pgn_parse, move_collection: PGN handling before any analysis
+- move: one move's full analysis (engine or heuristic path)
+- engine_acquire: waiting for a pooled Stockfish engine
+- search_before, search_after: Stockfish searches before/after the move
+- search_multipv: multi-PV search for brilliant move candidates
+- coaching: coaching comment enrichment
+- game_metrics: game-level metric calculation
+- persistence: saving the analysis
+
+Position cache lookups are counted by tier (exact depth, each lower depth
+fallback, miss).
+
+Each span is recorded twice: into a process-wide histogram of span durations,
+and into the timings of the game being analyzed (tracked with a context
+variable, so concurrent move tasks and executor threads started with a copied
+context report to their own game). Per-game stage totals are summed across
+concurrently analyzed moves, so they can exceed the game's wall-clock time.
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+# Histogram bucket upper bounds in milliseconds (last bucket is unbounded)
+BUCKET_BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+# Number of recent games kept for the slowest-games breakdown
+RECENT_GAMES = 50
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (not thread-safe; guarded by StageMetrics)."""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        index = len(BUCKET_BOUNDS_MS)
+        for i, bound in enumerate(BUCKET_BOUNDS_MS):
+            if ms <= bound:
+                index = i
+                break
+        self.buckets[index] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of observations."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank:
+                return float(BUCKET_BOUNDS_MS[i]) if i < len(BUCKET_BOUNDS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 1),
+            "mean_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p90_ms": self.percentile(0.9),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 1),
+            "buckets": {
+                (f"le_{BUCKET_BOUNDS_MS[i]}" if i < len(BUCKET_BOUNDS_MS) else "inf"): bucket_count
+                for i, bucket_count in enumerate(self.buckets) if bucket_count
+            },
+        }
+
+
+class GameTimings:
+    """Stage totals and counters of one game (thread-safe)."""
+
+    def __init__(self, game_id: Optional[str] = None):
+        self.game_id = game_id
+        self.started = time.perf_counter()
+        self.total_ms: Optional[float] = None
+        self._stages: Dict[str, List[float]] = {}
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, ms: float) -> None:
+        with self._lock:
+            entry = self._stages.setdefault(stage, [0.0, 0])
+            entry[0] += ms
+            entry[1] += 1
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    def finish(self) -> None:
+        if self.total_ms is None:
+            self.total_ms = (time.perf_counter() - self.started) * 1000
+
+    def summary(self) -> Dict[str, Any]:
+        """JSON-serializable breakdown (stored on GameAnalysis.stage_timings)."""
+        with self._lock:
+            stages = {stage: {"ms": round(ms, 1), "count": count} for stage, (ms, count) in self._stages.items()}
+            counters = dict(self._counters)
+        total_ms = self.total_ms if self.total_ms is not None else (time.perf_counter() - self.started) * 1000
+        # The per-move "move" span contains the other move stages
+        breakdown = {stage: data for stage, data in stages.items() if stage != "move"}
+        return {
+            "game_id": self.game_id,
+            "pid": os.getpid(),
+            "total_ms": round(total_ms, 1),
+            "stages": stages,
+            "counters": counters,
+            "dominant_stage": max(breakdown, key=lambda stage: breakdown[stage]["ms"]) if breakdown else None,
+        }
+
+
+class StageMetrics:
+    """
+    Process-wide stage histograms and counters.
+
+    Features:
+    - Histogram of every span per stage
+    - Histogram of per-game stage totals (what a whole game spent per stage)
+    - Counters (position cache tiers)
+    - Breakdown of the slowest recent games
+
+    Usage:
+        metrics = get_stage_metrics()
+        metrics.observe("search_before", 182.5)
+        snapshot = metrics.snapshot()
+    """
+
+    def __init__(self, recent_games: int = RECENT_GAMES):
+        self._spans: Dict[str, Histogram] = {}
+        self._game_stages: Dict[str, Histogram] = {}
+        self._counters: Dict[str, int] = {}
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=recent_games)
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, ms: float) -> None:
+        with self._lock:
+            histogram = self._spans.get(stage)
+            if histogram is None:
+                histogram = self._spans[stage] = Histogram()
+            histogram.observe(ms)
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    def record_game(self, summary: Dict[str, Any]) -> None:
+        """Add a finished game's stage totals (from GameTimings.summary())."""
+        with self._lock:
+            for stage, data in summary.get("stages", {}).items():
+                histogram = self._game_stages.get(stage)
+                if histogram is None:
+                    histogram = self._game_stages[stage] = Histogram()
+                histogram.observe(data["ms"])
+            total = self._game_stages.get("total")
+            if total is None:
+                total = self._game_stages["total"] = Histogram()
+            total.observe(summary.get("total_ms", 0.0))
+            self._recent.append(summary)
+
+    def snapshot(self, slowest: int = 10) -> Dict[str, Any]:
+        """Histograms, counters and the slowest recent games."""
+        with self._lock:
+            recent = sorted(self._recent, key=lambda summary: summary.get("total_ms", 0.0), reverse=True)
+            return {
+                "spans": {stage: histogram.to_dict() for stage, histogram in sorted(self._spans.items())},
+                "per_game": {stage: histogram.to_dict() for stage, histogram in sorted(self._game_stages.items())},
+                "counters": dict(sorted(self._counters.items())),
+                "slowest_recent_games": recent[:slowest],
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._game_stages.clear()
+            self._counters.clear()
+            self._recent.clear()
+
+
+_current_game: contextvars.ContextVar[Optional[GameTimings]] = contextvars.ContextVar("stage_timing_game", default=None)
+
+# Global metrics instance
+_stage_metrics: Optional[StageMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_stage_metrics() -> StageMetrics:
+    """Get or create the global stage metrics."""
+    global _stage_metrics
+
+    if _stage_metrics is None:
+        with _metrics_lock:
+            if _stage_metrics is None:
+                _stage_metrics = StageMetrics()
+
+    return _stage_metrics
+
+
+def record_stage(stage: str, ms: float) -> None:
+    """Record a stage duration for the process and the current game."""
+    get_stage_metrics().observe(stage, ms)
+    game = _current_game.get()
+    if game is not None:
+        game.add(stage, ms)
+
+
+def count_stage(counter: str, amount: int = 1) -> None:
+    """Increment a counter for the process and the current game."""
+    get_stage_metrics().increment(counter, amount)
+    game = _current_game.get()
+    if game is not None:
+        game.increment(counter, amount)
+
+
+def current_game_timings() -> Optional[GameTimings]:
+    """Timings of the game being analyzed in this context, if any."""
+    return _current_game.get()
+
+
+@contextmanager
+def stage_span(stage: str) -> Iterator[None]:
+    """Time the enclosed block as one span of stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, (time.perf_counter() - started) * 1000)
+
+
+def timed_stage(stage: str):
+    """Decorator timing every call of a function (sync or async) as one span."""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with stage_span(stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage_span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def game_timing(game_id: Optional[str] = None) -> Iterator[GameTimings]:
+    """
+    Collect stage timings of one game.
+
+    Nested use joins the outer game (e.g. a worker timing analysis plus
+    persistence around analyze_game); only the outermost scope records the
+    game into the process histograms.
+    """
+    existing = _current_game.get()
+    if existing is not None:
+        yield existing
+        return
+
+    timings = GameTimings(game_id)
+    token = _current_game.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_game.reset(token)
+        timings.finish()
+        get_stage_metrics().record_game(timings.summary())
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Tactical Feature Extraction
+One attack/pin/fork pass per position, shared by all tactical detectors.
+
+The coaching and AI-comment paths run several detectors on the same positions
+(PositionAnalyzer, AdvancedChessAnalyzer, ChessKnowledgeRetriever), and each
+used to walk the board with board.attackers()/is_attacked_by() per square.
+TacticalFeatures computes the attack sets once from bitboards:
+- Attack mask of every piece and the combined attack mask of each color
+- Absolute pins (pinned piece, pinner, king)
+- X-ray lines: each slider through the first piece it hits to the piece behind
+- Hanging pieces (attacked by more enemy pieces than they are defended by)
+- Forks (pieces attacking two or more enemy pieces)
+
+Features depend only on piece placement and are memoized by it, so the
+position after one move and the position before the next share one entry.
+"""
+
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import chess
+
+from .cache_manager import LRUCache, register_cache
+
+
+class Pin(NamedTuple):
+    """A piece that cannot leave the line between its king and an enemy slider."""
+    pinned: chess.Square
+    pinner: chess.Square
+    king: chess.Square
+
+
+class XRay(NamedTuple):
+    """A slider's line through the first piece it attacks to the next piece behind it."""
+    slider: chess.Square
+    front: chess.Square
+    behind: chess.Square
+
+
+class TacticalFeatures:
+    """
+    Attack maps and tactical motifs of one position.
+
+    Instances are shared through the feature cache and must be treated as
+    read-only. Square lists are in ascending square order.
+
+    Usage:
+        features = get_tactical_features(board)
+        if features.attacked[chess.WHITE] & chess.BB_SQUARES[chess.E5]:
+            ...
+        forking_targets = features.forks.get(move.to_square, [])
+    """
+
+    def __init__(self, board: chess.Board):
+        self.occupied_co = (board.occupied_co[chess.BLACK], board.occupied_co[chess.WHITE])
+        self.attacks: Dict[chess.Square, chess.Bitboard] = {}
+        self.attacked = [chess.BB_EMPTY, chess.BB_EMPTY]
+        # Per color: (square, attack mask) of each piece, for attacker counts
+        self._pieces: Tuple[List[Tuple[chess.Square, chess.Bitboard]], ...] = ([], [])
+        for square in chess.scan_forward(board.occupied):
+            color = bool(board.occupied_co[chess.WHITE] & chess.BB_SQUARES[square])
+            mask = board.attacks_mask(square)
+            self.attacks[square] = mask
+            self.attacked[color] |= mask
+            self._pieces[color].append((square, mask))
+
+        self.pins: Dict[chess.Color, List[Pin]] = {color: self._find_pins(board, color) for color in chess.COLORS}
+        self.xrays: List[XRay] = self._find_xrays(board)
+        self.hanging: Dict[chess.Color, List[chess.Square]] = {
+            color: self._find_hanging(board, color) for color in chess.COLORS
+        }
+        self.forks: Dict[chess.Square, List[chess.Square]] = {}
+        for color in chess.COLORS:
+            enemies = self.occupied_co[not color]
+            for square, mask in self._pieces[color]:
+                targets = mask & enemies
+                if chess.popcount(targets) >= 2:
+                    self.forks[square] = list(chess.scan_forward(targets))
+
+    def attackers(self, color: chess.Color, square: chess.Square) -> chess.Bitboard:
+        """Mask of color's pieces attacking (or defending) square."""
+        bit = chess.BB_SQUARES[square]
+        if not self.attacked[color] & bit:
+            return chess.BB_EMPTY
+        mask = chess.BB_EMPTY
+        for piece_square, attacks in self._pieces[color]:
+            if attacks & bit:
+                mask |= chess.BB_SQUARES[piece_square]
+        return mask
+
+    def attacker_count(self, color: chess.Color, square: chess.Square) -> int:
+        """Number of color's pieces attacking (or defending) square."""
+        return chess.popcount(self.attackers(color, square))
+
+    def attack_count(self, color: chess.Color, mask: chess.Bitboard) -> int:
+        """Sum over color's pieces of attacked squares inside mask."""
+        if not self.attacked[color] & mask:
+            return 0
+        return sum(chess.popcount(attacks & mask) for _, attacks in self._pieces[color])
+
+    def attacked_pieces(self, color: chess.Color) -> List[chess.Square]:
+        """Enemy pieces attacked by color."""
+        return list(chess.scan_forward(self.attacked[color] & self.occupied_co[not color]))
+
+    def defended_pieces(self, color: chess.Color) -> List[chess.Square]:
+        """Color's own pieces defended by another piece of color."""
+        return list(chess.scan_forward(self.attacked[color] & self.occupied_co[color]))
+
+    def controlled_squares(self, color: chess.Color) -> List[chess.Square]:
+        """Squares attacked by color."""
+        return list(chess.scan_forward(self.attacked[color]))
+
+    @staticmethod
+    def _find_pins(board: chess.Board, color: chess.Color) -> List[Pin]:
+        """Pieces of color pinned to their own king."""
+        king = board.king(color)
+        if king is None:
+            return []
+        rooks_and_queens = board.rooks | board.queens
+        bishops_and_queens = board.bishops | board.queens
+        snipers = board.occupied_co[not color] & (
+            (chess.BB_RANK_ATTACKS[king][0] & rooks_and_queens) |
+            (chess.BB_FILE_ATTACKS[king][0] & rooks_and_queens) |
+            (chess.BB_DIAG_ATTACKS[king][0] & bishops_and_queens)
+        )
+        pins = []
+        for sniper in chess.scan_forward(snipers):
+            blockers = chess.between(king, sniper) & board.occupied
+            if blockers and chess.popcount(blockers) == 1 and blockers & board.occupied_co[color]:
+                pins.append(Pin(chess.lsb(blockers), sniper, king))
+        pins.sort()
+        return pins
+
+    def _find_xrays(self, board: chess.Board) -> List[XRay]:
+        """Slider lines through their first hit to the next piece on the same line."""
+        xrays = []
+        sliders = board.bishops | board.rooks | board.queens
+        for slider in chess.scan_forward(sliders):
+            for front in chess.scan_forward(self.attacks[slider] & board.occupied):
+                beyond = chess.ray(slider, front) & board.occupied & ~chess.BB_SQUARES[front]
+                behind = None
+                for square in chess.scan_forward(beyond):
+                    # Beyond the front piece, with nothing in between
+                    if chess.between(slider, square) & chess.BB_SQUARES[front] and not chess.between(front, square) & board.occupied:
+                        behind = square
+                        break
+                if behind is not None:
+                    xrays.append(XRay(slider, front, behind))
+        return xrays
+
+    def _find_hanging(self, board: chess.Board, color: chess.Color) -> List[chess.Square]:
+        """Color's pieces (kings excluded) attacked by more enemy pieces than they are defended by."""
+        hanging = []
+        candidates = board.occupied_co[color] & ~board.kings & self.attacked[not color]
+        for square in chess.scan_forward(candidates):
+            if self.attacker_count(not color, square) > self.attacker_count(color, square):
+                hanging.append(square)
+        return hanging
+
+
+def _placement_key(board: chess.Board) -> str:
+    """Cache key of the piece placement (all that attack sets depend on)."""
+    return "%x:%x:%x:%x:%x:%x:%x:%x" % (
+        board.occupied_co[chess.WHITE], board.occupied_co[chess.BLACK],
+        board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings
+    )
+
+
+# Global feature cache: positions recur across detectors and across consecutive moves
+_feature_cache: Optional[LRUCache] = None
+_cache_lock = threading.Lock()
+
+
+def _get_feature_cache() -> LRUCache:
+    """Get or create the global feature cache."""
+    global _feature_cache
+
+    if _feature_cache is None:
+        with _cache_lock:
+            if _feature_cache is None:
+                _feature_cache = LRUCache(maxsize=1024, ttl=600, name="tactical_features")
+                register_cache(_feature_cache)
+
+    return _feature_cache
+
+
+def get_tactical_features(board: chess.Board) -> TacticalFeatures:
+    """Tactical features of a position, computed once per piece placement."""
+    cache = _get_feature_cache()
+    key = _placement_key(board)
+    features = cache.get(key)
+    if features is None:
+        features = TacticalFeatures(board)
+        cache.set(key, features)
+    return features
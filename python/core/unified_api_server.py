@@ -22,30 +22,37 @@ else:
     # Logger not available yet, but avoid printing sensitive info
     pass
 
-# Check if stripe library is available
+# Check if stripe library is available (imported by stripe_service when payments are configured)
+from importlib import metadata as importlib_metadata
 try:
-    import stripe as stripe_lib
-    print(f"[OK] Stripe library imported successfully (version: {stripe_lib.VERSION if hasattr(stripe_lib, 'VERSION') else 'unknown'})")
-except ImportError as e:
-    print(f"[ERROR] Stripe library import failed: {e}")
+    print(f"[OK] Stripe library available (version: {importlib_metadata.version('stripe')})")
+except importlib_metadata.PackageNotFoundError as e:
+    print(f"[ERROR] Stripe library not installed: {e}")
     print("   Run: pip install stripe>=7.0.0")
 
 from contextlib import asynccontextmanager
+from functools import lru_cache
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Request, Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.middleware.gzip import GZipMiddleware
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, Field, validator, model_validator
-from typing import List, Optional, Dict, Any, Annotated, Union, Tuple
+from typing import List, Optional, Dict, Any, Annotated, Union, Tuple, Callable, Awaitable
 from collections import Counter
+from dataclasses import fields as dataclass_fields
 from decimal import Decimal
+import json
 import re
 import uvicorn
 import asyncio
 import uuid
+import threading
 import traceback
+import urllib.parse
 from datetime import datetime, timezone
 import time
+import httpx
 from supabase import create_client, Client
 from jose import jwt as jose_jwt
 import logging
@@ -59,12 +66,27 @@ asyncio_logger.setLevel(logging.WARNING)  # Suppress ERROR level, but keep CRITI
 logger = logging.getLogger(__name__)
 
 # Import our unified analysis engine
-from .analysis_engine import ChessAnalysisEngine, AnalysisConfig, AnalysisType, GameAnalysis
+from .analysis_engine import COACHING_FIELDS, ChessAnalysisEngine, AnalysisConfig, AnalysisType, GameAnalysis, MoveAnalysis
 
 # Import memory optimization modules
-from .cache_manager import LRUCache, TTLDict, register_cache, cleanup_all_caches, get_all_cache_stats
+from .cache_manager import LRUCache, register_cache, cleanup_all_caches, get_all_cache_stats
 from .engine_pool import StockfishEnginePool, get_engine_pool, close_global_engine_pool
 from .memory_monitor import MemoryMonitor, get_memory_monitor, stop_memory_monitor
+from .admission_controller import get_admission_controller
+from .progress_events import get_progress_broker, sse_stream, analysis_topic, import_topic, job_topic, TERMINAL_JOB_EVENTS
+from .hot_path_logger import get_hot_logger
+from .stage_timing import get_stage_metrics, timed_stage
+from .metrics_registry import get_metrics_registry
+from .request_trace import RequestTraceMiddleware, trace_file_from_env
+from .entitlements import Entitlement, EntitlementService
+from .usage_ledger import ledger_settings_from_env
+from .rate_limiter import RateLimitMiddleware, RateLimitPolicy, RouteRateLimit, get_rate_limiter
+from .upstream_cache import cached_get, chesscom_archive_is_complete, get_upstream_cache
+from .fast_json import EncodedJSONResponse, EncodedPayload, FastJSONResponse, GZIP_MIN_BYTES
+from .cache_invalidation import create_invalidation_log
+from .llm_scheduler import process_pending_retries
+
+hot_log = get_hot_logger()
 
 # Import reliable persistence system
 from .reliable_analysis_persistence import ReliableAnalysisPersistence, PersistenceResult
@@ -86,6 +108,7 @@ from .opening_utils import normalize_opening_name, get_opening_name_from_eco_cod
 
 # Import resilient API client
 from .resilient_api_client import get_api_client as get_resilient_api_client
+from .resilient_api_client import CHESSCOM_API_BASE_URL, LICHESS_BASE_URL
 
 # Import Coach modules
 from .lesson_generator import LessonGenerator
@@ -156,34 +179,118 @@ if JWT_ISSUER:
 if JWT_AUDIENCE:
     print(f"JWT validation configured with audience: {JWT_AUDIENCE}")
 
+# Service group this process serves behind the gateway (core/service_gateway.py):
+# "engine", "imports" or "analytics". Unset means one process serves everything.
+SERVICE_GROUP = os.getenv('SERVICE_GROUP', '').lower() or None
+
+def _serves_group(name: str) -> bool:
+    """Whether this process owns the routes and background work of a service group."""
+    return SERVICE_GROUP is None or SERVICE_GROUP == name
+
+# When to create the analysis engine and AI generator (engine pool, opening data,
+# LLM SDK clients): "background" starts them in a worker thread once the server is
+# up, "eager" blocks startup on them, "off" leaves them to the first request.
+# Only the engine group pre-initializes by default; the others rarely need them.
+STARTUP_PREWARM = os.getenv('STARTUP_PREWARM', 'background' if _serves_group('engine') else 'off').lower()
+
+# How often queued LLM requests (throttled or failed comments) are replayed
+LLM_RETRY_INTERVAL_SECONDS = float(os.getenv('LLM_RETRY_INTERVAL_SECONDS', '30'))
+
 # Bounded in-memory cache for analytics with TTL (replaces unbounded dict)
 CACHE_TTL_SECONDS = 1800  # 30 minutes cache TTL (was 5 minutes)
 _analytics_cache = LRUCache(maxsize=500, ttl=CACHE_TTL_SECONDS, name="analytics")
 register_cache(_analytics_cache)
 
+# Invalidations are shared with the other server processes (workers, service
+# groups) through a local SQLite log, so no process keeps serving stale analytics
+CACHE_INVALIDATION_POLL_SECONDS = float(os.getenv('CACHE_INVALIDATION_POLL_SECONDS', '1.0'))
+_default_invalidation_url = (
+    f"sqlite:///{os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'cache_invalidations.db')}"
+    if SERVICE_GROUP else 'off'
+)
+try:
+    _invalidation_log = create_invalidation_log(os.getenv('CACHE_INVALIDATION_PATH', _default_invalidation_url))
+except Exception as e:
+    print(f"[CACHE] Cross-process invalidation disabled: {e}")
+    _invalidation_log = None
+
+# Entitlement invalidations share the log; their scope is this prefix plus the
+# auth user id (analytics scopes are "user_id:platform")
+ENTITLEMENT_SCOPE_PREFIX = "entitlements/"
+
 def _get_from_cache(cache_key: str) -> Optional[Dict[str, Any]]:
     """Get data from cache if it exists and is not expired."""
-    result = _analytics_cache.get(cache_key)
-    if result is not None:
-        if DEBUG:
-            print(f"[CACHE] Hit for key: {cache_key}")
-        return result
+    payload = _analytics_cache.get(cache_key)
+    if payload is not None:
+        hot_log.debug("CACHE", "Hit for key: %s", cache_key)
+        return payload.data
     return None
 
+def _get_cached_response(cache_key: str, request: Optional[Request] = None) -> Optional[Response]:
+    """Serve a cached entry as its pre-encoded JSON body, skipping FastAPI's encoder.
+
+    The body (and its gzip form) is encoded once per cache entry. Entries that
+    cannot be encoded fall back to the regular path via None.
+    """
+    payload = _analytics_cache.get(cache_key)
+    if payload is None:
+        return None
+    try:
+        response = EncodedJSONResponse.from_payload(payload, request)
+    except (TypeError, ValueError) as e:
+        print(f"[CACHE] Cannot pre-encode {cache_key}, serving uncached: {e}")
+        return None
+    hot_log.debug("CACHE", "Encoded hit for key: %s", cache_key)
+    return response
+
 def _set_in_cache(cache_key: str, data: Dict[str, Any]) -> None:
     """Store data in cache with current timestamp."""
-    _analytics_cache.set(cache_key, data)
-    if DEBUG:
-        print(f"[CACHE] Set for key: {cache_key}")
+    _analytics_cache.set(cache_key, EncodedPayload(data))
+    hot_log.debug("CACHE", "Set for key: %s", cache_key)
 
 def _delete_from_cache(cache_key: str) -> None:
     """Delete a specific cache entry."""
     if _analytics_cache.delete(cache_key):
-        if DEBUG:
-            print(f"[CACHE] Deleted key: {cache_key}")
+        hot_log.debug("CACHE", "Deleted key: %s", cache_key)
+
+def _publish_invalidation(user_id: str, platform: str) -> None:
+    """Tell the other server processes to drop their entries for a user/platform."""
+    if _invalidation_log is None:
+        return
+    try:
+        _invalidation_log.publish(f"{user_id}:{platform}")
+    except Exception as e:
+        print(f"[CACHE] Could not publish invalidation for {user_id}:{platform}: {e}")
+
+def _publish_entitlement_invalidation(target: str) -> None:
+    """Tell the other server processes to drop cached entitlements (an auth user id, or '*' for all)."""
+    if _invalidation_log is None:
+        return
+    try:
+        _invalidation_log.publish(f"{ENTITLEMENT_SCOPE_PREFIX}{target}")
+    except Exception as e:
+        print(f"[CACHE] Could not publish entitlement invalidation for {target}: {e}")
+
+def _apply_invalidation(scope: str) -> None:
+    """Apply an invalidation published by another server process."""
+    if scope.startswith(ENTITLEMENT_SCOPE_PREFIX):
+        target = scope[len(ENTITLEMENT_SCOPE_PREFIX):]
+        if entitlement_service is not None:
+            if target == EntitlementService.ALL:
+                entitlement_service.invalidate_all(propagate=False)
+            else:
+                entitlement_service.invalidate(target, propagate=False)
+        return
+    user_id, _, platform = scope.rpartition(":")
+    _invalidate_local_cache(user_id, platform)
 
 def _invalidate_cache(user_id: str, platform: str) -> None:
-    """Invalidate all cache entries for a specific user/platform.
+    """Invalidate all cache entries for a specific user/platform, in every process."""
+    _invalidate_local_cache(user_id, platform)
+    _publish_invalidation(user_id, platform)
+
+def _invalidate_local_cache(user_id: str, platform: str) -> None:
+    """Invalidate this process's cache entries for a specific user/platform.
 
     Uses exact segment matching to avoid over-deleting keys for similar user IDs
     (e.g., "alice:lichess" should not match "malice:lichess:*" patterns).
@@ -218,28 +325,65 @@ def _get_stockfish_path() -> str:
         _stockfish_path = ChessAnalysisEngine(config=AnalysisConfig()).stockfish_path
     return _stockfish_path
 
-def _get_sync_engine_pool():
+async def _sync_engine_pool_ready():
     """Get the SyncEnginePool from the analysis engine singleton.
 
-    Returns the thread-safe synchronous engine pool for use in
-    asyncio.to_thread() workers and synchronous helper functions.
+    Resolved by request handlers (a first-use engine initialization runs in a
+    worker thread, see _analysis_engine_ready()) and handed to the
+    asyncio.to_thread() workers and synchronous helpers that use it.
     Avoids spawning a new Stockfish process per request.
     """
-    engine = get_analysis_engine()
+    engine = await _analysis_engine_ready()
     if engine and engine._sync_engine_pool:
         return engine._sync_engine_pool
     return None
 
 _ai_generator = None
+_ai_generator_lock = threading.Lock()
 
 def _get_ai_generator():
     """Get or create a singleton AIChessCommentGenerator instance."""
     global _ai_generator
     if _ai_generator is None:
-        from .ai_comment_generator import AIChessCommentGenerator
-        _ai_generator = AIChessCommentGenerator()
+        with _ai_generator_lock:
+            if _ai_generator is None:
+                from .ai_comment_generator import AIChessCommentGenerator
+                _ai_generator = AIChessCommentGenerator()
     return _ai_generator
 
+async def _ai_generator_ready():
+    """_get_ai_generator() for request handlers: a first-use initialization
+    (LLM SDK import, client setup) runs in a worker thread, not on the event loop."""
+    if _ai_generator is not None:
+        return _ai_generator
+    return await asyncio.to_thread(_get_ai_generator)
+
+def _prewarm_heavy_subsystems() -> None:
+    """Create the analysis engine and AI generator ahead of their first use."""
+    started = time.time()
+    try:
+        get_analysis_engine()
+        _get_ai_generator()
+        print(f"[STARTUP] [OK] Analysis engine and AI generator initialized in {time.time() - started:.2f}s")
+    except Exception as e:
+        logger.warning(f"[STARTUP] [WARNING] Pre-initialization failed (will retry on first use): {e}")
+        logger.debug(f"[STARTUP] Traceback: {traceback.format_exc()}")
+
+@lru_cache(maxsize=1)
+def _ai_config_status() -> Dict[str, Any]:
+    """AI provider status from configuration, without creating the generator or its SDK client."""
+    from .ai_comment_generator import ANTHROPIC_AVAILABLE, GEMINI_AVAILABLE, AIConfig, AIProvider
+    ai_config = AIConfig()
+    if ai_config.ai_provider == AIProvider.GEMINI.value:
+        available, has_api_key = GEMINI_AVAILABLE, bool(ai_config.gemini_api_key)
+    else:
+        available, has_api_key = ANTHROPIC_AVAILABLE, bool(ai_config.anthropic_api_key)
+    return {
+        "available": available,
+        "enabled": bool(available and has_api_key and ai_config.ai_enabled),
+        "model": ai_config.ai_model,
+    }
+
 _study_plan_generator = None
 _opening_repertoire_analyzer = None
 _progress_analyzer = None
@@ -288,7 +432,13 @@ if config.database.url and config.database.anon_key:
     from .usage_tracker import UsageTracker
     from .stripe_service import StripeService
 
-    usage_tracker = UsageTracker(supabase_service)
+    entitlement_service = EntitlementService(supabase_service, on_invalidate=_publish_entitlement_invalidation)
+    register_cache(entitlement_service.cache)
+    usage_tracker = UsageTracker(supabase_service, entitlements=entitlement_service)
+    usage_ledger_settings = ledger_settings_from_env()
+    if usage_ledger_settings:
+        usage_ledger = usage_tracker.enable_write_behind(**usage_ledger_settings)
+        print(f"Usage write-behind enabled (journal: {usage_ledger.journal_path or 'off'})")
     stripe_service = StripeService(supabase_service)
     print("Usage tracking and payment services initialized")
 else:
@@ -297,6 +447,7 @@ else:
     supabase = None
     supabase_service = None
     persistence = None
+    entitlement_service = None
     usage_tracker = None
     stripe_service = None
 
@@ -492,16 +643,21 @@ def get_client_ip(request: Request) -> str:
 _engine_pool_instance = None
 _memory_monitor_instance = None
 _cache_cleanup_task = None
+_invalidation_poll_task = None
+_llm_retry_task = None
+_prewarm_task = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan: startup and shutdown logic."""
-    global _engine_pool_instance, _memory_monitor_instance, _cache_cleanup_task
+    global _engine_pool_instance, _memory_monitor_instance, _cache_cleanup_task, _invalidation_poll_task, _llm_retry_task, _prewarm_task
 
     # --- STARTUP ---
     print("=" * 80)
     print("[START] Starting Chess Analytics API Server with Memory Optimizations")
     print("=" * 80)
+    if SERVICE_GROUP:
+        print(f"[STARTUP] Serving service group: {SERVICE_GROUP}")
 
     # Initialize Stockfish engine pool (cost-optimized for scale-to-zero)
     stockfish_path = config.stockfish.path
@@ -533,35 +689,32 @@ async def lifespan(app: FastAPI):
     await _memory_monitor_instance.start()
     print(f"[STARTUP] [OK] Memory monitor started")
 
-    # Initialize analysis engine early to trigger AI comment generator initialization
-    logger.info("[STARTUP] Pre-initializing analysis engine (this will initialize AI comment generator)...")
-    try:
-        get_analysis_engine()
-        logger.info("[STARTUP] [OK] Analysis engine pre-initialized successfully")
-    except Exception as e:
-        logger.warning(f"[STARTUP] [WARNING] Analysis engine pre-initialization failed: {e}")
-        logger.debug(f"[STARTUP] Traceback: {traceback.format_exc()}")
+    # Drive admission control (engines, hash, concurrency, caches) from memory readings
+    admission_controller = get_admission_controller()
+    admission_controller.monitor = _memory_monitor_instance
+    admission_controller.register_cache(_analytics_cache)
+    _memory_monitor_instance.add_listener(admission_controller.on_snapshot)
+    print(f"[STARTUP] [OK] Memory admission control enabled")
+
+    # With scale-to-zero every cold start is on a user's critical path, so the
+    # analysis engine and AI generator do not hold up startup by default: they
+    # initialize in a worker thread while the server already answers requests.
+    if STARTUP_PREWARM == 'eager':
+        print("[STARTUP] Pre-initializing analysis engine and AI generator...")
+        _prewarm_heavy_subsystems()
+    elif STARTUP_PREWARM == 'background':
+        print("[STARTUP] Initializing analysis engine and AI generator in the background")
+        _prewarm_task = asyncio.create_task(asyncio.to_thread(_prewarm_heavy_subsystems))
+    else:
+        print("[STARTUP] Analysis engine and AI generator will initialize on first use")
 
-    # Check AI status and log it
-    logger.info("[STARTUP] Checking AI generation status...")
+    # Log AI status from configuration (does not initialize the provider client)
     try:
-        ai_check = _get_ai_generator()
-        if ai_check and ai_check.enabled:
-            model = ai_check.config.ai_model if hasattr(ai_check, 'config') else 'unknown'
-            logger.info(f"[STARTUP] [OK] AI Generation: ENABLED (Model: {model})")
-            logger.info("[STARTUP] [OK] AI-powered style analysis and move comments are available")
+        ai_status = _ai_config_status()
+        if ai_status["enabled"]:
+            logger.info(f"[STARTUP] [OK] AI Generation: ENABLED (Model: {ai_status['model']})")
         else:
-            if ai_check:
-                ai_enabled = ai_check.config.ai_enabled if hasattr(ai_check, 'config') else False
-                provider = ai_check.config.ai_provider if hasattr(ai_check, 'config') else 'anthropic'
-                if provider == 'gemini':
-                    has_api_key = bool(ai_check.config.gemini_api_key if hasattr(ai_check, 'config') else False)
-                else:
-                    has_api_key = bool(ai_check.config.anthropic_api_key if hasattr(ai_check, 'config') else False)
-                logger.warning(f"[STARTUP] [WARNING] AI Generation: DISABLED")
-                logger.info(f"[STARTUP]    Provider={provider}, AI_ENABLED={ai_enabled}, API_KEY present={has_api_key}")
-            else:
-                logger.warning("[STARTUP] [WARNING] AI Generation: NOT AVAILABLE (generator failed to initialize)")
+            logger.warning(f"[STARTUP] [WARNING] AI Generation: DISABLED (package installed={ai_status['available']})")
             logger.info("[STARTUP]    Falling back to template-based generation")
     except Exception as ai_error:
         logger.warning(f"[STARTUP] [WARNING] AI Generation: CHECK FAILED - {ai_error}")
@@ -597,15 +750,63 @@ async def lifespan(app: FastAPI):
 
     _cache_cleanup_task = asyncio.create_task(cache_cleanup_loop())
 
-    # Initialize the analysis queue (if using queue system)
-    try:
-        from .analysis_queue import get_analysis_queue
-        queue = get_analysis_queue()
-        if queue._queue_processor_task is None or queue._queue_processor_task.done():
-            queue._queue_processor_task = asyncio.create_task(queue._process_queue())
-            print("[STARTUP] Analysis queue processor started")
-    except ImportError:
-        print("[STARTUP] Analysis queue not available")
+    # Apply cache invalidations published by the other server processes
+    async def invalidation_poll_loop():
+        print(f"[STARTUP] Polling shared cache invalidations every {CACHE_INVALIDATION_POLL_SECONDS}s ({_invalidation_log.path})")
+        while True:
+            try:
+                await asyncio.sleep(CACHE_INVALIDATION_POLL_SECONDS)
+                for scope in await asyncio.to_thread(_invalidation_log.poll):
+                    _apply_invalidation(scope)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"[CACHE] Error polling invalidations: {e}")
+
+    if _invalidation_log is not None:
+        _invalidation_poll_task = asyncio.create_task(invalidation_poll_loop())
+
+    # Replay LLM requests that were throttled or failed (persistent retry queue);
+    # replays only use scheduler slots no chat or comment request is waiting for
+    def replay_llm_retries() -> int:
+        # Importing the generator module registers the comment replay handler
+        from . import ai_comment_generator  # noqa: F401
+        return process_pending_retries()
+
+    async def llm_retry_loop():
+        while True:
+            try:
+                await asyncio.sleep(LLM_RETRY_INTERVAL_SECONDS)
+                replayed = await asyncio.to_thread(replay_llm_retries)
+                if replayed:
+                    print(f"[LLM_RETRY] Replayed {replayed} queued LLM requests")
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"[LLM_RETRY] Error replaying queued LLM requests: {e}")
+
+    _llm_retry_task = asyncio.create_task(llm_retry_loop())
+
+    # Initialize the analysis queue (if using queue system); behind the gateway
+    # only the engine group runs jobs
+    if _serves_group('engine'):
+        try:
+            from .analysis_queue import get_analysis_queue
+            queue = get_analysis_queue()
+            if queue._queue_processor_task is None or queue._queue_processor_task.done():
+                queue._queue_processor_task = asyncio.create_task(queue._process_queue())
+                print("[STARTUP] Analysis queue processor started")
+            # Resume jobs that were queued or running when the server last stopped,
+            # or whose owner stopped renewing their lease; jobs of live nodes are left alone
+            await queue.recover_jobs()
+            queue.start_lease_maintenance()
+        except ImportError:
+            print("[STARTUP] Analysis queue not available")
+
+    # Start batched usage flushing (applies usage recovered from the journal first)
+    if usage_tracker and usage_tracker.ledger:
+        await usage_tracker.start()
+        print(f"[STARTUP] [OK] Usage ledger flushing every {usage_tracker.ledger.flush_interval}s")
 
     # Verify Stripe configuration
     stripe_key = os.getenv('STRIPE_SECRET_KEY')
@@ -635,12 +836,40 @@ async def lifespan(app: FastAPI):
             pass
         print("[SHUTDOWN] Cache cleanup task stopped")
 
+    for task in (_invalidation_poll_task, _llm_retry_task):
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
     # Stop memory monitor
     if _memory_monitor_instance:
         print("[SHUTDOWN] Stopping memory monitor...")
         await stop_memory_monitor()
         print("[SHUTDOWN] Memory monitor stopped")
 
+    # Stop the worker pool shared by analysis jobs
+    if _serves_group('engine'):
+        try:
+            from .analysis_queue import get_analysis_queue
+            queue = get_analysis_queue()
+            queue.scheduler.shutdown()
+            await queue.release_leases()
+            print("[SHUTDOWN] Analysis worker pool stopped")
+        except Exception as e:
+            print(f"[SHUTDOWN] Could not stop analysis worker pool: {e}")
+
+    # Flush usage recorded since the last batch
+    if usage_tracker and usage_tracker.ledger:
+        print("[SHUTDOWN] Flushing usage ledger...")
+        try:
+            await usage_tracker.stop()
+            print(f"[SHUTDOWN] Usage ledger flushed: {usage_tracker.ledger.stats()}")
+        except Exception as e:
+            print(f"[SHUTDOWN] Could not flush usage ledger (kept in journal): {e}")
+
     # Close engine pool
     if _engine_pool_instance:
         print("[SHUTDOWN] Closing engine pool...")
@@ -657,7 +886,6 @@ async def lifespan(app: FastAPI):
     # Clear all caches
     print("[SHUTDOWN] Clearing all caches...")
     cache_results = {}
-    cache_results['user_rate_limits'] = user_rate_limits.clear()
     cache_results['import_progress'] = large_import_progress.clear()
     cache_results['import_cancel_flags'] = large_import_cancel_flags.clear()
     total_cleared = sum(cache_results.values())
@@ -694,6 +922,52 @@ async def rate_limit_exception_handler(request: Request, exc: RateLimitError):
 # Add global exception handler
 app.add_exception_handler(Exception, global_exception_handler)
 
+# Request rate limiting (GCRA, state shared by all workers on the node)
+rate_limiter = get_rate_limiter()
+
+# Per-route burst protection, checked before routing (requests per minute per user or IP)
+ROUTE_RATE_LIMITS_ENABLED = os.getenv("ROUTE_RATE_LIMITS_ENABLED", "true").lower() == "true"
+ROUTE_RATE_LIMITS = [
+    RouteRateLimit(r"^/api/v1/analyze-position-quick$",
+                   RateLimitPolicy("route_quick_analysis", int(os.getenv("QUICK_ANALYSIS_RATE_LIMIT", "60")))),
+    RouteRateLimit(r"^/api/v1/coach/play-move$",
+                   RateLimitPolicy("route_play_move", int(os.getenv("PLAY_MOVE_RATE_LIMIT", "120")))),
+    RouteRateLimit(r"^/api/v1/coach/chat$",
+                   RateLimitPolicy("route_coach_chat", int(os.getenv("COACH_CHAT_BURST_LIMIT", "10")))),
+    RouteRateLimit(r"^/api/v1/(validate-user|check-user-exists)$",
+                   RateLimitPolicy("route_user_lookup", int(os.getenv("USER_LOOKUP_RATE_LIMIT", "30")))),
+]
+
+
+def _rate_limit_identity(scope: dict) -> str:
+    """Verified token subject of a request, or its client IP if it has no valid token."""
+    for name, value in scope.get("headers", []):
+        if name == b"authorization" and value[:7].lower() == b"bearer ":
+            try:
+                payload = jose_jwt.decode(
+                    value[7:].decode("latin-1"),
+                    JWT_SECRET,
+                    algorithms=["HS256"],
+                    options={"verify_aud": False, "verify_iss": False},
+                )
+                if payload.get("sub"):
+                    return f"user:{payload['sub']}"
+            except Exception:
+                pass
+            break
+    return f"ip:{get_client_ip(Request(scope))}"
+
+
+# Compress large JSON bodies (game lists, moves_analysis arrays). Cached analytics
+# responses arrive pre-compressed and pass through untouched.
+RESPONSE_GZIP_ENABLED = os.getenv('RESPONSE_GZIP_ENABLED', 'true').lower() == 'true'
+if RESPONSE_GZIP_ENABLED:
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_BYTES, compresslevel=6)
+
+# Added before CORS so rejected requests still carry CORS headers
+if ROUTE_RATE_LIMITS_ENABLED:
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter, routes=ROUTE_RATE_LIMITS, identify=_rate_limit_identity)
+
 # CORS middleware with secure configuration
 # allow_origin_regex enables Vercel preview/staging deployments (*.vercel.app)
 app.add_middleware(
@@ -706,6 +980,12 @@ app.add_middleware(
     max_age=cors_config.max_age,
 )
 
+# Optional request trace recording for offline load replay (scripts/loadtest)
+_request_trace_file = trace_file_from_env()
+if _request_trace_file:
+    app.add_middleware(RequestTraceMiddleware, path=_request_trace_file)
+    print(f"[TRACE] Recording requests to {_request_trace_file}")
+
 # Global analysis engine instance
 analysis_engine = None
 
@@ -731,25 +1011,19 @@ ANALYSIS_TEST_LIMIT = int(os.getenv("ANALYSIS_TEST_LIMIT", "5"))
 ANALYSIS_RATE_LIMIT = int(os.getenv("ANALYSIS_RATE_LIMIT", "5"))  # requests per minute
 IMPORT_RATE_LIMIT = int(os.getenv("IMPORT_RATE_LIMIT", "3"))      # requests per minute
 
-# Track timestamps of requests by user for rate limiting
-# Use TTLDict with 5-minute TTL for automatic cleanup
-user_rate_limits = TTLDict(ttl=300, name="user_rate_limits")
-register_cache(user_rate_limits)
-
-# Helper for rate limiting
-def _enforce_rate_limit(user_key: str, limit: int, window_seconds: int = 60) -> None:
-    now = time.time()
-    requests = user_rate_limits.get(user_key, [])
+@lru_cache(maxsize=64)
+def _burst_policy(name: str, limit: int, window_seconds: int) -> RateLimitPolicy:
+    return RateLimitPolicy(name, limit, window_seconds)
 
-    # Remove timestamps outside the window
-    requests = [ts for ts in requests if now - ts < window_seconds]
 
-    if len(requests) >= limit:
+# Helper for rate limiting
+async def _enforce_rate_limit(user_key: str, limit: int, window_seconds: int = 60) -> None:
+    """Count a request against limit per window_seconds; the key prefix names the policy."""
+    name, _, subject = user_key.partition(":")
+    decision = await rate_limiter.ahit(subject, _burst_policy(name, limit, window_seconds))
+    if not decision.allowed:
         raise RateLimitError("Rate limit exceeded. Please wait before retrying.")
 
-    requests.append(now)
-    user_rate_limits.set(user_key, requests)
-
 # Track import progress for large imports
 # Use LRU cache with 500 max entries, 1-hour TTL
 large_import_progress = LRUCache(maxsize=500, ttl=3600, name="import_progress")
@@ -762,15 +1036,28 @@ def get_import_progress(key: str) -> dict:
     """Get import progress for a key, returning empty dict if not found."""
     return large_import_progress.get(key, {})
 
+def _publish_import_progress(key: str, progress: dict) -> dict:
+    """Push import progress to SSE subscribers; returns it with throughput/ETA added."""
+    try:
+        return get_progress_broker().publish(
+            import_topic(key), "import", progress,
+            completed=progress.get("imported_games"),
+            total=progress.get("total_to_import"),
+            stage=progress.get("status")
+        )
+    except Exception as e:
+        print(f"[PROGRESS] Could not publish import progress for {key}: {e}")
+        return progress
+
 def update_import_progress(key: str, updates: dict) -> None:
     """Update import progress by merging updates into existing progress."""
     current = get_import_progress(key)
     current.update(updates)
-    large_import_progress.set(key, current)
+    large_import_progress.set(key, _publish_import_progress(key, current))
 
 def set_import_progress(key: str, progress: dict) -> None:
     """Set import progress directly."""
-    large_import_progress.set(key, progress)
+    large_import_progress.set(key, _publish_import_progress(key, progress))
 
 def delete_import_progress(key: str) -> None:
     """Delete import progress."""
@@ -822,6 +1109,32 @@ async def get_http_client():
         )
     return _shared_http_client
 
+# Upstream response cache freshness in seconds (see core/upstream_cache.py).
+# Stale entries are revalidated with conditional GETs; completed Chess.com
+# month archives never expire.
+CHESSCOM_CURRENT_ARCHIVE_TTL = int(os.getenv("CHESSCOM_CURRENT_ARCHIVE_TTL", "120"))
+CHESSCOM_PROFILE_TTL = int(os.getenv("CHESSCOM_PROFILE_TTL", "300"))
+LICHESS_RECENT_GAMES_TTL = int(os.getenv("LICHESS_RECENT_GAMES_TTL", "60"))
+LICHESS_HISTORY_TTL = int(os.getenv("LICHESS_HISTORY_TTL", "86400"))
+LICHESS_GAME_EXPORT_TTL = int(os.getenv("LICHESS_GAME_EXPORT_TTL", "86400"))
+
+# Chess.com API requires User-Agent header per their API guidelines
+CHESSCOM_HEADERS = {
+    'User-Agent': 'ChessAnalytics/1.0 (Contact: your-email@example.com)'
+}
+
+
+async def _get_chesscom_archive(session, user_id: str, year: int, month: int):
+    """One Chess.com monthly archive through the upstream cache."""
+    url = f"{CHESSCOM_API_BASE_URL}/pub/player/{user_id}/games/{year}/{month:02d}"
+    return await cached_get(
+        session, url,
+        headers=CHESSCOM_HEADERS,
+        ttl=CHESSCOM_CURRENT_ARCHIVE_TTL,
+        immutable=chesscom_archive_is_complete(year, month),
+        platform="chess.com",
+    )
+
 # ============================================================================
 # HELPER CLASSES
 # ============================================================================
@@ -1263,21 +1576,31 @@ async def diagnostic_data_check(user_id: str, platform: str):
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint with AI status."""
-    engine = get_analysis_engine()
-    stockfish_available = engine.stockfish_path is not None
+    """Health check endpoint with AI status.
+
+    Reports status without initializing the analysis engine or the AI
+    generator, so probes against a cold instance return immediately.
+    """
+    if analysis_engine is not None:
+        stockfish_available = analysis_engine.stockfish_path is not None
+    else:
+        stockfish_available = bool(config.stockfish.path)
 
     # Check AI generation status
     ai_status = {
         "available": False,
         "enabled": False,
         "model": None,
-        "error": None
+        "error": None,
+        "initialized": _ai_generator is not None
     }
 
     try:
-        ai_check = _get_ai_generator()
-        ai_status["available"] = True
+        ai_check = _ai_generator
+        if ai_check is None:
+            ai_status.update(_ai_config_status())
+        else:
+            ai_status["available"] = True
         if ai_check and ai_check.enabled:
             ai_status["enabled"] = True
             ai_status["model"] = ai_check.config.ai_model if hasattr(ai_check, 'config') else 'unknown'
@@ -1293,6 +1616,7 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "unified-chess-analysis-api",
+        "service_group": SERVICE_GROUP,
         "version": "3.0.0",
         "stockfish_available": stockfish_available,
         "analysis_types": ["stockfish", "deep"],
@@ -1327,6 +1651,8 @@ async def get_memory_metrics():
             "memory": memory_stats,
             "caches": cache_stats,
             "engine_pool": engine_stats,
+            "admission": get_admission_controller().get_stats(),
+            "hot_path_logging": hot_log.stats(),
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
@@ -1337,6 +1663,83 @@ async def get_memory_metrics():
         }
 
 
+_metrics = get_metrics_registry()
+_cache_entries = _metrics.gauge("cache_entries", "Entries held by each registered cache", ["cache"])
+_cache_capacity = _metrics.gauge("cache_capacity", "Maximum entries of each LRU cache", ["cache"])
+_cache_hits = _metrics.counter("cache_hits_total", "Cache hits of each LRU cache", ["cache"])
+_cache_misses = _metrics.counter("cache_misses_total", "Cache misses of each LRU cache", ["cache"])
+_pool_engines = _metrics.gauge("engine_pool_engines", "Stockfish engines per pool by state", ["pool", "state"])
+_pool_max_size = _metrics.gauge("engine_pool_max_size", "Engine pool size limit", ["pool"])
+_queue_depth = _metrics.gauge("analysis_queue_depth", "Jobs waiting in the analysis queue")
+_queue_jobs = _metrics.gauge("analysis_queue_jobs", "Tracked batch analysis jobs by status", ["status"])
+_circuit_open = _metrics.gauge("upstream_circuit_open", "Whether the upstream circuit breaker is open", ["platform"])
+_rate_tokens = _metrics.gauge("upstream_rate_limit_tokens", "Tokens left in the upstream rate limiter", ["platform"])
+_upstream_rate = _metrics.gauge("upstream_request_rate", "Request rate allowed by the upstream governor (req/s)", ["platform"])
+_process_memory = _metrics.gauge("process_memory_bytes", "Resident memory of this process")
+_memory_percent = _metrics.gauge("system_memory_percent", "System memory in use")
+_admission_usage = _metrics.gauge("admission_memory_usage_ratio", "Memory used as a fraction of the admission budget")
+
+
+def _collect_component_metrics() -> None:
+    """Mirror component stats (caches, pools, queue, API client, memory) into the registry."""
+    for cache in get_all_cache_stats():
+        _cache_entries.labels(cache=cache["name"]).set(cache["size"])
+        if "hits" in cache:
+            _cache_capacity.labels(cache=cache["name"]).set(cache["maxsize"])
+            _cache_hits.set_total(cache["hits"], cache=cache["name"])
+            _cache_misses.set_total(cache["misses"], cache=cache["name"])
+
+    pools = {}
+    if _engine_pool_instance:
+        pools["async"] = _engine_pool_instance.stats()
+    if analysis_engine is not None:
+        for name, pool in (("analysis", analysis_engine._sync_engine_pool), ("probe", analysis_engine._probe_engine_pool)):
+            if pool is not None:
+                pools[name] = pool.stats()
+    for name, stats in pools.items():
+        _pool_engines.labels(pool=name, state="in_use").set(stats["in_use"])
+        _pool_engines.labels(pool=name, state="idle").set(stats["pool_size"] - stats["in_use"])
+        _pool_max_size.labels(pool=name).set(stats["max_size"])
+
+    # Only the engine group runs the analysis queue; the gateway merges its metrics
+    if _serves_group('engine'):
+        from .analysis_queue import get_analysis_queue
+        queue_stats = get_analysis_queue().get_queue_stats()
+        _queue_depth.set(queue_stats["queue_size"])
+        for status in ("pending", "running", "completed", "failed"):
+            _queue_jobs.labels(status=status).set(queue_stats[f"{status}_jobs"])
+
+    api_client = get_resilient_api_client()
+    for platform, circuit, limiter in (
+        ("lichess", api_client.lichess_circuit, api_client.lichess_limiter),
+        ("chess.com", api_client.chesscom_circuit, api_client.chesscom_limiter),
+    ):
+        _circuit_open.labels(platform=platform).set(1 if circuit.state.value == "open" else 0)
+        _rate_tokens.labels(platform=platform).set(limiter.tokens)
+        _upstream_rate.labels(platform=platform).set(limiter.rate)
+
+    if _memory_monitor_instance:
+        current = _memory_monitor_instance.get_stats()["current"]
+        _process_memory.set(current["process_mb"] * 1024 * 1024)
+        _memory_percent.set(current["percent"])
+    _admission_usage.set(get_admission_controller().get_stats()["usage_ratio"])
+
+
+_metrics.register_collector(_collect_component_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    """
+    Metrics in Prometheus text exposition format.
+
+    Covers cache hit rates, engine pool sizes and acquire waits, queue depth
+    and job durations, upstream API outcomes and latency, and memory.
+    """
+    text = await asyncio.to_thread(_metrics.render)
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 async def verify_admin(token_data: Annotated[dict, Depends(verify_token)]) -> dict:
     """Verify the authenticated user's email is in app_admins. Returns the JWT payload."""
     email = (token_data.get("email") or "").strip().lower()
@@ -1356,6 +1759,22 @@ async def verify_admin(token_data: Annotated[dict, Depends(verify_token)]) -> di
     return token_data
 
 
+@app.get("/api/v1/metrics/stages")
+async def get_stage_metrics_endpoint(_admin: Annotated[dict, Depends(verify_admin)], slowest: int = 10):
+    """
+    Admin-only per-stage timing histograms for game analysis.
+
+    Shows whether slow games were engine-bound (search_before/search_after),
+    pool-starved (engine_acquire) or coaching-bound (coaching), plus position
+    cache hits by depth-fallback tier and the slowest recent games.
+    """
+    return {
+        "success": True,
+        "stages": get_stage_metrics().snapshot(slowest=max(0, min(slowest, 50))),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
 @app.get("/api/v1/admin/check")
 async def admin_check(token_data: Annotated[dict, Depends(verify_token)]):
     """Lightweight check: is the current user an admin? Returns {is_admin: bool}."""
@@ -1477,23 +1896,27 @@ async def admin_overview(_admin: Annotated[dict, Depends(verify_admin)]):
         overview["errors"].append(f"activity: {e}")
 
     # --- Queue ---
-    try:
-        from .analysis_queue import get_analysis_queue
-        queue = get_analysis_queue()
-        overview["queue"] = queue.get_queue_stats()
-    except Exception as e:
-        overview["errors"].append(f"queue: {e}")
+    if not _serves_group('engine'):
+        # Another process runs the queue; a local one would only report zeros
+        overview["queue"] = {"served_by_group": "engine"}
+    else:
+        try:
+            from .analysis_queue import get_analysis_queue
+            queue = get_analysis_queue()
+            overview["queue"] = queue.get_queue_stats()
+        except Exception as e:
+            overview["errors"].append(f"queue: {e}")
 
     # --- System (Stockfish + AI + caches + engine pool + memory) ---
     try:
-        engine = get_analysis_engine()
+        engine = await _analysis_engine_ready()
         stockfish_available = engine.stockfish_path is not None
     except Exception:
         stockfish_available = False
 
     ai_status = {"available": False, "enabled": False, "model": None}
     try:
-        ai_check = _get_ai_generator()
+        ai_check = await _ai_generator_ready()
         if ai_check:
             ai_status["available"] = True
             ai_status["enabled"] = bool(getattr(ai_check, 'enabled', False))
@@ -1908,13 +2331,12 @@ async def analyze_position_quick(request: QuickPositionAnalysisRequest):
     import chess.engine
     from concurrent.futures import ThreadPoolExecutor
 
-    def _analyze_position(fen: str, depth: int):
+    def _analyze_position(fen: str, depth: int, pool):
         """Synchronous analysis function to run in thread pool."""
         try:
             # Validate FEN
             board = chess.Board(fen)
 
-            pool = _get_sync_engine_pool()
             if not pool:
                 raise ValueError("Stockfish not available")
 
@@ -1993,9 +2415,10 @@ async def analyze_position_quick(request: QuickPositionAnalysisRequest):
 
     try:
         # Run synchronous analysis in thread pool
+        pool = await _sync_engine_pool_ready()
         loop = asyncio.get_event_loop()
         with ThreadPoolExecutor(max_workers=1) as executor:
-            result = await loop.run_in_executor(executor, _analyze_position, request.fen, request.depth)
+            result = await loop.run_in_executor(executor, _analyze_position, request.fen, request.depth, pool)
 
         return QuickPositionAnalysisResponse(**result)
 
@@ -2015,6 +2438,8 @@ async def unified_analyze(
     background_tasks: BackgroundTasks,
     # Optional parallel analysis flag
     use_parallel: bool = True,
+    # Stream per-move results as NDJSON (single game analysis with PGN only)
+    stream: bool = False,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
 ):
     """
@@ -2025,10 +2450,14 @@ async def unified_analyze(
     - /analyze-position (position analysis)
     - /analyze-move (move analysis)
     - /analyze-game (single game analysis)
+
+    With stream=true, PGN analysis responds with newline-delimited JSON records
+    (moves, game metrics, save status, AI comments) as they are produced.
     """
     try:
         # Check usage limits for authenticated users
         auth_user_id = None
+        account_tier = None
         try:
             if credentials:
                 token_data = await verify_token(credentials)
@@ -2043,6 +2472,7 @@ async def unified_analyze(
                                 status_code=429,
                                 detail=f"Analysis limit reached. {stats.get('message', 'Please upgrade or wait for limit reset.')}"
                             )
+                        account_tier = stats.get('account_tier')
                     except HTTPException:
                         raise  # Re-raise HTTP exceptions (429 limit errors)
                     except Exception as e:
@@ -2076,7 +2506,7 @@ async def unified_analyze(
         # Premium users are not rate limited since they already passed check_analysis_limit
         if not auth_user_id:
             user_key = f"analysis:{request.user_id}:{request.platform}"
-            _enforce_rate_limit(user_key, ANALYSIS_RATE_LIMIT)
+            await _enforce_rate_limit(user_key, ANALYSIS_RATE_LIMIT)
 
         # Normalize and validate analysis type
         original_type = request.analysis_type
@@ -2095,6 +2525,18 @@ async def unified_analyze(
         # Determine analysis type based on provided parameters
         if request.pgn:
             # Single game analysis with PGN
+            if stream:
+                client_ip = get_client_ip(http_request)
+
+                async def record_usage() -> None:
+                    if auth_user_id and usage_tracker:
+                        await usage_tracker.increment_usage(auth_user_id, 'analyze', count=1)
+                    elif usage_tracker:
+                        await usage_tracker.increment_anonymous_usage(client_ip, 'analyze', count=1)
+
+                # Usage is recorded by the stream once the analysis is saved, so a
+                # stream that fails before then is not counted
+                return await _stream_single_game_analysis(request, on_complete=record_usage)
             result = await _handle_single_game_analysis(request)
             # Increment usage
             if auth_user_id and usage_tracker:
@@ -2136,7 +2578,7 @@ async def unified_analyze(
             # Batch analysis - use the unified handler
             # NOTE: Usage tracking for batch analysis is handled in the queue completion handler
             # since batch analysis is async and the count is determined when it completes
-            return await _handle_batch_analysis(request, background_tasks, use_parallel, auth_user_id)
+            return await _handle_batch_analysis(request, background_tasks, use_parallel, auth_user_id, account_tier)
 
     except RateLimitError as e:
         # Re-raise rate limit errors with proper 429 status
@@ -2389,6 +2831,7 @@ async def get_analysis_stats(
 async def get_game_analyses(
     user_id: str,
     platform: str,
+    request: Request,
     analysis_type: str = Query("stockfish"),
     limit: int = Query(100, ge=1, le=1000, description="Number of analyses to return (1-1000)"),
     offset: int = Query(0, ge=0, description="Number of analyses to skip"),
@@ -2403,9 +2846,9 @@ async def get_game_analyses(
         # Check cache first (only cache offset=0 to avoid too many cache entries)
         if offset == 0:
             cache_key = f"game_analyses:{canonical_user_id}:{platform}:{analysis_type}:{limit}"
-            cached_data = _get_from_cache(cache_key)
-            if cached_data is not None:
-                return cached_data
+            cached_response = _get_cached_response(cache_key, request)
+            if cached_response is not None:
+                return cached_response
 
         if DEBUG:
             print(f"[DEBUG] get_game_analyses called with user_id={user_id}, platform={platform}, analysis_type={analysis_type}, limit={limit}, offset={offset}")
@@ -2485,7 +2928,7 @@ async def get_game_analyses(
         if offset == 0:
             _set_in_cache(cache_key, cleaned_data)
 
-        return cleaned_data
+        return FastJSONResponse(content=cleaned_data)
 
     except Exception as e:
         print(f"Error fetching game analyses: {e}")
@@ -2687,13 +3130,8 @@ async def get_realtime_analysis_progress(
         # Use canonical user ID for consistency
         platform_key = platform.strip().lower()
         progress_key = f"{canonical_user_id}_{platform_key}"
-        print(f"[PROGRESS REQUEST] user_id={user_id}, platform={platform}")
-        print(f"[PROGRESS REQUEST] canonical_user_id={canonical_user_id}, platform_key={platform_key}")
-        print(f"[PROGRESS REQUEST] Looking for progress_key: {progress_key}")
-        print(f"[PROGRESS REQUEST] Available progress keys: {list(analysis_progress.keys())}")
-        if analysis_progress:
-            for key, value in analysis_progress.items():
-                print(f"[PROGRESS REQUEST]   Key '{key}': {value}")
+        hot_log.debug("PROGRESS REQUEST", "Looking for progress_key: %s", progress_key, user_id=user_id, platform=platform)
+        hot_log.debug("PROGRESS REQUEST", lambda: f"Available progress keys: {list(analysis_progress.keys())}")
 
         # Try multiple key formats to find progress
         progress_data = None
@@ -2704,14 +3142,13 @@ async def get_realtime_analysis_progress(
             f"{user_id}_{platform_key}",
         ]
 
-        print(f"[PROGRESS REQUEST] Trying keys: {possible_keys}")
+        hot_log.debug("PROGRESS REQUEST", lambda: f"Trying keys: {possible_keys}")
         for candidate_suffix in possible_keys:
             for key, value in analysis_progress.items():
                 if key.endswith(candidate_suffix):
                     stored_key = key
                     progress_data = value
-                    print(f"[PROGRESS REQUEST] Found progress with key: {key}")
-                    print(f"[PROGRESS REQUEST] Progress data: {progress_data}")
+                    hot_log.debug("PROGRESS REQUEST", lambda: f"Found progress with key: {key}: {progress_data}")
                     break
             if progress_data:
                 break
@@ -2751,6 +3188,47 @@ async def get_realtime_analysis_progress(
             estimated_time_remaining=None
         )
 
+_SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Disable proxy buffering so events arrive immediately
+    # GZipMiddleware skips responses that already carry an encoding; compressing
+    # would hold small records in the compressor buffer (NDJSON is not excluded)
+    "Content-Encoding": "identity",
+}
+
+@app.get("/api/v1/progress-stream/{user_id}/{platform}")
+async def stream_progress(
+    user_id: str,
+    platform: str,
+    request: Request,
+    # Optional authentication
+    _: Optional[bool] = get_optional_auth()
+):
+    """
+    Server-sent events for a user's analysis and import progress.
+
+    Replaces polling progress-realtime and import-progress. Events:
+    progress, game (one per finished game), completed, failed, import.
+    Progress payloads include throughput_per_minute and estimated_time_remaining.
+    """
+    canonical_user_id = _canonical_user_id(user_id, platform)
+    progress_key = f"{canonical_user_id}_{platform.strip().lower()}"
+    topics = [analysis_topic(progress_key), import_topic(progress_key)]
+    return StreamingResponse(
+        sse_stream(get_progress_broker(), topics, request.is_disconnected),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS
+    )
+
+@app.get("/api/v1/job-stream/{job_id}")
+async def stream_job_progress(job_id: str, request: Request):
+    """Server-sent events for one analysis job; the stream ends when the job finishes."""
+    return StreamingResponse(
+        sse_stream(get_progress_broker(), [job_topic(job_id)], request.is_disconnected, close_on=TERMINAL_JOB_EVENTS),
+        media_type="text/event-stream",
+        headers=_SSE_HEADERS
+    )
+
 @app.get("/api/v1/elo-stats/{user_id}/{platform}")
 async def get_elo_stats(
     user_id: str,
@@ -3381,6 +3859,7 @@ async def _fetch_remaining_games(
 async def get_comprehensive_analytics(
     user_id: str,
     platform: str,
+    request: Request,
     limit: int = Query(500, ge=1, le=10000, description="Number of games to analyze"),
     background_tasks: BackgroundTasks = BackgroundTasks(),
     # Optional authentication
@@ -3403,9 +3882,9 @@ async def get_comprehensive_analytics(
 
         # Check cache first (v3: SQL aggregation version)
         cache_key = f"comprehensive_analytics_v3:{canonical_user_id}:{platform}"
-        cached_data = _get_from_cache(cache_key)
-        if cached_data is not None:
-            return cached_data
+        cached_response = _get_cached_response(cache_key, request)
+        if cached_response is not None:
+            return cached_response
 
         db_client = supabase_service or supabase
         if not db_client:
@@ -4054,11 +4533,59 @@ async def get_match_history(
         print(f"Error fetching match history: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Coaching generated on first view of batch-analyzed games. Kept in memory so
+# repeat views are served even if the write-back to move_analyses fails.
+_coaching_enrichment_cache = LRUCache(maxsize=200, ttl=3600, name="coaching_enrichment")
+register_cache(_coaching_enrichment_cache)
+_coaching_enrichment_tasks: Dict[str, asyncio.Task] = {}
+
+
+async def _enrich_deferred_coaching(
+    moves_analysis: List[Dict[str, Any]],
+    canonical_user_id: str,
+    platform: str,
+    game_id: str,
+    persist: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Fill in coaching fields that batch analysis deferred (coaching_pending moves).
+
+    Concurrent first views of the same game share one enrichment; the result is
+    written back to move_analyses so it is only generated once.
+    """
+    cache_key = f"{canonical_user_id}:{platform}:{game_id}"
+    cached = _coaching_enrichment_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    async def enrich() -> List[Dict[str, Any]]:
+        moves = [dict(move) if isinstance(move, dict) else move for move in moves_analysis]
+        engine = await _analysis_engine_ready()
+        started = time.time()
+        enriched = await asyncio.to_thread(
+            engine.enrich_coaching, [move for move in moves if isinstance(move, dict)]
+        )
+        print(f"[COACHING] Enriched {enriched} deferred moves for game {game_id} in {time.time() - started:.2f}s")
+        _coaching_enrichment_cache.set(cache_key, moves)
+        if enriched and persist:
+            await _update_all_move_comments_in_db(game_id, canonical_user_id, platform, moves)
+        return moves
+
+    task = _coaching_enrichment_tasks.get(cache_key)
+    if task is None:
+        task = asyncio.create_task(enrich())
+        _coaching_enrichment_tasks[cache_key] = task
+        task.add_done_callback(lambda _: _coaching_enrichment_tasks.pop(cache_key, None))
+    # Shielded so a client disconnect does not cancel the enrichment for other viewers
+    return await asyncio.shield(task)
+
+
 @app.get("/api/v1/game/{user_id}/{platform}/{game_id}")
 async def get_single_game(
     user_id: str,
     platform: str,
     game_id: str,
+    request: Request,
     # Optional authentication
     _: Optional[bool] = get_optional_auth()
 ):
@@ -4127,6 +4654,7 @@ async def get_single_game(
         # Fetch analysis - use limit(1) instead of maybe_single() to avoid 204 errors
         # Try move_analyses table first (where analyses are actually saved)
         analysis_data = None
+        analysis_source = None
         try:
             # First try move_analyses table (primary storage)
             analysis_response = await asyncio.to_thread(
@@ -4140,6 +4668,7 @@ async def get_single_game(
             )
             if analysis_response.data and len(analysis_response.data) > 0:
                 analysis_data = analysis_response.data[0]
+                analysis_source = 'move_analyses'
             else:
                 # Fallback to unified_analyses table for backwards compatibility
                 analysis_response = await asyncio.to_thread(
@@ -4158,17 +4687,32 @@ async def get_single_game(
             print(f"Analysis not found for game {game_identifier}: {analysis_error}")
             analysis_data = None
 
+        # Batch analyses defer coaching text; generate it on first view
+        if analysis_data and any(
+            isinstance(move, dict) and move.get('coaching_pending')
+            for move in analysis_data.get('moves_analysis') or []
+        ):
+            analysis_data['moves_analysis'] = await _enrich_deferred_coaching(
+                analysis_data['moves_analysis'],
+                canonical_user_id,
+                platform,
+                game_identifier,
+                persist=analysis_source == 'move_analyses'
+            )
+
         # Extract ai_comments_status from analysis_data if available
         ai_comments_status = None
         if analysis_data:
             ai_comments_status = analysis_data.get('ai_comments_status', 'pending')
 
-        return {
+        # Full moves_analysis arrays make this one of the largest responses;
+        # encode it directly instead of walking it with jsonable_encoder
+        return EncodedJSONResponse.from_payload(EncodedPayload({
             'game': game,
             'pgn': pgn_data,
             'analysis': analysis_data,
             'ai_comments_status': ai_comments_status or 'pending'
-        }
+        }), request)
 
     except HTTPException:
         raise
@@ -4223,6 +4767,7 @@ async def clear_user_cache(
             _delete_from_cache(key)
             if DEBUG:
                 print(f"[INFO] Cleared cache key: {key}")
+        _publish_invalidation(canonical_user_id, platform)
         return ClearCacheResponse(
             success=True,
             message=f"Cache cleared for user {user_id} on {platform}",
@@ -4237,6 +4782,7 @@ async def clear_user_cache(
 async def get_deep_analysis(
     user_id: str,
     platform: str,
+    request: Request,
     force_refresh: bool = Query(False, description="Force refresh bypassing cache"),
     # Optional authentication
     _: Optional[bool] = get_optional_auth()
@@ -4252,11 +4798,11 @@ async def get_deep_analysis(
         # Check cache first (unless force_refresh is True)
         cache_key = f"deep_analysis:{canonical_user_id}:{platform}"
         if not force_refresh:
-            cached_data = _get_from_cache(cache_key)
-            if cached_data is not None:
+            cached_response = _get_cached_response(cache_key, request)
+            if cached_response is not None:
                 if DEBUG:
                     print(f"[INFO] Returning cached deep analysis data")
-                return cached_data
+                return cached_response
         else:
             if DEBUG:
                 print(f"[INFO] Force refresh requested, bypassing cache")
@@ -4384,7 +4930,12 @@ async def get_deep_analysis(
             result = _build_fallback_deep_analysis(canonical_user_id, games, profile, analyzed_games_count)
         else:
             print(f"[INFO] Building deep analysis from {len(analyses)} analysis records")
-            result = _build_deep_analysis_response(canonical_user_id, games, analyses, profile, all_games_for_repertoire, analyzed_games_count)
+            ai_generator = await _ai_generator_ready()  # Used by the style analysis
+            # Off the event loop: the style analysis waits for an LLM scheduler slot
+            result = await asyncio.to_thread(
+                _build_deep_analysis_response,
+                canonical_user_id, games, analyses, profile, all_games_for_repertoire, analyzed_games_count, ai_generator
+            )
 
         # Cache the result before returning (15 minute TTL via CACHE_TTL_SECONDS)
         _set_in_cache(cache_key, result)
@@ -5295,18 +5846,17 @@ def _generate_ai_style_analysis(
     player_level: str,
     total_games: int,
     average_accuracy: float,
-    phase_accuracies: Dict[str, float]
+    phase_accuracies: Dict[str, float],
+    ai_generator=None
 ) -> Dict[str, str]:
     """Generate personalized, data-driven style analysis with specific insights.
 
-    First tries AI generation if available, then falls back to template-based generation.
+    First tries AI generation with the generator the request handler resolved
+    (_ai_generator_ready()), then falls back to template-based generation.
     """
 
     # Try AI generation first
     try:
-        logger.info("[STYLE ANALYSIS] Initializing AI generator...")
-        ai_generator = _get_ai_generator()
-
         if ai_generator and ai_generator.enabled:
             logger.info("[STYLE ANALYSIS] ✅ AI generator is enabled and ready")
             logger.info(f"[STYLE ANALYSIS] Model: {ai_generator.config.ai_model if hasattr(ai_generator, 'config') else 'unknown'}")
@@ -6526,7 +7076,8 @@ def _build_deep_analysis_response(
     analyses: List[Dict[str, Any]],
     profile: Dict[str, Any],
     all_games_for_repertoire: Optional[List[Dict[str, Any]]] = None,
-    analyzed_games_count: Optional[int] = None
+    analyzed_games_count: Optional[int] = None,
+    ai_generator=None
 ) -> DeepAnalysisData:
     # Use analyzed_games_count if provided (from database), otherwise fall back to unique analyses or games length
     if analyzed_games_count is not None and analyzed_games_count > 0:
@@ -6544,7 +7095,7 @@ def _build_deep_analysis_response(
     strengths, improvements = _summarize_strengths_and_gaps(personality_scores)
     recommendations = _build_recommendations(personality_scores, player_style, strengths, improvements, phase_accuracies, analyses)
     famous_players = _generate_famous_player_comparisons(personality_scores, player_style)
-    ai_style_analysis = _generate_ai_style_analysis(personality_scores, player_style, player_level, total_games, average_accuracy, phase_accuracies)
+    ai_style_analysis = _generate_ai_style_analysis(personality_scores, player_style, player_level, total_games, average_accuracy, phase_accuracies, ai_generator)
 
     # Generate enhanced opening analysis
     enhanced_opening_analysis = None
@@ -6658,10 +7209,6 @@ async def _fetch_chesscom_games(
         games = []
         # Use shared HTTP client with connection pooling
         session = await get_http_client()
-        # Chess.com API requires User-Agent header per their API guidelines
-        headers = {
-            'User-Agent': 'ChessAnalytics/1.0 (Contact: your-email@example.com)'
-        }
         try:
             # Parse date range if provided
             from_year, from_month = None, None
@@ -6724,46 +7271,45 @@ async def _fetch_chesscom_games(
                     break
 
                 month_count += 1
-                url = f"https://api.chess.com/pub/player/{user_id}/games/{current_year}/{current_month:02d}"
-                print(f"[chess.com] Fetching month {month_count}: {current_year}/{current_month:02d} from {url}")
+                print(f"[chess.com] Fetching month {month_count}: {current_year}/{current_month:02d}")
 
                 try:
-                    async with session.get(url, headers=headers) as response:
-                        print(f"[chess.com] Response status: {response.status}")
-                        if response.status == 200:
-                            data = await response.json()
-                            month_games = data.get('games', [])
-                            print(f"[chess.com] Month {current_year}/{current_month:02d}: Found {len(month_games)} games")
-
-                            if len(month_games) > 0:
-                                consecutive_failures = 0  # Reset counter on success
-                            else:
-                                consecutive_failures += 1  # Empty month counts as failure
-
-                            # Reverse to get newest games in month first
-                            month_games.reverse()
-
-                            # Parse each game to extract proper ratings
-                            parsed_count = 0
-                            for game in month_games:
-                                parsed_game = _parse_chesscom_game(game, user_id)
-                                if parsed_game:
-                                    games.append(parsed_game)
-                                    parsed_count += 1
-                                    if len(games) >= limit:
-                                        break
-
-                            print(f"[chess.com] Parsed {parsed_count} games, total so far: {len(games)}")
-                        elif response.status == 404:
-                            print(f"[chess.com] Month {current_year}/{current_month:02d}: No games found (404)")
-                            consecutive_failures += 1
-                        elif response.status == 410:
-                            # 410 Gone - old archives no longer available, should stop
-                            print(f"[chess.com] Month {current_year}/{current_month:02d}: Archive no longer available (410)")
-                            consecutive_failures += 1
+                    response = await _get_chesscom_archive(session, user_id, current_year, current_month)
+                    print(f"[chess.com] Response status: {response.status} ({response.source})")
+                    if response.status == 200:
+                        data = response.json()
+                        month_games = data.get('games', [])
+                        print(f"[chess.com] Month {current_year}/{current_month:02d}: Found {len(month_games)} games")
+
+                        if len(month_games) > 0:
+                            consecutive_failures = 0  # Reset counter on success
                         else:
-                            print(f"[chess.com] Month {current_year}/{current_month:02d}: Unexpected status {response.status}")
-                            consecutive_failures += 1
+                            consecutive_failures += 1  # Empty month counts as failure
+
+                        # Reverse to get newest games in month first
+                        month_games.reverse()
+
+                        # Parse each game to extract proper ratings
+                        parsed_count = 0
+                        for game in month_games:
+                            parsed_game = _parse_chesscom_game(game, user_id)
+                            if parsed_game:
+                                games.append(parsed_game)
+                                parsed_count += 1
+                                if len(games) >= limit:
+                                    break
+
+                        print(f"[chess.com] Parsed {parsed_count} games, total so far: {len(games)}")
+                    elif response.status == 404:
+                        print(f"[chess.com] Month {current_year}/{current_month:02d}: No games found (404)")
+                        consecutive_failures += 1
+                    elif response.status == 410:
+                        # 410 Gone - old archives no longer available, should stop
+                        print(f"[chess.com] Month {current_year}/{current_month:02d}: Archive no longer available (410)")
+                        consecutive_failures += 1
+                    else:
+                        print(f"[chess.com] Month {current_year}/{current_month:02d}: Unexpected status {response.status}")
+                        consecutive_failures += 1
                 except Exception as month_error:
                     print(f"[chess.com] Error fetching month {current_year}/{current_month:02d}: {month_error}")
                     consecutive_failures += 1
@@ -6803,7 +7349,7 @@ async def _fetch_lichess_games(user_id: str, limit: int, until_timestamp: Option
         import json
 
         session = await get_http_client()
-        url = f"https://lichess.org/api/games/user/{user_id}"
+        url = f"{LICHESS_BASE_URL}/api/games/user/{user_id}"
         params = {
             'max': limit,
             'pgnInJson': 'true',  # This makes Lichess return NDJSON format
@@ -6823,71 +7369,80 @@ async def _fetch_lichess_games(user_id: str, limit: int, until_timestamp: Option
         print(f"[lichess] Request URL: {url}")
         print(f"[lichess] Request params: {params}")
 
-        async with session.get(url, params=params, headers={'Accept': 'application/x-ndjson'}) as response:
-            if response.status != 200:
-                print(f"[lichess] API error: {response.status}")
-                response_text = await response.text()
-                print(f"[lichess] Error response: {response_text[:500]}")
-                return []
+        # Games created before an 'until' more than a day ago are finished, so
+        # that page of history only changes if games are deleted
+        history = bool(until_timestamp) and until_timestamp < (time.time() - 86400) * 1000
+        response = await cached_get(
+            session, url,
+            params=params,
+            headers={'Accept': 'application/x-ndjson'},
+            ttl=LICHESS_HISTORY_TTL if history else LICHESS_RECENT_GAMES_TTL,
+            platform="lichess",
+        )
+        if response.status != 200:
+            print(f"[lichess] API error: {response.status}")
+            response_text = response.text()
+            print(f"[lichess] Error response: {response_text[:500]}")
+            return []
 
-            print(f"[lichess] Response status: {response.status}")
-            print(f"[lichess] Response content-type: {response.headers.get('content-type')}")
+        print(f"[lichess] Response status: {response.status} ({response.source})")
+        print(f"[lichess] Response content-type: {response.headers.get('content-type')}")
 
-            games = []
-            # Lichess returns NDJSON (newline-delimited JSON)
-            # Each line is a complete JSON object for one game
-            text = await response.text()
+        games = []
+        # Lichess returns NDJSON (newline-delimited JSON)
+        # Each line is a complete JSON object for one game
+        text = response.text()
 
-            if not text.strip():
-                print(f"[lichess] WARNING: Empty response from Lichess API")
-                return []
+        if not text.strip():
+            print(f"[lichess] WARNING: Empty response from Lichess API")
+            return []
 
-            # Check if response starts with PGN or JSON
-            first_line = text.split('\n')[0].strip() if text else ""
-            print(f"[lichess] First line of response (first 100 chars): {first_line[:100]}")
+        # Check if response starts with PGN or JSON
+        first_line = text.split('\n')[0].strip() if text else ""
+        print(f"[lichess] First line of response (first 100 chars): {first_line[:100]}")
 
-            # Split by newlines and parse each line as JSON
-            lines = text.strip().split('\n')
-            print(f"[lichess] Total lines in response: {len(lines)}")
+        # Split by newlines and parse each line as JSON
+        lines = text.strip().split('\n')
+        print(f"[lichess] Total lines in response: {len(lines)}")
 
-            for line_num, line in enumerate(lines, 1):
-                line = line.strip()
-                if not line:
-                    continue
+        for line_num, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line:
+                continue
 
-                # Skip if this looks like PGN format (starts with '[')
-                if line.startswith('['):
-                    if line_num <= 3:  # Only log first few
-                        print(f"[lichess] WARNING: Line {line_num} looks like PGN, not JSON: {line[:50]}")
-                    continue
+            # Skip if this looks like PGN format (starts with '[')
+            if line.startswith('['):
+                if line_num <= 3:  # Only log first few
+                    print(f"[lichess] WARNING: Line {line_num} looks like PGN, not JSON: {line[:50]}")
+                continue
 
-                try:
-                    game_data = json.loads(line)
-                    games.append(game_data)
-
-                    # Log first game for debugging
-                    if line_num == 1:
-                        game_id = game_data.get('id', 'unknown')
-                        has_pgn = 'pgn' in game_data
-                        print(f"[lichess] First game parsed successfully: id={game_id}, has_pgn={has_pgn}")
-
-                except json.JSONDecodeError as e:
-                    if line_num <= 5:  # Only log first few errors
-                        print(f"[lichess] JSON parse error on line {line_num}: {e}")
-                        print(f"[lichess] Problematic line (first 100 chars): {line[:100]}")
-                    continue
-                except Exception as e:
-                    if line_num <= 5:
-                        print(f"[lichess] Unexpected error on line {line_num}: {e}")
-                    continue
+            try:
+                game_data = json.loads(line)
+                games.append(game_data)
+
+                # Log first game for debugging
+                if line_num == 1:
+                    game_id = game_data.get('id', 'unknown')
+                    has_pgn = 'pgn' in game_data
+                    print(f"[lichess] First game parsed successfully: id={game_id}, has_pgn={has_pgn}")
+
+            except json.JSONDecodeError as e:
+                if line_num <= 5:  # Only log first few errors
+                    print(f"[lichess] JSON parse error on line {line_num}: {e}")
+                    print(f"[lichess] Problematic line (first 100 chars): {line[:100]}")
+                continue
+            except Exception as e:
+                if line_num <= 5:
+                    print(f"[lichess] Unexpected error on line {line_num}: {e}")
+                continue
 
-            print(f"[lichess] Successfully fetched and parsed {len(games)} games")
+        print(f"[lichess] Successfully fetched and parsed {len(games)} games")
 
-            if len(games) == 0 and len(lines) > 0:
-                print(f"[lichess] ERROR: Fetched {len(lines)} lines but parsed 0 games!")
-                print(f"[lichess] This suggests the response format is not NDJSON as expected")
+        if len(games) == 0 and len(lines) > 0:
+            print(f"[lichess] ERROR: Fetched {len(lines)} lines but parsed 0 games!")
+            print(f"[lichess] This suggests the response format is not NDJSON as expected")
 
-            return games
+        return games
 
     except Exception as e:
         print(f"[lichess] ERROR in _fetch_lichess_games: {e}")
@@ -6898,18 +7453,14 @@ async def _fetch_lichess_games(user_id: str, limit: int, until_timestamp: Option
 async def _fetch_chesscom_stats(user_id: str) -> Optional[Dict[str, Any]]:
     """Fetch user stats from Chess.com API"""
     try:
-        import aiohttp
-        headers = {
-            'User-Agent': 'ChessAnalytics/1.0 (Contact: your-email@example.com)'
-        }
-        async with aiohttp.ClientSession(headers=headers) as session:
-            url = f"https://api.chess.com/pub/player/{user_id}/stats"
-            async with session.get(url) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    print(f"Chess.com stats API error: {response.status}")
-                    return None
+        session = await get_http_client()
+        url = f"{CHESSCOM_API_BASE_URL}/pub/player/{user_id}/stats"
+        response = await cached_get(session, url, headers=CHESSCOM_HEADERS, ttl=CHESSCOM_PROFILE_TTL, platform="chess.com")
+        if response.status == 200:
+            return response.json()
+        else:
+            print(f"Chess.com stats API error: {response.status}")
+            return None
     except Exception as e:
         print(f"Error fetching Chess.com stats: {e}")
         return None
@@ -7053,67 +7604,93 @@ async def _fetch_single_lichess_game(game_id: str) -> Optional[str]:
     """Fetch a single game PGN from Lichess by game ID"""
     try:
         session = await get_http_client()
-        url = f"https://lichess.org/game/export/{game_id}"
+        url = f"{LICHESS_BASE_URL}/game/export/{game_id}"
         params = {'pgnInJson': 'false'}
 
-        async with session.get(url, params=params) as response:
-            if response.status == 200:
-                pgn_text = await response.text()
-                return pgn_text
-            else:
-                print(f"Lichess API error fetching game {game_id}: {response.status}")
-                return None
+        response = await cached_get(session, url, params=params, ttl=LICHESS_GAME_EXPORT_TTL, platform="lichess")
+        if response.status == 200:
+            return response.text()
+        else:
+            print(f"Lichess API error fetching game {game_id}: {response.status}")
+            return None
     except Exception as e:
         print(f"Error fetching Lichess game {game_id}: {e}")
         return None
 async def _fetch_single_chesscom_game(user_id: str, game_id: str) -> Optional[str]:
     """Fetch a single game PGN from Chess.com by searching recent games"""
     try:
-        import aiohttp
         from datetime import datetime, timedelta
 
         # Chess.com doesn't have a single-game endpoint, so we need to search recent archives
         # The game_id is typically a URL like "https://www.chess.com/game/live/123456"
         # We'll extract just the number and search through recent months
+        session = await get_http_client()
 
-        # Chess.com API requires User-Agent header
-        headers = {
-            'User-Agent': 'ChessAnalytics/1.0 (Contact: your-email@example.com)'
-        }
-        async with aiohttp.ClientSession(headers=headers) as session:
-            # Search last 3 months of games
-            end_date = datetime.now()
-
-            for months_ago in range(3):
-                search_date = end_date - timedelta(days=30 * months_ago)
-                year = search_date.year
-                month = search_date.month
-
-                url = f"https://api.chess.com/pub/player/{user_id}/games/{year}/{month:02d}"
+        # Search last 3 months of games (archives are shared with imports through the upstream cache)
+        end_date = datetime.now()
 
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        games = data.get('games', [])
-
-                        # Search for the game by ID
-                        for game in games:
-                            game_url = game.get('url', '')
-                            # Check if this is the game we're looking for
-                            if game_id in game_url or game_url.endswith(f"/{game_id}"):
-                                pgn = game.get('pgn', '')
-                                if pgn:
-                                    return pgn
-
-            # If not found in recent months, return None
-            print(f"Chess.com game {game_id} not found in recent archives for user {user_id}")
-            return None
+        for months_ago in range(3):
+            search_date = end_date - timedelta(days=30 * months_ago)
+            response = await _get_chesscom_archive(session, user_id, search_date.year, search_date.month)
+            if response.status == 200:
+                games = response.json().get('games', [])
+
+                # Search for the game by ID
+                for game in games:
+                    game_url = game.get('url', '')
+                    # Check if this is the game we're looking for
+                    if game_id in game_url or game_url.endswith(f"/{game_id}"):
+                        pgn = game.get('pgn', '')
+                        if pgn:
+                            return pgn
+
+        # If not found in recent months, return None
+        print(f"Chess.com game {game_id} not found in recent archives for user {user_id}")
+        return None
 
     except Exception as e:
         print(f"Error fetching Chess.com game {game_id}: {e}")
         return None
 
 
+_imports_group_url: Optional[str] = None
+
+
+async def _fetch_platform_game(platform: str, user_id: str, game_id: str) -> Optional[str]:
+    """
+    Fetch a single game PGN from its platform.
+
+    Behind the gateway only the imports group calls Lichess/Chess.com, so its
+    upstream governor paces every request; other groups fetch through it
+    (GET /proxy/game/...) instead of running a second governor.
+    """
+    if not _serves_group('imports'):
+        return await _fetch_platform_game_via_imports(platform, user_id, game_id)
+    if platform == 'lichess':
+        return await _fetch_single_lichess_game(game_id)
+    if platform == 'chess.com':
+        return await _fetch_single_chesscom_game(user_id, game_id)
+    return None
+
+
+async def _fetch_platform_game_via_imports(platform: str, user_id: str, game_id: str) -> Optional[str]:
+    """Fetch a single game PGN through the imports group's internal port."""
+    global _imports_group_url
+    if _imports_group_url is None:
+        from .service_gateway import load_service_groups
+        _imports_group_url = next(group.base_url for group in load_service_groups() if group.name == 'imports')
+    try:
+        async with httpx.AsyncClient(base_url=_imports_group_url, timeout=60.0) as client:
+            response = await client.get(
+                f"/proxy/game/{platform}/{urllib.parse.quote(game_id, safe='')}",
+                params={'user_id': user_id}
+            )
+    except httpx.HTTPError as e:
+        print(f"Error fetching {platform} game {game_id} through the imports group: {e}")
+        return None
+    return response.text if response.status_code == 200 else None
+
+
 def _count_moves_in_pgn(pgn: str) -> int:
     """Count the number of moves in a PGN string"""
     try:
@@ -7426,7 +8003,7 @@ async def _check_import_auth_and_limits(
         except Exception as e:
             logger.warning(f"Anonymous import limit check failed for IP {client_ip} (non-critical): {e}")
 
-    _enforce_rate_limit(f"import:{user_id}:{platform}:{rate_key_suffix}", IMPORT_RATE_LIMIT)
+    await _enforce_rate_limit(f"import:{user_id}:{platform}:{rate_key_suffix}", IMPORT_RATE_LIMIT)
     return auth_user_id, anonymous_limit_remaining
 
 
@@ -7728,7 +8305,7 @@ async def import_games(payload: BulkGameImportRequest, _auth: Optional[bool] = g
     # REMOVED rate limiting - this is an internal endpoint called by large imports in batches
     # Rate limiting is enforced at the parent level (/api/v1/import-more-games, etc.)
     # rate_key = f"import:{payload.user_id}:{payload.platform}:bulk"
-    # _enforce_rate_limit(rate_key, IMPORT_RATE_LIMIT)
+    # await _enforce_rate_limit(rate_key, IMPORT_RATE_LIMIT)
 
     canonical_user_id = _canonical_user_id(payload.user_id, payload.platform)
     errors: List[str] = []
@@ -7952,7 +8529,7 @@ async def discover_games(request: Dict[str, Any]):
     if not user_id or not platform:
         raise HTTPException(status_code=400, detail="user_id and platform are required")
 
-    _enforce_rate_limit(f"import:{user_id}:{platform}:discover", IMPORT_RATE_LIMIT)
+    await _enforce_rate_limit(f"import:{user_id}:{platform}:discover", IMPORT_RATE_LIMIT)
 
     canonical_user_id = _canonical_user_id(user_id, platform)
     db_client = supabase_service or supabase
@@ -8003,7 +8580,7 @@ async def import_more_games(request: Dict[str, Any], _auth: Optional[bool] = get
     if not user_id or not platform:
         raise HTTPException(status_code=400, detail="user_id and platform are required")
 
-    _enforce_rate_limit(f"import:{user_id}:{platform}:more", IMPORT_RATE_LIMIT)
+    await _enforce_rate_limit(f"import:{user_id}:{platform}:more", IMPORT_RATE_LIMIT)
 
     # Validate platform
     if platform not in ('lichess', 'chess.com'):
@@ -8255,17 +8832,9 @@ async def _perform_large_import(user_id: str, platform: str, limit: int, from_da
                 print(f"[large_import] Fetching games (batch limit: {batch_limit}, offset: {batch_start}/{limit})")
                 print(f"[large_import] Pagination state - until_timestamp: {until_timestamp}, since_timestamp: {since_timestamp if 'since_timestamp' in locals() else None}, oldest_game_month: {oldest_game_month}")
 
-                # Stagger requests when multiple imports are running to prevent resource contention
-                active_imports = MAX_CONCURRENT_IMPORTS - import_semaphore._value
-                if active_imports >= 2:
-                    await asyncio.sleep(0.5)  # 500ms delay reduces CPU/memory spikes and prevents connection pool exhaustion
-                    print(f"[large_import] {active_imports} concurrent imports active - added 0.5s delay for stability")
-
-                # ALWAYS add a small delay between batches to avoid Lichess rate limiting (429 errors)
-                # Lichess allows roughly 50-60 requests per minute for authenticated users
-                if platform == 'lichess':
-                    await asyncio.sleep(1.2)  # 1.2 seconds = ~50 requests/minute (safe rate)
-                    print(f"[large_import] Added 1.2s delay to respect Lichess API rate limits")
+                # No fixed delay between batches: upstream requests are paced by the shared
+                # per-platform rate governor (core/upstream_governor.py), which adapts to 429s
+                # and is shared by every concurrent import
 
                 try:
                     games_data = await _fetch_games_from_platform(
@@ -8611,30 +9180,32 @@ async def debug_db_state(user_id: str, platform: str):
 @app.get("/proxy/chess-com/{username}")
 async def proxy_chess_com_user(username: str):
     """Proxy endpoint for Chess.com user info to avoid CORS issues."""
-    import httpx
-
     try:
         canonical_username = username.strip().lower()
-        url = f"https://api.chess.com/pub/player/{canonical_username}"
+        url = f"{CHESSCOM_API_BASE_URL}/pub/player/{canonical_username}"
         print(f"Proxying user request to: {url}")
 
-        # Chess.com API requires User-Agent header
-        headers = {
-            'User-Agent': 'ChessAnalytics/1.0 (Contact: your-email@example.com)'
-        }
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers, timeout=30.0)
+        session = await get_http_client()
+        response = await cached_get(session, url, headers=CHESSCOM_HEADERS, ttl=CHESSCOM_PROFILE_TTL, platform="chess.com")
 
-            if response.status_code == 200:
-                return response.json()
-            else:
-                print(f"Chess.com API returned status {response.status_code}")
-                return {"success": False, "message": f"User not found or API returned status {response.status_code}"}
+        if response.status == 200:
+            return response.json()
+        else:
+            print(f"Chess.com API returned status {response.status}")
+            return {"success": False, "message": f"User not found or API returned status {response.status}"}
 
     except Exception as e:
         print(f"Error proxying Chess.com user request: {e}")
         return {"success": False, "message": str(e)}
 
+@app.get("/proxy/game/{platform}/{game_id:path}", response_class=PlainTextResponse)
+async def proxy_platform_game(platform: str, game_id: str, user_id: str = Query('')):
+    """PGN of one game from its platform; the other service groups fetch games through this."""
+    pgn = await _fetch_platform_game(platform, user_id, game_id)
+    if not pgn:
+        raise HTTPException(status_code=404, detail=f"Game not found on {platform}: {game_id}")
+    return pgn
+
 @app.post("/api/v1/validate-user")
 async def validate_user(request: dict):
     """Validate that a user exists on the specified platform.
@@ -8727,9 +9298,11 @@ async def get_api_client_stats():
     try:
         api_client = get_resilient_api_client()
         stats = api_client.get_stats()
+        upstream_cache = get_upstream_cache()
         return {
             "success": True,
             "stats": stats,
+            "upstream_cache": upstream_cache.stats() if upstream_cache else None,
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
@@ -8912,12 +9485,26 @@ def _validate_single_game_analysis_request(request: UnifiedAnalysisRequest) -> T
         return False, f"Unsupported platform: {request.platform}"
 
     return True, "Valid"
+_analysis_engine_lock = threading.Lock()
+
 def get_analysis_engine() -> ChessAnalysisEngine:
     """Get or create the analysis engine instance."""
     global analysis_engine
     if analysis_engine is not None:
         return analysis_engine
+    with _analysis_engine_lock:
+        if analysis_engine is None:
+            analysis_engine = _create_analysis_engine()
+    return analysis_engine
+
+async def _analysis_engine_ready() -> ChessAnalysisEngine:
+    """get_analysis_engine() for request handlers: a first-use initialization
+    runs in a worker thread, not on the event loop."""
+    if analysis_engine is not None:
+        return analysis_engine
+    return await asyncio.to_thread(get_analysis_engine)
 
+def _create_analysis_engine() -> ChessAnalysisEngine:
     # Pass stockfish path from config to ensure production paths are checked
     stockfish_path = config.stockfish.path
     if stockfish_path:
@@ -8926,9 +9513,9 @@ def get_analysis_engine() -> ChessAnalysisEngine:
         print(f"[ENGINE] Warning: No Stockfish path found in config")
 
     print("[ENGINE] Initializing ChessAnalysisEngine (this will also initialize AI comment generator)...")
-    analysis_engine = ChessAnalysisEngine(stockfish_path=stockfish_path)
+    engine = ChessAnalysisEngine(stockfish_path=stockfish_path)
     print("[ENGINE] ✅ ChessAnalysisEngine initialized successfully")
-    return analysis_engine
+    return engine
 
 async def _handle_single_game_analysis(request: UnifiedAnalysisRequest) -> UnifiedAnalysisResponse:
     """Handle single game analysis with PGN data."""
@@ -8936,7 +9523,7 @@ async def _handle_single_game_analysis(request: UnifiedAnalysisRequest) -> Unifi
         # Canonicalize user ID for database consistency
         canonical_user_id = _canonical_user_id(request.user_id, request.platform)
 
-        engine = get_analysis_engine()
+        engine = await _analysis_engine_ready()
 
         # Configure analysis type with optimized settings
         resolved_type = _normalize_analysis_type(request.analysis_type, quiet=True)
@@ -8993,6 +9580,122 @@ async def _handle_single_game_analysis(request: UnifiedAnalysisRequest) -> Unifi
             )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# Streaming analyses keep running (and saving) if the client disconnects mid-stream
+_streaming_analysis_tasks: set = set()
+
+
+def _ndjson_line(event: str, data: Dict[str, Any]) -> str:
+    """Encode one streamed analysis event as a newline-delimited JSON record."""
+    return json.dumps({"event": event, "data": data}, default=str) + "\n"
+
+
+def _game_summary(game_analysis: GameAnalysis) -> Dict[str, Any]:
+    """Game-level metrics of an analysis, without the per-move list."""
+    return {
+        f.name: getattr(game_analysis, f.name)
+        for f in dataclass_fields(game_analysis)
+        if f.name != 'moves_analysis'
+    }
+
+
+async def _stream_single_game_analysis(
+    request: UnifiedAnalysisRequest,
+    on_complete: Optional[Callable[[], Awaitable[None]]] = None
+) -> StreamingResponse:
+    """
+    Stream single game analysis with PGN data as newline-delimited JSON.
+
+    on_complete runs once the analysis has been saved (usage is recorded
+    there); it does not run when the analysis or the save fails. Like the
+    analysis itself, it still runs if the client has disconnected.
+
+    Records are emitted as soon as they are available:
+    - move: one per analyzed move (completion order; use ply_index to place it)
+    - game: game-level metrics once all moves are classified
+    - saved: the analysis was persisted (data.success)
+    - comment: coaching fields for a move whose AI comment finished
+    - error: analysis failed
+    - done: end of stream
+    """
+    canonical_user_id = _canonical_user_id(request.user_id, request.platform)
+    engine = await _analysis_engine_ready()
+
+    resolved_type = _normalize_analysis_type(request.analysis_type, quiet=True)
+    if request.analysis_type != resolved_type:
+        request.analysis_type = resolved_type
+    analysis_type_enum = AnalysisType(resolved_type)
+    if resolved_type == "deep":
+        engine.config = AnalysisConfig.for_deep_analysis()
+    else:
+        engine.config = AnalysisConfig(
+            analysis_type=analysis_type_enum,
+            depth=request.depth,
+            skill_level=request.skill_level
+        )
+
+    events: asyncio.Queue = asyncio.Queue()
+
+    def emit(event: str, data: Dict[str, Any]) -> None:
+        events.put_nowait(_ndjson_line(event, data))
+
+    def on_move(move: MoveAnalysis) -> None:
+        emit("move", _serialize_move_analysis(move))
+
+    def on_comment(move: MoveAnalysis) -> None:
+        patch = {"ply_index": move.ply_index}
+        patch.update({name: getattr(move, name) for name in COACHING_FIELDS})
+        emit("comment", patch)
+
+    async def produce() -> None:
+        try:
+            analysis_game_id = request.game_id or request.provider_game_id
+            game_analysis = await engine.analyze_game(
+                request.pgn,
+                canonical_user_id,
+                request.platform,
+                analysis_type_enum,
+                analysis_game_id,
+                move_callback=on_move
+            )
+            if not game_analysis:
+                emit("error", {"message": "Failed to analyze game"})
+                return
+
+            emit("game", _game_summary(game_analysis))
+            success = await _save_stockfish_analysis(game_analysis)
+            emit("saved", {"success": success, "game_id": game_analysis.game_id})
+            if success and on_complete is not None:
+                try:
+                    await on_complete()
+                except Exception as e:
+                    print(f"[SINGLE GAME ANALYSIS] Warning: Could not record usage for streamed analysis: {e}")
+            if success:
+                # Same work as the background task of the non-streaming path, but comments are streamed too
+                await _generate_ai_comments_background(game_analysis, comment_callback=on_comment)
+        except Exception as e:
+            print(f"[SINGLE GAME ANALYSIS] ERROR Streaming analysis failed: {e}")
+            traceback.print_exc()
+            emit("error", {"message": str(e)})
+        finally:
+            events.put_nowait(None)
+
+    task = asyncio.create_task(produce())
+    _streaming_analysis_tasks.add(task)
+    task.add_done_callback(_streaming_analysis_tasks.discard)
+
+    async def body():
+        while True:
+            line = await events.get()
+            if line is None:
+                yield _ndjson_line("done", {})
+                return
+            yield line
+
+    return StreamingResponse(body(), media_type="application/x-ndjson", headers=_SSE_HEADERS)
+
+
 async def _handle_single_game_by_id(request: UnifiedAnalysisRequest) -> UnifiedAnalysisResponse:
     """Handle single game analysis by game_id - fetch PGN from database."""
     try:
@@ -9071,11 +9774,7 @@ async def _handle_single_game_by_id(request: UnifiedAnalysisRequest) -> UnifiedA
         if not game_response or not hasattr(game_response, 'data') or not game_response.data:
             print(f"[SINGLE GAME ANALYSIS] Game not found in database, attempting to fetch from {request.platform}")
 
-            pgn_from_platform = None
-            if request.platform == 'lichess':
-                pgn_from_platform = await _fetch_single_lichess_game(game_id)
-            elif request.platform == 'chess.com':
-                pgn_from_platform = await _fetch_single_chesscom_game(request.user_id, game_id)
+            pgn_from_platform = await _fetch_platform_game(request.platform, request.user_id, game_id)
 
             if not pgn_from_platform:
                 print(f"[SINGLE GAME ANALYSIS] ERROR Game not found in database or on {request.platform}: {game_id}")
@@ -9219,7 +9918,7 @@ async def _handle_single_game_by_id(request: UnifiedAnalysisRequest) -> UnifiedA
                     )
 
         # Now analyze the game with the fetched PGN
-        engine = get_analysis_engine()
+        engine = await _analysis_engine_ready()
 
         # Configure analysis type with optimized settings
         resolved_type = _normalize_analysis_type(request.analysis_type, quiet=True)
@@ -9455,7 +10154,7 @@ async def _handle_single_game_by_id(request: UnifiedAnalysisRequest) -> UnifiedA
 async def _handle_position_analysis(request: UnifiedAnalysisRequest) -> UnifiedAnalysisResponse:
     """Handle position analysis."""
     try:
-        engine = get_analysis_engine()
+        engine = await _analysis_engine_ready()
 
         # Configure analysis type
         resolved_type = _normalize_analysis_type(request.analysis_type, quiet=True)
@@ -9483,7 +10182,7 @@ async def _handle_move_analysis(request: UnifiedAnalysisRequest) -> UnifiedAnaly
     try:
         import chess
 
-        engine = get_analysis_engine()
+        engine = await _analysis_engine_ready()
 
         # Configure analysis type with optimized settings
         resolved_type = _normalize_analysis_type(request.analysis_type, quiet=True)
@@ -9523,7 +10222,7 @@ async def _handle_move_analysis(request: UnifiedAnalysisRequest) -> UnifiedAnaly
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-async def _handle_batch_analysis(request: UnifiedAnalysisRequest, background_tasks: BackgroundTasks, use_parallel: bool = True, auth_user_id: Optional[str] = None) -> UnifiedAnalysisResponse:
+async def _handle_batch_analysis(request: UnifiedAnalysisRequest, background_tasks: BackgroundTasks, use_parallel: bool = True, auth_user_id: Optional[str] = None, account_tier: Optional[str] = None) -> UnifiedAnalysisResponse:
     """Handle batch analysis using the queue system."""
     try:
         # Validate request parameters
@@ -9545,7 +10244,8 @@ async def _handle_batch_analysis(request: UnifiedAnalysisRequest, background_tas
             limit=request.limit or 5,
             depth=request.depth or 14,
             skill_level=request.skill_level or 20,
-            auth_user_id=auth_user_id
+            auth_user_id=auth_user_id,
+            account_tier=account_tier
         )
 
         return UnifiedAnalysisResponse(
@@ -9733,8 +10433,7 @@ async def _update_all_move_comments_in_db(
             # For now, we'll just update the moves_analysis JSONB
         }
 
-        print(f"[AI_COMMENTS] Updating database for game_id: {game_id}")
-        print(f"[AI_COMMENTS] Moves to update: {len(moves_analysis)}")
+        hot_log.debug("AI_COMMENTS", "Updating database for game_id: %s (%d moves)", game_id, len(moves_analysis))
 
         response = await asyncio.to_thread(
             lambda: db_client.table('move_analyses')
@@ -9745,14 +10444,11 @@ async def _update_all_move_comments_in_db(
             .execute()
         )
 
-        print(f"[AI_COMMENTS] Database update response: {type(response)}")
-        print(f"[AI_COMMENTS] Response has data: {hasattr(response, 'data')}")
-        if hasattr(response, 'data'):
-            print(f"[AI_COMMENTS] Response data: {response.data}")
+        hot_log.debug("AI_COMMENTS", lambda: f"Database update response: {getattr(response, 'data', response)}")
 
         success = bool(getattr(response, 'data', None))
         if success:
-            print(f"[AI_COMMENTS] ✅ Successfully updated AI comments for game_id: {game_id}")
+            hot_log.info("AI_COMMENTS", "Successfully updated AI comments for game_id: %s", game_id)
             # Invalidate cache to ensure fresh data
             _invalidate_cache(canonical_user_id, platform)
         else:
@@ -9766,11 +10462,67 @@ async def _update_all_move_comments_in_db(
         return False
 
 
-async def _generate_ai_comments_background(game_analysis: GameAnalysis) -> None:
+def _serialize_move_analysis(move: MoveAnalysis) -> Dict[str, Any]:
+    """Convert a MoveAnalysis into the dict format stored in move_analyses.moves_analysis."""
+    return {
+        'move': move.move,
+        'move_san': move.move_san,
+        'move_notation': move.move,
+        'best_move': move.best_move,
+        'best_move_san': getattr(move, 'best_move_san', ''),
+        'best_move_pv': getattr(move, 'best_move_pv', []),
+        'engine_move': move.best_move,
+        'fen_before': getattr(move, 'fen_before', ''),
+        'fen_after': getattr(move, 'fen_after', ''),
+        'evaluation': move.evaluation,
+        'evaluation_before': getattr(move, 'evaluation_before', None),
+        'evaluation_after': getattr(move, 'evaluation_after', None),
+        'is_best': move.is_best,
+        'is_brilliant': move.is_brilliant,
+        'is_great': move.is_great,
+        'is_excellent': move.is_excellent,
+        'is_blunder': move.is_blunder,
+        'is_mistake': move.is_mistake,
+        'is_inaccuracy': move.is_inaccuracy,
+        'is_good': move.is_good,
+        'is_acceptable': move.is_acceptable,
+        'centipawn_loss': move.centipawn_loss,
+        'depth_analyzed': move.depth_analyzed,
+        'is_user_move': move.is_user_move,
+        'player_color': move.player_color,
+        'ply_index': move.ply_index,
+        'ply': move.ply_index,
+        'opening_ply': move.ply_index,
+        'explanation': move.explanation,
+        'heuristic_details': move.heuristic_details,
+        'coaching_comment': move.coaching_comment,
+        'what_went_right': move.what_went_right,
+        'what_went_wrong': move.what_went_wrong,
+        'how_to_improve': move.how_to_improve,
+        'tactical_insights': move.tactical_insights,
+        'positional_insights': move.positional_insights,
+        'risks': move.risks,
+        'benefits': move.benefits,
+        'learning_points': move.learning_points,
+        'encouragement_level': move.encouragement_level,
+        'move_quality': move.move_quality,
+        'game_phase': move.game_phase,
+        'coaching_pending': move.coaching_pending
+    }
+
+
+async def _generate_ai_comments_background(
+    game_analysis: GameAnalysis,
+    comment_callback: Optional[Callable[[MoveAnalysis], None]] = None
+) -> None:
     """
     Background task to generate AI comments asynchronously after analysis saves.
 
     This runs in the background and doesn't block the analysis response.
+
+    Args:
+        game_analysis: Saved analysis to add comments to
+        comment_callback: Optional callable invoked with each move as its comment is generated
     """
     try:
         print(f"[AI_COMMENTS] ========================================")
@@ -9785,55 +10537,10 @@ async def _generate_ai_comments_background(game_analysis: GameAnalysis) -> None:
 
         # Generate comments in parallel batches
         config = CommentGenerationConfig.from_env()
-        updated_analysis = await generate_comments_parallel(game_analysis, config)
+        updated_analysis = await generate_comments_parallel(game_analysis, config, comment_callback)
 
         # Convert moves back to dict format for database update
-        moves_analysis_dict = []
-        for move in updated_analysis.moves_analysis:
-            moves_analysis_dict.append({
-                'move': move.move,
-                'move_san': move.move_san,
-                'move_notation': move.move,
-                'best_move': move.best_move,
-                'best_move_san': getattr(move, 'best_move_san', ''),
-                'best_move_pv': getattr(move, 'best_move_pv', []),
-                'engine_move': move.best_move,
-                'fen_before': getattr(move, 'fen_before', ''),
-                'fen_after': getattr(move, 'fen_after', ''),
-                'evaluation': move.evaluation,
-                'evaluation_before': getattr(move, 'evaluation_before', None),
-                'evaluation_after': getattr(move, 'evaluation_after', None),
-                'is_best': move.is_best,
-                'is_brilliant': move.is_brilliant,
-                'is_great': move.is_great,
-                'is_excellent': move.is_excellent,
-                'is_blunder': move.is_blunder,
-                'is_mistake': move.is_mistake,
-                'is_inaccuracy': move.is_inaccuracy,
-                'is_good': move.is_good,
-                'is_acceptable': move.is_acceptable,
-                'centipawn_loss': move.centipawn_loss,
-                'depth_analyzed': move.depth_analyzed,
-                'is_user_move': move.is_user_move,
-                'player_color': move.player_color,
-                'ply_index': move.ply_index,
-                'ply': move.ply_index,
-                'opening_ply': move.ply_index,
-                'explanation': move.explanation,
-                'heuristic_details': move.heuristic_details,
-                'coaching_comment': move.coaching_comment,
-                'what_went_right': move.what_went_right,
-                'what_went_wrong': move.what_went_wrong,
-                'how_to_improve': move.how_to_improve,
-                'tactical_insights': move.tactical_insights,
-                'positional_insights': move.positional_insights,
-                'risks': move.risks,
-                'benefits': move.benefits,
-                'learning_points': move.learning_points,
-                'encouragement_level': move.encouragement_level,
-                'move_quality': move.move_quality,
-                'game_phase': move.game_phase
-            })
+        moves_analysis_dict = [_serialize_move_analysis(move) for move in updated_analysis.moves_analysis]
 
         # Update database with AI comments
         success = await _update_all_move_comments_in_db(
@@ -9858,6 +10565,7 @@ async def _generate_ai_comments_background(game_analysis: GameAnalysis) -> None:
         # Don't raise - this is a background task, errors shouldn't crash the server
 
 
+@timed_stage("persistence")
 async def _save_stockfish_analysis(analysis: GameAnalysis) -> bool:
     """Persist Stockfish/deep analysis using reliable persistence fallback."""
     try:
@@ -9916,7 +10624,8 @@ async def _save_stockfish_analysis(analysis: GameAnalysis) -> bool:
                 'learning_points': move.learning_points,
                 'encouragement_level': move.encouragement_level,
                 'move_quality': move.move_quality,
-                'game_phase': move.game_phase
+                'game_phase': move.game_phase,
+                'coaching_pending': move.coaching_pending
             })
 
         data = {
@@ -9955,9 +10664,7 @@ async def _save_stockfish_analysis(analysis: GameAnalysis) -> bool:
             'ai_comments_status': 'pending'  # Will be updated to 'completed' when AI comments are generated
         }
 
-        print(f"[SAVE ANALYSIS] Attempting to save analysis for game_id: {analysis.game_id}, user: {canonical_user_id}, platform: {analysis.platform}")
-        print(f"[SAVE ANALYSIS] Data keys: {list(data.keys())}")
-        print(f"[SAVE ANALYSIS] Number of moves: {len(moves_analysis_dict)}")
+        hot_log.debug("SAVE ANALYSIS", "Attempting to save analysis", game_id=analysis.game_id, user=canonical_user_id, platform=analysis.platform, moves=len(moves_analysis_dict))
 
         response = await asyncio.to_thread(
             lambda: supabase_service.table('move_analyses').upsert(
@@ -9968,11 +10675,7 @@ async def _save_stockfish_analysis(analysis: GameAnalysis) -> bool:
 
         success = bool(getattr(response, 'data', None))
         if success:
-            print(f"[SAVE ANALYSIS] ✅ Successfully saved analysis for game_id: {analysis.game_id}, user: {canonical_user_id}, platform: {analysis.platform}")
-            print(f"[SAVE ANALYSIS] Saved data game_id: {data.get('game_id')}")
-            print(f"[SAVE ANALYSIS] Response data exists: {bool(response.data)}")
-            if response.data:
-                print(f"[SAVE ANALYSIS] Response data game_id: {response.data[0].get('game_id') if isinstance(response.data, list) and len(response.data) > 0 else 'N/A'}")
+            hot_log.info("SAVE ANALYSIS", "Successfully saved analysis", game_id=analysis.game_id, user=canonical_user_id, platform=analysis.platform)
             # Invalidate cache for this user/platform to ensure fresh stats
             _invalidate_cache(canonical_user_id, analysis.platform)
         else:
@@ -10700,6 +11403,8 @@ async def link_chess_account(
                 update_data
             ).eq('id', user_id).execute()
         )
+        if entitlement_service:
+            entitlement_service.invalidate(user_id)
 
         # Claim any previously imported anonymous data for this username
         games_claimed = 0
@@ -10799,6 +11504,8 @@ async def unlink_chess_account(
                 update_data
             ).eq('id', user_id).execute()
         )
+        if entitlement_service:
+            entitlement_service.invalidate(user_id)
 
         logger.info(f"Unlinked {platform} account for user {user_id}")
         return {"success": True, "platform": platform}
@@ -11106,6 +11813,10 @@ async def stripe_webhook(request: Request):
                 content={"success": False, "message": result.get('message', 'Unknown error')}
             )
 
+        # Subscription changes apply to users resolved inside the handler
+        if entitlement_service:
+            entitlement_service.invalidate_all()
+
         return result
     except Exception as e:
         logger.error(f"Error processing webhook: {e}")
@@ -11174,6 +11885,8 @@ async def verify_stripe_session(
 
     try:
         result = await stripe_service.verify_and_sync_session(user_id, request.session_id)
+        if entitlement_service:
+            entitlement_service.invalidate(user_id)
 
         if not result.get('success', False):
             return JSONResponse(
@@ -11217,6 +11930,8 @@ async def cancel_subscription(token_data: Annotated[dict, Depends(verify_token)]
 
     try:
         result = await stripe_service.cancel_subscription(user_id)
+        if entitlement_service:
+            entitlement_service.invalidate(user_id)
 
         if not result.get('success', False):
             return JSONResponse(
@@ -11269,84 +11984,64 @@ async def _check_premium_access(user_id: str, platform: Optional[str] = None) ->
     Returns:
         True if user has premium access, False otherwise
     """
-    if not supabase_service:
+    if not entitlement_service:
         return False
 
     try:
-        # Determine if user_id is a UUID or username
-        is_uuid = len(user_id) == 36 and '-' in user_id and user_id.count('-') == 4
+        lookup_id = user_id if platform is None else _canonical_user_id(user_id, platform)
+        entitlement = await entitlement_service.resolve(lookup_id, platform)
+        if DEBUG:
+            print(f"[PREMIUM_CHECK] user_id={user_id}, platform={platform}, found={entitlement.found}, "
+                  f"account_tier={entitlement.account_tier}, subscription_status={entitlement.subscription_status}, "
+                  f"premium={entitlement.is_premium}")
+        return entitlement.is_premium
+    except Exception as e:
+        logger.error(f"Error checking premium access: {e}")
+        return False
 
-        if is_uuid:
-            # It's already a UUID, use it directly
-            check_user_id = user_id
-        elif platform:
-            # It's a username, need to look up the UUID from user_profiles
-            canonical_username = _canonical_user_id(user_id, platform)
 
-            # Look up auth_user_id from user_profiles
-            profile_result = await asyncio.to_thread(
-                lambda: supabase_service.table('user_profiles')
-                .select('auth_user_id')
-                .eq('platform', platform)
-                .eq('user_id', canonical_username)
-                .limit(1)
-                .execute()
-            )
+async def require_coach_entitlement(auth_user_id: str = Depends(require_coach_user_id)) -> Entitlement:
+    """Resolve the entitlements of the authenticated coach user (cached, shared per request)."""
+    if not entitlement_service:
+        raise HTTPException(status_code=503, detail="Database not configured")
+    try:
+        return await entitlement_service.resolve(auth_user_id)
+    except Exception as e:
+        logger.error(f"Error resolving entitlements for {auth_user_id}: {e}")
+        return Entitlement(found=False, auth_user_id=auth_user_id)
 
-            if profile_result.data and profile_result.data[0].get('auth_user_id'):
-                check_user_id = profile_result.data[0]['auth_user_id']
-                logger.info(f"Found auth_user_id {check_user_id} for username {canonical_username} on {platform}")
-            else:
-                logger.warning(f"No auth_user_id found for username {canonical_username} on {platform}")
-                return False
-        else:
-            # No platform provided and not a UUID - can't look up
-            logger.warning(f"Cannot check premium access: user_id={user_id} is not a UUID and no platform provided")
-            return False
 
-        # Now check premium status using the UUID
-        result = await asyncio.to_thread(
-            lambda: supabase_service.table('authenticated_users')
-            .select('account_tier, subscription_status')
-            .eq('id', check_user_id)
-            .execute()
-        )
+async def get_coach_entitlement(auth_user_id: Optional[str] = Depends(get_coach_user_id)) -> Optional[Entitlement]:
+    """Entitlements of the coach user if authenticated, else None (username-based endpoints)."""
+    if not auth_user_id:
+        return None
+    return await require_coach_entitlement(auth_user_id)
 
-        logger.info(f"[PREMIUM_CHECK] Query result for user_id={check_user_id}: found={bool(result.data)}")
-        if result.data:
-            logger.info(f"[PREMIUM_CHECK] User data: {result.data[0]}")
 
-        if not result.data:
-            logger.warning(f"[PREMIUM_CHECK] User not found in authenticated_users table: {check_user_id}")
-            return False
+async def require_coach_premium(entitlement: Entitlement = Depends(require_coach_entitlement)) -> str:
+    """Auth user id of a premium coach user; 401 if not authenticated, 403 if not premium."""
+    if not entitlement.is_premium:
+        raise HTTPException(
+            status_code=403,
+            detail="Coach features require premium subscription. Please upgrade to access."
+        )
+    return entitlement.auth_user_id
 
-        user = result.data[0]
-        account_tier = user.get('account_tier', 'free')
-        subscription_status = user.get('subscription_status', 'expired')
-
-        # Log for debugging
-        logger.info(f"[PREMIUM_CHECK] user_id={check_user_id}, account_tier={account_tier}, subscription_status={subscription_status}")
-
-        # Premium tiers
-        premium_tiers = ['pro', 'pro_monthly', 'pro_yearly', 'enterprise']
-        is_premium_tier = account_tier in premium_tiers
-        logger.info(f"[PREMIUM_CHECK] is_premium_tier={is_premium_tier} (account_tier={account_tier} in {premium_tiers})")
-
-        # Check subscription is active for premium tiers
-        if is_premium_tier:
-            is_active = subscription_status in ['active', 'trialing']
-            logger.info(f"[PREMIUM_CHECK] subscription_status={subscription_status}, is_active={is_active} (checking if in ['active', 'trialing'])")
-            if is_active:
-                logger.info(f"[PREMIUM_CHECK] ✅ ACCESS GRANTED for user {check_user_id}")
-            else:
-                logger.warning(f"[PREMIUM_CHECK] ❌ ACCESS DENIED: Premium tier but subscription not active. status={subscription_status}")
-            return is_active
 
-        logger.warning(f"[PREMIUM_CHECK] ❌ ACCESS DENIED: Not a premium tier. account_tier={account_tier}, premium_tiers={premium_tiers}")
-        return False
-    except Exception as e:
-        logger.error(f"Error checking premium access: {e}")
-        return False
+async def _require_coach_premium_for(entitlement: Optional[Entitlement], user_id: str, platform: str) -> None:
+    """
+    403 unless the coach user is premium: the authenticated user if any,
+    else the user linked to the platform username.
+    """
+    if entitlement is not None:
+        premium = entitlement.is_premium
+    else:
+        premium = await _check_premium_access(user_id, platform)
+    if not premium:
+        raise HTTPException(
+            status_code=403,
+            detail="Coach features require premium subscription. Please upgrade to access."
+        )
 
 
 # Structured detail used by the frontend to render an inline upgrade CTA
@@ -11358,7 +12053,7 @@ COACH_CHAT_UPGRADE_DETAIL = {
 }
 
 
-async def _authorize_coach_chat(auth_user_id: str, game_id: Optional[str]) -> None:
+async def _authorize_coach_chat(entitlement: Entitlement, game_id: Optional[str]) -> None:
     """
     Gate the coach chat endpoint.
 
@@ -11370,8 +12065,9 @@ async def _authorize_coach_chat(auth_user_id: str, game_id: Optional[str]) -> No
     Raises HTTPException(403) with COACH_CHAT_UPGRADE_DETAIL for free users
     who have already used their one game.
     """
-    if await _check_premium_access(auth_user_id):
+    if entitlement.is_premium:
         return
+    auth_user_id = entitlement.auth_user_id
 
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
@@ -11420,24 +12116,26 @@ async def _authorize_coach_chat(auth_user_id: str, game_id: Optional[str]) -> No
 
 @app.post("/api/v1/coach/game-review/use")
 async def record_game_review_usage(
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: str = Depends(require_coach_user_id),
+    entitlement: Entitlement = Depends(require_coach_entitlement)
 ):
     """
     Record that a free user has used one of their game review credits.
     Increments the lifetime game_reviews_used counter on authenticated_users.
     Premium users are unlimited so this is a no-op for them.
     """
-    if not auth_user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
-
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
 
+    # Premium users don't need to track - they have unlimited
+    if entitlement.is_premium:
+        return {"success": True, "unlimited": True}
+
     try:
         # Get current user data
         user_result = await asyncio.to_thread(
             lambda: supabase_service.table('authenticated_users')
-            .select('account_tier, subscription_status, game_reviews_used')
+            .select('account_tier, game_reviews_used')
             .eq('id', auth_user_id)
             .execute()
         )
@@ -11447,12 +12145,6 @@ async def record_game_review_usage(
 
         user = user_result.data[0]
         account_tier = user.get('account_tier', 'free')
-        subscription_status = user.get('subscription_status', 'expired')
-
-        # Premium users don't need to track - they have unlimited
-        premium_tiers = ['pro', 'pro_monthly', 'pro_yearly', 'enterprise']
-        if account_tier in premium_tiers and subscription_status in ['active', 'trialing']:
-            return {"success": True, "unlimited": True}
 
         # Get tier limit
         tier_result = await asyncio.to_thread(
@@ -11497,36 +12189,15 @@ async def record_game_review_usage(
 async def get_coach_dashboard(
     user_id: str,
     platform: str,
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: Optional[str] = Depends(get_coach_user_id),
+    entitlement: Optional[Entitlement] = Depends(get_coach_entitlement)
 ):
     """
     Get Coach dashboard data (daily lesson, weaknesses, strengths).
     Premium-only endpoint.
     """
-    # Premium check: Always use authenticated user's UUID if provided
     logger.info(f"[COACH_DASHBOARD] Request: user_id={user_id}, platform={platform}, auth_user_id={auth_user_id}")
-    if auth_user_id:
-        logger.info(f"[COACH_DASHBOARD] Using auth_user_id for premium check: {auth_user_id}")
-        premium_result = await _check_premium_access(auth_user_id, None)
-        logger.info(f"[COACH_DASHBOARD] Premium check result: {premium_result}")
-        if not premium_result:
-            logger.warning(f"[COACH_DASHBOARD] ❌ Premium check failed for auth_user_id={auth_user_id}")
-            raise HTTPException(
-                status_code=403,
-                detail="Coach features require premium subscription. Please upgrade to access."
-            )
-        logger.info(f"[COACH_DASHBOARD] ✅ Premium check passed for auth_user_id={auth_user_id}")
-    else:
-        logger.info(f"[COACH_DASHBOARD] No auth_user_id provided, using user_id={user_id} with platform={platform}")
-        premium_result = await _check_premium_access(user_id, platform)
-        logger.info(f"[COACH_DASHBOARD] Premium check result: {premium_result}")
-        if not premium_result:
-            logger.warning(f"[COACH_DASHBOARD] ❌ Premium check failed for user_id={user_id}")
-            raise HTTPException(
-                status_code=403,
-                detail="Coach features require premium subscription. Please upgrade to access."
-            )
-        logger.info(f"[COACH_DASHBOARD] ✅ Premium check passed for user_id={user_id}")
+    await _require_coach_premium_for(entitlement, user_id, platform)
 
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
@@ -11659,18 +12330,14 @@ async def get_coach_progress(
     user_id: str,
     platform: str,
     period_days: int = Query(90, description="Number of days to look back"),
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: Optional[str] = Depends(get_coach_user_id),
+    entitlement: Optional[Entitlement] = Depends(get_coach_entitlement)
 ):
     """
     Get progress tracking data for charts and streaks.
     Premium-only endpoint.
     """
-    if auth_user_id:
-        if not await _check_premium_access(auth_user_id, None):
-            raise HTTPException(status_code=403, detail="Coach features require premium subscription.")
-    else:
-        if not await _check_premium_access(user_id, platform):
-            raise HTTPException(status_code=403, detail="Coach features require premium subscription.")
+    await _require_coach_premium_for(entitlement, user_id, platform)
 
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
@@ -11788,25 +12455,14 @@ async def get_lessons(
     user_id: str,
     platform: str,
     category: Optional[str] = Query(None, description="Filter by lesson category"),
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: Optional[str] = Depends(get_coach_user_id),
+    entitlement: Optional[Entitlement] = Depends(get_coach_entitlement)
 ):
     """
     Get all lessons for user with progress status.
     Premium-only endpoint.
     """
-    # Premium check: Always use authenticated user's UUID if provided
-    if auth_user_id:
-        if not await _check_premium_access(auth_user_id, None):
-            raise HTTPException(
-                status_code=403,
-                detail="Coach features require premium subscription. Please upgrade to access."
-            )
-    else:
-        if not await _check_premium_access(user_id, platform):
-            raise HTTPException(
-                status_code=403,
-                detail="Coach features require premium subscription. Please upgrade to access."
-            )
+    await _require_coach_premium_for(entitlement, user_id, platform)
 
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
@@ -11994,25 +12650,14 @@ async def get_puzzles(
     user_id: str,
     platform: str,
     category: Optional[str] = Query(None, description="Filter by puzzle category"),
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: Optional[str] = Depends(get_coach_user_id),
+    entitlement: Optional[Entitlement] = Depends(get_coach_entitlement)
 ):
     """
     Get personalized puzzles for user.
     Premium-only endpoint.
     """
-    # Premium check: Always use authenticated user's UUID if provided
-    if auth_user_id:
-        if not await _check_premium_access(auth_user_id, None):
-            raise HTTPException(
-                status_code=403,
-                detail="Coach features require premium subscription. Please upgrade to access."
-            )
-    else:
-        if not await _check_premium_access(user_id, platform):
-            raise HTTPException(
-                status_code=403,
-                detail="Coach features require premium subscription. Please upgrade to access."
-            )
+    await _require_coach_premium_for(entitlement, user_id, platform)
 
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
@@ -12089,25 +12734,14 @@ async def get_puzzles(
 async def get_daily_puzzle(
     user_id: str,
     platform: str,
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: Optional[str] = Depends(get_coach_user_id),
+    entitlement: Optional[Entitlement] = Depends(get_coach_entitlement)
 ):
     """
     Get or generate one daily puzzle for the user.
     Premium-only endpoint.
     """
-    # Premium check: Always use authenticated user's UUID if provided
-    if auth_user_id:
-        if not await _check_premium_access(auth_user_id, None):
-            raise HTTPException(
-                status_code=403,
-                detail="Coach features require premium subscription. Please upgrade to access."
-            )
-    else:
-        if not await _check_premium_access(user_id, platform):
-            raise HTTPException(
-                status_code=403,
-                detail="Coach features require premium subscription. Please upgrade to access."
-            )
+    await _require_coach_premium_for(entitlement, user_id, platform)
 
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
@@ -12209,7 +12843,7 @@ class PlayMoveResponse(BaseModel):
 @app.post("/api/v1/coach/play-move", response_model=PlayMoveResponse)
 async def get_engine_move(
     request: PlayMoveRequest,
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: str = Depends(require_coach_premium)
 ):
     """
     Get engine move for playing against Tal Coach.
@@ -12219,26 +12853,12 @@ async def get_engine_move(
     import chess.engine
     from concurrent.futures import ThreadPoolExecutor
 
-    # Premium check - require authentication
-    if not auth_user_id:
-        raise HTTPException(
-            status_code=401,
-            detail="Authentication required. Please log in to access coach features."
-        )
-
-    if not await _check_premium_access(auth_user_id):
-        raise HTTPException(
-            status_code=403,
-            detail="Coach features require premium subscription. Please upgrade to access."
-        )
-
-    def _get_engine_move(fen: str, skill_level: int, depth: int):
+    def _get_engine_move(fen: str, skill_level: int, depth: int, pool):
         """Synchronous function to get engine move."""
         try:
             # Validate FEN
             board = chess.Board(fen)
 
-            pool = _get_sync_engine_pool()
             if not pool:
                 raise ValueError("Stockfish not available")
 
@@ -12314,6 +12934,7 @@ async def get_engine_move(
 
     try:
         # Run in thread pool with capacity for multiple concurrent games
+        pool = await _sync_engine_pool_ready()
         loop = asyncio.get_event_loop()
         with ThreadPoolExecutor(max_workers=4) as executor:
             result = await loop.run_in_executor(
@@ -12321,7 +12942,8 @@ async def get_engine_move(
                 _get_engine_move,
                 request.fen,
                 request.skill_level,
-                request.depth
+                request.depth,
+                pool
             )
 
         return PlayMoveResponse(**result)
@@ -12399,57 +13021,43 @@ class CoachChatResponse(BaseModel):
     model_used: Optional[str] = None
 
 
-# In-memory chat rate limiter
-# NOTE: This resets on server restart. Acceptable for now since Railway auto-restarts
-# are infrequent and the limit is generous. For persistent rate limiting, consider
-# moving to the usage_tracking table or Redis in a future infrastructure upgrade.
-_chat_usage: Dict[str, List[float]] = {}
+# Chat rate limit, kept in the shared rate limiter (survives restarts, shared by workers).
+# Checked before the reply is generated and counted only once it was sent.
 _CHAT_RATE_LIMIT = 50  # messages per hour per user
+_CHAT_RATE_POLICY = RateLimitPolicy("coach_chat", _CHAT_RATE_LIMIT, 3600)
 
 
-def _check_chat_rate_limit(user_id: str) -> Tuple[bool, Dict]:
+async def _check_chat_rate_limit(user_id: str) -> Tuple[bool, Dict]:
     """Check if user has remaining chat messages this hour."""
-    import time as _time
-    now = _time.time()
-    one_hour_ago = now - 3600
-
-    if user_id not in _chat_usage:
-        _chat_usage[user_id] = []
-
-    # Prune old entries
-    _chat_usage[user_id] = [t for t in _chat_usage[user_id] if t > one_hour_ago]
-    count = len(_chat_usage[user_id])
-
-    if count >= _CHAT_RATE_LIMIT:
+    decision = await rate_limiter.ahit(user_id, _CHAT_RATE_POLICY, consume=False)
+    if not decision.allowed:
         return False, {
-            'message': f'You have used {count}/{_CHAT_RATE_LIMIT} chat messages this hour.',
+            'message': f'You have used {_CHAT_RATE_LIMIT}/{_CHAT_RATE_LIMIT} chat messages this hour.',
             'remaining': 0,
             'limit': _CHAT_RATE_LIMIT
         }
     return True, {
-        'remaining': _CHAT_RATE_LIMIT - count,
+        # The check counts the next message; report the allowance before it
+        'remaining': decision.remaining + 1,
         'limit': _CHAT_RATE_LIMIT
     }
 
 
-def _increment_chat_usage(user_id: str):
+async def _increment_chat_usage(user_id: str):
     """Record a chat message usage."""
-    import time as _time
-    if user_id not in _chat_usage:
-        _chat_usage[user_id] = []
-    _chat_usage[user_id].append(_time.time())
+    await rate_limiter.ahit(user_id, _CHAT_RATE_POLICY)
 
 
-def _get_stockfish_top_moves(fen: str, num_moves: int = 3, depth: int = 14, time_limit: float = 0.2) -> List[Dict[str, Any]]:
+def _get_stockfish_top_moves(fen: str, pool, num_moves: int = 3, depth: int = 14, time_limit: float = 0.2) -> List[Dict[str, Any]]:
     """Quick Stockfish evaluation returning top N moves with scores.
 
     Returns list of dicts with keys: move_san, eval_text, is_best.
-    Uses the shared SyncEnginePool to avoid spawning a new Stockfish process per call.
+    Uses the shared SyncEnginePool (from _sync_engine_pool_ready()) to avoid
+    spawning a new Stockfish process per call.
     """
     import chess as _chess
     import chess.engine as _engine
 
-    pool = _get_sync_engine_pool()
     if not pool:
         return []
 
@@ -12755,23 +13363,18 @@ Respond as Coach Tal.{student_reminder} Be direct and helpful - give a clear opi
 @app.post("/api/v1/coach/chat", response_model=CoachChatResponse)
 async def coach_chat(
     request: CoachChatRequest,
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: str = Depends(require_coach_user_id),
+    entitlement: Entitlement = Depends(require_coach_entitlement)
 ):
     """
     Interactive chat with Tal Coach about the current chess position.
     Premium for unlimited use; free users get one analyzed game.
     """
-    # 1. Auth + tier check (free users get coach chat for one game)
-    if not auth_user_id:
-        raise HTTPException(
-            status_code=401,
-            detail="Authentication required. Please log in to chat with Coach Tal."
-        )
-
-    await _authorize_coach_chat(auth_user_id, request.position_context.game_id)
+    # 1. Tier check (free users get coach chat for one game)
+    await _authorize_coach_chat(entitlement, request.position_context.game_id)
 
     # 2. Rate limiting
-    can_chat, chat_stats = _check_chat_rate_limit(auth_user_id)
+    can_chat, chat_stats = await _check_chat_rate_limit(auth_user_id)
     if not can_chat:
         raise HTTPException(
             status_code=429,
@@ -12787,7 +13390,7 @@ async def coach_chat(
 
     # 4. Quick Stockfish evaluation for top moves (runs in thread to avoid blocking)
     stockfish_moves = await asyncio.to_thread(
-        _get_stockfish_top_moves, request.position_context.fen
+        _get_stockfish_top_moves, request.position_context.fen, await _sync_engine_pool_ready()
     )
 
     # 5. Build prompts and call AI
@@ -12801,7 +13404,7 @@ async def coach_chat(
         )
 
         # Use singleton AI generator
-        generator = _get_ai_generator()
+        generator = await _ai_generator_ready()
 
         response_text = None
         model_used = None
@@ -12824,7 +13427,7 @@ async def coach_chat(
             model_used = "fallback"
 
         # 5. Increment usage
-        _increment_chat_usage(auth_user_id)
+        await _increment_chat_usage(auth_user_id)
 
         return CoachChatResponse(
             response=response_text,
@@ -12849,15 +13452,11 @@ async def coach_chat(
 async def get_study_plan(
     user_id: str,
     platform: str,
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: str = Depends(require_coach_premium)
 ):
     """Get current active study plan. Premium-only."""
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
-    if not auth_user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
-    if not await _check_premium_access(auth_user_id):
-        raise HTTPException(status_code=403, detail="Coach features require premium subscription")
 
     try:
         from .study_plan_generator import StudyPlanGenerator
@@ -12877,15 +13476,11 @@ async def get_study_plan(
 async def create_study_plan(
     user_id: str,
     platform: str,
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: str = Depends(require_coach_premium)
 ):
     """Generate a new weekly study plan. Premium-only."""
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
-    if not auth_user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
-    if not await _check_premium_access(auth_user_id):
-        raise HTTPException(status_code=403, detail="Coach features require premium subscription")
 
     try:
         from .study_plan_generator import StudyPlanGenerator
@@ -12905,15 +13500,11 @@ async def create_study_plan(
 async def complete_study_activity(
     plan_id: str,
     activity_data: Dict[str, Any],
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: str = Depends(require_coach_premium)
 ):
     """Mark a daily activity as completed. Premium-only."""
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
-    if not auth_user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
-    if not await _check_premium_access(auth_user_id):
-        raise HTTPException(status_code=403, detail="Coach features require premium subscription")
 
     try:
         day = activity_data.get('day', 0)
@@ -12936,15 +13527,11 @@ async def complete_study_activity(
 async def get_user_goals(
     user_id: str,
     platform: str,
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: str = Depends(require_coach_premium)
 ):
     """Get user goals. Premium-only."""
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
-    if not auth_user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
-    if not await _check_premium_access(auth_user_id):
-        raise HTTPException(status_code=403, detail="Coach features require premium subscription")
 
     try:
         from .study_plan_generator import StudyPlanGenerator
@@ -12968,16 +13555,12 @@ async def get_user_goals(
 async def get_opening_repertoire(
     user_id: str,
     platform: str,
-    auth_user_id: Optional[str] = Depends(get_coach_user_id),
+    auth_user_id: str = Depends(require_coach_premium),
     refresh: bool = Query(False, description="Force re-analysis of repertoire")
 ):
     """Get user's opening repertoire overview. Premium-only."""
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
-    if not auth_user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
-    if not await _check_premium_access(auth_user_id):
-        raise HTTPException(status_code=403, detail="Coach features require premium subscription")
 
     try:
         from .opening_repertoire import OpeningRepertoireAnalyzer
@@ -13007,15 +13590,11 @@ async def get_opening_detail(
     platform: str,
     opening_family: str,
     color: str = Query('white', description="Color: 'white' or 'black'"),
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: str = Depends(require_coach_premium)
 ):
     """Get detailed analysis for a specific opening. Premium-only."""
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
-    if not auth_user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
-    if not await _check_premium_access(auth_user_id):
-        raise HTTPException(status_code=403, detail="Coach features require premium subscription")
 
     try:
         from .opening_repertoire import OpeningRepertoireAnalyzer
@@ -13039,15 +13618,11 @@ async def get_opening_detail(
 @app.post("/api/v1/coach/openings/drill")
 async def get_drill_positions(
     drill_request: Dict[str, Any],
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: str = Depends(require_coach_premium)
 ):
     """Get drill positions for an opening. Premium-only."""
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
-    if not auth_user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
-    if not await _check_premium_access(auth_user_id):
-        raise HTTPException(status_code=403, detail="Coach features require premium subscription")
 
     try:
         user_id = drill_request.get('user_id', '')
@@ -13076,13 +13651,11 @@ async def get_drill_positions(
 @app.post("/api/v1/coach/openings/drill/complete")
 async def complete_drill(
     completion_data: Dict[str, Any],
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: str = Depends(require_coach_user_id)
 ):
     """Update spaced repetition after a drill. Premium-only."""
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
-    if not auth_user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
 
     try:
         repertoire_id = completion_data.get('repertoire_id', '')
@@ -13113,15 +13686,11 @@ async def complete_drill(
 @app.post("/api/v1/coach/tags")
 async def add_game_tag(
     tag_data: Dict[str, Any],
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: str = Depends(require_coach_premium)
 ):
     """Add a tag to a game. Premium-only."""
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
-    if not auth_user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
-    if not await _check_premium_access(auth_user_id):
-        raise HTTPException(status_code=403, detail="Coach features require premium subscription")
 
     try:
         game_id = tag_data.get('game_id')
@@ -13160,13 +13729,11 @@ async def add_game_tag(
 @app.delete("/api/v1/coach/tags/{tag_id}")
 async def delete_game_tag(
     tag_id: str,
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: str = Depends(require_coach_user_id)
 ):
     """Remove a tag. Premium-only."""
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
-    if not auth_user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
 
     try:
         # Verify ownership
@@ -13201,15 +13768,11 @@ async def delete_game_tag(
 async def get_user_tags(
     user_id: str,
     platform: str,
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: str = Depends(require_coach_premium)
 ):
     """Get all tags for a user. Premium-only."""
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
-    if not auth_user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
-    if not await _check_premium_access(auth_user_id):
-        raise HTTPException(status_code=403, detail="Coach features require premium subscription")
 
     try:
         result = await asyncio.to_thread(
@@ -13233,13 +13796,11 @@ async def get_user_tags(
 @app.get("/api/v1/coach/tags/game/{game_id}")
 async def get_game_tags(
     game_id: str,
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: str = Depends(require_coach_user_id)
 ):
     """Get tags for a specific game. Premium-only."""
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
-    if not auth_user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
 
     try:
         result = await asyncio.to_thread(
@@ -13266,15 +13827,11 @@ async def get_game_tags(
 @app.post("/api/v1/coach/positions")
 async def save_position(
     position_data: Dict[str, Any],
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: str = Depends(require_coach_premium)
 ):
     """Save a chess position. Premium-only."""
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
-    if not auth_user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
-    if not await _check_premium_access(auth_user_id):
-        raise HTTPException(status_code=403, detail="Coach features require premium subscription")
 
     try:
         fen = position_data.get('fen', '').strip()
@@ -13319,15 +13876,11 @@ async def save_position(
 async def get_saved_positions(
     user_id: str,
     platform: str,
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: str = Depends(require_coach_premium)
 ):
     """Get saved positions for a user. Premium-only."""
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
-    if not auth_user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
-    if not await _check_premium_access(auth_user_id):
-        raise HTTPException(status_code=403, detail="Coach features require premium subscription")
 
     try:
         result = await asyncio.to_thread(
@@ -13352,13 +13905,11 @@ async def get_saved_positions(
 async def update_saved_position(
     position_id: str,
     update_data: Dict[str, Any],
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: str = Depends(require_coach_user_id)
 ):
     """Update notes/title of a saved position. Premium-only."""
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
-    if not auth_user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
 
     try:
         # Verify ownership
@@ -13397,13 +13948,11 @@ async def update_saved_position(
 @app.delete("/api/v1/coach/positions/{position_id}")
 async def delete_saved_position(
     position_id: str,
-    auth_user_id: Optional[str] = Depends(get_coach_user_id)
+    auth_user_id: str = Depends(require_coach_user_id)
 ):
     """Delete a saved position. Premium-only."""
     if not supabase_service:
         raise HTTPException(status_code=503, detail="Database not configured")
-    if not auth_user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
 
     try:
         # Verify ownership
@@ -13639,6 +14188,7 @@ async def _get_personalized_theme(auth_user_id: str) -> Optional[Dict[str, Any]]
 @app.get("/api/v1/coach/puzzle-bank/next")
 async def get_next_bank_puzzle(
     auth_user_id: str = Depends(require_coach_user_id),
+    entitlement: Entitlement = Depends(require_coach_entitlement),
     theme: Optional[str] = Query(None, description="Filter by theme (fork, pin, mate, etc.)"),
     mode: str = Query("rated", description="rated|daily|practice"),
     personalized: bool = Query(True, description="Enable weakness-based personalization"),
@@ -13653,7 +14203,7 @@ async def get_next_bank_puzzle(
 
     # Premium check for rated mode only
     if mode == "rated":
-        if not await _check_premium_access(auth_user_id, None):
+        if not entitlement.is_premium:
             raise HTTPException(
                 status_code=403,
                 detail="Unlimited rated puzzles require premium subscription."
@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Upstream HTTP Cache
+On-disk cache for GET requests to Lichess and Chess.com, so re-imports,
+"import more" and repeated game lookups mostly avoid the upstream APIs.
+
+Features:
+- Bodies stored zlib-compressed in a local SQLite file (shared by workers
+  and kept across restarts), bounded by size with least-recently-used eviction
+- The stored byte total is kept by triggers, so a write never scans the
+  table; eviction deletes in bounded batches only once over the budget
+- Fresh entries are served without a request; stale entries are revalidated
+  with a conditional GET (If-None-Match / If-Modified-Since), and a 304 only
+  extends the entry
+- Immutable entries (completed Chess.com month archives) are never revalidated
+- Concurrent identical fetches share one upstream request
+- A stale entry is served when the upstream request fails or is throttled
+- Requests that do reach upstream are paced by the provider's rate governor
+- Cache-Control: no-store responses are never stored
+
+Usage:
+    response = await cached_get(session, url, params=params, ttl=300, platform="lichess")
+    if response.status == 200:
+        data = response.json()
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from .metrics_registry import get_metrics_registry
+from .upstream_governor import get_upstream_governor
+
+_metrics = get_metrics_registry()
+_cache_results = _metrics.counter(
+    "upstream_http_cache_total", "Upstream HTTP cache outcomes", ["platform", "result"]
+)
+
+# Cache outcomes
+HIT = "hit"                  # Fresh entry, no request
+REVALIDATED = "revalidated"  # Stale entry confirmed by a 304
+MISS = "miss"                # Fetched from upstream
+STALE = "stale"              # Upstream failed, stale entry served
+
+# Response headers kept with an entry
+_STORED_HEADERS = ("content-type", "etag", "last-modified")
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS upstream_responses (
+        key TEXT PRIMARY KEY,
+        url TEXT NOT NULL,
+        status INTEGER NOT NULL,
+        headers TEXT NOT NULL,
+        body BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        stored_at REAL NOT NULL,
+        expires_at REAL NOT NULL,
+        immutable INTEGER NOT NULL DEFAULT 0,
+        last_used REAL NOT NULL
+    )
+"""
+
+# Running byte total, kept by triggers so writes never sum the bodies
+_TOTAL_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS upstream_cache_size (id INTEGER PRIMARY KEY CHECK (id = 0), bytes INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO upstream_cache_size (id, bytes) SELECT 0, COALESCE(SUM(size), 0) FROM upstream_responses",
+    """
+    CREATE TRIGGER IF NOT EXISTS upstream_responses_size_insert AFTER INSERT ON upstream_responses
+    BEGIN UPDATE upstream_cache_size SET bytes = bytes + NEW.size WHERE id = 0; END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS upstream_responses_size_delete AFTER DELETE ON upstream_responses
+    BEGIN UPDATE upstream_cache_size SET bytes = bytes - OLD.size WHERE id = 0; END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS upstream_responses_size_update AFTER UPDATE OF size ON upstream_responses
+    BEGIN UPDATE upstream_cache_size SET bytes = bytes + NEW.size - OLD.size WHERE id = 0; END
+    """,
+)
+
+# Entries deleted per statement when evicting
+_EVICT_BATCH = 200
+
+# Seconds between last_used updates of an entry that keeps being read
+_TOUCH_INTERVAL = 60.0
+
+
+@dataclass
+class CachedResponse:
+    """An upstream response, read from the cache or the network."""
+    status: int
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    source: str = MISS
+
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+def chesscom_archive_is_complete(year: int, month: int, now: Optional[datetime] = None) -> bool:
+    """
+    Whether a Chess.com monthly archive can no longer change.
+
+    Games are filed by end time (UTC); a day of grace covers games that end
+    just after midnight and late archive updates.
+    """
+    now = now or datetime.now(timezone.utc)
+    next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    closed_at = datetime(next_year, next_month, 1, tzinfo=timezone.utc).timestamp() + 86400
+    return now.timestamp() >= closed_at
+
+
+async def _send(session, url: str, params, headers, platform: str) -> Tuple[int, Dict[str, str], str, bytes]:
+    """One upstream GET, paced by the provider's governor when it has one."""
+    governor = get_upstream_governor(platform)
+    if governor is None:
+        async with session.get(url, params=params, headers=headers) as upstream:
+            return await _read(upstream)
+    async with governor.request():
+        async with session.get(url, params=params, headers=headers) as upstream:
+            governor.observe(upstream.status, upstream.headers)
+            return await _read(upstream)
+
+
+async def _read(upstream) -> Tuple[int, Dict[str, str], str, bytes]:
+    headers = {name: upstream.headers[name] for name in _STORED_HEADERS if name in upstream.headers}
+    cache_control = upstream.headers.get("cache-control", "").lower()
+    body = await upstream.read() if upstream.status != 304 else b""
+    return upstream.status, headers, cache_control, body
+
+
+def _cache_key(url: str, params: Optional[Dict[str, Any]], headers: Optional[Dict[str, str]]) -> str:
+    accept = (headers or {}).get("Accept", "")
+    query = json.dumps(params or {}, sort_keys=True, default=str)
+    return hashlib.sha256(f"GET {url} {query} {accept}".encode()).hexdigest()
+
+
+class UpstreamCache:
+    """
+    Size-bounded on-disk cache of upstream GET responses.
+
+    Only 200 responses are stored. Entries carry their own freshness: a TTL
+    chosen by the caller per endpoint, or immutable for content that cannot
+    change.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, compress_level: int = 6):
+        """
+        Initialize the cache and create the schema.
+
+        Args:
+            path: SQLite file path
+            max_bytes: Compressed body bytes kept before evicting
+            compress_level: zlib level for stored bodies
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.compress_level = compress_level
+        self._local = threading.local()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats = {HIT: 0, REVALIDATED: 0, MISS: 0, STALE: 0, "deduplicated": 0, "evicted": 0}
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(_SCHEMA)
+            # Covers the eviction scan, which then never reads the bodies
+            conn.execute("DROP INDEX IF EXISTS idx_upstream_responses_last_used")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_upstream_responses_lru ON upstream_responses (last_used, size)")
+            for statement in _TOTAL_SCHEMA:
+                conn.execute(statement)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Storage (blocking; called through asyncio.to_thread)
+    # ------------------------------------------------------------------
+
+    def _load(self, key: str) -> Optional[Tuple[CachedResponse, float, bool]]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT status, headers, body, expires_at, immutable, last_used FROM upstream_responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        status, headers, body, expires_at, immutable, last_used = row
+        now = time.time()
+        # Recency only needs minute precision for eviction; skip the write on most hits
+        if now - last_used >= _TOUCH_INTERVAL:
+            conn.execute("UPDATE upstream_responses SET last_used = ? WHERE key = ?", (now, key))
+        response = CachedResponse(status, zlib.decompress(body), json.loads(headers))
+        return response, expires_at, bool(immutable)
+
+    def _store(self, key: str, url: str, response: CachedResponse, ttl: float, immutable: bool) -> None:
+        body = zlib.compress(response.body, self.compress_level)
+        now = time.time()
+        conn = self._conn()
+        # An upsert rather than INSERT OR REPLACE, whose implicit delete skips the size trigger
+        conn.execute(
+            "INSERT INTO upstream_responses "
+            "(key, url, status, headers, body, size, stored_at, expires_at, immutable, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET url = excluded.url, status = excluded.status, "
+            "headers = excluded.headers, body = excluded.body, size = excluded.size, "
+            "stored_at = excluded.stored_at, expires_at = excluded.expires_at, "
+            "immutable = excluded.immutable, last_used = excluded.last_used",
+            (key, url, response.status, json.dumps(response.headers), body, len(body),
+             now, now + ttl, int(immutable), now)
+        )
+        if self._total(conn) > self.max_bytes:
+            self._evict(conn)
+
+    def _touch(self, key: str, ttl: float, headers: Dict[str, str]) -> None:
+        now = time.time()
+        self._conn().execute(
+            "UPDATE upstream_responses SET expires_at = ?, last_used = ?, headers = ? WHERE key = ?",
+            (now + ttl, now, json.dumps(headers), key)
+        )
+
+    def _total(self, conn: sqlite3.Connection) -> int:
+        row = conn.execute("SELECT bytes FROM upstream_cache_size WHERE id = 0").fetchone()
+        return row[0] if row else 0
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        # Drop least recently used entries down to 90% of the budget, a batch at a time
+        target = int(self.max_bytes * 0.9)
+        while True:
+            excess = self._total(conn) - target
+            if excess <= 0:
+                return
+            rows = conn.execute(
+                "SELECT rowid, size FROM upstream_responses ORDER BY last_used LIMIT ?", (_EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                return
+            victims = []
+            for rowid, size in rows:
+                if excess <= 0:
+                    break
+                victims.append(rowid)
+                excess -= size
+            conn.execute(
+                f"DELETE FROM upstream_responses WHERE rowid IN ({', '.join('?' for _ in victims)})", victims
+            )
+            self._stats["evicted"] += len(victims)
+
+    # ------------------------------------------------------------------
+    # Fetching
+    # ------------------------------------------------------------------
+
+    async def get(
+        self,
+        session,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        ttl: float = 300,
+        immutable: bool = False,
+        platform: str = "unknown",
+    ) -> CachedResponse:
+        """
+        GET a URL through the cache.
+
+        Args:
+            session: aiohttp ClientSession used for upstream requests
+            url: Request URL
+            params: Query parameters (part of the cache key)
+            headers: Request headers (only Accept is part of the cache key)
+            ttl: Seconds a stored response is served without revalidation
+            immutable: Store the response as never changing
+            platform: Label for metrics ('lichess' or 'chess.com')
+
+        Returns:
+            CachedResponse (non-200 responses are returned but not stored)
+        """
+        key = _cache_key(url, params, headers)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self._stats["deduplicated"] += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await self._get(session, key, url, params, headers, ttl, immutable, platform)
+            future.set_result(response)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieve it so a fetch nobody else awaited does not log a warning
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        self._stats[response.source] += 1
+        _cache_results.labels(platform=platform, result=response.source).inc()
+        return response
+
+    async def _get(self, session, key, url, params, headers, ttl, immutable, platform) -> CachedResponse:
+        try:
+            cached = await asyncio.to_thread(self._load, key)
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            print(f"[UPSTREAM_CACHE] Read failed for {url}: {e}")
+            cached = None
+
+        request_headers = dict(headers or {})
+        if cached is not None:
+            response, expires_at, stored_immutable = cached
+            if stored_immutable or time.time() < expires_at:
+                response.source = HIT
+                return response
+            if response.headers.get("etag"):
+                request_headers["If-None-Match"] = response.headers["etag"]
+            if response.headers.get("last-modified"):
+                request_headers["If-Modified-Since"] = response.headers["last-modified"]
+
+        try:
+            status, upstream_headers, cache_control, body = await _send(session, url, params, request_headers, platform)
+        except Exception as e:
+            if cached is None:
+                raise
+            print(f"[UPSTREAM_CACHE] Serving stale {url} after upstream error: {e}")
+            response = cached[0]
+            response.source = STALE
+            return response
+
+        if status == 429 and cached is not None:
+            print(f"[UPSTREAM_CACHE] Serving stale {url} while throttled")
+            response = cached[0]
+            response.source = STALE
+            return response
+
+        if status == 304 and cached is not None:
+            response = cached[0]
+            response.headers.update(upstream_headers)
+            response.source = REVALIDATED
+            await self._write(self._touch, key, ttl, response.headers)
+            return response
+
+        response = CachedResponse(status, body, upstream_headers, MISS)
+        if status == 200 and "no-store" not in cache_control:
+            await self._write(self._store, key, url, response, ttl, immutable)
+        return response
+
+    async def _write(self, func, *args) -> None:
+        try:
+            await asyncio.to_thread(func, *args)
+        except sqlite3.Error as e:
+            # Losing a cache write only costs a future upstream request
+            print(f"[UPSTREAM_CACHE] Write failed: {e}")
+
+    def invalidate(self, url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None) -> bool:
+        """Drop one cached response."""
+        cursor = self._conn().execute("DELETE FROM upstream_responses WHERE key = ?", (_cache_key(url, params, headers),))
+        return cursor.rowcount > 0
+
+    def clear(self) -> int:
+        return self._conn().execute("DELETE FROM upstream_responses").rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._conn()
+        entries = conn.execute("SELECT COUNT(*) FROM upstream_responses").fetchone()[0]
+        return {**self._stats, "entries": entries, "bytes": self._total(conn), "max_bytes": self.max_bytes}
+
+
+# Global cache instance
+_upstream_cache: Optional[UpstreamCache] = None
+_upstream_cache_initialized = False
+_cache_lock = threading.Lock()
+
+
+def get_upstream_cache() -> Optional[UpstreamCache]:
+    """
+    Get the global upstream cache, configured from UPSTREAM_CACHE_PATH.
+
+    Defaults to a SQLite file next to the server; set UPSTREAM_CACHE_PATH=off
+    to always go to the network. UPSTREAM_CACHE_MAX_MB bounds the stored
+    (compressed) bytes. A cache that cannot be opened is disabled rather than
+    blocking startup.
+
+    Returns:
+        UpstreamCache instance, or None when caching is disabled or unavailable
+    """
+    global _upstream_cache, _upstream_cache_initialized
+
+    if not _upstream_cache_initialized:
+        with _cache_lock:
+            if not _upstream_cache_initialized:
+                default_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "upstream_cache.db")
+                path = os.getenv("UPSTREAM_CACHE_PATH", default_path)
+                if path.lower() not in ("", "off", "none"):
+                    try:
+                        _upstream_cache = UpstreamCache(
+                            path,
+                            max_bytes=int(float(os.getenv("UPSTREAM_CACHE_MAX_MB", "256")) * 1024 * 1024)
+                        )
+                        print(f"[UPSTREAM_CACHE] Caching upstream responses in {path}")
+                    except Exception as e:
+                        print(f"[UPSTREAM_CACHE] Could not open {path} ({e}); upstream caching disabled")
+                _upstream_cache_initialized = True
+
+    return _upstream_cache
+
+
+async def cached_get(session, url: str, **kwargs) -> CachedResponse:
+    """
+    GET through the global upstream cache, or straight from upstream when it is disabled.
+
+    Takes the same arguments as UpstreamCache.get().
+    """
+    cache = get_upstream_cache()
+    if cache is not None:
+        return await cache.get(session, url, **kwargs)
+    status, headers, _, body = await _send(
+        session, url, kwargs.get("params"), kwargs.get("headers"), kwargs.get("platform", "unknown")
+    )
+    return CachedResponse(status, body, headers, MISS)
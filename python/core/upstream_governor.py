@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Adaptive Upstream Rate Governor
+Paces requests to Lichess and Chess.com at the highest rate each provider
+accepts, shared by every fetch path and every concurrent import in the process.
+
+The governor is a token bucket whose refill rate adapts with AIMD (additive
+increase, multiplicative decrease):
+- Each successful response raises the rate by a small step, up to max_rate
+- A 429 (or 503 with Retry-After) halves it, down to min_rate, and pauses all
+  requests to that provider for Retry-After seconds (a default backoff when
+  the header is missing). 429s from requests already in flight only extend
+  the pause instead of halving again.
+- X-RateLimit-Remaining / X-RateLimit-Reset headers, when a provider sends
+  them, cap the rate at what is left of the current window
+
+Slots are reserved in arrival order (the bucket may go negative), so waiting
+is O(1), concurrent imports share the budget fairly and none of them triggers
+429s that stall the others. A concurrency limit bounds requests in flight.
+
+Usage:
+    governor = get_upstream_governor("lichess")
+    async with governor.request():
+        async with session.get(url) as response:
+            governor.observe(response.status, response.headers)
+"""
+
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from .metrics_registry import get_metrics_registry
+
+_metrics = get_metrics_registry()
+_throttled = _metrics.counter(
+    "upstream_throttled_total", "Upstream 429 responses seen by the rate governor", ["platform"]
+)
+_governor_wait = _metrics.histogram(
+    "upstream_governor_wait_seconds", "Time requests waited for an upstream slot", ["platform"]
+)
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - (now if now is not None else time.time()))
+    except (TypeError, ValueError):
+        return None
+
+
+class UpstreamGovernor:
+    """
+    AIMD-adjusted token bucket for one upstream provider.
+
+    Also provides the wait_for_token()/tokens interface of the client's
+    RateLimiter so it can replace it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        min_rate: float,
+        max_rate: float,
+        burst: int = 2,
+        max_concurrency: int = 2,
+        increase: float = 0.05,
+        decrease: float = 0.5,
+        default_backoff: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not 0 < min_rate <= rate <= max_rate:
+            raise ValueError(f"Governor {name}: need 0 < min_rate <= rate <= max_rate")
+        self.name = name
+        self.rate = float(rate)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.increase = increase
+        self.decrease = decrease
+        self.default_backoff = default_backoff
+        self.clock = clock
+
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._stats = {"requests": 0, "throttled": 0, "decreases": 0, "waited_seconds": 0.0}
+
+    # ------------------------------------------------------------------
+    # Pacing
+    # ------------------------------------------------------------------
+
+    def _refill(self, now: float) -> None:
+        # While paused after a 429, _updated lies in the future and nothing refills
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        """Tokens available now (negative while reservations are queued)."""
+        with self._lock:
+            self._refill(self.clock())
+            return self._tokens
+
+    def reserve(self, timeout: Optional[float] = None) -> Optional[float]:
+        """
+        Reserve the next slot.
+
+        Returns:
+            Seconds to wait before sending, or None if that exceeds timeout
+            (nothing is reserved then)
+        """
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            wait = max(0.0, self._updated - now) + max(0.0, (1 - self._tokens) / self.rate)
+            if timeout is not None and wait > timeout:
+                return None
+            self._tokens -= 1
+            self._stats["requests"] += 1
+            self._stats["waited_seconds"] += wait
+            return wait
+
+    async def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the next slot; False if it is further away than timeout."""
+        while True:
+            wait = self.reserve(timeout)
+            if wait is None:
+                return False
+            _governor_wait.labels(platform=self.name).observe(wait)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            # A 429 while we slept pauses the provider; queue again behind the pause
+            if self.clock() >= self._blocked_until:
+                return True
+
+    async def wait_for_token(self, tokens: int = 1, timeout: float = 30.0) -> bool:
+        """RateLimiter-compatible acquire."""
+        for _ in range(tokens):
+            if not await self.acquire(timeout):
+                return False
+        return True
+
+    @asynccontextmanager
+    async def request(self):
+        """Hold a concurrency slot and wait for a rate slot around one upstream request."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            await self.acquire()
+            yield self
+
+    # ------------------------------------------------------------------
+    # Feedback
+    # ------------------------------------------------------------------
+
+    def observe(self, status: int, headers: Optional[Mapping[str, Any]] = None) -> None:
+        """Adapt the rate to one upstream response."""
+        headers = headers or {}
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+
+            retry_after = parse_retry_after(headers.get("Retry-After") or headers.get("retry-after"))
+            if status == 429 or (status == 503 and retry_after is not None):
+                self._stats["throttled"] += 1
+                _throttled.labels(platform=self.name).inc()
+                if now >= self._blocked_until:
+                    # First 429 of a burst: back off. Later ones came from requests already in flight.
+                    self.rate = max(self.min_rate, self.rate * self.decrease)
+                    self._stats["decreases"] += 1
+                    print(f"[GOVERNOR] {self.name} throttled (HTTP {status}); rate lowered to {self.rate:.2f} req/s")
+                pause = retry_after if retry_after is not None else self.default_backoff
+                self._blocked_until = max(self._blocked_until, now + pause)
+                # Restart the bucket at the end of the pause with one token, so
+                # waiting requests resume one interval apart instead of in a burst
+                self._updated = self._blocked_until
+                self._tokens = 1.0
+                return
+
+            if status < 500:
+                self.rate = min(self.max_rate, self.rate + self.increase)
+            window_cap = self._header_cap(headers)
+            if window_cap is not None:
+                self.rate = min(self.rate, max(self.min_rate, window_cap))
+
+    @staticmethod
+    def _header_cap(headers: Mapping[str, Any]) -> Optional[float]:
+        """Rate that spreads the remaining window budget until its reset, if advertised."""
+        remaining = headers.get("X-RateLimit-Remaining") or headers.get("x-ratelimit-remaining")
+        reset = headers.get("X-RateLimit-Reset") or headers.get("x-ratelimit-reset")
+        if remaining is None or reset is None:
+            return None
+        try:
+            remaining, reset = float(remaining), float(reset)
+        except (TypeError, ValueError):
+            return None
+        if reset > 1e9:  # Epoch timestamp rather than seconds left
+            reset -= time.time()
+        return remaining / max(reset, 1.0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            return {
+                **self._stats,
+                "waited_seconds": round(self._stats["waited_seconds"], 3),
+                "rate": round(self.rate, 3),
+                "tokens": round(self._tokens, 2),
+                "blocked_for": round(max(0.0, self._blocked_until - now), 2),
+            }
+
+
+# Defaults per provider: (rate, min_rate, max_rate, burst, max_concurrency).
+# Lichess asks clients to keep requests few and sequential and to wait a full
+# minute after a 429; Chess.com allows serial requests freely and may
+# throttle parallel ones.
+_PROVIDER_DEFAULTS = {
+    "lichess": (1.0, 0.2, 4.0, 2, 1),
+    "chess.com": (4.0, 0.5, 12.0, 4, 4),
+}
+
+_governors: Dict[str, UpstreamGovernor] = {}
+_governors_lock = threading.Lock()
+
+
+def get_upstream_governor(platform: str) -> Optional[UpstreamGovernor]:
+    """
+    Get the process-wide governor of a provider ('lichess' or 'chess.com').
+
+    Configured from <PREFIX>_RATE, <PREFIX>_MIN_RATE, <PREFIX>_MAX_RATE,
+    <PREFIX>_BURST and <PREFIX>_MAX_CONCURRENCY with prefix LICHESS or
+    CHESSCOM (rates in requests per second).
+
+    Returns:
+        UpstreamGovernor, or None for other platforms
+    """
+    if platform not in _PROVIDER_DEFAULTS:
+        return None
+    governor = _governors.get(platform)
+    if governor is None:
+        with _governors_lock:
+            governor = _governors.get(platform)
+            if governor is None:
+                prefix = "LICHESS" if platform == "lichess" else "CHESSCOM"
+                rate, min_rate, max_rate, burst, concurrency = _PROVIDER_DEFAULTS[platform]
+                governor = _governors[platform] = UpstreamGovernor(
+                    platform,
+                    rate=float(os.getenv(f"{prefix}_RATE", str(rate))),
+                    min_rate=float(os.getenv(f"{prefix}_MIN_RATE", str(min_rate))),
+                    max_rate=float(os.getenv(f"{prefix}_MAX_RATE", str(max_rate))),
+                    burst=int(os.getenv(f"{prefix}_BURST", str(burst))),
+                    max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", str(concurrency))),
+                )
+    return governor
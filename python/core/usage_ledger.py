@@ -0,0 +1,386 @@
+"""
+Write-Behind Usage Ledger
+Records usage increments in process and flushes them to the database in
+aggregated batches, so request and job completion paths no longer wait on a
+row-locking RPC per action.
+
+Features:
+- record() is synchronous and cheap: it adds to an in-memory delta per
+  (user or IP, action) and appends one line to a local journal
+- flush() applies the aggregated deltas (one RPC per user/IP and action per
+  batch) on a timer and on shutdown; failed deltas stay pending for up to
+  max_attempts flushes, then move to a dead-letter file next to the journal
+  and no longer count toward limits
+- pending() exposes unflushed counts so limit checks can enforce quotas
+  optimistically against a cached snapshot plus local usage
+- Crash safety: the journal always holds the unflushed deltas and is replayed
+  on startup. Delivery is at-least-once: a crash between a successful flush
+  and the journal rewrite applies that batch again on restart.
+- Each worker process locks its own journal slot (usage_ledger.jsonl,
+  usage_ledger.1.jsonl, ...) and reclaims a free slot after a restart
+- A reconcile callback runs on a slower timer with the users/IPs touched since
+  the last run (UsageTracker compares them with check_usage_limits)
+
+Usage:
+    ledger = UsageLedger(apply=tracker._apply_delta, journal_path="data/usage_ledger.jsonl")
+    ledger.record(USER, user_id, 'analyze', 3)
+    await ledger.start()
+    ...
+    await ledger.stop()  # Final flush
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+# Journal slots are claimed with an advisory lock where available (POSIX)
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+    fcntl = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Ledger subjects
+USER = "user"
+ANONYMOUS = "anonymous"
+
+# increment_usage_atomic accepts at most this many per call
+MAX_DELTA_PER_CALL = 1000
+
+# Journal slots tried per process before giving up on journaling
+MAX_JOURNAL_SLOTS = 32
+
+# Consecutive failed flushes before a delta is dead-lettered
+DEFAULT_MAX_ATTEMPTS = 5
+
+DeltaKey = Tuple[str, str, str]  # (subject, user id or IP, action type)
+
+
+def _slot_path(path: str, slot: int) -> str:
+    if slot == 0:
+        return path
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{slot}{ext}"
+
+
+def _dead_letter_path(journal_path: str) -> str:
+    stem, ext = os.path.splitext(journal_path)
+    return f"{stem}.dead{ext}"
+
+
+class UsageLedger:
+    """
+    In-process usage counters with journaled write-behind flushing.
+
+    apply(subject, key, action_type, count) writes one delta to the database
+    and returns True on success. on_applied(subject, key) runs right after a
+    delta is applied (e.g. to drop a cached quota snapshot). on_reconcile
+    receives the (subject, key) pairs touched since its previous run.
+
+    A delta that fails max_attempts flushes in a row (apply returns False or
+    raises, e.g. a deleted user) is dropped from pending usage and appended
+    to the dead-letter file, so it neither retries forever nor keeps
+    inflating the user's counted usage.
+    """
+
+    def __init__(
+        self,
+        apply: Callable[[str, str, str, int], Awaitable[bool]],
+        journal_path: Optional[str] = None,
+        flush_interval: float = 5.0,
+        reconcile_interval: float = 60.0,
+        on_applied: Optional[Callable[[str, str], None]] = None,
+        on_reconcile: Optional[Callable[[Set[Tuple[str, str]]], Awaitable[None]]] = None,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ):
+        if flush_interval <= 0:
+            raise ValueError("flush_interval must be positive")
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        self.apply = apply
+        self.max_attempts = max_attempts
+        self.flush_interval = flush_interval
+        self.reconcile_interval = reconcile_interval
+        self.on_applied = on_applied
+        self.on_reconcile = on_reconcile
+
+        self._pending: Dict[DeltaKey, int] = {}
+        self._in_flight: Dict[DeltaKey, int] = {}
+        self._attempts: Dict[DeltaKey, int] = {}  # Consecutive failed flushes per pending delta
+        self._touched: Set[Tuple[str, str]] = set()
+        self._lock = threading.Lock()
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.journal_path: Optional[str] = None
+        self._journal = None
+        self._stats = {
+            "recorded": 0,
+            "recovered": 0,
+            "flushes": 0,
+            "deltas_applied": 0,
+            "units_applied": 0,
+            "apply_failures": 0,
+            "dead_lettered": 0,
+            "journal_errors": 0,
+        }
+        if journal_path:
+            self._open_journal(journal_path)
+
+    # ------------------------------------------------------------------
+    # Journal
+    # ------------------------------------------------------------------
+
+    def _open_journal(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        for slot in range(MAX_JOURNAL_SLOTS):
+            candidate = _slot_path(path, slot)
+            handle = open(candidate, "a+", encoding="utf-8")
+            if FCNTL_AVAILABLE:
+                try:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    handle.close()
+                    continue
+            self.journal_path = candidate
+            self._journal = handle
+            self._recover()
+            return
+        logger.warning(f"[USAGE_LEDGER] No free journal slot for {path}; unflushed usage will not survive a crash")
+
+    def _recover(self) -> None:
+        self._journal.seek(0)
+        for line in self._journal:
+            try:
+                entry = json.loads(line)
+                key = (entry["subject"], entry["key"], entry["action"])
+                self._pending[key] = self._pending.get(key, 0) + int(entry["count"])
+                if entry.get("attempts"):
+                    self._attempts[key] = max(self._attempts.get(key, 0), int(entry["attempts"]))
+                self._touched.add(key[:2])
+                self._stats["recovered"] += int(entry["count"])
+            except (ValueError, KeyError, TypeError):
+                continue  # Torn last line after a crash
+        if self._pending:
+            logger.warning(
+                f"[USAGE_LEDGER] Recovered {self._stats['recovered']} unflushed usage units "
+                f"({len(self._pending)} deltas) from {self.journal_path}"
+            )
+
+    def _journal_write(self, subject: str, key: str, action_type: str, count: int) -> None:
+        if self._journal is None:
+            return
+        try:
+            self._journal.write(json.dumps({"subject": subject, "key": key, "action": action_type, "count": count}) + "\n")
+            self._journal.flush()
+        except OSError as e:
+            self._stats["journal_errors"] += 1
+            logger.error(f"[USAGE_LEDGER] Journal write failed: {e}")
+
+    def _rewrite_journal(self) -> None:
+        """Replace the journal with the current pending deltas (caller holds the lock)."""
+        if self._journal is None:
+            return
+        try:
+            self._journal.seek(0)
+            self._journal.truncate()
+            for delta_key, count in self._pending.items():
+                subject, key, action_type = delta_key
+                entry = {"subject": subject, "key": key, "action": action_type, "count": count}
+                if self._attempts.get(delta_key):
+                    entry["attempts"] = self._attempts[delta_key]
+                self._journal.write(json.dumps(entry) + "\n")
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+        except OSError as e:
+            self._stats["journal_errors"] += 1
+            logger.error(f"[USAGE_LEDGER] Journal rewrite failed: {e}")
+
+    def _dead_letter(self, delta_key: DeltaKey, count: int, attempts: int, error: str) -> None:
+        """Give up on a delta: log it and keep it in the dead-letter file for manual replay (caller holds the lock)."""
+        subject, key, action_type = delta_key
+        self._stats["dead_lettered"] += 1
+        logger.error(
+            f"[USAGE_LEDGER] Dropping {count} {action_type} usage for {subject} {key} "
+            f"after {attempts} failed flushes: {error}"
+        )
+        if self.journal_path is None:
+            return
+        try:
+            with open(_dead_letter_path(self.journal_path), "a", encoding="utf-8") as handle:
+                handle.write(json.dumps({
+                    "subject": subject, "key": key, "action": action_type, "count": count,
+                    "attempts": attempts, "error": error,
+                }) + "\n")
+        except OSError as e:
+            self._stats["journal_errors"] += 1
+            logger.error(f"[USAGE_LEDGER] Dead-letter write failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def record(self, subject: str, key: str, action_type: str, count: int = 1) -> None:
+        """Record usage locally; it reaches the database with the next flush."""
+        delta_key = (subject, key, action_type)
+        with self._lock:
+            self._pending[delta_key] = self._pending.get(delta_key, 0) + count
+            self._touched.add((subject, key))
+            self._stats["recorded"] += count
+            self._journal_write(subject, key, action_type, count)
+
+    def pending(self, subject: str, key: str, action_type: str) -> int:
+        """Usage recorded locally but not yet applied to the database."""
+        delta_key = (subject, key, action_type)
+        with self._lock:
+            return self._pending.get(delta_key, 0) + self._in_flight.get(delta_key, 0)
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+
+    async def flush(self) -> int:
+        """
+        Apply all pending deltas.
+
+        Returns:
+            Number of deltas applied (failed ones stay pending)
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            with self._lock:
+                batch = self._pending
+                self._pending = {}
+                for delta_key, count in batch.items():
+                    self._in_flight[delta_key] = self._in_flight.get(delta_key, 0) + count
+            if not batch:
+                return 0
+
+            applied = 0
+            for delta_key, count in batch.items():
+                subject, key, action_type = delta_key
+                remaining = count
+                error = "apply returned False"
+                try:
+                    while remaining > 0:
+                        chunk = min(remaining, MAX_DELTA_PER_CALL)
+                        if not await self.apply(subject, key, action_type, chunk):
+                            break
+                        remaining -= chunk
+                except Exception as e:
+                    error = str(e)
+                    logger.error(f"[USAGE_LEDGER] Applying {action_type} usage for {subject} {key} failed: {e}")
+
+                with self._lock:
+                    self._in_flight[delta_key] -= count
+                    if self._in_flight[delta_key] <= 0:
+                        del self._in_flight[delta_key]
+                    if remaining:
+                        self._stats["apply_failures"] += 1
+                        attempts = self._attempts.get(delta_key, 0) + 1
+                        if attempts >= self.max_attempts:
+                            # Units recorded since this flush started get their own attempts
+                            self._attempts.pop(delta_key, None)
+                            self._dead_letter(delta_key, remaining, attempts, error)
+                        else:
+                            self._attempts[delta_key] = attempts
+                            self._pending[delta_key] = self._pending.get(delta_key, 0) + remaining
+                    else:
+                        self._attempts.pop(delta_key, None)
+                    if remaining < count:
+                        self._stats["units_applied"] += count - remaining
+                        if not remaining:
+                            self._stats["deltas_applied"] += 1
+                            applied += 1
+                        # Applied units left the local delta; refresh snapshots that exclude them
+                        if self.on_applied:
+                            try:
+                                self.on_applied(subject, key)
+                            except Exception as e:
+                                logger.warning(f"[USAGE_LEDGER] on_applied failed: {e}")
+
+            with self._lock:
+                self._stats["flushes"] += 1
+                self._rewrite_journal()
+            return applied
+
+    async def _run(self) -> None:
+        since_reconcile = 0.0
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"[USAGE_LEDGER] Flush failed: {e}")
+
+            since_reconcile += self.flush_interval
+            if self.on_reconcile and self.reconcile_interval > 0 and since_reconcile >= self.reconcile_interval:
+                since_reconcile = 0.0
+                with self._lock:
+                    touched, self._touched = self._touched, set()
+                if touched:
+                    try:
+                        await self.on_reconcile(touched)
+                    except Exception as e:
+                        logger.error(f"[USAGE_LEDGER] Reconcile failed: {e}")
+
+    async def start(self) -> None:
+        """Start periodic flushing (and apply anything recovered from the journal)."""
+        if self._task is None:
+            if self._pending:
+                await self.flush()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the timer and flush what is left."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def close(self) -> None:
+        """Release the journal slot (pending deltas stay journaled)."""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                **self._stats,
+                "pending_deltas": len(self._pending),
+                "pending_units": sum(self._pending.values()) + sum(self._in_flight.values()),
+            }
+
+
+def ledger_settings_from_env() -> Optional[Dict[str, object]]:
+    """
+    UsageLedger settings from the environment, or None when write-behind is off.
+
+    USAGE_LEDGER_ENABLED (default true), USAGE_LEDGER_JOURNAL (default
+    data/usage_ledger.jsonl next to the server, "off" disables journaling),
+    USAGE_LEDGER_FLUSH_INTERVAL (seconds, default 5),
+    USAGE_LEDGER_RECONCILE_INTERVAL (seconds, default 60) and
+    USAGE_LEDGER_MAX_ATTEMPTS (failed flushes before a delta is dropped, default 5).
+    """
+    if os.getenv('USAGE_LEDGER_ENABLED', 'true').lower() != 'true':
+        return None
+    default_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "usage_ledger.jsonl")
+    journal_path = os.getenv('USAGE_LEDGER_JOURNAL', default_path)
+    return {
+        "journal_path": None if journal_path.lower() in ("", "off", "none") else journal_path,
+        "flush_interval": float(os.getenv('USAGE_LEDGER_FLUSH_INTERVAL', '5')),
+        "reconcile_interval": float(os.getenv('USAGE_LEDGER_RECONCILE_INTERVAL', '60')),
+        "max_attempts": int(os.getenv('USAGE_LEDGER_MAX_ATTEMPTS', str(DEFAULT_MAX_ATTEMPTS))),
+    }
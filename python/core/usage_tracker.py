@@ -6,13 +6,20 @@ Security Features:
 - Race condition prevention with database-level locking
 - Input validation
 - Fail-safe error handling
+
+With write-behind enabled (enable_write_behind), increments are recorded in a
+local UsageLedger and flushed in batches; limit checks add the unflushed usage
+to the database (or cached entitlement) counts.
 """
 
 from datetime import datetime, timedelta, timezone
-from typing import Dict, Optional, Tuple
+from typing import Dict, Optional, Set, Tuple
 import logging
 import asyncio
 
+from .entitlements import is_auth_user_id
+from .usage_ledger import ANONYMOUS, DEFAULT_MAX_ATTEMPTS, USER, UsageLedger
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,12 +29,14 @@ class UsageTracker:
     Implements 24-hour rolling window for fair limit enforcement.
     """
 
-    def __init__(self, supabase_client):
+    def __init__(self, supabase_client, entitlements=None):
         """
         Initialize usage tracker with Supabase client.
 
         Args:
             supabase_client: Supabase client instance (should use service role key)
+            entitlements: Optional EntitlementService; limit checks then use its
+                cached entitlements and increments invalidate them
 
         Raises:
             ValueError: If supabase_client is None
@@ -35,6 +44,115 @@ class UsageTracker:
         if supabase_client is None:
             raise ValueError("Supabase client is required")
         self.supabase = supabase_client
+        self.entitlements = entitlements
+        self.ledger: Optional[UsageLedger] = None
+        self.reconcile_drift = 0
+
+    def enable_write_behind(
+        self,
+        journal_path: Optional[str] = None,
+        flush_interval: float = 5.0,
+        reconcile_interval: float = 60.0,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    ) -> UsageLedger:
+        """
+        Record increments in a local ledger and flush them in batches.
+
+        Args:
+            journal_path: Journal file for crash recovery (None = memory only)
+            flush_interval: Seconds between flushes
+            reconcile_interval: Seconds between reconciliations with check_usage_limits
+            max_attempts: Failed flushes before a delta is dead-lettered
+
+        Returns:
+            The UsageLedger (started by start())
+        """
+        self.ledger = UsageLedger(
+            apply=self._apply_delta,
+            journal_path=journal_path,
+            flush_interval=flush_interval,
+            reconcile_interval=reconcile_interval,
+            max_attempts=max_attempts,
+            on_applied=self._on_delta_applied,
+            on_reconcile=self.reconcile_usage,
+        )
+        return self.ledger
+
+    async def start(self) -> None:
+        """Start background flushing when write-behind is enabled."""
+        if self.ledger:
+            await self.ledger.start()
+
+    async def stop(self) -> None:
+        """Flush outstanding usage and stop background flushing."""
+        if self.ledger:
+            await self.ledger.stop()
+
+    async def _apply_delta(self, subject: str, key: str, action_type: str, count: int) -> bool:
+        if subject == USER:
+            return await self._increment_usage_now(key, action_type, count)
+        return await self._increment_anonymous_usage_now(key, action_type, count)
+
+    def _on_delta_applied(self, subject: str, key: str) -> None:
+        if subject == USER and self.entitlements is not None:
+            self.entitlements.invalidate(key)
+
+    def _with_pending(self, subject: str, key: str, action_type: str, can_proceed: bool, stats: Dict) -> Tuple[bool, Dict]:
+        """Add unflushed ledger usage to limit-check stats and re-decide against the limit."""
+        if self.ledger is None:
+            return can_proceed, stats
+        pending = self.ledger.pending(subject, key, action_type)
+        limit = stats.get('import_limit' if action_type == 'import' else 'analysis_limit')
+        if not pending or limit is None:
+            return can_proceed, stats
+
+        counter = 'current_imports' if action_type == 'import' else 'current_analyses'
+        current = (stats.get(counter) or 0) + pending
+        can_proceed = can_proceed and current < limit
+        stats = {**stats, counter: current, 'pending_usage': pending, 'can_proceed': can_proceed}
+        if not can_proceed:
+            label = 'Import' if action_type == 'import' else 'Analysis'
+            stats['reason'] = f'{label} limit reached: {current}/{limit}'
+        return can_proceed, stats
+
+    async def reconcile_usage(self, touched: Set[Tuple[str, str]]) -> int:
+        """
+        Compare cached quota snapshots of recently active users with check_usage_limits.
+
+        Snapshots that disagree with the database (usage recorded by another
+        worker, manual resets) are dropped so the next check reloads them.
+
+        Args:
+            touched: (subject, key) pairs recorded since the last reconciliation
+
+        Returns:
+            Number of snapshots that had drifted
+        """
+        if self.entitlements is None:
+            return 0
+        drifted = 0
+        for subject, key in touched:
+            if subject != USER:
+                continue
+            cached = self.entitlements.peek(key)
+            if cached is None:
+                continue
+            result = await asyncio.to_thread(
+                lambda key=key: self.supabase.rpc(
+                    'check_usage_limits',
+                    {'p_user_id': key, 'p_action_type': 'import'}
+                ).execute()
+            )
+            data = result.data or {}
+            if 'current_imports' not in data:
+                continue
+            if (data.get('current_imports'), data.get('current_analyses')) != (cached.current_imports, cached.current_analyses):
+                self.entitlements.invalidate(key)
+                drifted += 1
+        if drifted:
+            self.reconcile_drift += drifted
+            logger.info(f"[USAGE_LEDGER] Reconciled usage: {drifted} cached snapshot(s) refreshed")
+        return drifted
 
     async def check_import_limit(self, user_id: str) -> Tuple[bool, Dict]:
         """
@@ -86,6 +204,14 @@ class UsageTracker:
             logger.error(f"Invalid action_type: {action_type}")
             return False, {'error': 'Invalid action type'}
 
+        if self.entitlements is not None and is_auth_user_id(user_id):
+            try:
+                entitlement = await self.entitlements.resolve(user_id)
+                can_proceed, stats = entitlement.usage_check(action_type)
+                return self._with_pending(USER, user_id, action_type, can_proceed, stats)
+            except Exception as e:
+                logger.warning(f"Entitlement lookup failed for user {user_id}, checking limits directly: {e}")
+
         try:
             # Call database function to check limits
             result = await asyncio.to_thread(
@@ -96,7 +222,7 @@ class UsageTracker:
             )
 
             if result.data:
-                return result.data.get('can_proceed', False), result.data
+                return self._with_pending(USER, user_id, action_type, result.data.get('can_proceed', False), result.data)
 
             # Default to denying if check fails (fail-closed for security)
             logger.warning(f"Usage limit check failed for user {user_id}, denying by default")
@@ -147,6 +273,13 @@ class UsageTracker:
         if count > 1000:
             raise ValueError("count cannot exceed 1000 in a single operation")
 
+        if self.ledger is not None:
+            self.ledger.record(USER, user_id, action_type, count)
+            return True
+        return await self._increment_usage_now(user_id, action_type, count)
+
+    async def _increment_usage_now(self, user_id: str, action_type: str, count: int) -> bool:
+        """Apply an increment with the increment_usage_atomic RPC."""
         try:
             result = await asyncio.to_thread(
                 lambda: self.supabase.rpc(
@@ -154,6 +287,8 @@ class UsageTracker:
                     {'p_user_id': user_id, 'p_action_type': action_type, 'p_count': count}
                 ).execute()
             )
+            if self.entitlements is not None and self.ledger is None:
+                self.entitlements.invalidate(user_id)
 
             if result.data and result.data.get('success'):
                 logger.info(
@@ -480,14 +615,16 @@ class UsageTracker:
             )
 
             if result.data:
-                can_proceed = result.data.get('can_proceed', False)
+                can_proceed, stats = self._with_pending(
+                    ANONYMOUS, ip_address, action_type, result.data.get('can_proceed', False), result.data
+                )
                 logger.info(
                     f"Anonymous {action_type} limit check for IP {ip_address}: "
                     f"can_proceed={can_proceed}, "
-                    f"current={result.data.get('current_imports' if action_type == 'import' else 'current_analyses', 0)}, "
-                    f"limit={result.data.get('import_limit' if action_type == 'import' else 'analysis_limit', 0)}"
+                    f"current={stats.get('current_imports' if action_type == 'import' else 'current_analyses', 0)}, "
+                    f"limit={stats.get('import_limit' if action_type == 'import' else 'analysis_limit', 0)}"
                 )
-                return can_proceed, result.data
+                return can_proceed, stats
 
             logger.warning(f"Anonymous usage limit check failed for IP {ip_address}, denying by default")
             return False, {'message': 'Usage check failed'}
@@ -523,6 +660,13 @@ class UsageTracker:
             logger.error(f"Invalid count: {count}")
             return False
 
+        if self.ledger is not None:
+            self.ledger.record(ANONYMOUS, ip_address, action_type, count)
+            return True
+        return await self._increment_anonymous_usage_now(ip_address, action_type, count)
+
+    async def _increment_anonymous_usage_now(self, ip_address: str, action_type: str, count: int) -> bool:
+        """Apply an anonymous increment with the increment_anonymous_usage RPC."""
         try:
             result = await asyncio.to_thread(
                 lambda: self.supabase.rpc(
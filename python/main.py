@@ -20,9 +20,16 @@ if __name__ == "__main__":
     parser.add_argument("--host", default="0.0.0.0", help="Host to bind to")
     parser.add_argument("--port", type=int, default=8002, help="Port to bind to")
     parser.add_argument("--reload", action="store_true", help="Enable auto-reload")
+    parser.add_argument("--gateway", action="store_true",
+                        help="Run engine, import and analytics routes as separate process groups behind a local gateway")
     
     args = parser.parse_args()
     
+    if args.gateway:
+        from core.service_gateway import run_gateway
+        run_gateway(args.host, args.port)
+        sys.exit(0)
+
     print(f"Starting Unified Chess Analysis API Server v3.0 on {args.host}:{args.port}")
     print("This server provides a single, comprehensive API for all chess analysis operations!")
     print("Available analysis types: basic, stockfish, deep")
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark Corpus
+Fixed PGN corpora (bullet, blitz, classical) for the analysis benchmarks.
+
+The PGN files in corpus/ are committed so every run analyzes exactly the same
+games. They were produced by generate_corpus() below: each game starts from a
+named opening line and continues with seeded self-play that picks among the
+best few moves by the heuristic evaluator, so the games are varied, legal and
+reach middlegames and endgames like real games do. Clock comments follow the
+time control of the corpus. The blitz corpus also carries the Opera Game as a
+known reference game.
+
+Regenerating rewrites the files; do that only together with a new baseline
+(python run_benchmarks.py --regenerate-corpus --save-baseline).
+"""
+
+import io
+import random
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import chess
+import chess.pgn
+
+# Add the python directory to the path before importing application modules
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from core.heuristic_evaluator import evaluate_board
+
+CORPUS_DIR = Path(__file__).parent / "corpus"
+
+# Time control (seconds + increment), game count, ply cap and seed per corpus
+CORPORA: Dict[str, Dict[str, int]] = {
+    "bullet": {"base": 60, "increment": 0, "games": 8, "max_plies": 70, "seed": 1001},
+    "blitz": {"base": 180, "increment": 2, "games": 8, "max_plies": 90, "seed": 2002},
+    "classical": {"base": 1800, "increment": 30, "games": 6, "max_plies": 120, "seed": 3003},
+}
+
+# (ECO, opening name, moves) the self-play games start from
+OPENINGS = [
+    ("B90", "Sicilian Defense, Najdorf Variation", "e4 c5 Nf3 d6 d4 cxd4 Nxd4 Nf6 Nc3 a6"),
+    ("C50", "Italian Game", "e4 e5 Nf3 Nc6 Bc4 Bc5"),
+    ("C65", "Ruy Lopez, Berlin Defense", "e4 e5 Nf3 Nc6 Bb5 Nf6"),
+    ("D37", "Queen's Gambit Declined", "d4 d5 c4 e6 Nc3 Nf6 Nf3 Be7"),
+    ("E60", "King's Indian Defense", "d4 Nf6 c4 g6 Nc3 Bg7 e4 d6"),
+    ("B12", "Caro-Kann Defense, Advance Variation", "e4 c6 d4 d5 e5 Bf5"),
+    ("C02", "French Defense, Advance Variation", "e4 e6 d4 d5 e5 c5"),
+    ("A20", "English Opening", "c4 e5 Nc3 Nf6 g3 d5"),
+    ("D02", "London System", "d4 d5 Nf3 Nf6 Bf4 e6"),
+    ("B01", "Scandinavian Defense", "e4 d5 exd5 Qxd5 Nc3 Qa5"),
+]
+
+OPERA_GAME = """[Event "Paris"]
+[Site "Paris FRA"]
+[Date "1858.11.02"]
+[White "bench_user"]
+[Black "Duke Karl / Count Isouard"]
+[Result "1-0"]
+[ECO "C41"]
+[Opening "Philidor Defense"]
+[TimeControl "180+2"]
+
+1. e4 e5 2. Nf3 d6 3. d4 Bg4 4. dxe5 Bxf3 5. Qxf3 dxe5 6. Bc4 Nf6 7. Qb3 Qe7
+8. Nc3 c6 9. Bg5 b5 10. Nxb5 cxb5 11. Bxb5+ Nbd7 12. O-O-O Rd8 13. Rxd7 Rxd7
+14. Rd1 Qe6 15. Bxd7+ Nxd7 16. Qb8+ Nxb8 17. Rd8# 1-0
+"""
+
+# The user whose games are analyzed (plays white in even games, black in odd ones)
+BENCH_USER = "bench_user"
+
+
+def _choose_move(board: chess.Board, rng: random.Random, top_k: int = 3) -> chess.Move:
+    """Pick one of the top_k moves by one-ply heuristic evaluation."""
+    sign = 1 if board.turn == chess.WHITE else -1
+    scored = []
+    for move in board.legal_moves:
+        board.push(move)
+        score, _ = evaluate_board(board)
+        board.pop()
+        scored.append((sign * score, move.uci(), move))
+    scored.sort(key=lambda item: (-item[0], item[1]))
+    return rng.choice(scored[:top_k])[2]
+
+
+def _self_play_game(index: int, name: str, spec: Dict[str, int], rng: random.Random) -> chess.pgn.Game:
+    eco, opening, line = OPENINGS[(index + spec["seed"]) % len(OPENINGS)]
+    board = chess.Board()
+    for san in line.split():
+        board.push_san(san)
+    while not board.is_game_over(claim_draw=True) and board.ply() < spec["max_plies"]:
+        board.push(_choose_move(board, rng))
+
+    game = chess.pgn.Game()
+    user_is_white = index % 2 == 0
+    game.headers["Event"] = f"Benchmark {name}"
+    game.headers["Site"] = "benchmark"
+    game.headers["Date"] = "2024.01.01"
+    game.headers["Round"] = str(index + 1)
+    game.headers["White"] = BENCH_USER if user_is_white else f"opponent_{index}"
+    game.headers["Black"] = f"opponent_{index}" if user_is_white else BENCH_USER
+    game.headers["Result"] = board.result(claim_draw=True) if board.is_game_over(claim_draw=True) else "*"
+    game.headers["ECO"] = eco
+    game.headers["Opening"] = opening
+    game.headers["TimeControl"] = f"{spec['base']}+{spec['increment']}"
+
+    # Each side spends a random share of its remaining time, then gets the increment
+    clocks = [float(spec["base"]), float(spec["base"])]
+    node = game
+    for ply, move in enumerate(board.move_stack):
+        side = ply % 2
+        spent = min(clocks[side] - 0.1, clocks[side] * rng.uniform(0.01, 0.06)) if clocks[side] > 0.2 else 0.0
+        clocks[side] = round(clocks[side] - spent + spec["increment"], 1)
+        node = node.add_variation(move)
+        node.set_clock(clocks[side])
+    return game
+
+
+def generate_corpus(name: str) -> str:
+    """PGN text of a corpus, regenerated from its seed."""
+    spec = CORPORA[name]
+    rng = random.Random(spec["seed"])
+    games = [_self_play_game(i, name, spec, rng) for i in range(spec["games"])]
+    text = "\n\n".join(str(game) for game in games) + "\n"
+    if name == "blitz":
+        text += "\n" + OPERA_GAME
+    return text
+
+
+def write_corpora() -> None:
+    """Regenerate every corpus file."""
+    CORPUS_DIR.mkdir(exist_ok=True)
+    for name in CORPORA:
+        path = CORPUS_DIR / f"{name}.pgn"
+        path.write_text(generate_corpus(name), encoding="utf-8")
+        print(f"[CORPUS] Wrote {path}")
+
+
+def split_pgns(text: str) -> List[str]:
+    """Split a multi-game PGN file into one PGN string per game."""
+    pgns = []
+    pgn_io = io.StringIO(text)
+    while True:
+        game = chess.pgn.read_game(pgn_io)
+        if game is None:
+            break
+        pgns.append(str(game))
+    return pgns
+
+
+def load_corpus(name: str) -> List[str]:
+    """Games of a committed corpus file as PGN strings."""
+    path = CORPUS_DIR / f"{name}.pgn"
+    if not path.exists():
+        raise FileNotFoundError(f"Corpus {name} not found at {path} (run with --regenerate-corpus)")
+    return split_pgns(path.read_text(encoding="utf-8"))
+
+
+if __name__ == "__main__":
+    write_corpora()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+API Cold-Start Profiler
+Measures how long a fresh process takes to serve its first health check and
+which imports that time goes to.
+
+Phases (each measured in a fresh interpreter, as on a scale-to-zero cold start):
+- import: importing core.unified_api_server (module-level setup included)
+- startup: running the FastAPI lifespan startup
+- health: the first GET /health
+
+The import report comes from `python -X importtime` and lists the modules with
+the largest cumulative import time. Heavy optional subsystems (LLM SDKs) are
+expected to load on first use; the report flags any that load at startup.
+
+The server is started without external services (no Supabase or Stripe,
+in-memory stores, a placeholder LLM key) and with STARTUP_PREWARM=off, so the
+numbers measure the server itself.
+
+Usage:
+    python profile_startup.py                  # Phase timings and top 25 imports
+    python profile_startup.py --top 50 --json startup.json
+    python profile_startup.py --budget 2.0     # Exit 1 if import + startup + health exceeds 2 s
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+PYTHON_DIR = Path(__file__).resolve().parents[2]
+SERVER_MODULE = "core.unified_api_server"
+
+# Modules that must not be imported until a feature needs them
+DEFERRED_MODULES = ("anthropic", "google.generativeai")
+
+# config.py and ai_comment_generator.py load .env.local with override=True,
+# which would configure real services; keep the profiled process isolated
+_NO_DOTENV = "import dotenv; dotenv.load_dotenv = lambda *args, **kwargs: False"
+
+_STARTUP_SNIPPET = _NO_DOTENV + """
+import asyncio, json, sys, time
+t0 = time.perf_counter()
+from core.unified_api_server import app
+t1 = time.perf_counter()
+
+async def main():
+    import httpx
+    async with app.router.lifespan_context(app):
+        t2 = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            response = await client.get("/health")
+        t3 = time.perf_counter()
+        return t2, t3, response.status_code
+
+t2, t3, status = asyncio.run(main())
+print("STARTUP_RESULT " + json.dumps({
+    "import": t1 - t0,
+    "startup": t2 - t1,
+    "health": t3 - t2,
+    "health_status": status,
+    "loaded_deferred": [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+def isolated_environment() -> Dict[str, str]:
+    """Environment for a server with no external services configured."""
+    env = dict(os.environ)
+    for name in ("SUPABASE_URL", "SUPABASE_ANON_KEY", "SUPABASE_SERVICE_ROLE_KEY", "STRIPE_SECRET_KEY",
+                 "AI_ANTHROPIC_API_KEY", "GEMINI_API_KEY", "AI_GEMINI_API_KEY", "GOOGLE_AI_API_KEY",
+                 "AI_MODEL", "REQUEST_TRACE_FILE"):
+        env.pop(name, None)
+    env.setdefault("JWT_SECRET", "startup-profile-secret-" + "x" * 32)
+    env.update({
+        # A configured provider, so an eager SDK import would show up; nothing is sent
+        "AI_PROVIDER": "anthropic",
+        "ANTHROPIC_API_KEY": "startup-profile-key",
+        # Measure the server alone, without the background pre-initialization
+        "STARTUP_PREWARM": "off",
+        "USAGE_LEDGER_JOURNAL": "off",
+        "RATE_LIMIT_STORE_URL": "memory",
+        "UPSTREAM_CACHE_PATH": "off",
+        "LLM_RETRY_QUEUE_PATH": "off",
+        "AI_COMMENT_STORE_URL": "off",
+        "PYTHONDONTWRITEBYTECODE": "1",
+    })
+    return env
+
+
+def _run(args: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=PYTHON_DIR, env=isolated_environment(),
+        capture_output=True, text=True, timeout=300,
+    )
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parse `-X importtime` output into {module, self_ms, cumulative_ms, depth} rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            rows.append({
+                "module": name.strip(),
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            })
+        except ValueError:
+            continue
+    return rows
+
+
+def profile_imports(module: str = SERVER_MODULE) -> List[Dict[str, Any]]:
+    """Import module in a fresh interpreter and return its import-time rows."""
+    result = _run(["-X", "importtime", "-c", f"{_NO_DOTENV}; import {module}"])
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def measure_startup() -> Dict[str, Any]:
+    """Time import, lifespan startup and the first health check in a fresh interpreter."""
+    result = _run(["-c", _STARTUP_SNIPPET % (DEFERRED_MODULES,)])
+    for line in result.stdout.splitlines():
+        if line.startswith("STARTUP_RESULT "):
+            timings = json.loads(line[len("STARTUP_RESULT "):])
+            timings["total"] = timings["import"] + timings["startup"] + timings["health"]
+            return timings
+    raise RuntimeError(f"Startup measurement failed:\n{result.stderr[-2000:]}")
+
+
+def print_report(timings: Dict[str, Any], imports: List[Dict[str, Any]], top: int) -> None:
+    print("=" * 72)
+    print("API cold start")
+    print("=" * 72)
+    for phase in ("import", "startup", "health", "total"):
+        print(f"{phase:<10} {timings[phase] * 1000:9.1f} ms")
+    print(f"health status {timings['health_status']}")
+    if timings["loaded_deferred"]:
+        print(f"[WARNING] Loaded at startup (should be deferred): {', '.join(timings['loaded_deferred'])}")
+
+    print()
+    print(f"Top {top} imports by cumulative time")
+    print(f"{'cumulative':>12} {'self':>9}  module")
+    for row in sorted(imports, key=lambda r: r["cumulative_ms"], reverse=True)[:top]:
+        print(f"{row['cumulative_ms']:10.1f}ms {row['self_ms']:7.1f}ms  {'  ' * row['depth']}{row['module']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Profile API server cold start")
+    parser.add_argument("--top", type=int, default=25, help="Number of imports to list")
+    parser.add_argument("--budget", type=float, help="Fail if import + startup + health exceeds this many seconds")
+    parser.add_argument("--json", dest="json_path", help="Write the report as JSON")
+    args = parser.parse_args(argv)
+
+    timings = measure_startup()
+    imports = profile_imports()
+    print_report(timings, imports, args.top)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"timings": timings, "imports": imports}, f, indent=2)
+        print(f"\n[OK] Report written to {args.json_path}")
+
+    if args.budget is not None and timings["total"] > args.budget:
+        print(f"\n[FAIL] Cold start took {timings['total']:.2f}s, budget is {args.budget:.2f}s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
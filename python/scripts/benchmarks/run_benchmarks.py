@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Analysis Benchmark Suite
+Runs the analysis stack against the fixed PGN corpora and compares the results
+with a stored baseline.
+
+Benchmarks:
+- analyze_game: ChessAnalysisEngine.analyze_game per corpus (bullet, blitz,
+  classical), one game at a time with fixed engine limits
+- basic_evaluator: heuristic evaluate_board / evaluate_boards over every
+  corpus position
+- personality: PersonalityScorer.calculate_scores on the analyzed user moves
+- progress: ProgressAnalyzer.get_advanced_metrics on the analyzed games
+- openings: opening identification and normalization utilities
+
+Reported metrics: games/sec (and positions or calls/sec), engine calls per
+game, cache hit rates and peak RSS. Engine calls and hit rates are
+deterministic for a given corpus and engine mode, so they are compared with a
+tight tolerance and catch changes that quietly add engine work (e.g. move
+analysis order defeating the before/after position cache). Throughput and RSS
+depend on the machine and get a wide tolerance; record the baseline on the
+machine that runs the comparison.
+
+Usage:
+    python run_benchmarks.py                      # Compare with baseline.json
+    python run_benchmarks.py --heuristic          # Force heuristic mode (no Stockfish)
+    python run_benchmarks.py --save-baseline      # Record a new baseline for this mode
+    python run_benchmarks.py --corpus blitz --json results.json
+    python run_benchmarks.py --regenerate-corpus --save-baseline
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import resource
+import sys
+import time
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import chess
+import chess.pgn
+
+# Add the python directory to the path before importing application modules
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from core.analysis_engine import AnalysisConfig, AnalysisType, ChessAnalysisEngine
+from core.heuristic_evaluator import evaluate_board, evaluate_boards
+from core.opening_utils import (
+    get_opening_name_from_eco_code, identify_opening_from_pgn_moves, normalize_opening_name
+)
+from core.personality_scoring import PersonalityScorer
+from core.progress_analyzer import ProgressAnalyzer
+from core.stage_timing import get_stage_metrics
+
+from corpus import BENCH_USER, CORPORA, load_corpus, write_corpora
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+
+# Fixed engine limits: every move is searched at exactly this depth (the time
+# cap only guards against pathological positions)
+BENCH_DEPTH = 12
+BENCH_TIME_LIMIT = 5.0
+
+# Allowed relative change before a metric counts as a regression
+THROUGHPUT_TOLERANCE = 0.25  # Machine-dependent: throughput and RSS
+STABLE_TOLERANCE = 0.02  # Deterministic: engine calls per game and cache hit rates
+
+# get_advanced_metrics calls per timed run (one call is too short to time reliably)
+PROGRESS_CALLS = 20
+
+# Stage spans that are one Stockfish search each
+ENGINE_SEARCH_STAGES = ("search_before", "search_after", "search_multipv")
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def _rate(count: float, seconds: float) -> float:
+    return round(count / seconds, 2) if seconds > 0 else 0.0
+
+
+def _best_of(repeat: int, func) -> float:
+    """Fastest wall-clock time of repeat runs of func."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _headers(pgn: str) -> chess.pgn.Headers:
+    return chess.pgn.read_headers(io.StringIO(pgn))
+
+
+def _user_color(pgn: str) -> str:
+    return "white" if _headers(pgn).get("White") == BENCH_USER else "black"
+
+
+def _user_result(pgn: str, color: str) -> str:
+    result = _headers(pgn).get("Result", "*")
+    if result == "1/2-1/2":
+        return "draw"
+    if result in ("1-0", "0-1"):
+        return "win" if (result == "1-0") == (color == "white") else "loss"
+    return "unknown"
+
+
+def bench_analyze_game(name: str, pgns: List[str], use_stockfish: bool) -> Dict[str, Any]:
+    """Analyze every game of a corpus; returns metrics and the analyses."""
+    config = AnalysisConfig(depth=BENCH_DEPTH, time_limit=BENCH_TIME_LIMIT, fixed_limits=True)
+    engine = ChessAnalysisEngine(config=config)
+    if not use_stockfish:
+        engine.stockfish_path = None
+    get_stage_metrics().reset()
+
+    analyses = []
+    started = time.perf_counter()
+    for i, pgn in enumerate(pgns):
+        analysis = asyncio.run(engine.analyze_game(pgn, BENCH_USER, "lichess", AnalysisType.STOCKFISH, f"{name}-{i}"))
+        if analysis is None:
+            raise RuntimeError(f"Analysis of {name} game {i} failed")
+        analyses.append(analysis)
+    elapsed = time.perf_counter() - started
+
+    snapshot = get_stage_metrics().snapshot()
+    engine_calls = sum(snapshot["spans"].get(stage, {}).get("count", 0) for stage in ENGINE_SEARCH_STAGES)
+    counters = snapshot["counters"]
+    lookups = sum(count for counter, count in counters.items() if counter.startswith("position_cache."))
+    hits = lookups - counters.get("position_cache.miss", 0)
+    moves = sum(len(analysis.moves_analysis) for analysis in analyses)
+
+    metrics = {
+        "games_per_sec": _rate(len(pgns), elapsed),
+        "moves_per_sec": _rate(moves, elapsed),
+        "engine_calls_per_game": round(engine_calls / len(pgns), 2),
+    }
+    if lookups:
+        metrics["position_cache_hit_rate"] = round(hits / lookups, 4)
+    cache_stats = engine.get_cache_stats()
+    for cache in ("eval_cache", "move_cache", "probe_cache"):
+        stats = cache_stats[cache]
+        if stats["hits"] + stats["misses"]:
+            metrics[f"{cache}_hit_rate"] = round(stats["hit_rate"], 4)
+    return {"metrics": metrics, "analyses": analyses}
+
+
+def bench_basic_evaluator(pgns: List[str], repeat: int) -> Dict[str, float]:
+    """Heuristic evaluation of every position in the corpora."""
+    boards = []
+    for pgn in pgns:
+        game = chess.pgn.read_game(io.StringIO(pgn))
+        board = game.board()
+        for move in game.mainline_moves():
+            board.push(move)
+            boards.append(board.copy(stack=False))
+
+    def single():
+        for board in boards:
+            evaluate_board(board)
+
+    return {
+        "positions_per_sec": _rate(len(boards), _best_of(repeat, single)),
+        "batch_positions_per_sec": _rate(len(boards), _best_of(repeat, lambda: evaluate_boards(boards))),
+    }
+
+
+def bench_personality(analyses, repeat: int) -> Dict[str, float]:
+    """PersonalityScorer.calculate_scores on each game's user moves."""
+    scorer = PersonalityScorer()
+    games = [[asdict(move) for move in analysis.moves_analysis if move.is_user_move] for analysis in analyses]
+
+    def run():
+        for moves in games:
+            scorer.calculate_scores(moves, 50.0)
+
+    return {"calls_per_sec": _rate(len(games), _best_of(repeat, run))}
+
+
+def bench_progress(analyses, pgns: List[str], repeat: int) -> Dict[str, float]:
+    """ProgressAnalyzer.get_advanced_metrics over all analyzed games."""
+    analyzer = ProgressAnalyzer(None)
+    created_at = (datetime.now() - timedelta(days=1)).isoformat()
+    game_analyses, games_data = [], []
+    for analysis, pgn in zip(analyses, pgns):
+        color = _user_color(pgn)
+        game_analyses.append({
+            "game_id": analysis.game_id,
+            "created_at": created_at,
+            "moves_analysis": [asdict(move) for move in analysis.moves_analysis],
+        })
+        games_data.append({"provider_game_id": analysis.game_id, "result": _user_result(pgn, color), "color": color})
+
+    async def calls():
+        for _ in range(PROGRESS_CALLS):
+            await analyzer.get_advanced_metrics(BENCH_USER, "lichess", game_analyses, games_data)
+
+    return {"calls_per_sec": _rate(PROGRESS_CALLS, _best_of(repeat, lambda: asyncio.run(calls())))}
+
+
+def bench_openings(pgns: List[str], repeat: int) -> Dict[str, float]:
+    """Opening identification from moves plus name/ECO normalization."""
+    games = []
+    for pgn in pgns:
+        headers = _headers(pgn)
+        games.append((pgn, _user_color(pgn), headers.get("Opening", ""), headers.get("ECO", "")))
+
+    def run():
+        for pgn, color, opening, eco in games:
+            identify_opening_from_pgn_moves(pgn, color)
+            normalize_opening_name(opening)
+            get_opening_name_from_eco_code(eco)
+
+    return {"games_per_sec": _rate(len(games), _best_of(repeat, run))}
+
+
+def run_benchmarks(corpora: List[str], use_stockfish: bool, repeat: int = 3) -> Dict[str, float]:
+    """Run every benchmark; returns flat metrics keyed "<benchmark>.<corpus>.<metric>"."""
+    results: Dict[str, float] = {}
+    all_pgns: List[str] = []
+    all_analyses = []
+
+    for name in corpora:
+        pgns = load_corpus(name)
+        print(f"[BENCH] analyze_game: {name} ({len(pgns)} games)")
+        outcome = bench_analyze_game(name, pgns, use_stockfish)
+        for metric, value in outcome["metrics"].items():
+            results[f"analyze_game.{name}.{metric}"] = value
+        all_pgns.extend(pgns)
+        all_analyses.extend(outcome["analyses"])
+
+    print("[BENCH] basic_evaluator, personality, progress, openings")
+    for group, metrics in (
+        ("basic_evaluator", bench_basic_evaluator(all_pgns, repeat)),
+        ("personality", bench_personality(all_analyses, repeat)),
+        ("progress", bench_progress(all_analyses, all_pgns, repeat)),
+        ("openings", bench_openings(all_pgns, repeat)),
+    ):
+        for metric, value in metrics.items():
+            results[f"{group}.all.{metric}"] = value
+
+    results["process.all.peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def metric_rule(metric: str) -> Optional[Dict[str, Any]]:
+    """How a metric is compared: direction and tolerance (None = informational)."""
+    if metric.endswith("_per_sec"):
+        return {"higher_is_better": True, "tolerance": THROUGHPUT_TOLERANCE}
+    if metric.endswith("peak_rss_mb"):
+        return {"higher_is_better": False, "tolerance": THROUGHPUT_TOLERANCE}
+    if metric.endswith("engine_calls_per_game"):
+        return {"higher_is_better": False, "tolerance": STABLE_TOLERANCE}
+    if metric.endswith("_hit_rate"):
+        return {"higher_is_better": True, "tolerance": STABLE_TOLERANCE}
+    return None
+
+
+def compare_to_baseline(current: Dict[str, float], baseline: Dict[str, float],
+                        throughput_tolerance: float = THROUGHPUT_TOLERANCE) -> List[Dict[str, Any]]:
+    """
+    Metrics that got worse than the baseline by more than their tolerance.
+
+    Args:
+        current: Metrics of this run
+        baseline: Stored metrics for the same engine mode
+        throughput_tolerance: Override for the machine-dependent tolerance
+
+    Returns:
+        List of regressions (metric, baseline, current, change)
+    """
+    regressions = []
+    for metric, expected in sorted(baseline.items()):
+        rule = metric_rule(metric)
+        if rule is None or metric not in current:
+            continue
+        tolerance = throughput_tolerance if rule["tolerance"] == THROUGHPUT_TOLERANCE else rule["tolerance"]
+        actual = current[metric]
+        if rule["higher_is_better"]:
+            regressed = actual < expected * (1 - tolerance)
+        else:
+            # An engine-call count of zero (heuristic mode) must stay zero
+            regressed = actual > expected * (1 + tolerance) if expected else actual > 0
+        if regressed:
+            change = (actual - expected) / expected if expected else float("inf")
+            regressions.append({"metric": metric, "baseline": expected, "current": actual, "change": round(change, 4)})
+    return regressions
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> Dict[str, Any]:
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(mode: str, metrics: Dict[str, float], path: Path = BASELINE_PATH) -> None:
+    """Store this run's metrics as the baseline of its engine mode."""
+    baseline = load_baseline(path)
+    baseline[mode] = {
+        "recorded_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "settings": {"depth": BENCH_DEPTH, "time_limit": BENCH_TIME_LIMIT, "python": sys.version.split()[0]},
+        "metrics": metrics,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def print_report(current: Dict[str, float], baseline: Dict[str, float]) -> None:
+    print(f"\n{'metric':<52} {'baseline':>12} {'current':>12} {'change':>9}")
+    print("-" * 88)
+    for metric, value in current.items():
+        expected = baseline.get(metric)
+        if expected:
+            change = f"{(value - expected) / expected:+.1%}"
+        else:
+            change = ""
+        expected_text = f"{expected:.4g}" if expected is not None else "-"
+        print(f"{metric:<52} {expected_text:>12} {value:>12.4g} {change:>9}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the analysis engine against fixed PGN corpora")
+    parser.add_argument("--corpus", action="append", choices=sorted(CORPORA), help="Corpus to run (repeatable, default all)")
+    parser.add_argument("--heuristic", action="store_true", help="Force heuristic analysis even if Stockfish is available")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per micro-benchmark (fastest is kept)")
+    parser.add_argument("--throughput-tolerance", type=float, default=THROUGHPUT_TOLERANCE,
+                        help="Allowed relative throughput/RSS regression")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline for its mode")
+    parser.add_argument("--regenerate-corpus", action="store_true", help="Rewrite the corpus files from their seeds first")
+    parser.add_argument("--json", help="Write the metrics to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show engine output")
+    args = parser.parse_args()
+
+    if args.regenerate_corpus:
+        write_corpora()
+
+    # Coaching text picks random phrasings; keep runs identical
+    random.seed(0)
+    probe = ChessAnalysisEngine()
+    use_stockfish = bool(probe.stockfish_path) and not args.heuristic
+    mode = "stockfish" if use_stockfish else "heuristic"
+    corpora = args.corpus or list(CORPORA)
+    print(f"[BENCH] Mode: {mode} (depth={BENCH_DEPTH}), corpora: {', '.join(corpora)}")
+
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+            current = run_benchmarks(corpora, use_stockfish, args.repeat)
+
+    stored = load_baseline().get(mode, {})
+    baseline_metrics = stored.get("metrics", {})
+    print_report(current, baseline_metrics)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"mode": mode, "metrics": current}, f, indent=2)
+
+    if args.save_baseline:
+        if args.corpus:
+            print("\n[BENCH] Not saving a baseline from a partial corpus run")
+            return 2
+        save_baseline(mode, current)
+        print(f"\n[BENCH] Saved {mode} baseline to {BASELINE_PATH}")
+        return 0
+
+    if not baseline_metrics:
+        print(f"\n[BENCH] No {mode} baseline stored; run with --save-baseline to record one")
+        return 0
+
+    regressions = compare_to_baseline(current, baseline_metrics, args.throughput_tolerance)
+    if regressions:
+        print(f"\n[BENCH] {len(regressions)} regression(s) against the {mode} baseline:")
+        for regression in regressions:
+            print(f"   {regression['metric']}: {regression['baseline']} -> {regression['current']} ({regression['change']:+.1%})")
+        return 1
+    print(f"\n[BENCH] No regressions against the {mode} baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
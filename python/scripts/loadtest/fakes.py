@@ -0,0 +1,618 @@
+#!/usr/bin/env python3
+"""
+Local Service Fakes
+Stand-ins for every external service the API server talks to, served over
+HTTP from one local fixture server so the server runs unmodified:
+
+- Supabase: in-memory PostgREST subset under /rest/v1 (select with filters,
+  ordering, limit/offset, exact counts, single/maybe_single, insert, upsert,
+  update, delete and RPC calls). Tables are schemaless and created on first
+  write; reads of unknown tables return no rows.
+- Lichess: /lichess/api/user/{username}, /lichess/api/games/user/{username}
+  (NDJSON) and /lichess/game/export/{id}
+- Chess.com: /chesscom/pub/player/{username}[/stats] and
+  /chesscom/pub/player/{username}/games/{year}/{month}
+- LLM: Anthropic-compatible /anthropic/v1/messages
+
+Platform games are built from the benchmark corpus (scripts/benchmarks/corpus)
+with the requested username as the user's side, so every username has the
+same deterministic game history. Each service has a configurable latency to
+emulate network round trips.
+
+The server runs its own event loop in a background thread: the API server
+calls Supabase synchronously (sometimes from the event loop thread), which
+would deadlock against a fake served on the same loop.
+
+Usage:
+    fixtures = FixtureServer(latency_ms={"supabase": 5, "lichess": 80})
+    fixtures.start()
+    os.environ["SUPABASE_URL"] = fixtures.url
+    ...
+    fixtures.stop()
+"""
+
+import asyncio
+import copy
+import fnmatch
+import hashlib
+import io
+import json
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import chess.pgn
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "benchmarks"))
+
+from corpus import BENCH_USER, CORPORA, load_corpus  # noqa: E402
+
+SERVICES = ("supabase", "lichess", "chesscom", "llm")
+
+# Query parameters that are not column filters
+_RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+# RPCs the server relies on for usage limits; everything else returns []
+DEFAULT_RPC_RESULTS: Dict[str, Any] = {
+    "check_usage_limits": {"can_proceed": True, "is_anonymous": False},
+    "check_anonymous_usage_limits": {"can_proceed": True, "current_imports": 0, "current_analyses": 0},
+    "increment_usage_atomic": {"success": True, "new_value": 1},
+    "increment_anonymous_usage": {"success": True, "new_value": 1},
+    # JSON-object analytics functions (supabase/migrations/*aggregate_stats*)
+    "get_player_game_length_distribution": {},
+    "get_player_performance_trends": {},
+    "get_player_elo_summary": {},
+}
+
+
+class PostgrestError(Exception):
+    """Error returned to the client in PostgREST's JSON error format."""
+
+    def __init__(self, status: int, code: str, message: str, details: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.body = {"code": code, "message": message, "details": details, "hint": None}
+
+
+def _split_top_level(text: str, separator: str = ",") -> List[str]:
+    """Split on separator outside parentheses, braces and double quotes."""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char in "({":
+            depth += 1
+        elif not quoted and char in ")}":
+            depth -= 1
+        if char == separator and depth == 0 and not quoted:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    if current:
+        parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _unquote(value: str) -> str:
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _parse_list(raw: str) -> List[str]:
+    """Items of "(a,b)" or "{a,b}" (array literal) filter values."""
+    return [_unquote(item) for item in _split_top_level(raw.strip()[1:-1])]
+
+
+def _compare(value: Any, op: str, raw: str) -> bool:
+    if op == "is":
+        expected = {"null": None, "true": True, "false": False}.get(raw.lower(), raw)
+        return value is expected if expected is None or isinstance(expected, bool) else _as_text(value) == raw
+    if value is None:
+        return False
+    if op == "in":
+        return _as_text(value) in _parse_list(raw)
+    if op in ("like", "ilike"):
+        pattern = fnmatch.translate(raw.replace("%", "*"))
+        return re.match(pattern, _as_text(value), re.IGNORECASE if op == "ilike" else 0) is not None
+    if op in ("cs", "cd"):
+        expected = json.loads(raw) if raw.startswith(("[", "{\"")) else _parse_list(raw)
+        if isinstance(value, dict):
+            return all(value.get(k) == v for k, v in expected.items()) if op == "cs" else False
+        actual = [_as_text(item) for item in (value or [])]
+        expected = [_as_text(item) for item in expected]
+        return all(item in actual for item in expected) if op == "cs" else all(item in expected for item in actual)
+
+    left: Any = _as_text(value)
+    right: Any = raw
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            left, right = float(value), float(raw)
+        except ValueError:
+            pass
+    if op == "eq":
+        return left == right
+    if op == "neq":
+        return left != right
+    if op == "gt":
+        return left > right
+    if op == "gte":
+        return left >= right
+    if op == "lt":
+        return left < right
+    if op == "lte":
+        return left <= right
+    raise PostgrestError(400, "PGRST100", f"Unsupported filter operator: {op}")
+
+
+def _condition(column: str, expression: str) -> Callable[[Dict[str, Any]], bool]:
+    """Row predicate for one filter ("eq.5", "not.is.null", ...)."""
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    op, _, raw = expression.partition(".")
+
+    def predicate(row: Dict[str, Any]) -> bool:
+        result = _compare(row.get(column), op, raw)
+        return not result if negate else result
+
+    return predicate
+
+
+def _or_condition(expression: str) -> Callable[[Dict[str, Any]], bool]:
+    """Row predicate for or=(col.op.value,...)."""
+    predicates = []
+    for part in _split_top_level(expression.strip()[1:-1]):
+        column, _, rest = part.partition(".")
+        predicates.append(_condition(column, rest))
+    return lambda row: any(predicate(row) for predicate in predicates)
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    if isinstance(value, bool):
+        return (1, str(value))
+    if isinstance(value, (int, float)):
+        return (0, value)
+    return (1, str(value))
+
+
+def _order(rows: List[Dict[str, Any]], order: str) -> List[Dict[str, Any]]:
+    for term in reversed(_split_top_level(order)):
+        parts = term.split(".")
+        column, descending = parts[0], "desc" in parts[1:]
+        # PostgreSQL default: NULLS LAST ascending, NULLS FIRST descending
+        nulls_first = "nullsfirst" in parts[1:] or (descending and "nullslast" not in parts[1:])
+        present = [row for row in rows if row.get(column) is not None]
+        missing = [row for row in rows if row.get(column) is None]
+        present.sort(key=lambda row: _sort_key(row[column]), reverse=descending)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+
+def _project(row: Dict[str, Any], select: str) -> Dict[str, Any]:
+    columns = _split_top_level(select or "*")
+    if "*" in columns:
+        result = dict(row)
+    else:
+        result = {}
+    for column in columns:
+        if column == "*":
+            continue
+        alias, _, name = column.rpartition(":") if ":" in column.split("(")[0] else ("", "", column)
+        name = name.split("::")[0]
+        if "(" in name:
+            # Embedded resources are not modelled
+            relation = name.split("(")[0].split("!")[0]
+            result[alias or relation] = None
+            continue
+        result[alias or name] = row.get(name)
+    return result
+
+
+class FakePostgrest:
+    """
+    In-memory tables behind a PostgREST-compatible request handler.
+
+    Features:
+    - Filters: eq, neq, gt, gte, lt, lte, like, ilike, in, is, cs, cd, not.*, or
+    - order (multiple columns, nulls first/last), limit, offset
+    - Prefer: count=exact (Content-Range), return=representation,
+      resolution=merge-duplicates / ignore-duplicates with on_conflict
+    - Accept: application/vnd.pgrst.object+json (single)
+    - RPC handlers (defaults in DEFAULT_RPC_RESULTS)
+    """
+
+    def __init__(self, tables: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+                 rpc_handlers: Optional[Dict[str, Callable[[Dict[str, Any]], Any]]] = None):
+        self.tables: Dict[str, List[Dict[str, Any]]] = {name: list(rows) for name, rows in (tables or {}).items()}
+        self.rpc_handlers = {"get_player_aggregate_stats": self._player_aggregate_stats}
+        self.rpc_handlers.update(rpc_handlers or {})
+        self.requests: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def _filtered(self, table: str, params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        predicates = []
+        for key, value in params:
+            if key in _RESERVED_PARAMS or "." in key:
+                continue
+            predicates.append(_or_condition(value) if key == "or" else _condition(key, value))
+        return [row for row in self.tables.get(table, []) if all(predicate(row) for predicate in predicates)]
+
+    def handle(self, method: str, table: str, params: List[Tuple[str, str]], headers: Dict[str, str],
+               body: Any) -> Tuple[int, Dict[str, str], Any]:
+        """Execute one request; returns (status, headers, JSON body)."""
+        self.requests[f"{method} {table}"] += 1
+        query = dict(params)
+        prefer = headers.get("Prefer", "")
+        with self._lock:
+            if method in ("GET", "HEAD"):
+                rows = _order(self._filtered(table, params), query["order"]) if "order" in query else self._filtered(table, params)
+                total = len(rows)
+                offset = int(query.get("offset", 0))
+                limit = int(query["limit"]) if "limit" in query else None
+                rows = rows[offset:offset + limit if limit is not None else None]
+            elif method == "POST":
+                rows = self._write(table, body if isinstance(body, list) else [body], prefer, query.get("on_conflict"))
+                total = len(rows)
+            elif method == "PATCH":
+                rows = self._filtered(table, params)
+                for row in rows:
+                    row.update(copy.deepcopy(body))
+                total = len(rows)
+            elif method == "DELETE":
+                rows = self._filtered(table, params)
+                remaining = [row for row in self.tables.get(table, []) if not any(row is match for match in rows)]
+                self.tables[table] = remaining
+                total = len(rows)
+            else:
+                raise PostgrestError(405, "PGRST105", f"Unsupported method {method}")
+            data = [_project(row, query.get("select", "*")) for row in rows]
+
+        response_headers = {}
+        if "count=" in prefer:
+            response_headers["Content-Range"] = f"{0 if data else '*'}-{max(len(data) - 1, 0)}/{total}"
+        if method == "HEAD":
+            return 200, response_headers, None
+        if method != "GET" and "return=representation" not in prefer:
+            return 201 if method == "POST" else 204, response_headers, None
+        if headers.get("Accept", "").startswith("application/vnd.pgrst.object+json"):
+            if len(data) != 1:
+                raise PostgrestError(406, "PGRST116", "JSON object requested, multiple (or no) rows returned",
+                                     f"The result contains {len(data)} rows")
+            return 200, response_headers, data[0]
+        return 201 if method == "POST" else 200, response_headers, data
+
+    def _write(self, table: str, records: List[Dict[str, Any]], prefer: str, on_conflict: Optional[str]) -> List[Dict[str, Any]]:
+        rows = self.tables.setdefault(table, [])
+        upsert = "resolution=" in prefer
+        keys = [key.strip() for key in on_conflict.split(",")] if on_conflict else ["id"]
+        written = []
+        for record in records:
+            record = copy.deepcopy(record)
+            existing = None
+            if upsert and all(record.get(key) is not None for key in keys):
+                existing = next((row for row in rows if all(_as_text(row.get(key)) == _as_text(record[key]) for key in keys)), None)
+            if existing is not None:
+                if "resolution=merge-duplicates" in prefer:
+                    existing.update(record)
+                written.append(existing)
+                continue
+            record.setdefault("id", str(uuid.uuid4()))
+            record.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+            rows.append(record)
+            written.append(record)
+        return written
+
+    def _player_aggregate_stats(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Counts from the games table, like the SQL function of the same name."""
+        games = [row for row in self.tables.get("games", [])
+                 if row.get("user_id") == params.get("p_user_id") and row.get("platform") == params.get("p_platform")]
+        stats: Dict[str, Any] = {"total_games": len(games)}
+        for result in ("win", "loss", "draw"):
+            stats[f"{result}s" if result != "loss" else "losses"] = sum(1 for g in games if g.get("result") == result)
+        for color in ("white", "black"):
+            colored = [g for g in games if g.get("color") == color]
+            ratings = [g["my_rating"] for g in colored if g.get("my_rating") is not None]
+            stats[f"{color}_games"] = len(colored)
+            stats[f"{color}_wins"] = sum(1 for g in colored if g.get("result") == "win")
+            stats[f"{color}_draws"] = sum(1 for g in colored if g.get("result") == "draw")
+            stats[f"{color}_losses"] = sum(1 for g in colored if g.get("result") == "loss")
+            stats[f"{color}_avg_elo"] = round(sum(ratings) / len(ratings)) if ratings else None
+        ratings = [g["my_rating"] for g in games if g.get("my_rating") is not None]
+        moves = [g["total_moves"] for g in games if g.get("total_moves") is not None]
+        stats["highest_elo"] = max(ratings, default=None)
+        stats["avg_total_moves"] = round(sum(moves) / len(moves)) if moves else None
+        return stats
+
+    def rpc(self, name: str, params: Dict[str, Any]) -> Any:
+        self.requests[f"RPC {name}"] += 1
+        handler = self.rpc_handlers.get(name)
+        if handler is not None:
+            with self._lock:
+                return handler(params)
+        return copy.deepcopy(DEFAULT_RPC_RESULTS.get(name, []))
+
+
+def _corpus_games() -> List[chess.pgn.Game]:
+    games = []
+    for name in CORPORA:
+        for pgn in load_corpus(name):
+            games.append(chess.pgn.read_game(io.StringIO(pgn)))
+    return games
+
+
+class PlatformFixtures:
+    """Deterministic game history per username for the Lichess and Chess.com fakes."""
+
+    def __init__(self, games_per_user: int = 20):
+        self.games = _corpus_games()[:games_per_user]
+        self._pgn_by_id: Dict[str, str] = {}
+
+    def _user_games(self, username: str) -> List[Tuple[str, chess.pgn.Game, str]]:
+        """(game id, game with the user's name filled in, user color)."""
+        result = []
+        for index, template in enumerate(self.games):
+            game = copy.deepcopy(template)
+            color = "white" if game.headers["White"] == BENCH_USER else "black"
+            game.headers["White" if color == "white" else "Black"] = username
+            game_id = hashlib.md5(f"{username.lower()}:{index}".encode()).hexdigest()[:8]
+            self._pgn_by_id[game_id] = str(game)
+            result.append((game_id, game, color))
+        return result
+
+    @staticmethod
+    def _time_control(game: chess.pgn.Game) -> Tuple[int, int]:
+        base, _, increment = game.headers.get("TimeControl", "180+0").partition("+")
+        return int(base), int(increment or 0)
+
+    def lichess_games(self, username: str, limit: int) -> List[Dict[str, Any]]:
+        now_ms = int(time.time() * 1000)
+        games = []
+        for index, (game_id, game, color) in enumerate(self._user_games(username)[:limit]):
+            base, increment = self._time_control(game)
+            result = game.headers.get("Result", "*")
+            winner = {"1-0": "white", "0-1": "black"}.get(result)
+            white, black = game.headers["White"], game.headers["Black"]
+            entry = {
+                "id": game_id,
+                "rated": True,
+                "variant": "standard",
+                "speed": "bullet" if base < 180 else "blitz" if base < 480 else "classical",
+                "createdAt": now_ms - index * 3_600_000,
+                "lastMoveAt": now_ms - index * 3_600_000 + 600_000,
+                "status": "mate" if winner else "draw",
+                "players": {
+                    "white": {"user": {"name": white, "id": white.lower()}, "rating": 1500 + index},
+                    "black": {"user": {"name": black, "id": black.lower()}, "rating": 1490 + index},
+                },
+                "opening": {"eco": game.headers.get("ECO"), "name": game.headers.get("Opening")},
+                "clock": {"initial": base, "increment": increment},
+                "pgn": str(game),
+            }
+            if winner:
+                entry["winner"] = winner
+            games.append(entry)
+        return games
+
+    def chesscom_games(self, username: str) -> List[Dict[str, Any]]:
+        now = int(time.time())
+        games = []
+        for index, (game_id, game, color) in enumerate(self._user_games(username)):
+            base, increment = self._time_control(game)
+            result = game.headers.get("Result", "*")
+            white_result = {"1-0": "win", "0-1": "checkmated"}.get(result, "agreed")
+            black_result = {"1-0": "checkmated", "0-1": "win"}.get(result, "agreed")
+            games.append({
+                "url": f"https://www.chess.com/game/live/{int(game_id, 16)}",
+                "uuid": game_id,
+                "pgn": str(game),
+                "time_control": f"{base}+{increment}" if increment else str(base),
+                "time_class": "bullet" if base < 180 else "blitz" if base < 600 else "daily",
+                "end_time": now - index * 3600,
+                "rated": True,
+                "rules": "chess",
+                "eco": game.headers.get("ECO"),
+                "white": {"username": game.headers["White"], "rating": 1500 + index, "result": white_result},
+                "black": {"username": game.headers["Black"], "rating": 1490 + index, "result": black_result},
+            })
+        return games
+
+    def pgn(self, game_id: str) -> Optional[str]:
+        """PGN of a game previously listed for some user."""
+        return self._pgn_by_id.get(game_id)
+
+
+class FixtureServer:
+    """
+    One local HTTP server for all fakes, running on its own thread and loop.
+
+    Features:
+    - Per-service latency (latency_ms: supabase, lichess, chesscom, llm)
+    - Optional LLM rate limit (llm_rate_limit: (requests, window seconds));
+      excess requests get 429 with Retry-After, like the real provider
+    - Request counts per service and route (stats())
+    - Ephemeral port; base URLs via url / service_url()
+    """
+
+    def __init__(self, latency_ms: Optional[Dict[str, float]] = None, database: Optional[FakePostgrest] = None,
+                 platforms: Optional[PlatformFixtures] = None, host: str = "127.0.0.1",
+                 llm_rate_limit: Optional[Tuple[int, float]] = None):
+        self.latency_ms = {service: 0.0 for service in SERVICES}
+        self.latency_ms.update(latency_ms or {})
+        self.database = database or FakePostgrest()
+        self.platforms = platforms or PlatformFixtures()
+        self.host = host
+        self.port: Optional[int] = None
+        self.requests: Counter = Counter()
+        self.llm_rate_limit = llm_rate_limit
+        self._llm_window: List[float] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def service_url(self, service: str) -> str:
+        """Base URL of a fake (supabase is served at the root, like a Supabase project URL)."""
+        prefixes = {"supabase": "", "lichess": "/lichess", "chesscom": "/chesscom", "llm": "/anthropic"}
+        return self.url + prefixes[service]
+
+    async def _delay(self, service: str) -> None:
+        self.requests[service] += 1
+        latency = self.latency_ms.get(service, 0.0)
+        if latency > 0:
+            await asyncio.sleep(latency / 1000)
+
+    def _app(self) -> web.Application:
+        app = web.Application(client_max_size=32 * 1024 * 1024)
+        app.router.add_route("*", "/rest/v1/rpc/{name}", self._rpc)
+        app.router.add_route("*", "/rest/v1/{table}", self._table)
+        app.router.add_get("/lichess/api/user/{username}", self._lichess_user)
+        app.router.add_get("/lichess/api/games/user/{username}", self._lichess_games)
+        app.router.add_get("/lichess/game/export/{game_id}", self._lichess_export)
+        app.router.add_get("/chesscom/pub/player/{username}", self._chesscom_player)
+        app.router.add_get("/chesscom/pub/player/{username}/stats", self._chesscom_stats)
+        app.router.add_get("/chesscom/pub/player/{username}/games/archives", self._chesscom_archives)
+        app.router.add_get("/chesscom/pub/player/{username}/games/{year}/{month}", self._chesscom_month)
+        app.router.add_post("/anthropic/v1/messages", self._anthropic_messages)
+        return app
+
+    async def _table(self, request: web.Request) -> web.Response:
+        await self._delay("supabase")
+        body = await request.json() if request.can_read_body else None
+        try:
+            status, headers, data = self.database.handle(
+                request.method, request.match_info["table"], list(request.query.items()), dict(request.headers), body
+            )
+        except PostgrestError as e:
+            return web.json_response(e.body, status=e.status)
+        if data is None:
+            return web.Response(status=status, headers=headers)
+        return web.json_response(data, status=status, headers=headers)
+
+    async def _rpc(self, request: web.Request) -> web.Response:
+        await self._delay("supabase")
+        params = await request.json() if request.can_read_body else dict(request.query)
+        return web.json_response(self.database.rpc(request.match_info["name"], params or {}))
+
+    async def _lichess_user(self, request: web.Request) -> web.Response:
+        await self._delay("lichess")
+        username = request.match_info["username"]
+        return web.json_response({"id": username.lower(), "username": username, "perfs": {}})
+
+    async def _lichess_games(self, request: web.Request) -> web.Response:
+        await self._delay("lichess")
+        limit = int(request.query.get("max", 100))
+        games = self.platforms.lichess_games(request.match_info["username"], limit)
+        text = "\n".join(json.dumps(game) for game in games)
+        return web.Response(text=text + "\n" if text else "", content_type="application/x-ndjson")
+
+    async def _lichess_export(self, request: web.Request) -> web.Response:
+        await self._delay("lichess")
+        pgn = self.platforms.pgn(request.match_info["game_id"])
+        return web.Response(text=pgn, content_type="application/x-chess-pgn") if pgn else web.Response(status=404)
+
+    async def _chesscom_player(self, request: web.Request) -> web.Response:
+        await self._delay("chesscom")
+        username = request.match_info["username"]
+        return web.json_response({"username": username.lower(), "player_id": 1, "status": "basic"})
+
+    async def _chesscom_stats(self, request: web.Request) -> web.Response:
+        await self._delay("chesscom")
+        rating = {"last": {"rating": 1500, "date": int(time.time())}, "best": {"rating": 1600}, "record": {"win": 10, "loss": 8, "draw": 2}}
+        return web.json_response({"chess_blitz": rating, "chess_bullet": rating, "chess_rapid": rating})
+
+    async def _chesscom_archives(self, request: web.Request) -> web.Response:
+        await self._delay("chesscom")
+        now = datetime.now(timezone.utc)
+        username = request.match_info["username"]
+        return web.json_response({"archives": [f"{self.service_url('chesscom')}/pub/player/{username}/games/{now.year}/{now.month:02d}"]})
+
+    async def _chesscom_month(self, request: web.Request) -> web.Response:
+        await self._delay("chesscom")
+        now = datetime.now(timezone.utc)
+        # All fixture games are in the current month's archive
+        if (int(request.match_info["year"]), int(request.match_info["month"])) != (now.year, now.month):
+            return web.json_response({"games": []})
+        return web.json_response({"games": self.platforms.chesscom_games(request.match_info["username"])})
+
+    async def _anthropic_messages(self, request: web.Request) -> web.Response:
+        await self._delay("llm")
+        if self.llm_rate_limit:
+            limit, window = self.llm_rate_limit
+            now = time.monotonic()
+            self._llm_window = [t for t in self._llm_window if now - t < window]
+            if len(self._llm_window) >= limit:
+                self.requests["llm_throttled"] += 1
+                retry_after = window - (now - self._llm_window[0])
+                return web.json_response(
+                    {"type": "error", "error": {"type": "rate_limit_error", "message": "Rate limit exceeded"}},
+                    status=429, headers={"retry-after": f"{retry_after:.3f}"},
+                )
+            self._llm_window.append(now)
+        payload = await request.json()
+        return web.json_response({
+            "id": f"msg_{uuid.uuid4().hex[:12]}",
+            "type": "message",
+            "role": "assistant",
+            "model": payload.get("model", "fake"),
+            "content": [{"type": "text", "text": "A solid developing move that keeps the position balanced."}],
+            "stop_reason": "end_turn",
+            "usage": {"input_tokens": len(json.dumps(payload)) // 4, "output_tokens": 12},
+        })
+
+    def start(self, timeout: float = 10.0) -> "FixtureServer":
+        """Start serving on an ephemeral port (returns once the port is bound)."""
+        ready = threading.Event()
+        failure: List[BaseException] = []
+
+        def run() -> None:
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._runner = web.AppRunner(self._app(), access_log=None)
+                self._loop.run_until_complete(self._runner.setup())
+                site = web.TCPSite(self._runner, self.host, 0)
+                self._loop.run_until_complete(site.start())
+                self.port = site._server.sockets[0].getsockname()[1]
+            except BaseException as e:
+                failure.append(e)
+                ready.set()
+                return
+            ready.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._runner.cleanup())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="fixture-server", daemon=True)
+        self._thread.start()
+        if not ready.wait(timeout) or failure:
+            raise RuntimeError(f"Fixture server failed to start: {failure[0] if failure else 'timeout'}")
+        return self
+
+    def stop(self) -> None:
+        if self._loop and self._thread:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": dict(self.requests),
+            "supabase_requests": dict(self.database.requests.most_common()),
+            "tables": {name: len(rows) for name, rows in sorted(self.database.tables.items())},
+        }
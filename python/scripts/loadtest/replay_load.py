@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Offline Replay Load Generator
+Replays a recorded request trace against an in-process unified_api_server
+wired to local fakes (scripts/loadtest/fakes.py) instead of Supabase,
+Lichess, Chess.com and the LLM provider, so capacity tests run on a laptop
+and never touch production.
+
+Reported per run:
+- Per endpoint: request count, errors, status codes and p50/p90/p99/max latency
+- Event loop lag (p50/p95/p99/max of a periodic sleep's overshoot)
+- Default thread pool saturation: peak active/queued work items, queue wait
+  percentiles and the share of samples with every worker busy
+- Calls made to each fake
+
+Traces are JSON lines (see core/request_trace.py). Record one from a running
+server with REQUEST_TRACE_FILE=traces/my-trace.jsonl, or start from
+traces/sample.jsonl. Requests are sent at their recorded offsets divided by
+--speed (0 sends as fast as --concurrency allows); bearer tokens are minted
+for the recorded users.
+
+Usage:
+    python replay_load.py                                # traces/sample.jsonl, real-time
+    python replay_load.py --trace traces/prod.jsonl --speed 4 --concurrency 64
+    python replay_load.py --speed 0 --repeat 5 --supabase-latency 20 --json report.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add the python directory to the path before importing application modules
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from fakes import FixtureServer  # noqa: E402
+
+TRACES_DIR = Path(__file__).parent / "traces"
+DEFAULT_TRACE = TRACES_DIR / "sample.jsonl"
+
+# Signing secret for the minted tokens (only ever used against the local server)
+LOADTEST_JWT_SECRET = "loadtest-secret-not-for-production-0123456789"
+
+LAG_INTERVAL = 0.05  # Seconds between event loop lag probes
+POOL_SAMPLE_INTERVAL = 0.05  # Seconds between thread pool samples
+
+
+def percentile(values: List[float], q: float) -> float:
+    """q-th percentile (0-100) with linear interpolation; 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    """p50/p90/p99/max of latencies in seconds, reported in milliseconds."""
+    return {
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p90_ms": round(percentile(values, 90) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(max(values, default=0.0) * 1000, 2),
+    }
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic sleep wakes up (event loop blocking)."""
+
+    def __init__(self, interval: float = LAG_INTERVAL):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - started - self.interval))
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "samples": len(self.samples),
+            "p50_ms": round(percentile(self.samples, 50) * 1000, 2),
+            "p95_ms": round(percentile(self.samples, 95) * 1000, 2),
+            "p99_ms": round(percentile(self.samples, 99) * 1000, 2),
+            "max_ms": round(max(self.samples, default=0.0) * 1000, 2),
+        }
+
+
+class InstrumentedThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    ThreadPoolExecutor that tracks queued/active work items and queue wait.
+
+    Installed as the loop's default executor, so run_in_executor(None, ...)
+    and asyncio.to_thread calls in the server are measured.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, **kwargs):
+        super().__init__(max_workers=max_workers, **kwargs)
+        self.workers = self._max_workers
+        self.queued = 0
+        self.active = 0
+        self.max_queued = 0
+        self.max_active = 0
+        self.completed = 0
+        self.queue_waits: List[float] = []
+        self.samples: List[Dict[str, int]] = []
+        self._stats_lock = threading.Lock()
+
+    def submit(self, fn, /, *args, **kwargs):
+        submitted = time.perf_counter()
+        with self._stats_lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+
+        def tracked():
+            with self._stats_lock:
+                self.queued -= 1
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+                self.queue_waits.append(time.perf_counter() - submitted)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._stats_lock:
+                    self.active -= 1
+                    self.completed += 1
+
+        return super().submit(tracked)
+
+    def sample(self) -> None:
+        with self._stats_lock:
+            self.samples.append({"active": self.active, "queued": self.queued})
+
+    def summary(self) -> Dict[str, Any]:
+        saturated = sum(1 for s in self.samples if s["active"] >= self.workers)
+        return {
+            "workers": self.workers,
+            "completed": self.completed,
+            "max_active": self.max_active,
+            "max_queued": self.max_queued,
+            "queue_wait_p50_ms": round(percentile(self.queue_waits, 50) * 1000, 2),
+            "queue_wait_p99_ms": round(percentile(self.queue_waits, 99) * 1000, 2),
+            "saturated_fraction": round(saturated / len(self.samples), 3) if self.samples else 0.0,
+        }
+
+
+def configure_environment(fixtures: FixtureServer, ai_provider: str = "anthropic") -> None:
+    """Point every external dependency of the server at the local fakes."""
+    os.environ.update({
+        "SUPABASE_URL": fixtures.service_url("supabase"),
+        "SUPABASE_ANON_KEY": "loadtest-anon-key",
+        "SUPABASE_SERVICE_ROLE_KEY": "loadtest-service-role-key",
+        "LICHESS_BASE_URL": fixtures.service_url("lichess"),
+        "CHESSCOM_API_BASE_URL": fixtures.service_url("chesscom"),
+        "ANTHROPIC_BASE_URL": fixtures.service_url("llm"),
+        "ANTHROPIC_API_KEY": "loadtest-key",
+        "AI_PROVIDER": ai_provider,
+        "JWT_SECRET": LOADTEST_JWT_SECRET,
+        "STRIPE_SECRET_KEY": "",
+        "STRIPE_WEBHOOK_SECRET": "",
+        "REQUEST_TRACE_FILE": "",
+        "USAGE_LEDGER_JOURNAL": "off",
+        "RATE_LIMIT_STORE_URL": "memory",
+        "UPSTREAM_CACHE_PATH": "off",
+        "LLM_RETRY_QUEUE_PATH": "off",
+        "AI_COMMENT_STORE_URL": "off",
+    })
+    os.environ.pop("JWT_ISSUER", None)
+    os.environ.pop("JWT_AUDIENCE", None)
+
+    # config.py and ai_comment_generator.py load .env.local with override=True,
+    # which would point the server back at real services
+    import dotenv
+    dotenv.load_dotenv = lambda *args, **kwargs: False
+
+
+def import_app(fixtures: FixtureServer):
+    """Import the server after configure_environment and verify it uses the fakes."""
+    from core.config import get_config
+    from core.unified_api_server import app
+
+    database_url = get_config().database.url
+    if not database_url.startswith(fixtures.url):
+        raise RuntimeError(f"Refusing to run: server is configured for {database_url}, not the local fakes")
+    return app
+
+
+def mint_token(user_id: str, lifetime: int = 3600) -> str:
+    from jose import jwt
+    now = int(time.time())
+    return jwt.encode({"sub": user_id, "iat": now, "exp": now + lifetime, "role": "authenticated"},
+                      LOADTEST_JWT_SECRET, algorithm="HS256")
+
+
+async def replay(app, entries, speed: float = 1.0, concurrency: int = 32, repeat: int = 1,
+                 timeout: float = 120.0, executor: Optional[InstrumentedThreadPoolExecutor] = None) -> Dict[str, Any]:
+    """Send the trace entries to the app and collect latencies per endpoint."""
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    if executor is not None:
+        loop.set_default_executor(executor)
+    lag = LoopLagMonitor()
+    semaphore = asyncio.Semaphore(concurrency)
+    tokens: Dict[str, str] = {}
+    results: Dict[str, Dict[str, Any]] = {}
+
+    async def sample_pool() -> None:
+        while True:
+            executor.sample()
+            await asyncio.sleep(POOL_SAMPLE_INTERVAL)
+
+    async def send(client, entry, start_at: float) -> None:
+        delay = start_at - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        headers = {}
+        if entry.user:
+            if entry.user not in tokens:
+                tokens[entry.user] = mint_token(entry.user)
+            headers["Authorization"] = f"Bearer {tokens[entry.user]}"
+        url = entry.path + (f"?{entry.query}" if entry.query else "")
+        stats = results.setdefault(entry.label, {"latencies": [], "statuses": {}, "errors": 0})
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    client.request(entry.method, url, headers=headers, json=entry.body), timeout
+                )
+                status = str(response.status_code)
+                if response.status_code >= 500:
+                    stats["errors"] += 1
+            except asyncio.TimeoutError:
+                status = "timeout"
+                stats["errors"] += 1
+            except Exception as e:
+                status = type(e).__name__
+                stats["errors"] += 1
+            stats["latencies"].append(time.perf_counter() - started)
+            stats["statuses"][status] = stats["statuses"].get(status, 0) + 1
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+            lag.start()
+            sampler = asyncio.create_task(sample_pool()) if executor is not None else None
+            started = time.perf_counter()
+            span = entries[-1].t if entries else 0.0
+            tasks = []
+            base = loop.time()
+            for round_index in range(repeat):
+                for entry in entries:
+                    offset = (round_index * (span + 1.0) + entry.t) / speed if speed > 0 else 0.0
+                    tasks.append(asyncio.create_task(send(client, entry, base + offset)))
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started
+            await lag.stop()
+            if sampler:
+                sampler.cancel()
+
+    endpoints = {}
+    for label, stats in sorted(results.items()):
+        endpoints[label] = {
+            "count": len(stats["latencies"]),
+            "errors": stats["errors"],
+            "statuses": stats["statuses"],
+            **latency_summary(stats["latencies"]),
+        }
+    total = sum(endpoint["count"] for endpoint in endpoints.values())
+    return {
+        "requests": total,
+        "errors": sum(endpoint["errors"] for endpoint in endpoints.values()),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2) if elapsed > 0 else 0.0,
+        "endpoints": endpoints,
+        "event_loop_lag": lag.summary(),
+        "thread_pool": executor.summary() if executor is not None else None,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print("\n" + "=" * 100)
+    print(f"[LOADTEST] {report['requests']} requests in {report['elapsed_s']}s "
+          f"({report['throughput_rps']} req/s), {report['errors']} errors")
+    print("=" * 100)
+    print(f"{'endpoint':<62} {'count':>6} {'err':>4} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}")
+    for label, stats in report["endpoints"].items():
+        print(f"{label[:62]:<62} {stats['count']:>6} {stats['errors']:>4} {stats['p50_ms']:>8.1f} "
+              f"{stats['p90_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f}")
+        unexpected = {status: n for status, n in stats["statuses"].items() if not status.startswith("2")}
+        if unexpected:
+            print(f"{'':<4}statuses: {unexpected}")
+
+    lag = report["event_loop_lag"]
+    print(f"\n[LOOP] lag p50={lag['p50_ms']}ms p95={lag['p95_ms']}ms p99={lag['p99_ms']}ms max={lag['max_ms']}ms "
+          f"({lag['samples']} samples)")
+    pool = report.get("thread_pool")
+    if pool:
+        print(f"[POOL] {pool['workers']} workers, {pool['completed']} items, max active={pool['max_active']}, "
+              f"max queued={pool['max_queued']}, queue wait p50={pool['queue_wait_p50_ms']}ms "
+              f"p99={pool['queue_wait_p99_ms']}ms, saturated {pool['saturated_fraction']:.0%} of samples")
+    fakes = report.get("fakes")
+    if fakes:
+        print(f"[FAKES] {fakes['requests']}")
+        print(f"[FAKES] top supabase calls: {dict(list(fakes['supabase_requests'].items())[:8])}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay a request trace against the API server with local fakes")
+    parser.add_argument("--trace", default=str(DEFAULT_TRACE), help="JSON-lines trace to replay")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier (0 = as fast as possible)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Maximum requests in flight")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the trace this many times back to back")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request timeout in seconds")
+    parser.add_argument("--threads", type=int, default=None, help="Default thread pool size (Python default if unset)")
+    parser.add_argument("--supabase-latency", type=float, default=5.0, help="Fake Supabase latency (ms)")
+    parser.add_argument("--platform-latency", type=float, default=80.0, help="Fake Lichess/Chess.com latency (ms)")
+    parser.add_argument("--llm-latency", type=float, default=400.0, help="Fake LLM latency (ms)")
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    from core.request_trace import load_trace
+
+    entries = load_trace(args.trace)
+    if not entries:
+        print(f"[LOADTEST] No requests in {args.trace}")
+        return 1
+
+    fixtures = FixtureServer(latency_ms={
+        "supabase": args.supabase_latency,
+        "lichess": args.platform_latency,
+        "chesscom": args.platform_latency,
+        "llm": args.llm_latency,
+    }).start()
+    print(f"[LOADTEST] Fakes listening on {fixtures.url}")
+    try:
+        configure_environment(fixtures)
+        app = import_app(fixtures)
+        executor = InstrumentedThreadPoolExecutor(max_workers=args.threads, thread_name_prefix="loadtest")
+        print(f"[LOADTEST] Replaying {len(entries)} requests x{args.repeat} from {args.trace} "
+              f"(speed={args.speed}, concurrency={args.concurrency})")
+        report = asyncio.run(replay(app, entries, speed=args.speed, concurrency=args.concurrency,
+                                    repeat=args.repeat, timeout=args.timeout, executor=executor))
+        report["fakes"] = fixtures.stats()
+    finally:
+        fixtures.stop()
+
+    report["config"] = {key: value for key, value in vars(args).items() if key != "json"}
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        print(f"\n[LOADTEST] Report written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
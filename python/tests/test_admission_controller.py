@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Unit tests for memory-aware admission control.
+
+These tests drive the controller with synthetic memory snapshots and verify
+that limits, cache sizes and job admission follow the pressure level.
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+# Add the python directory to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.admission_controller import AdmissionLimits, MemoryAdmissionController, PressureLevel
+from core.cache_manager import LRUCache
+from core.memory_monitor import MemorySnapshot
+
+
+def _snapshot(percent: float, process_mb: float = 100.0) -> MemorySnapshot:
+    return MemorySnapshot(
+        timestamp=time.time(),
+        total_mb=1000.0,
+        used_mb=percent * 10,
+        available_mb=1000.0 - percent * 10,
+        percent=percent,
+        process_mb=process_mb,
+    )
+
+
+@pytest.fixture
+def controller():
+    baseline = AdmissionLimits(
+        engine_pool_size=8,
+        engine_hash_mb=96,
+        move_concurrency=4,
+        max_concurrent_jobs=4,
+        cache_scale=1.0,
+    )
+    # Large sample interval so tests never sample the real system
+    return MemoryAdmissionController(baseline, sample_interval=3600)
+
+
+class TestMemoryAdmissionController:
+    """Test cases for pressure levels, limits and admission."""
+
+    def test_levels_follow_thresholds(self, controller):
+        assert controller.on_snapshot(_snapshot(50)) == PressureLevel.NORMAL
+        assert controller.on_snapshot(_snapshot(75)) == PressureLevel.ELEVATED
+        assert controller.on_snapshot(_snapshot(90)) == PressureLevel.CRITICAL
+
+    def test_hysteresis_prevents_flapping(self, controller):
+        controller.on_snapshot(_snapshot(90))
+        # Just below critical threshold but within hysteresis band
+        assert controller.on_snapshot(_snapshot(83)) == PressureLevel.CRITICAL
+        assert controller.on_snapshot(_snapshot(75)) == PressureLevel.ELEVATED
+        assert controller.on_snapshot(_snapshot(67)) == PressureLevel.ELEVATED
+        assert controller.on_snapshot(_snapshot(60)) == PressureLevel.NORMAL
+
+    def test_limits_scale_down_under_pressure(self, controller):
+        controller.on_snapshot(_snapshot(90))
+        limits = controller.current_limits()
+        assert limits.engine_pool_size == 2
+        assert limits.engine_hash_mb == 24
+        assert limits.move_concurrency == 1
+        assert limits.admit_new_jobs is False
+
+    def test_process_budget_raises_pressure(self):
+        baseline = AdmissionLimits(8, 96, 4, 4, 1.0)
+        controller = MemoryAdmissionController(baseline, memory_budget_mb=200, sample_interval=3600)
+        assert controller.on_snapshot(_snapshot(10, process_mb=180)) == PressureLevel.CRITICAL
+
+    def test_registered_cache_is_resized_and_restored(self, controller):
+        cache = LRUCache(maxsize=100, name="admission_test")
+        for i in range(100):
+            cache.set(f"k{i}", i)
+        controller.register_cache(cache)
+
+        controller.on_snapshot(_snapshot(90))
+        assert cache.maxsize == 25
+        assert cache.size() == 25
+        # Most recently used entries survive
+        assert cache.get("k99") == 99
+
+        controller.on_snapshot(_snapshot(10))
+        assert cache.maxsize == 100
+
+    def test_resizer_receives_limits(self, controller):
+        received = []
+        controller.register_resizer(received.append)
+        controller.on_snapshot(_snapshot(75))
+        assert received and received[-1].engine_pool_size == 4
+
+    def test_jobs_deferred_when_critical(self, controller):
+        assert controller.can_admit_job(0) is True
+        controller.on_snapshot(_snapshot(90))
+        assert controller.can_admit_job(0) is False
+        assert controller.get_stats()["deferred_jobs"] == 1
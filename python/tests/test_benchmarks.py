@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the analysis benchmark suite.
+
+These tests verify that the committed corpora are reproducible from their
+seeds and that baseline comparison flags regressions with the right
+direction and tolerance per metric.
+"""
+
+import io
+import os
+import sys
+
+import chess.pgn
+
+# Add the python and benchmark directories to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts', 'benchmarks'))
+
+from corpus import BENCH_USER, CORPORA, generate_corpus, load_corpus, split_pgns
+from run_benchmarks import compare_to_baseline, load_baseline, metric_rule
+
+
+class TestBenchmarkCorpus:
+    """Test cases for the committed PGN corpora."""
+
+    def test_corpora_match_their_specs(self):
+        for name, spec in CORPORA.items():
+            pgns = load_corpus(name)
+            extra = 1 if name == "blitz" else 0  # The Opera Game
+            assert len(pgns) == spec["games"] + extra
+            for pgn in pgns:
+                headers = chess.pgn.read_headers(io.StringIO(pgn))
+                assert BENCH_USER in (headers["White"], headers["Black"])
+                assert headers["TimeControl"].startswith(str(spec["base"]))
+
+    def test_corpus_is_reproducible_from_seed(self):
+        assert split_pgns(generate_corpus("bullet")) == load_corpus("bullet")
+
+
+class TestBaselineComparison:
+    """Test cases for regression detection against a stored baseline."""
+
+    def test_metric_rules(self):
+        assert metric_rule("analyze_game.blitz.games_per_sec")["higher_is_better"]
+        assert not metric_rule("analyze_game.blitz.engine_calls_per_game")["higher_is_better"]
+        assert metric_rule("analyze_game.blitz.position_cache_hit_rate")["tolerance"] == 0.02
+        assert metric_rule("analyze_game.blitz.moves") is None
+
+    def test_regressions_respect_direction_and_tolerance(self):
+        baseline = {
+            "analyze_game.blitz.games_per_sec": 2.0,
+            "analyze_game.blitz.engine_calls_per_game": 100.0,
+            "analyze_game.blitz.position_cache_hit_rate": 0.40,
+            "analyze_game.bullet.engine_calls_per_game": 0.0,
+            "process.all.peak_rss_mb": 200.0,
+        }
+        current = {
+            "analyze_game.blitz.games_per_sec": 1.7,  # -15%: within throughput tolerance
+            "analyze_game.blitz.engine_calls_per_game": 110.0,  # +10% engine work
+            "analyze_game.blitz.position_cache_hit_rate": 0.30,  # Cache defeated
+            "analyze_game.bullet.engine_calls_per_game": 0.0,
+            "process.all.peak_rss_mb": 150.0,  # Improvement
+        }
+        regressions = {r["metric"] for r in compare_to_baseline(current, baseline)}
+        assert regressions == {
+            "analyze_game.blitz.engine_calls_per_game",
+            "analyze_game.blitz.position_cache_hit_rate",
+        }
+
+        current["analyze_game.bullet.engine_calls_per_game"] = 3.0
+        regressions = {r["metric"] for r in compare_to_baseline(current, baseline, throughput_tolerance=0.1)}
+        assert "analyze_game.bullet.engine_calls_per_game" in regressions
+        assert "analyze_game.blitz.games_per_sec" in regressions
+
+    def test_committed_baseline_covers_every_corpus(self):
+        metrics = load_baseline()["heuristic"]["metrics"]
+        for name in CORPORA:
+            assert f"analyze_game.{name}.games_per_sec" in metrics
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the durable AI comment store.
+
+These tests verify that comments written by one process are found by
+another, that the store stays within its size budget by evicting the least
+recently used comments, that its running byte total matches the stored
+comments, that hits are counted and written in batches, and that the
+tiered cache serves repeat lookups from memory and survives a failing store.
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+# Add the python directory to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.cache_manager import LRUCache
+from core.comment_store import SQLiteCommentStore, TieredCommentCache, create_comment_store
+
+
+class TestSQLiteCommentStore:
+    """Test cases for the SQLite backend."""
+
+    def test_comment_shared_between_processes(self, tmp_path):
+        path = str(tmp_path / "comments.db")
+        SQLiteCommentStore(path).set("ai_comment:abc", "Develops the knight toward the centre.")
+        # A second store on the same file stands in for another worker or a restart
+        assert SQLiteCommentStore(path).get("ai_comment:abc") == "Develops the knight toward the centre."
+
+    def test_hit_rate(self, tmp_path):
+        store = SQLiteCommentStore(str(tmp_path / "comments.db"))
+        store.set("ai_comment:1", "Good move.")
+        assert store.get("ai_comment:1") == "Good move."
+        assert store.get("ai_comment:2") is None
+        stats = store.stats()
+        assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
+        assert stats["entries"] == 1
+
+    def test_replace_keeps_one_entry(self, tmp_path):
+        store = SQLiteCommentStore(str(tmp_path / "comments.db"))
+        store.set("ai_comment:1", "First.")
+        store.set("ai_comment:1", "Second.")
+        assert store.get("ai_comment:1") == "Second."
+        assert store.stats()["bytes"] == len("Second.")
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        store = SQLiteCommentStore(str(tmp_path / "comments.db"), max_bytes=100, evict_every=5)
+        for index in range(4):
+            store.set(f"ai_comment:{index}", "x" * 30)
+            store._execute("UPDATE ai_comments SET last_used = ? WHERE key = ?", (index, f"ai_comment:{index}"))
+        assert store.get("ai_comment:0") == "x" * 30  # Recently used again
+
+        store.set("ai_comment:4", "x" * 30)  # Fifth write checks the size: 150 bytes
+        stats = store.stats()
+        assert stats["bytes"] <= 90
+        assert stats["evicted"] == 2
+        assert store.get("ai_comment:0") == "x" * 30
+        assert store.get("ai_comment:1") is None
+        assert store.get("ai_comment:2") is None
+
+    def test_running_total_matches_stored_bytes(self, tmp_path):
+        path = str(tmp_path / "comments.db")
+        store = SQLiteCommentStore(path, max_bytes=100, evict_every=1)
+
+        def stored_bytes():
+            return store._execute("SELECT COALESCE(SUM(size), 0) FROM ai_comments", fetch=True)[0][0]
+
+        for index in range(6):
+            store.set(f"ai_comment:{index}", "x" * (20 + index))
+            assert store.stats()["bytes"] == stored_bytes() <= 100
+        store.set("ai_comment:5", "short")
+        assert store.stats()["bytes"] == stored_bytes()
+        # A second store on the same file picks up the existing total
+        assert SQLiteCommentStore(path).stats()["bytes"] == stored_bytes()
+        store.clear()
+        assert store.stats()["bytes"] == 0
+
+    def test_hits_are_written_in_batches(self, tmp_path):
+        store = SQLiteCommentStore(str(tmp_path / "comments.db"), touch_batch=2, touch_interval=3600)
+        store.set("ai_comment:1", "Good move.")
+        store.set("ai_comment:2", "Better move.")
+
+        def hits():
+            return dict(store._execute("SELECT key, hits FROM ai_comments", fetch=True))
+
+        store.get("ai_comment:1")
+        store.get("ai_comment:1")
+        assert hits() == {"ai_comment:1": 0, "ai_comment:2": 0}  # Buffered
+        store.get("ai_comment:2")  # Second distinct key fills the batch
+        assert hits() == {"ai_comment:1": 2, "ai_comment:2": 1}
+        assert store.flush_touches() == 0
+
+    def test_create_from_url(self, tmp_path):
+        assert create_comment_store("off") is None
+        assert create_comment_store(None) is None
+        assert isinstance(create_comment_store(f"sqlite:///{tmp_path / 'c.db'}"), SQLiteCommentStore)
+        with pytest.raises(ValueError):
+            create_comment_store("redis://localhost")
+
+
+class TestTieredCommentCache:
+    """Test cases for the in-memory cache in front of the store."""
+
+    def test_store_hit_is_copied_to_memory(self, tmp_path):
+        path = str(tmp_path / "comments.db")
+        SQLiteCommentStore(path).set("ai_comment:abc", "Castles into safety.")
+        store = SQLiteCommentStore(path)
+        cache = TieredCommentCache(LRUCache(maxsize=10), store)
+
+        assert cache.get("ai_comment:abc") == "Castles into safety."
+        assert cache.get("ai_comment:abc") == "Castles into safety."
+        assert store.stats()["hits"] == 1  # Second lookup served from memory
+        assert cache.get("ai_comment:missing") is None
+
+    def test_set_writes_through(self, tmp_path):
+        path = str(tmp_path / "comments.db")
+        TieredCommentCache(LRUCache(maxsize=10), SQLiteCommentStore(path)).set("ai_comment:abc", "Pins the knight.")
+        assert SQLiteCommentStore(path).get("ai_comment:abc") == "Pins the knight."
+
+    def test_failing_store_is_a_miss(self, tmp_path):
+        store = SQLiteCommentStore(str(tmp_path / "comments.db"))
+        cache = TieredCommentCache(LRUCache(maxsize=10), store)
+        store._execute("DROP TABLE ai_comments")
+
+        cache.set("ai_comment:abc", "Still cached locally.")
+        assert cache.get("ai_comment:abc") == "Still cached locally."
+        assert cache.get("ai_comment:other") is None
+        with pytest.raises(sqlite3.Error):
+            store.get("ai_comment:other")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the cached entitlement resolver.
+
+These tests verify that entitlements are resolved with one RPC and reused
+from the cache, that usage increments invalidate them, and that premium and
+usage-limit decisions match the database functions they replace.
+"""
+
+import asyncio
+import os
+import sys
+from unittest.mock import Mock
+
+# Add the python directory to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.entitlements import Entitlement, EntitlementService, is_auth_user_id
+from core.usage_tracker import UsageTracker
+
+USER_ID = "0f8fad5b-d9cb-469f-a165-70867728950e"
+
+
+def _entitlement_row(**overrides):
+    row = {
+        'found': True,
+        'auth_user_id': USER_ID,
+        'account_tier': 'free',
+        'subscription_status': None,
+        'chess_com_username': None,
+        'lichess_username': 'alice',
+        'import_limit': 100,
+        'analysis_limit': 5,
+        'current_imports': 40,
+        'current_analyses': 5,
+        'reset_at': '2026-01-01T00:00:00+00:00',
+    }
+    row.update(overrides)
+    return row
+
+
+def _client(rpc_data):
+    client = Mock()
+    client.rpc.return_value.execute.side_effect = lambda: Mock(data=rpc_data())
+    return client
+
+
+class TestEntitlement:
+    """Test cases for entitlement decisions."""
+
+    def test_premium_requires_active_subscription(self):
+        assert Entitlement.from_row(_entitlement_row(account_tier='pro_monthly', subscription_status='active')).is_premium
+        assert Entitlement.from_row(_entitlement_row(account_tier='pro', subscription_status='trialing')).is_premium
+        assert not Entitlement.from_row(_entitlement_row(account_tier='pro', subscription_status='canceled')).is_premium
+        assert not Entitlement.from_row(_entitlement_row(subscription_status='active')).is_premium
+        assert not Entitlement(found=False).is_premium
+
+    def test_usage_check_matches_check_usage_limits(self):
+        entitlement = Entitlement.from_row(_entitlement_row())
+        assert entitlement.linked_usernames == {'lichess': 'alice'}
+
+        can_import, stats = entitlement.usage_check('import')
+        assert can_import and stats['import_limit'] == 100
+        assert entitlement.remaining('import') == 60
+
+        can_analyze, stats = entitlement.usage_check('analyze')
+        assert not can_analyze
+        assert stats['reason'] == 'Analysis limit reached: 5/5'
+
+        unlimited = Entitlement.from_row(_entitlement_row(analysis_limit=None))
+        assert unlimited.usage_check('analyze') == (True, {'can_proceed': True, 'is_unlimited': True, 'account_tier': 'free'})
+        assert Entitlement(found=False).usage_check('import')[1]['is_anonymous']
+
+    def test_auth_user_id_detection(self):
+        assert is_auth_user_id(USER_ID)
+        assert not is_auth_user_id("alice")
+        assert not is_auth_user_id("")
+
+
+class TestEntitlementService:
+    """Test cases for resolution, caching and invalidation."""
+
+    def test_resolves_once_and_caches(self):
+        client = _client(_entitlement_row)
+        service = EntitlementService(client)
+
+        async def run():
+            first = await service.resolve(USER_ID)
+            second = await service.resolve(USER_ID)
+            by_username = await service.resolve('alice', 'lichess')
+            return first, second, by_username
+
+        first, second, by_username = asyncio.run(run())
+        assert first is second
+        assert by_username.auth_user_id == USER_ID
+        assert client.rpc.call_count == 2
+        client.rpc.assert_any_call('get_user_entitlements', {'p_user_id': 'alice', 'p_platform': 'lichess'})
+
+        assert service.invalidate(USER_ID) == 2
+        asyncio.run(service.resolve(USER_ID))
+        assert client.rpc.call_count == 3
+
+    def test_unknown_users_are_not_cached(self):
+        client = _client(lambda: {'found': False})
+        service = EntitlementService(client)
+        assert not asyncio.run(service.resolve('bob', 'lichess')).found
+        assert not asyncio.run(service.resolve('bob', 'lichess')).found
+        assert client.rpc.call_count == 2
+        assert not asyncio.run(service.resolve('bob')).found  # Username without platform: no query
+        assert client.rpc.call_count == 2
+
+    def test_usage_tracker_uses_cache_and_invalidates_on_increment(self):
+        rows = {'get_user_entitlements': _entitlement_row(current_imports=99),
+                'increment_usage_atomic': {'success': True, 'new_value': 100}}
+        client = Mock()
+        client.rpc.side_effect = lambda name, params: Mock(execute=Mock(return_value=Mock(data=rows[name])))
+        service = EntitlementService(client)
+        tracker = UsageTracker(client, entitlements=service)
+
+        async def run():
+            results = [await tracker.check_import_limit(USER_ID) for _ in range(3)]
+            rows['get_user_entitlements'] = _entitlement_row(current_imports=100)
+            await tracker.increment_usage(USER_ID, 'import', count=1)
+            results.append(await tracker.check_import_limit(USER_ID))
+            return results
+
+        results = asyncio.run(run())
+        assert [can_proceed for can_proceed, _ in results] == [True, True, True, False]
+        names = [call.args[0] for call in client.rpc.call_args_list]
+        assert names == ['get_user_entitlements', 'increment_usage_atomic', 'get_user_entitlements']
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Unit tests for pre-encoded JSON responses.
+
+These tests verify that payloads encode to the same JSON FastAPI would send
+with either backend, that a cached payload is encoded once and reused, and
+that large bodies are served pre-compressed only to clients that accept gzip.
+"""
+
+import gzip
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import pytest
+from pydantic import BaseModel
+
+# Add the python directory to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core import fast_json
+from core.fast_json import EncodedJSONResponse, EncodedPayload, FastJSONResponse, dumps
+
+
+class Summary(BaseModel):
+    total_games: int
+    phase_accuracies: Dict[str, float]
+    played_at: Optional[datetime] = None
+
+
+class FakeRequest:
+    def __init__(self, accept_encoding=""):
+        self.headers = {"accept-encoding": accept_encoding}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    """Run a test with orjson (if installed) and with the stdlib encoder."""
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(fast_json, "ORJSON_AVAILABLE", False)
+    return request.param
+
+
+@pytest.mark.usefixtures("backend")
+class TestDumps:
+    """Test cases for encoding with each backend."""
+
+    def test_matches_stdlib_json(self):
+        data = {"games": [{"id": "g1", "accuracy": 87.5, "moves": [1, 2, 3]}], "name": "Élise", "ok": None}
+        assert json.loads(dumps(data)) == data
+        assert b" " not in dumps({"a": [1, 2]})  # Compact separators
+
+    def test_models_and_extended_types(self):
+        played_at = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+        model = Summary(total_games=3, phase_accuracies={"opening": 90.0}, played_at=played_at)
+        assert json.loads(dumps(model)) == model.model_dump(mode="json")
+        assert json.loads(dumps({"summary": model, "tags": {"a"}})) == {
+            "summary": model.model_dump(mode="json"), "tags": ["a"],
+        }
+
+    def test_rejects_non_finite_floats(self):
+        for value in (float("nan"), float("inf"), float("-inf")):
+            with pytest.raises(ValueError):
+                dumps({"games": [{"accuracy": value, "opponent": None}]})
+        assert dumps({"accuracy": None}) == b'{"accuracy":null}'
+
+
+class TestEncodedPayload:
+    """Test cases for cached bodies and compression."""
+
+    def test_body_is_encoded_once(self, monkeypatch):
+        calls = []
+        real_dumps = fast_json.dumps
+        monkeypatch.setattr(fast_json, "dumps", lambda obj: calls.append(obj) or real_dumps(obj))
+        payload = EncodedPayload({"games": list(range(10))})
+        for _ in range(3):
+            EncodedJSONResponse.from_payload(payload)
+        assert len(calls) == 1
+        assert payload.data == {"games": list(range(10))}
+
+    def test_large_bodies_are_served_gzipped_when_accepted(self):
+        payload = EncodedPayload({"moves": [{"san": "e4", "accuracy": 100.0}] * 200})
+        assert len(payload.body) >= fast_json.GZIP_MIN_BYTES
+
+        plain = EncodedJSONResponse.from_payload(payload, FakeRequest("identity"))
+        assert plain.body == payload.body
+        assert "content-encoding" not in plain.headers
+
+        compressed = EncodedJSONResponse.from_payload(payload, FakeRequest("gzip, deflate, br"))
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert compressed.headers["vary"] == "Accept-Encoding"
+        assert gzip.decompress(compressed.body) == payload.body
+        assert compressed.body is EncodedJSONResponse.from_payload(payload, FakeRequest("gzip")).body
+
+    def test_small_bodies_are_not_compressed(self):
+        response = EncodedJSONResponse.from_payload(EncodedPayload({"ok": True}), FakeRequest("gzip"))
+        assert response.body == b'{"ok":true}'
+        assert response.media_type == "application/json"
+        assert FastJSONResponse(content={"ok": True}).body == b'{"ok":true}'
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Unit tests for fair-share game scheduling across analysis jobs.
+
+A single-thread executor stands in for the shared process pool so the
+dispatch order can be observed directly.
+"""
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pytest
+
+# Add the python directory to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.game_scheduler import FairShareScheduler
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = FairShareScheduler(max_workers=1)
+    pool = ThreadPoolExecutor(max_workers=1)
+    scheduler._get_executor = lambda: pool
+    yield scheduler
+    pool.shutdown(wait=True)
+
+
+def _blocked_run(scheduler, submissions):
+    """Hold the single worker while everything is queued, then record the run order."""
+    gate = threading.Event()
+    order = []
+    futures = [scheduler.submit("warmup", 1.0, "warmup", gate.wait)]
+    for share_key, weight, job_id, label in submissions:
+        futures.append(scheduler.submit(share_key, weight, job_id, order.append, label))
+    gate.set()
+    wait(futures, timeout=5)
+    return order
+
+
+class TestFairShareScheduler:
+    """Test cases for dispatch order, weights and cancellation."""
+
+    def test_small_job_is_not_stuck_behind_backfill(self, scheduler):
+        submissions = [("power", 1.0, "big", f"big-{i}") for i in range(6)]
+        submissions += [("casual", 1.0, "small", f"small-{i}") for i in range(2)]
+        order = _blocked_run(scheduler, submissions)
+        assert order.index("small-1") < 4
+
+    def test_weights_give_proportional_share(self, scheduler):
+        submissions = [("free", 1.0, "a", "free") for _ in range(6)]
+        submissions += [("pro", 2.0, "b", "pro") for _ in range(6)]
+        order = _blocked_run(scheduler, submissions)
+        assert order[:6].count("pro") == 4
+
+    def test_cancel_job_drops_queued_games(self, scheduler):
+        gate = threading.Event()
+        blocker = scheduler.submit("u1", 1.0, "job-1", gate.wait)
+        queued = [scheduler.submit("u1", 1.0, "job-1", len, "x") for _ in range(3)]
+        assert scheduler.cancel_job("job-1") == 3
+        assert all(f.cancelled() for f in queued)
+        gate.set()
+        blocker.result(timeout=5)
+        assert scheduler.get_stats()["queued_games"] == 0
+
+    def test_tier_weights(self, scheduler):
+        assert scheduler.weight_for(None) == 1.0
+        assert scheduler.weight_for("pro_monthly") > scheduler.weight_for("free")
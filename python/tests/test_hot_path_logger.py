@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the hot-path logger.
+
+These tests verify per-category levels, lazy message formatting, sampling,
+rate limiting, the bounded buffer and text/JSON rendering through the
+background writer.
+"""
+
+import io
+import json
+import os
+import sys
+
+# Add the python directory to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core import hot_path_logger
+from core.hot_path_logger import DEBUG, INFO, WARNING, HotPathLogger, _parse_mapping, _parse_level
+
+
+def _logger(**kwargs) -> HotPathLogger:
+    return HotPathLogger(stream=io.StringIO(), **kwargs)
+
+
+class TestHotPathLogger:
+    """Test cases for filtering, sampling and emission."""
+
+    def test_levels_filter_per_category(self):
+        log = _logger(default_level=INFO, levels={"pv": DEBUG})
+        log.debug("COACHING", "hidden")
+        log.debug("PV", "Captured %d moves", 3)
+        log.info("QUEUE", "Progress update", job_id="j1", completed=2)
+        assert log.flush()
+
+        assert log.stream.getvalue().splitlines() == [
+            "[PV] Captured 3 moves",
+            "[QUEUE] Progress update job_id=j1 completed=2",
+        ]
+        assert log.stats()["suppressed"] == 1
+        assert log.stats()["emitted"] == 2
+        assert log.enabled("PV", DEBUG) and not log.enabled("COACHING", DEBUG)
+
+    def test_callable_messages_are_only_built_when_emitted(self):
+        log = _logger(default_level=INFO)
+        calls = []
+
+        def build():
+            calls.append(1)
+            return "expensive"
+
+        log.debug("BRILLIANT", build)
+        assert calls == []
+        log.warning("BRILLIANT", build)
+        assert log.flush()
+        assert calls == [1]
+        assert log.stream.getvalue() == "[BRILLIANT] expensive\n"
+
+    def test_sampling_and_rate_limits_skip_warnings(self, monkeypatch):
+        log = _logger(default_level=DEBUG, sample_rates={"COACHING": 0.25}, rate_limits={"QUEUE": 2})
+        values = iter([0.1, 0.9, 0.9, 0.1])
+        monkeypatch.setattr(hot_path_logger.random, "random", lambda: next(values))
+        for _ in range(4):
+            log.debug("COACHING", "sampled")
+        for _ in range(5):
+            log.info("QUEUE", "limited")
+        log.warning("QUEUE", "always")
+        assert log.flush()
+
+        stats = log.stats()
+        assert stats["sampled_out"] == 2
+        assert stats["rate_limited"] == 3
+        assert log.stream.getvalue().count("[COACHING] sampled") == 2
+        assert log.stream.getvalue().count("[QUEUE] limited") == 2
+        assert "[QUEUE] always" in log.stream.getvalue()
+
+    def test_full_buffer_drops_oldest_records(self):
+        log = _logger(max_queue_size=2)
+        # Hold the lock so the writer cannot drain while records are queued
+        with log._condition:
+            log._buffer.extend([(0.0, INFO, "X", "old", (), {})] * 2)
+            log._pending = 2
+        log._enqueue((0.0, INFO, "X", "new", (), {}))
+        assert log.flush()
+        assert log.stats()["dropped"] == 1
+        assert log.stream.getvalue().splitlines()[-1] == "[X] new"
+
+    def test_json_format_and_env_parsing(self):
+        log = _logger(output_format="json")
+        log.info("SAVE ANALYSIS", "Saved %s", "g1", moves=40)
+        assert log.flush()
+        record = json.loads(log.stream.getvalue())
+        assert record["category"] == "SAVE ANALYSIS"
+        assert record["message"] == "Saved g1"
+        assert record["level"] == "INFO" and record["moves"] == 40
+
+        assert _parse_mapping("PV=DEBUG, brilliant=warning,bad", _parse_level) == {"PV": DEBUG, "BRILLIANT": WARNING}
+        assert _parse_mapping("COACHING=0.01", float) == {"COACHING": 0.01}
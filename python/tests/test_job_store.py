@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the durable analysis job store.
+
+These tests use the SQLite backend to verify leases, lease expiry,
+idempotent completion and job recovery records, and that a node only
+recovers jobs whose owner's lease has expired.
+"""
+
+import asyncio
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+import pytest
+
+# Add the python directory to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.job_store import SQLiteJobStore, ITEM_DONE, ITEM_FAILED, ITEM_LEASED, ITEM_PENDING
+from core.analysis_queue import AnalysisJob, AnalysisQueue, AnalysisStatus, _job_from_record, _job_to_record
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteJobStore(str(tmp_path / "jobs.db"), lease_seconds=60, max_attempts=2)
+
+
+def _job(job_id: str = "job-1") -> AnalysisJob:
+    return AnalysisJob(
+        job_id=job_id,
+        user_id="magnus",
+        platform="lichess",
+        analysis_type="stockfish",
+        limit=3,
+        depth=14,
+        skill_level=20,
+    )
+
+
+async def _recover(store):
+    # Built inside the loop so the queue processor task belongs to it
+    queue = AnalysisQueue(store=store)
+    return queue, await queue.recover_jobs()
+
+
+class TestJobStore:
+    """Test cases for job persistence and work item leasing."""
+
+    def test_job_round_trip(self, store):
+        job = _job()
+        job.status = AnalysisStatus.RUNNING
+        job.started_at = datetime.now()
+        job.result = {"analyzed_games": 2}
+        store.save_job(_job_to_record(job))
+
+        restored = _job_from_record(store.get_job("job-1"))
+        assert restored.status == AnalysisStatus.RUNNING
+        assert restored.limit == 3
+        assert restored.result == {"analyzed_games": 2}
+        assert [r["job_id"] for r in store.load_unfinished_jobs()] == ["job-1"]
+
+    def test_job_completed_once(self, store):
+        record = _job_to_record(_job())
+        store.save_job(record)
+        record["status"] = AnalysisStatus.COMPLETED.value
+        assert store.mark_job_completed("job-1", record) is True
+        assert store.mark_job_completed("job-1", record) is False
+        assert store.load_unfinished_jobs() == []
+
+    def test_work_items_are_not_duplicated(self, store):
+        assert store.add_work_items("job-1", [("g1", {"id": "g1"}), ("g2", {"id": "g2"})]) == 2
+        assert store.add_work_items("job-1", [("g1", {"id": "g1"})]) == 0
+        assert store.work_item_counts("job-1")[ITEM_PENDING] == 2
+
+    def test_claims_are_exclusive_until_lease_expires(self, store):
+        store.add_work_items("job-1", [("g1", {"id": "g1"})])
+        claimed = store.claim_work_items("worker-a", job_id="job-1", limit=5)
+        assert [item["game_id"] for item in claimed] == ["g1"]
+        assert store.claim_work_items("worker-b", job_id="job-1", limit=5) == []
+
+        # Simulate a crashed worker: its lease runs out without heartbeats
+        store._execute("UPDATE analysis_work_items SET lease_expires_at = ?", (time.time() - 1,))
+        reclaimed = store.claim_work_items("worker-b", job_id="job-1", limit=5)
+        assert reclaimed[0]["attempts"] == 2
+
+    def test_items_fail_after_max_attempts(self, store):
+        store.add_work_items("job-1", [("g1", {"id": "g1"})])
+        for _ in range(2):
+            store.claim_work_items("worker-a", job_id="job-1")
+            store._execute("UPDATE analysis_work_items SET lease_expires_at = ?", (time.time() - 1,))
+        assert store.claim_work_items("worker-a", job_id="job-1") == []
+        assert store.work_item_counts("job-1")[ITEM_FAILED] == 1
+
+    def test_heartbeat_and_release(self, store):
+        store.add_work_items("job-1", [("g1", {"id": "g1"})])
+        store.claim_work_items("worker-a", job_id="job-1")
+        assert store.heartbeat("worker-a", job_id="job-1") == 1
+        assert store.heartbeat("worker-b") == 0
+        assert store.release_work_items("worker-a", job_id="job-1") == 1
+        assert store.work_item_counts("job-1")[ITEM_PENDING] == 1
+
+    def test_completion_is_idempotent(self, store):
+        store.add_work_items("job-1", [("g1", {"id": "g1"})])
+        store.claim_work_items("worker-a", job_id="job-1")
+        assert store.complete_work_item("job-1", "g1", {"game_id": "g1", "success": True}) is True
+        assert store.complete_work_item("job-1", "g1", {"game_id": "g1", "success": False}) is False
+
+        counts = store.work_item_counts("job-1")
+        assert counts[ITEM_DONE] == 1 and counts[ITEM_LEASED] == 0
+        assert store.get_work_results("job-1") == [{"game_id": "g1", "success": True}]
+
+
+class TestJobOwnership:
+    """Test cases for job leases between nodes."""
+
+    def test_live_lease_blocks_other_nodes(self, store):
+        store.save_job(_job_to_record(_job()))
+        assert [r["job_id"] for r in store.load_orphaned_jobs()] == ["job-1"]  # Never leased
+
+        assert store.acquire_job("job-1", "node-a") is True
+        assert store.acquire_job("job-1", "node-a") is True  # Owner keeps its lease
+        assert store.acquire_job("job-1", "node-b") is False
+        assert store.load_orphaned_jobs() == []
+
+        # node-a stops renewing: its lease runs out and node-b may adopt the job
+        store._execute("UPDATE analysis_jobs SET owner_expires_at = ?", (time.time() - 1,))
+        assert [r["job_id"] for r in store.load_orphaned_jobs()] == ["job-1"]
+        assert store.acquire_job("job-1", "node-b") is True
+        assert store.renew_job_leases("node-a") == 0
+        assert store.renew_job_leases("node-b") == 1
+
+    def test_release_makes_job_adoptable(self, store):
+        store.save_job(_job_to_record(_job()))
+        store.acquire_job("job-1", "node-a")
+        assert store.release_jobs("node-a") == 1
+        assert store.acquire_job("job-1", "node-b") is True
+
+    def test_existing_store_gains_owner_columns(self, tmp_path):
+        path = str(tmp_path / "old.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE analysis_jobs (job_id TEXT PRIMARY KEY, status TEXT)")
+        conn.commit()
+        conn.close()
+        store = SQLiteJobStore(path)
+        assert {"owner", "owner_expires_at"} <= set(store._columns("analysis_jobs"))
+
+    def test_recovery_skips_jobs_of_live_nodes(self, store):
+        for job_id in ("job-live", "job-orphan"):
+            store.save_job(_job_to_record(_job(job_id)))
+            store.acquire_job(job_id, "node-a")
+        store._execute("UPDATE analysis_jobs SET owner_expires_at = ? WHERE job_id = 'job-orphan'", (time.time() - 1,))
+
+        queue, recovered = asyncio.run(_recover(store))
+        assert recovered == 1
+        assert list(queue.jobs) == ["job-orphan"]
+        assert store.acquire_job("job-orphan", "node-a") is False
+        # A second node running recovery at the same time finds nothing left to adopt
+        assert asyncio.run(_recover(store))[1] == 0
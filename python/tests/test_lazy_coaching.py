@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Unit tests for deferred (lazy) coaching enrichment.
+
+These tests analyze a short game with coaching deferred, then enrich the
+stored move dicts and compare the coaching fields against eager analysis.
+Analysis runs on the heuristic path, so Stockfish is not required.
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+from dataclasses import asdict
+
+# Add the python directory to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.analysis_engine import COACHING_FIELDS, AnalysisConfig, AnalysisType, ChessAnalysisEngine
+
+PGN = """[White "tester"]
+[Black "opponent"]
+
+1. e4 e5 2. Nf3 Nc6 3. Bb5 a6 4. Ba4 Nf6 5. O-O Be7 6. Re1 b5 7. Bb3 d6 8. c3 O-O 1-0
+"""
+
+
+def _analyze(lazy_coaching: bool):
+    engine = ChessAnalysisEngine(config=AnalysisConfig(lazy_coaching=lazy_coaching))
+    engine.stockfish_path = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        analysis = asyncio.run(
+            engine.analyze_game(PGN, "tester", "lichess", AnalysisType.STOCKFISH, "lazy-coaching-test")
+        )
+    return engine, analysis
+
+
+class TestLazyCoaching:
+    """Test cases for deferring and enriching coaching fields."""
+
+    def test_lazy_enrichment_matches_eager_coaching(self, monkeypatch):
+        # Comment templates are picked at random; make the choice deterministic
+        monkeypatch.setattr(random, "choice", lambda seq: list(seq)[0])
+        monkeypatch.setattr(random, "random", lambda: 0.5)
+
+        _, eager = _analyze(lazy_coaching=False)
+        engine, lazy = _analyze(lazy_coaching=True)
+        assert all(move.coaching_pending for move in lazy.moves_analysis)
+        assert not any(move.coaching_pending for move in eager.moves_analysis)
+        assert all(move.coaching_comment == "" for move in lazy.moves_analysis)
+
+        stored = [asdict(move) for move in lazy.moves_analysis]
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert engine.enrich_coaching(stored) == len(stored)
+
+        for expected, move in zip(eager.moves_analysis, stored):
+            assert move["coaching_pending"] is False
+            for name in COACHING_FIELDS:
+                assert move[name] == getattr(expected, name), (expected.move_san, name)
+
+    def test_enrichment_skips_completed_moves(self):
+        engine = ChessAnalysisEngine()
+        stored = [{"move": "e2e4", "move_san": "e4", "coaching_comment": "kept", "coaching_pending": False}]
+        assert engine.enrich_coaching(stored) == 0
+        assert stored[0]["coaching_comment"] == "kept"
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the process-wide LLM request scheduler.
+
+These tests verify that requests are admitted at the provider's rate and
+concurrency, that interactive requests go ahead of batch requests, that
+identical in-flight requests share one provider call, that a 429 pauses
+admission, that rejected and transiently failed requests are replayed from
+the persistent retry queue by their own provider, and that a burst through the scheduler stays within the limits of the
+local fake provider.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import httpx
+
+# Add the python and loadtest directories to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts', 'loadtest'))
+
+from core import llm_scheduler
+from core.llm_scheduler import LLMScheduler, Priority, RetryQueue, create_retry_queue, mark_transient_failure
+from fakes import FixtureServer
+
+
+class FakeClock:
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _scheduler(clock=time.monotonic, **overrides):
+    settings = dict(rate=2.0, burst=2, max_concurrency=4)
+    settings.update(overrides)
+    return LLMScheduler("anthropic", clock=clock, **settings)
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+class TestAdmission:
+    """Test cases for the shared token bucket, concurrency and priorities."""
+
+    def test_burst_then_rate(self):
+        clock = FakeClock()
+        scheduler = _scheduler(clock)
+        assert scheduler.acquire(timeout=0)
+        assert scheduler.acquire(timeout=0)
+        assert not scheduler.acquire(timeout=0)  # Bucket empty; nothing left queued
+        assert scheduler.stats()["waiting"] == 0
+
+        clock.now += 0.5  # One token at 2 req/s
+        assert scheduler.acquire(timeout=0)
+        assert not scheduler.acquire(timeout=0)
+        assert scheduler.stats()["admitted"] == 3
+
+    def test_concurrency_limit(self):
+        scheduler = _scheduler(rate=1000.0, burst=10, max_concurrency=2)
+        assert scheduler.acquire(timeout=0)
+        assert scheduler.acquire(timeout=0)
+        assert not scheduler.acquire(timeout=0.02)
+        scheduler.release()
+        assert scheduler.acquire(timeout=0)
+
+    def test_interactive_goes_before_batch(self):
+        scheduler = _scheduler(rate=1000.0, burst=10, max_concurrency=1)
+        assert scheduler.acquire()
+        order = []
+
+        def wait(priority):
+            scheduler.acquire(priority, timeout=5.0)
+            order.append(priority)
+            scheduler.release()
+
+        threads = [threading.Thread(target=wait, args=(Priority.BATCH,)),
+                   threading.Thread(target=wait, args=(Priority.RETRY,))]
+        for thread in threads:
+            thread.start()
+        _wait_for(lambda: scheduler.stats()["waiting"] == 2)
+
+        async def chat():
+            assert await scheduler.acquire_async(Priority.INTERACTIVE, timeout=5.0)
+            order.append(Priority.INTERACTIVE)
+            scheduler.release()
+
+        async def main():
+            task = asyncio.create_task(chat())
+            await asyncio.sleep(0.02)
+            scheduler.release()
+            await task
+
+        asyncio.run(main())
+        for thread in threads:
+            thread.join(5)
+        assert order == [Priority.INTERACTIVE, Priority.BATCH, Priority.RETRY]
+
+    def test_async_timeout_leaves_queue(self):
+        scheduler = _scheduler(FakeClock(), burst=1)
+        assert scheduler.acquire()
+        assert not asyncio.run(scheduler.acquire_async(timeout=0))
+        assert scheduler.stats()["waiting"] == 0
+
+    def test_throttled_pauses_admission(self):
+        clock = FakeClock()
+        scheduler = _scheduler(clock, burst=5)
+        scheduler.throttled(retry_after=5.0)
+        assert not scheduler.acquire(timeout=0)
+        clock.now += 5.0
+        # Resumes with one token instead of a full burst
+        assert scheduler.acquire(timeout=0)
+        assert not scheduler.acquire(timeout=0)
+        assert scheduler.stats()["throttled"] == 1
+
+
+class TestCoalescing:
+    """Test cases for sharing one provider call between identical requests."""
+
+    def test_identical_keys_share_one_call(self):
+        scheduler = _scheduler(rate=1000.0, burst=10)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def provider_call():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "A solid developing move."
+
+        results = []
+        first = threading.Thread(target=lambda: results.append(scheduler.call(provider_call, key="ai_comment:abc")))
+        first.start()
+        started.wait(5)
+        second = threading.Thread(target=lambda: results.append(scheduler.call(provider_call, key="ai_comment:abc")))
+        second.start()
+        _wait_for(lambda: scheduler.stats()["coalesced"] == 1)
+        release.set()
+        first.join(5)
+        second.join(5)
+
+        assert len(calls) == 1
+        assert results == ["A solid developing move."] * 2
+        # Finished requests are not coalesced with later ones
+        assert scheduler.call(lambda: "again", key="ai_comment:abc") == "again"
+
+    def test_async_followers_share_result(self):
+        scheduler = _scheduler(rate=1000.0, burst=10)
+        calls = []
+
+        async def provider_call():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return "text"
+
+        async def main():
+            return await asyncio.gather(*(scheduler.call_async(provider_call, key="k") for _ in range(3)))
+
+        assert asyncio.run(main()) == ["text"] * 3
+        assert len(calls) == 1
+
+
+class TestRetryQueue:
+    """Test cases for persisting and replaying rejected requests."""
+
+    def test_rejected_request_is_replayed(self, tmp_path):
+        queue = RetryQueue(str(tmp_path / "retries.db"))
+        clock = FakeClock()
+        handlers = {}
+        scheduler = _scheduler(clock, burst=1, retry_queue=queue, retry_delay=0.0, retry_handlers=handlers)
+        assert scheduler.acquire()
+        scheduler.release()
+
+        # Bucket empty: the batch request is rejected and queued
+        result = scheduler.call(lambda: "unused", key="ai_comment:1", timeout=0,
+                                retry=("comment", {"prompt": "p"}))
+        assert result is None
+        assert len(queue) == 1
+
+        replayed = []
+        handlers["comment"] = lambda payload: replayed.append(payload) or True
+        clock.now += 1.0
+        assert scheduler.process_retries() == 1
+        assert replayed == [{"prompt": "p"}]
+        assert len(queue) == 0
+
+    def test_failed_request_backs_off_and_is_dropped(self, tmp_path):
+        queue = RetryQueue(str(tmp_path / "retries.db"))
+        handlers = {}
+        scheduler = _scheduler(rate=1000.0, burst=10, retry_queue=queue, retry_delay=0.0, max_retry_attempts=2,
+                               retry_handlers=handlers)
+        scheduler.call(mark_transient_failure, key="ai_comment:2", retry=("comment", {"prompt": "p"}))
+        assert len(queue) == 1
+
+        handlers["comment"] = lambda payload: False
+        assert scheduler.process_retries() == 0
+        assert queue.claim(10)[0][3] == 1  # attempts
+        queue.reschedule("ai_comment:2", 1, 0.0)
+        scheduler.process_retries()
+        assert len(queue) == 0
+        assert scheduler.stats()["retries_dropped"] == 1
+
+    def test_only_transient_failures_are_queued(self, tmp_path):
+        queue = RetryQueue(str(tmp_path / "retries.db"))
+        scheduler = _scheduler(rate=1000.0, burst=10, retry_queue=queue, retry_delay=0.0)
+        # An invalid request (400) fails the same way on every replay
+        assert scheduler.call(lambda: None, key="ai_comment:bad", retry=("comment", {"prompt": "p"})) is None
+
+        async def timed_out():
+            mark_transient_failure()
+            return None
+
+        asyncio.run(scheduler.call_async(timed_out, key="ai_comment:slow", retry=("comment", {"prompt": "p"})))
+        scheduler.call(lambda: scheduler.throttled(0.0), key="ai_comment:busy", retry=("comment", {"prompt": "p"}))
+        assert sorted(row[0] for row in queue.claim(10)) == ["ai_comment:busy", "ai_comment:slow"]
+
+    def test_claim_is_per_provider(self, tmp_path):
+        queue = RetryQueue(str(tmp_path / "retries.db"))
+        queue.push("comment", "a", {"prompt": "p"}, delay=0.0, provider="anthropic")
+        queue.push("comment", "g", {"prompt": "p"}, delay=0.0, provider="gemini")
+        assert sorted(queue.providers()) == ["anthropic", "gemini"]
+        assert [row[0] for row in queue.claim(10, provider="gemini")] == ["g"]
+        assert [row[0] for row in queue.claim(10, provider="anthropic")] == ["a"]
+
+    def test_stored_retries_are_replayed_after_restart(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "retries.db")
+        RetryQueue(path).push("comment", "g", {"prompt": "p"}, delay=0.0, provider="gemini")
+        # A fresh process: no scheduler has been created yet
+        monkeypatch.setattr(llm_scheduler, "_schedulers", {})
+        monkeypatch.setattr(llm_scheduler, "_retry_queue", RetryQueue(path))
+        monkeypatch.setattr(llm_scheduler, "_retry_queue_created", True)
+        replayed = []
+        monkeypatch.setitem(llm_scheduler._retry_handlers, "comment", lambda payload: replayed.append(payload) or True)
+
+        assert llm_scheduler.process_pending_retries() == 1
+        assert replayed == [{"prompt": "p"}]
+        assert "gemini" in llm_scheduler._schedulers
+
+    def test_claim_hides_requests_from_other_processes(self, tmp_path):
+        path = str(tmp_path / "retries.db")
+        queue = RetryQueue(path)
+        assert queue.push("comment", "k", {"prompt": "p"}, delay=0.0)
+        assert not queue.push("comment", "k", {"prompt": "other"}, delay=0.0)  # Already queued
+        assert [row[0] for row in queue.claim(10)] == ["k"]
+        assert RetryQueue(path).claim(10) == []
+
+    def test_create_from_url(self, tmp_path):
+        assert create_retry_queue("off") is None
+        assert isinstance(create_retry_queue(f"sqlite:///{tmp_path / 'q.db'}"), RetryQueue)
+
+
+class TestFakeProvider:
+    """Test cases against the local fake LLM provider with a rate limit."""
+
+    @classmethod
+    def setup_class(cls):
+        # At most 10 requests per half second, like a per-minute quota scaled down
+        cls.fixtures = FixtureServer(llm_rate_limit=(10, 0.5)).start()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.fixtures.stop()
+
+    def setup_method(self):
+        self.fixtures.requests.clear()
+        self.fixtures._llm_window.clear()
+
+    async def _burst(self, scheduler=None, count=20):
+        async with httpx.AsyncClient(base_url=self.fixtures.service_url("llm")) as client:
+            async def send():
+                response = await client.post("/v1/messages", json={"model": "fake", "messages": []})
+                if response.status_code == 429 and scheduler:
+                    scheduler.throttled(float(response.headers["retry-after"]))
+                return response.status_code
+
+            if scheduler is None:
+                return await asyncio.gather(*(send() for _ in range(count)))
+            return await asyncio.gather(*(scheduler.call_async(send) for _ in range(count)))
+
+    def test_unscheduled_burst_is_throttled(self):
+        statuses = asyncio.run(self._burst())
+        assert statuses.count(429) > 0
+
+    def test_scheduled_burst_stays_within_limit(self):
+        # 3 + 12/s admits at most 9 requests in any half second
+        scheduler = _scheduler(rate=12.0, burst=3, max_concurrency=4)
+        statuses = asyncio.run(self._burst(scheduler))
+        assert statuses == [200] * 20
+        assert self.fixtures.requests["llm_throttled"] == 0
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the offline replay load generator.
+
+These tests verify that the local Supabase fake answers the real supabase
+client the way PostgREST does, that recorded traces capture route templates
+and users without credentials, and the latency/lag helpers of the replayer.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+from jose import jwt
+
+# Add the python and loadtest directories to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts', 'loadtest'))
+
+from core.request_trace import RequestTraceMiddleware, load_trace
+from fakes import FakePostgrest, FixtureServer, PlatformFixtures
+from replay_load import InstrumentedThreadPoolExecutor, LoopLagMonitor, percentile
+
+
+class TestFakePostgrest:
+    """Test cases for the in-memory PostgREST stand-in, driven by the supabase client."""
+
+    @classmethod
+    def setup_class(cls):
+        from supabase import create_client
+        cls.database = FakePostgrest()
+        cls.fixtures = FixtureServer(database=cls.database, platforms=PlatformFixtures(games_per_user=2)).start()
+        cls.client = create_client(cls.fixtures.service_url("supabase"), "test-key")
+
+    @classmethod
+    def teardown_class(cls):
+        cls.fixtures.stop()
+
+    def setup_method(self):
+        self.database.tables.clear()
+
+    def test_insert_filter_order_and_count(self):
+        rows = [
+            {"user_id": "u1", "platform": "lichess", "provider_game_id": f"g{i}", "my_rating": 1500 + i, "opening": None if i == 2 else "Italian Game"}
+            for i in range(5)
+        ]
+        self.client.table("games").insert(rows).execute()
+        self.client.table("games").insert({"user_id": "u2", "platform": "lichess", "provider_game_id": "x"}).execute()
+
+        result = self.client.table("games").select("provider_game_id, my_rating", count="exact").eq(
+            "user_id", "u1").gte("my_rating", 1501).order("my_rating", desc=True).limit(2).execute()
+        assert [row["provider_game_id"] for row in result.data] == ["g4", "g3"]
+        assert set(result.data[0]) == {"provider_game_id", "my_rating"}
+        assert result.count == 4
+
+        in_result = self.client.table("games").select("provider_game_id").in_("provider_game_id", ["g1", "x"]).execute()
+        assert sorted(row["provider_game_id"] for row in in_result.data) == ["g1", "x"]
+        null_result = self.client.table("games").select("provider_game_id").eq("user_id", "u1").is_("opening", "null").execute()
+        assert [row["provider_game_id"] for row in null_result.data] == ["g2"]
+
+    def test_upsert_update_delete_and_single(self):
+        table = self.client.table("user_profiles")
+        table.upsert({"user_id": "u1", "platform": "lichess", "total_games": 1}, on_conflict="user_id,platform").execute()
+        table.upsert({"user_id": "u1", "platform": "lichess", "total_games": 5}, on_conflict="user_id,platform").execute()
+        assert len(self.database.tables["user_profiles"]) == 1
+
+        table.update({"total_games": 7}).eq("user_id", "u1").execute()
+        profile = table.select("*").eq("user_id", "u1").single().execute()
+        assert profile.data["total_games"] == 7
+        assert table.select("*").eq("user_id", "missing").maybe_single().execute() is None
+
+        table.delete().eq("user_id", "u1").execute()
+        assert table.select("*").execute().data == []
+
+    def test_rpc_defaults_and_unknown_tables(self):
+        assert self.client.rpc("check_usage_limits", {"p_user_id": "u1", "p_action_type": "import"}).execute().data["can_proceed"]
+        assert self.client.rpc("get_player_aggregate_stats", {"p_user_id": "u1", "p_platform": "lichess"}).execute().data["total_games"] == 0
+        assert self.client.table("never_written").select("*").execute().data == []
+
+
+class TestPlatformFixtures:
+    """Test cases for the Lichess/Chess.com game fixtures."""
+
+    def test_games_belong_to_the_requested_user(self):
+        fixtures = PlatformFixtures(games_per_user=3)
+        lichess = fixtures.lichess_games("alice", 3)
+        assert len(lichess) == 3
+        for game in lichess:
+            players = {side["user"]["name"] for side in game["players"].values()}
+            assert "alice" in players
+            assert fixtures.pgn(game["id"]) == game["pgn"]
+        assert [g["id"] for g in lichess] == [g["id"] for g in fixtures.lichess_games("alice", 3)]
+        assert all("bob" in (g["white"]["username"], g["black"]["username"]) for g in fixtures.chesscom_games("bob"))
+
+
+class TestRequestTrace:
+    """Test cases for trace recording and loading."""
+
+    def test_records_route_template_user_and_body(self, tmp_path):
+        trace_file = tmp_path / "trace.jsonl"
+        app = FastAPI()
+
+        @app.get("/api/v1/match-history/{user_id}/{platform}")
+        async def match_history(user_id: str, platform: str):
+            return {"user_id": user_id}
+
+        @app.post("/api/v1/analyze")
+        async def analyze(request: dict):
+            return request
+
+        app.add_middleware(RequestTraceMiddleware, path=str(trace_file))
+        token = jwt.encode({"sub": "alice"}, "x" * 40, algorithm="HS256")
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await client.get("/api/v1/match-history/alice/lichess?limit=5", headers={"Authorization": f"Bearer {token}"})
+                await client.post("/api/v1/analyze", json={"pgn": "1. e4 *"})
+
+        asyncio.run(run())
+        entries = load_trace(str(trace_file))
+        assert [entry.label for entry in entries] == [
+            "GET /api/v1/match-history/{user_id}/{platform}",
+            "POST /api/v1/analyze",
+        ]
+        assert entries[0].user == "alice"
+        assert entries[0].query == "limit=5"
+        assert entries[0].status == 200
+        assert entries[1].body == {"pgn": "1. e4 *"}
+        assert token not in trace_file.read_text()
+
+    def test_load_trace_sorts_and_skips_comments(self, tmp_path):
+        trace_file = tmp_path / "trace.jsonl"
+        trace_file.write_text("# comment\n\n" + "\n".join(json.dumps(e) for e in [
+            {"t": 2.0, "method": "GET", "path": "/b"},
+            {"t": 1.0, "method": "GET", "path": "/a", "note": "kept"},
+        ]))
+        entries = load_trace(str(trace_file))
+        assert [entry.path for entry in entries] == ["/a", "/b"]
+        assert entries[0].extra == {"note": "kept"}
+
+
+class TestReplayInstrumentation:
+    """Test cases for the replayer's measurement helpers."""
+
+    def test_percentile(self):
+        assert percentile([], 99) == 0.0
+        assert percentile([5.0], 50) == 5.0
+        assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+        assert percentile([3.0, 1.0, 2.0], 100) == 3.0
+
+    def test_loop_lag_detects_blocking(self):
+        async def run():
+            monitor = LoopLagMonitor(interval=0.01)
+            monitor.start()
+            await asyncio.sleep(0.03)
+            time.sleep(0.1)  # Block the loop
+            await asyncio.sleep(0.03)
+            await monitor.stop()
+            return monitor.summary()
+
+        assert asyncio.run(run())["max_ms"] >= 50
+
+    def test_thread_pool_tracks_queueing(self):
+        executor = InstrumentedThreadPoolExecutor(max_workers=2)
+        futures = [executor.submit(time.sleep, 0.05) for _ in range(6)]
+        executor.sample()
+        for future in futures:
+            future.result()
+        executor.shutdown()
+        summary = executor.summary()
+        assert summary["completed"] == 6
+        assert summary["max_active"] == 2
+        assert summary["max_queued"] >= 4
+        assert summary["saturated_fraction"] == 1.0
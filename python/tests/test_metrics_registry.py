@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the metrics registry.
+
+These tests verify counters, gauges and histograms, label handling,
+collectors, and the Prometheus text exposition output.
+"""
+
+import os
+import sys
+
+import pytest
+
+# Add the python directory to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.cache_manager import LRUCache, get_all_cache_stats, register_cache
+from core.metrics_registry import MetricsRegistry
+
+
+class TestMetricsRegistry:
+    """Test cases for metric families and text rendering."""
+
+    def test_counters_and_gauges_render_with_labels(self):
+        registry = MetricsRegistry()
+        requests = registry.counter("requests_total", "Requests", ["platform", "outcome"])
+        requests.labels(platform="lichess", outcome="success").inc()
+        requests.labels(platform="lichess", outcome="success").inc(2)
+        depth = registry.gauge("queue_depth", "Queue depth")
+        depth.set(4)
+        depth.dec()
+
+        text = registry.render()
+        assert "# TYPE requests_total counter" in text
+        assert 'requests_total{platform="lichess",outcome="success"} 3' in text
+        assert "# TYPE queue_depth gauge\nqueue_depth 3" in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        waits = registry.histogram("wait_seconds", "Waits", ["pool"], buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            waits.labels(pool="a").observe(value)
+
+        lines = registry.render().splitlines()
+        assert 'wait_seconds_bucket{pool="a",le="0.1"} 2' in lines
+        assert 'wait_seconds_bucket{pool="a",le="1"} 3' in lines
+        assert 'wait_seconds_bucket{pool="a",le="+Inf"} 4' in lines
+        assert 'wait_seconds_sum{pool="a"} 3.65' in lines
+        assert 'wait_seconds_count{pool="a"} 4' in lines
+
+    def test_registration_is_idempotent_and_validated(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("jobs_total", "Jobs", ["status"])
+        assert registry.counter("jobs_total", "Jobs", ["status"]) is counter
+        with pytest.raises(ValueError):
+            registry.gauge("jobs_total", "Jobs", ["status"])
+        with pytest.raises(ValueError):
+            counter.labels(state="done")
+        with pytest.raises(ValueError):
+            counter.inc()
+        with pytest.raises(ValueError):
+            registry.counter("plain_total", "Plain").inc(-1)
+
+    def test_collectors_refresh_before_render_and_failures_are_skipped(self):
+        registry = MetricsRegistry()
+        hits = registry.counter("hits_total", "Hits", ["cache"])
+        source = {"hits": 5}
+
+        def broken():
+            raise RuntimeError("unavailable")
+
+        registry.register_collector(broken)
+        registry.register_collector(lambda: hits.set_total(source["hits"], cache='a"b'))
+        assert 'hits_total{cache="a\\"b"} 5' in registry.render()
+        source["hits"] = 7
+        assert 'hits_total{cache="a\\"b"} 7' in registry.render()
+
+    def test_registered_cache_stats_export_as_metrics(self):
+        registry = MetricsRegistry()
+        cache_hits = registry.counter("cache_hits_total", "Cache hits", ["cache"])
+        cache_misses = registry.counter("cache_misses_total", "Cache misses", ["cache"])
+
+        def collect():
+            for stats in get_all_cache_stats():
+                if "hits" in stats:
+                    cache_hits.set_total(stats["hits"], cache=stats["name"])
+                    cache_misses.set_total(stats["misses"], cache=stats["name"])
+
+        registry.register_collector(collect)
+        cache = LRUCache(maxsize=10, ttl=60, name="metrics_test_cache")
+        register_cache(cache)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("b")
+
+        text = registry.render()
+        assert 'cache_hits_total{cache="metrics_test_cache"} 1' in text
+        assert 'cache_misses_total{cache="metrics_test_cache"} 1' in text
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the basic-analysis Stockfish probe budget.
+
+These tests verify the rolling window, all-or-nothing grants and the
+statistics reported to monitoring endpoints.
+"""
+
+import os
+import sys
+
+# Add the python directory to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core import analysis_engine
+from core.analysis_engine import ProbeBudget
+
+
+class TestProbeBudget:
+    """Test cases for probe budget windows and grants."""
+
+    def test_grants_are_all_or_nothing(self):
+        budget = ProbeBudget(limit=3, window=60.0)
+        assert budget.try_acquire(2)
+        # Only one probe left: a move needing two positions gets none
+        assert not budget.try_acquire(2)
+        assert budget.try_acquire(1)
+        assert not budget.try_acquire(1)
+
+        stats = budget.stats()
+        assert stats["used"] == 3
+        assert stats["granted"] == 3
+        assert stats["denied"] == 3
+
+    def test_budget_refills_after_window(self, monkeypatch):
+        clock = [1000.0]
+        monkeypatch.setattr(analysis_engine.time, "monotonic", lambda: clock[0])
+        budget = ProbeBudget(limit=2, window=10.0)
+        assert budget.try_acquire(2)
+        assert not budget.try_acquire(1)
+
+        clock[0] += 10.0
+        assert budget.try_acquire(2)
+        assert budget.stats()["used"] == 2
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the progress event broker and SSE stream.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+# Add the python directory to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core import progress_events
+from core.progress_events import ProgressBroker, format_sse, sse_stream
+
+
+async def _never_disconnected() -> bool:
+    return False
+
+
+class TestProgressBroker:
+    """Test cases for publishing, replay and SSE framing."""
+
+    def test_publish_from_thread_reaches_subscriber(self):
+        broker = ProgressBroker()
+
+        async def scenario():
+            subscription = broker.subscribe(["job:1"])
+            worker = threading.Thread(target=broker.publish, args=("job:1", "game", {"game_id": "g1"}))
+            worker.start()
+            worker.join()
+            event = await subscription.get(timeout=1)
+            broker.unsubscribe(subscription)
+            return event
+
+        event = asyncio.run(scenario())
+        assert event["event"] == "game"
+        assert event["data"] == {"game_id": "g1"}
+
+    def test_last_event_replayed_on_subscribe(self):
+        broker = ProgressBroker()
+        broker.publish("analysis:u_lichess", "progress", {"analyzed_games": 3})
+
+        async def scenario():
+            subscription = broker.subscribe(["analysis:u_lichess"])
+            return await subscription.get(timeout=1)
+
+        assert asyncio.run(scenario())["data"]["analyzed_games"] == 3
+
+    def test_throughput_and_eta(self):
+        broker = ProgressBroker()
+        broker.publish("job:1", "progress", {}, completed=0, total=10, stage="analyzing")
+        tracker = broker._rates.get("job:1")
+        # Pretend the first sample was taken 10 seconds ago
+        first_time, first_completed = tracker.samples[0]
+        tracker.samples[0] = (first_time - 10, first_completed)
+
+        payload = broker.publish("job:1", "progress", {}, completed=5, total=10, stage="analyzing")
+        assert 25 <= payload["throughput_per_minute"] <= 35
+        assert 8 <= payload["estimated_time_remaining"] <= 12
+
+        # A new stage restarts the throughput measurement
+        payload = broker.publish("job:1", "progress", {}, completed=5, total=10, stage="saving")
+        assert payload["throughput_per_minute"] is None
+
+    def test_concurrent_publishers_share_one_tracker(self, monkeypatch):
+        created = []
+
+        class SlowTracker(progress_events._RateTracker):
+            def __init__(self, window):
+                created.append(self)
+                time.sleep(0.01)  # Widen the get-or-create window
+                super().__init__(window)
+
+        monkeypatch.setattr(progress_events, "_RateTracker", SlowTracker)
+        broker = ProgressBroker()
+        workers = [
+            threading.Thread(target=broker.publish, args=("job:1", "progress", {}), kwargs={"completed": index, "total": 8})
+            for index in range(8)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert len(created) == 1
+        assert broker._rates.get("job:1") is created[0]
+
+    def test_slow_subscriber_drops_oldest(self):
+        broker = ProgressBroker(max_queue_size=2)
+
+        async def scenario():
+            subscription = broker.subscribe(["job:1"])
+            for i in range(4):
+                broker.publish("job:1", "progress", {"n": i})
+            await asyncio.sleep(0)
+            first = await subscription.get(timeout=1)
+            return first, subscription.dropped
+
+        first, dropped = asyncio.run(scenario())
+        assert first["data"]["n"] == 2
+        assert dropped == 2
+
+    def test_sse_stream_closes_on_terminal_event(self):
+        broker = ProgressBroker()
+        broker.publish("job:1", "completed", {"is_complete": True})
+
+        async def scenario():
+            frames = []
+            async for frame in sse_stream(broker, ["job:1"], _never_disconnected, close_on=("completed",)):
+                frames.append(frame)
+            return frames
+
+        frames = asyncio.run(scenario())
+        assert frames[0].startswith("retry:")
+        assert "event: completed" in frames[1]
+        assert broker.get_stats()["subscribers"] == 0
+
+    def test_format_sse(self):
+        frame = format_sse({"id": 7, "event": "game", "data": {"game_id": "g1"}})
+        lines = frame.strip().split("\n")
+        assert lines[0] == "id: 7"
+        assert lines[1] == "event: game"
+        assert json.loads(lines[2][len("data: "):]) == {"game_id": "g1"}
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the shared GCRA rate limiter.
+
+These tests verify burst and refill behaviour, checking without consuming,
+that two processes sharing a SQLite store see the same limits, and that the
+middleware rejects matching routes with Retry-After before the handler runs.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sqlite3
+import sys
+
+# Add the python directory to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.rate_limiter import (
+    MemoryRateLimitStore, RateLimiter, RateLimitMiddleware, RateLimitPolicy,
+    RouteRateLimit, SQLiteRateLimitStore, gcra,
+)
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _hit_shared_store(path, count, results):
+    limiter = RateLimiter(SQLiteRateLimitStore(path))
+    policy = RateLimitPolicy("import", limit=10, window=60)
+    results.put(sum(limiter.hit("alice", policy).allowed for _ in range(count)))
+
+
+class TestGCRA:
+    """Test cases for the algorithm."""
+
+    def test_burst_then_steady_rate(self):
+        clock = FakeClock()
+        limiter = RateLimiter(MemoryRateLimitStore(), clock=clock)
+        policy = RateLimitPolicy("analysis", limit=5, window=60)
+
+        decisions = [limiter.hit("u1", policy) for _ in range(6)]
+        assert [d.allowed for d in decisions] == [True] * 5 + [False]
+        assert [d.remaining for d in decisions[:5]] == [4, 3, 2, 1, 0]
+        assert decisions[5].retry_after == 12.0
+        assert decisions[5].headers()["Retry-After"] == "12"
+
+        clock.now += 12  # One emission interval frees one request
+        assert limiter.hit("u1", policy).allowed
+        assert not limiter.hit("u1", policy).allowed
+        assert limiter.hit("u2", policy).allowed  # Keys are independent
+
+        clock.now += 60
+        assert limiter.hit("u1", policy).remaining == 4
+
+    def test_peek_does_not_consume(self):
+        clock = FakeClock()
+        limiter = RateLimiter(MemoryRateLimitStore(), clock=clock)
+        policy = RateLimitPolicy("chat", limit=2, window=3600)
+        for _ in range(5):
+            assert limiter.hit("u1", policy, consume=False).allowed
+        limiter.hit("u1", policy)
+        limiter.hit("u1", policy)
+        assert not limiter.hit("u1", policy, consume=False).allowed
+
+    def test_state_is_one_number_per_key(self):
+        policy = RateLimitPolicy("analysis", limit=3, window=30)
+        decision, tat = gcra(None, 100.0, policy)
+        assert decision.allowed and tat == 110.0
+        decision, unchanged = gcra(130.0, 100.0, policy)
+        assert not decision.allowed and unchanged == 130.0
+
+
+class TestSharedStore:
+    """Test cases for the SQLite store shared between worker processes."""
+
+    def test_processes_share_limits(self, tmp_path):
+        path = str(tmp_path / "rate_limits.db")
+        SQLiteRateLimitStore(path)  # Create the table before the workers race
+        results = multiprocessing.Queue()
+        workers = [multiprocessing.Process(target=_hit_shared_store, args=(path, 8, results)) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+        assert results.get(timeout=5) + results.get(timeout=5) == 10
+
+    def test_store_errors_fail_open(self, tmp_path):
+        store = SQLiteRateLimitStore(str(tmp_path / "rate_limits.db"))
+        limiter = RateLimiter(store)
+        store.close()
+        store._conn = lambda: (_ for _ in ()).throw(OSError("disk I/O error"))
+        assert limiter.hit("u1", RateLimitPolicy("analysis", limit=1)).allowed
+        assert limiter.stats()["store_errors"] == 1
+
+    def test_locked_store_does_not_block_event_loop(self, tmp_path):
+        path = str(tmp_path / "rate_limits.db")
+        limiter = RateLimiter(SQLiteRateLimitStore(path, busy_timeout=0.3))
+        other_worker = sqlite3.connect(path, isolation_level=None)
+        other_worker.execute("BEGIN IMMEDIATE")  # Another process holds the write lock
+
+        async def run():
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            ticker = asyncio.create_task(tick())
+            decision = await limiter.ahit("u1", RateLimitPolicy("analysis", limit=1))
+            ticker.cancel()
+            return decision, ticks
+
+        try:
+            decision, ticks = asyncio.run(run())
+        finally:
+            other_worker.execute("ROLLBACK")
+            other_worker.close()
+        assert decision.allowed  # Fails open once the busy timeout expires
+        assert limiter.stats()["store_errors"] == 1
+        assert ticks >= 10  # The loop kept running while the store waited
+
+
+class TestRateLimitMiddleware:
+    """Test cases for per-route policies."""
+
+    def test_rejects_matching_routes_before_handler(self):
+        handled = []
+
+        async def app(scope, receive, send):
+            handled.append(scope["path"])
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"{}"})
+
+        middleware = RateLimitMiddleware(
+            app,
+            limiter=RateLimiter(MemoryRateLimitStore()),
+            routes=[RouteRateLimit(r"^/api/v1/coach/chat$", RateLimitPolicy("route_chat", limit=1))],
+            identify=lambda scope: "ip:10.0.0.1",
+        )
+
+        async def request(method, path):
+            sent = []
+
+            async def send(message):
+                sent.append(message)
+
+            await middleware({"type": "http", "method": method, "path": path, "headers": []}, None, send)
+            return sent[0]
+
+        async def run():
+            return [
+                await request("POST", "/api/v1/coach/chat"),
+                await request("POST", "/api/v1/coach/chat"),
+                await request("GET", "/api/v1/coach/chat"),
+                await request("POST", "/api/v1/analyze"),
+            ]
+
+        first, limited, other_method, other_route = asyncio.run(run())
+        assert first["status"] == 200
+        assert limited["status"] == 429
+        assert (b"retry-after", b"60") in limited["headers"]
+        assert other_method["status"] == other_route["status"] == 200
+        assert handled == ["/api/v1/coach/chat", "/api/v1/coach/chat", "/api/v1/analyze"]
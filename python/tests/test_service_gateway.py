@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the service group gateway and cross-process cache invalidation.
+
+These tests verify that routes map to the right service group, that requests
+and streamed responses pass through the gateway unchanged, that an unreachable
+group answers 503 without affecting the others, that progress streams from
+several groups are merged, that metrics from every group are merged with a
+group label, and that cache invalidations reach other processes.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+
+# Add the python directory to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.cache_invalidation import SharedInvalidationLog, create_invalidation_log
+from core.entitlements import EntitlementService
+from core.service_gateway import (
+    ServiceGateway, ServiceGroup, fan_in_groups, load_service_groups, merge_metrics, route_group,
+)
+
+GROUPS = [ServiceGroup("engine", 9101), ServiceGroup("imports", 9102), ServiceGroup("analytics", 9103, workers=2)]
+
+
+def make_group_app(name: str) -> FastAPI:
+    """A stand-in for one service group that echoes what it received."""
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy", "service_group": name}
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        return (
+            "# HELP http_requests_total Requests\n"
+            "# TYPE http_requests_total counter\n"
+            f'http_requests_total{{route="/a"}} {len(name)}\n'
+            "# HELP up Process up\n"
+            "# TYPE up gauge\n"
+            "up 1\n"
+        )
+
+    @app.get("/api/v1/progress-stream/{user_id}/{platform}")
+    async def progress_stream(user_id: str, platform: str):
+        async def events():
+            for index in range(2):
+                yield f"event: progress\ndata: {json.dumps({'group': name, 'index': index})}\n\n"
+                await asyncio.sleep(0)
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.api_route("/api/v1/{path:path}", methods=["GET", "POST"])
+    async def echo(path: str, request: Request):
+        return {
+            "group": name,
+            "path": path,
+            "query": request.url.query,
+            "body": (await request.body()).decode(),
+            "forwarded_for": request.headers.get("x-forwarded-for"),
+        }
+
+    return app
+
+
+def make_client(name: str, down: bool = False) -> httpx.AsyncClient:
+    if down:
+        def refuse(request):
+            raise httpx.ConnectError("connection refused", request=request)
+        transport = httpx.MockTransport(refuse)
+    else:
+        transport = httpx.ASGITransport(app=make_group_app(name))
+    return httpx.AsyncClient(transport=transport, base_url=f"http://{name}")
+
+
+async def call_gateway(method: str, path: str, down=(), **kwargs) -> httpx.Response:
+    clients = {group.name: make_client(group.name, group.name in down) for group in GROUPS}
+    gateway = ServiceGateway(GROUPS, clients=clients)
+    transport = httpx.ASGITransport(app=gateway, client=("203.0.113.7", 5000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+        return await client.request(method, path, **kwargs)
+
+
+class TestRouting:
+    """Test cases for mapping paths to service groups."""
+
+    @pytest.mark.parametrize("path, group", [
+        ("/api/v1/analyze", "engine"),
+        ("/api/v1/analyze-position-quick", "engine"),
+        ("/api/v1/coach/play-move", "engine"),
+        ("/api/v1/job-status/abc", "engine"),
+        ("/api/v1/progress-realtime/alice/lichess", "engine"),
+        ("/api/v1/metrics/stages", "engine"),
+        ("/api/v1/import-games-smart", "imports"),
+        ("/api/v1/import-progress/alice/lichess", "imports"),
+        ("/api/v1/validate-user", "imports"),
+        ("/proxy/chess-com/alice/stats", "imports"),
+        ("/proxy/game/lichess/abcd1234", "imports"),
+        ("/api/v1/comprehensive-analytics/alice/lichess", "analytics"),
+        ("/api/v1/analyses/alice/lichess", "analytics"),
+        ("/api/v1/analyze/extra", "analytics"),
+        ("/health", "analytics"),
+    ])
+    def test_route_group(self, path, group):
+        """Each route is served by exactly one group; unknown routes go to analytics."""
+        assert route_group(path) == group
+
+    def test_progress_stream_merges_engine_and_imports(self):
+        """The combined progress stream is the only fan-in route."""
+        assert fan_in_groups("/api/v1/progress-stream/alice/lichess") == ("engine", "imports")
+        assert fan_in_groups("/api/v1/progress-realtime/alice/lichess") is None
+
+    def test_groups_from_environment(self, monkeypatch):
+        """Ports follow the base port; workers and ports can be overridden per group."""
+        monkeypatch.setenv("SERVICE_GATEWAY_BASE_PORT", "7000")
+        monkeypatch.setenv("GATEWAY_ANALYTICS_WORKERS", "4")
+        monkeypatch.setenv("GATEWAY_ENGINE_PORT", "7100")
+        groups = {group.name: group for group in load_service_groups()}
+        assert groups["engine"].port == 7100
+        assert groups["imports"].port == 7001
+        assert groups["analytics"].port == 7002
+        assert groups["analytics"].workers == 4
+
+    def test_progress_groups_stay_single_worker(self, monkeypatch):
+        """Engine and imports publish progress in-process, so extra workers are ignored."""
+        monkeypatch.setenv("GATEWAY_ENGINE_WORKERS", "3")
+        monkeypatch.setenv("GATEWAY_IMPORTS_WORKERS", "2")
+        groups = {group.name: group for group in load_service_groups()}
+        assert groups["engine"].workers == 1
+        assert groups["imports"].workers == 1
+
+
+class TestProxy:
+    """Test cases for forwarding requests."""
+
+    def test_forwards_method_path_query_and_body(self):
+        """The group receives the original request and the client's address."""
+        response = asyncio.run(call_gateway("POST", "/api/v1/analyze?depth=12", content=b'{"fen": "x"}'))
+        assert response.status_code == 200
+        data = response.json()
+        assert data == {
+            "group": "engine",
+            "path": "analyze",
+            "query": "depth=12",
+            "body": '{"fen": "x"}',
+            "forwarded_for": "203.0.113.7",
+        }
+
+    def test_unreachable_group_is_isolated(self):
+        """A down group answers 503 while the other groups keep serving."""
+        down = asyncio.run(call_gateway("POST", "/api/v1/import-games-smart", down={"imports"}))
+        assert down.status_code == 503
+        assert down.headers["retry-after"] == "1"
+        assert "imports" in down.json()["detail"]
+
+        up = asyncio.run(call_gateway("GET", "/api/v1/analyses/alice/lichess", down={"imports"}))
+        assert up.status_code == 200
+        assert up.json()["group"] == "analytics"
+
+    def test_progress_stream_fan_in(self):
+        """Events from the engine and import streams are merged without splitting any event."""
+        response = asyncio.run(call_gateway("GET", "/api/v1/progress-stream/alice/lichess"))
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [event for event in response.text.split("\n\n") if event]
+        payloads = [json.loads(event.split("data: ", 1)[1]) for event in events]
+        assert sorted((p["group"], p["index"]) for p in payloads) == [
+            ("engine", 0), ("engine", 1), ("imports", 0), ("imports", 1),
+        ]
+
+    def test_progress_stream_with_one_group_down(self):
+        """The merged stream still carries the events of the groups that are up."""
+        response = asyncio.run(call_gateway("GET", "/api/v1/progress-stream/alice/lichess", down={"engine"}))
+        assert response.status_code == 200
+        assert {json.loads(e.split("data: ", 1)[1])["group"] for e in response.text.split("\n\n") if e} == {"imports"}
+
+
+class TestHealth:
+    """Test cases for aggregated health reporting."""
+
+    def test_all_groups_up(self):
+        response = asyncio.run(call_gateway("GET", "/health"))
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "healthy"
+        assert {name: group["status"] for name, group in data["groups"].items()} == {
+            "engine": "up", "imports": "up", "analytics": "up",
+        }
+        assert data["groups"]["analytics"]["workers"] == 2
+
+    def test_degraded_and_unavailable(self):
+        degraded = asyncio.run(call_gateway("GET", "/health", down={"engine"}))
+        assert degraded.status_code == 200
+        assert degraded.json()["status"] == "degraded"
+        assert degraded.json()["groups"]["engine"]["status"] == "down"
+
+        unavailable = asyncio.run(call_gateway("GET", "/health", down={"engine", "imports", "analytics"}))
+        assert unavailable.status_code == 503
+        assert unavailable.json()["status"] == "unavailable"
+
+
+class TestMetrics:
+    """Test cases for merging every group's metrics."""
+
+    def test_merge_labels_samples_by_group(self):
+        merged = merge_metrics({
+            "engine": "# TYPE jobs gauge\njobs 2\nlatency_bucket{le=\"1\"} 3\n",
+            "analytics": "# TYPE jobs gauge\njobs{queue=\"a\"} 0\n",
+        })
+        assert merged.splitlines() == [
+            "# TYPE jobs gauge",
+            'jobs{service_group="engine"} 2',
+            'jobs{service_group="analytics",queue="a"} 0',
+            'latency_bucket{service_group="engine",le="1"} 3',
+        ]
+
+    def test_metrics_from_all_groups(self):
+        """One scrape of the gateway covers every group, with one header per family."""
+        response = asyncio.run(call_gateway("GET", "/metrics", down={"imports"}))
+        assert response.status_code == 200
+        lines = response.text.splitlines()
+        assert lines.count("# TYPE http_requests_total counter") == 1
+        assert 'http_requests_total{service_group="engine",route="/a"} 6' in lines
+        assert 'http_requests_total{service_group="analytics",route="/a"} 9' in lines
+        assert 'up{service_group="analytics"} 1' in lines
+        assert not any('service_group="imports"' in line for line in lines)
+
+
+class TestInvalidationLog:
+    """Test cases for cross-process cache invalidation."""
+
+    def test_other_process_receives_scope(self, tmp_path):
+        path = str(tmp_path / "invalidations.db")
+        writer = SharedInvalidationLog(path)
+        reader = SharedInvalidationLog(path)
+        reader.origin = "other-host:1"
+
+        writer.publish("alice:lichess")
+        writer.publish("alice:lichess")
+        writer.publish("bob:chess.com")
+
+        assert reader.poll() == ["alice:lichess", "bob:chess.com"]
+        assert reader.poll() == []
+        # A process does not re-apply its own invalidations
+        assert writer.poll() == []
+
+    def test_new_process_starts_at_end_of_log(self, tmp_path):
+        path = str(tmp_path / "invalidations.db")
+        SharedInvalidationLog(path).publish("alice:lichess")
+        assert SharedInvalidationLog(path).poll() == []
+
+    def test_create_from_url(self, tmp_path):
+        assert create_invalidation_log("off") is None
+        assert create_invalidation_log(None) is None
+        log = create_invalidation_log(f"sqlite:///{tmp_path / 'log.db'}")
+        assert isinstance(log, SharedInvalidationLog)
+        with pytest.raises(ValueError):
+            create_invalidation_log("redis://localhost")
+
+    def test_entitlement_invalidation_is_forwarded(self):
+        """Entitlement invalidations are forwarded once; applying a received one does not echo it."""
+        published = []
+        service = EntitlementService(object(), on_invalidate=published.append)
+        service.invalidate("11111111-1111-1111-1111-111111111111")
+        service.invalidate_all()
+        service.invalidate("22222222-2222-2222-2222-222222222222", propagate=False)
+        assert published == ["11111111-1111-1111-1111-111111111111", EntitlementService.ALL]
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Unit tests for per-stage timing instrumentation.
+
+These tests verify histograms, per-game context tracking across tasks and
+executor threads, and the stage breakdown attached to analyzed games.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the python directory to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.analysis_engine import AnalysisType, ChessAnalysisEngine
+from core.stage_timing import (
+    Histogram, count_stage, game_timing, get_stage_metrics, record_stage, stage_span, timed_stage
+)
+
+PGN = """[White "tester"]
+[Black "opponent"]
+
+1. e4 e5 2. Nf3 Nc6 3. Bc4 Bc5 1-0
+"""
+
+
+class TestStageTiming:
+    """Test cases for spans, game timings and histograms."""
+
+    def setup_method(self):
+        get_stage_metrics().reset()
+
+    def test_histogram_percentiles(self):
+        histogram = Histogram()
+        for ms in [1, 3, 3, 40, 40, 40, 40, 40, 40, 700]:
+            histogram.observe(ms)
+        data = histogram.to_dict()
+        assert data["count"] == 10
+        assert data["p50_ms"] == 50.0
+        assert data["p99_ms"] == 1000.0
+        assert data["max_ms"] == 700.0
+        assert data["buckets"] == {"le_1": 1, "le_5": 2, "le_50": 6, "le_1000": 1}
+
+    def test_game_timing_follows_tasks_and_executor_threads(self):
+        @timed_stage("coaching")
+        def coach():
+            count_stage("position_cache.miss")
+
+        async def analyze():
+            with game_timing("g1") as timings:
+                async def move():
+                    with stage_span("move"):
+                        loop = asyncio.get_running_loop()
+                        with ThreadPoolExecutor(max_workers=1) as executor:
+                            await loop.run_in_executor(executor, contextvars.copy_context().run, coach)
+
+                await asyncio.gather(move(), move())
+                # Threads started without the copied context do not report to the game
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    executor.submit(record_stage, "coaching", 5.0).result()
+            return timings.summary()
+
+        summary = asyncio.run(analyze())
+        assert summary["game_id"] == "g1"
+        assert summary["stages"]["coaching"]["count"] == 2
+        assert summary["stages"]["move"]["count"] == 2
+        assert summary["counters"] == {"position_cache.miss": 2}
+        assert summary["dominant_stage"] == "coaching"
+
+        snapshot = get_stage_metrics().snapshot()
+        assert snapshot["spans"]["coaching"]["count"] == 3
+        assert snapshot["per_game"]["total"]["count"] == 1
+        assert snapshot["slowest_recent_games"][0]["game_id"] == "g1"
+
+    def test_nested_game_timing_joins_outer_game(self):
+        with game_timing("outer") as outer:
+            with game_timing("inner") as inner:
+                record_stage("persistence", 2.0)
+            assert inner is outer
+        assert get_stage_metrics().snapshot()["per_game"]["total"]["count"] == 1
+
+    def test_analyzed_game_carries_stage_breakdown(self):
+        engine = ChessAnalysisEngine()
+        engine.stockfish_path = None
+        with contextlib.redirect_stdout(io.StringIO()):
+            analysis = asyncio.run(engine.analyze_game(PGN, "tester", "lichess", AnalysisType.STOCKFISH, "timed-game"))
+
+        stages = analysis.stage_timings["stages"]
+        assert stages["move"]["count"] == len(analysis.moves_analysis)
+        for stage in ("pgn_parse", "move_collection", "coaching", "game_metrics"):
+            assert stage in stages
+        assert analysis.stage_timings["game_id"] == "timed-game"
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Startup budget tests for the API server.
+
+These tests start the server in a fresh interpreter, as a scale-to-zero cold
+start does, and verify that the LLM SDKs are not imported until first use and
+that lifespan startup plus the first health check stay well under a second
+(STARTUP_IMPORT_BUDGET and STARTUP_READY_BUDGET override the budgets).
+"""
+
+import os
+import sys
+
+# Add the python and benchmarks directories to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'scripts', 'benchmarks'))
+
+from profile_startup import measure_startup, parse_importtime
+
+# Generous so slow CI machines pass; the import typically takes under two seconds
+IMPORT_BUDGET_SECONDS = float(os.getenv("STARTUP_IMPORT_BUDGET", "5.0"))
+# Lifespan startup plus the first health check; raise STARTUP_READY_BUDGET on
+# slow or shared CI machines rather than loosening the default
+READY_BUDGET_SECONDS = float(os.getenv("STARTUP_READY_BUDGET", "1.0"))
+
+
+class TestStartupBudget:
+    """Test cases for cold-start time."""
+
+    @classmethod
+    def setup_class(cls):
+        cls.timings = measure_startup()
+
+    def test_health_check_is_ready_well_under_a_second(self):
+        assert self.timings["health_status"] == 200
+        assert self.timings["startup"] + self.timings["health"] < READY_BUDGET_SECONDS
+
+    def test_heavy_subsystems_are_deferred(self):
+        assert self.timings["loaded_deferred"] == []
+
+    def test_import_budget(self):
+        assert self.timings["import"] < IMPORT_BUDGET_SECONDS
+
+
+class TestImportTimeReport:
+    """Test cases for the -X importtime parser."""
+
+    def test_parse_importtime(self):
+        stderr = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |     chess.engine",
+            "import time:      2500 |       4100 |   chess",
+            "import time:      9000 |      13100 | core.analysis_engine",
+            "[AI] unrelated output",
+        ])
+        rows = parse_importtime(stderr)
+        assert [row["module"] for row in rows] == ["chess.engine", "chess", "core.analysis_engine"]
+        assert [row["depth"] for row in rows] == [2, 1, 0]
+        assert rows[2]["cumulative_ms"] == 13.1 and rows[2]["self_ms"] == 9.0
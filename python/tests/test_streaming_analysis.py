@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Unit tests for streamed single-game analysis.
+
+These tests verify the order of the newline-delimited JSON records of
+POST /api/v1/analyze?stream=true, that usage is recorded only once the
+streamed analysis has been saved, so a stream that fails is not counted, and
+that records reach the client uncompressed as they are produced.
+"""
+
+import asyncio
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+# Add the python directory to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# Provide default environment configuration for tests
+os.environ['SUPABASE_URL'] = os.environ.get('SUPABASE_URL', 'https://example.supabase.co')
+os.environ['SUPABASE_ANON_KEY'] = os.environ.get('SUPABASE_ANON_KEY', 'test-anon-key')
+os.environ.setdefault('AUTH_ENABLED', 'false')
+os.environ.setdefault('JWT_SECRET', 'test-secret-for-streaming-analysis-tests')
+os.environ.setdefault('RATE_LIMIT_STORE_URL', 'memory')
+
+from core import unified_api_server as server
+
+PGN = '[Event "Test"]\n\n1. e4 e5 2. Nf3 Nc6 *'
+
+
+class FakeUsageTracker:
+    def __init__(self):
+        self.recorded = []
+
+    async def increment_anonymous_usage(self, client_ip, action_type, count=1):
+        self.recorded.append((client_ip, action_type, count))
+        return True
+
+    async def check_anonymous_analysis_limit(self, client_ip):
+        return True, {}
+
+
+class FakeEngine:
+    def __init__(self, fail=False):
+        self.config = None
+        self.fail = fail
+
+    async def analyze_game(self, pgn, user_id, platform, analysis_type, game_id, move_callback=None):
+        for ply in (1, 2):
+            move_callback(ply)
+        if self.fail:
+            raise RuntimeError("engine crashed")
+        return SimpleNamespace(game_id="game-1")
+
+
+@pytest.fixture
+def stream_env(monkeypatch):
+    tracker = FakeUsageTracker()
+    state = SimpleNamespace(tracker=tracker, engine=FakeEngine(), saved=True)
+
+    async def engine_ready():
+        return state.engine
+
+    async def save(analysis):
+        return state.saved
+
+    async def comments(analysis, comment_callback=None):
+        comment_callback(SimpleNamespace(ply_index=2, **{name: None for name in server.COACHING_FIELDS}))
+
+    monkeypatch.setattr(server, "usage_tracker", tracker)
+    monkeypatch.setattr(server, "_analysis_engine_ready", engine_ready)
+    monkeypatch.setattr(server, "_save_stockfish_analysis", save)
+    monkeypatch.setattr(server, "_generate_ai_comments_background", comments)
+    monkeypatch.setattr(server, "_serialize_move_analysis", lambda move: {"ply_index": move})
+    monkeypatch.setattr(server, "_game_summary", lambda analysis: {"game_id": analysis.game_id})
+    async def allow(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(server, "_enforce_rate_limit", allow)
+    return state
+
+
+def _stream():
+    async def post():
+        transport = httpx.ASGITransport(app=server.app, client=("203.0.113.9", 5000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post(
+                "/api/v1/analyze?stream=true",
+                json={"user_id": "alice", "platform": "lichess", "pgn": PGN}
+            )
+            # Let the analysis task finish its work after the last record
+            await asyncio.sleep(0.05)
+            return response
+
+    response = asyncio.run(post())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+class TestStreamingAnalysis:
+    """Test cases for the NDJSON analysis stream."""
+
+    def test_event_sequence(self, stream_env):
+        records = _stream()
+        assert [record["event"] for record in records] == ["move", "move", "game", "saved", "comment", "done"]
+        assert [record["data"]["ply_index"] for record in records[:2]] == [1, 2]
+        assert records[3]["data"] == {"success": True, "game_id": "game-1"}
+        assert stream_env.tracker.recorded == [("203.0.113.9", "analyze", 1)]
+
+    def test_failed_stream_is_not_counted(self, stream_env):
+        stream_env.engine = FakeEngine(fail=True)
+        records = _stream()
+        assert [record["event"] for record in records] == ["move", "move", "error", "done"]
+        assert records[2]["data"]["message"] == "engine crashed"
+        assert stream_env.tracker.recorded == []
+
+    def test_unsaved_analysis_is_not_counted(self, stream_env):
+        stream_env.saved = False
+        records = _stream()
+        assert [record["event"] for record in records] == ["move", "move", "game", "saved", "done"]
+        assert stream_env.tracker.recorded == []
+
+    def test_records_are_not_held_by_compression(self, stream_env):
+        release = asyncio.Event()
+
+        class GatedEngine(FakeEngine):
+            async def analyze_game(self, pgn, user_id, platform, analysis_type, game_id, move_callback=None):
+                move_callback(1)
+                await release.wait()
+                return SimpleNamespace(game_id="game-1")
+
+        stream_env.engine = GatedEngine()
+
+        async def first_record():
+            body = json.dumps({"user_id": "alice", "platform": "lichess", "pgn": PGN}).encode()
+            scope = {
+                "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+                "scheme": "http", "path": "/api/v1/analyze", "raw_path": b"/api/v1/analyze",
+                "query_string": b"stream=true", "root_path": "", "server": ("test", 80),
+                "client": ("203.0.113.9", 5000),
+                "headers": [(b"host", b"test"), (b"content-type", b"application/json"),
+                            (b"accept-encoding", b"gzip"), (b"content-length", str(len(body)).encode())],
+            }
+            requests = [{"type": "http.request", "body": body, "more_body": False}]
+            sent = asyncio.Queue()
+
+            async def receive():
+                if requests:
+                    return requests.pop(0)
+                await release.wait()
+                return {"type": "http.disconnect"}
+
+            app = asyncio.create_task(server.app(scope, receive, sent.put))
+            start = await asyncio.wait_for(sent.get(), timeout=5)
+            chunk = b""
+            while not chunk:
+                chunk = (await asyncio.wait_for(sent.get(), timeout=5)).get("body", b"")
+            release.set()
+            await asyncio.wait_for(app, timeout=5)
+            return dict(start["headers"]), chunk
+
+        headers, chunk = asyncio.run(first_record())
+        assert headers.get(b"content-encoding", b"identity") == b"identity"
+        assert json.loads(chunk.splitlines()[0])["event"] == "move"
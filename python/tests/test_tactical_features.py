@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Unit tests for shared tactical feature extraction.
+
+These tests compare the bitboard attack maps, pins and hanging pieces against
+python-chess per-square queries on random positions, and check x-ray lines,
+forks and memoization on hand-picked positions.
+"""
+
+import os
+import random
+import sys
+
+import chess
+
+# Add the python directory to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.position_analyzer import PositionAnalyzer
+from core.tactical_features import TacticalFeatures, XRay, get_tactical_features
+
+
+def _random_positions(count: int, seed: int = 3):
+    """Positions from seeded random games."""
+    rng = random.Random(seed)
+    board = chess.Board()
+    positions = []
+    while len(positions) < count:
+        moves = list(board.legal_moves)
+        if not moves or board.ply() > 200:
+            board = chess.Board()
+            continue
+        board.push(rng.choice(moves))
+        positions.append(board.copy(stack=False))
+    return positions
+
+
+class TestTacticalFeatures:
+    """Test cases for attack maps, pins, x-rays, hanging pieces and forks."""
+
+    def test_attack_maps_match_python_chess(self):
+        for board in _random_positions(300):
+            features = TacticalFeatures(board)
+            for color in chess.COLORS:
+                for square in chess.SQUARES:
+                    attackers = board.attackers_mask(color, square)
+                    assert features.attackers(color, square) == attackers, (board.fen(), square)
+                    assert bool(features.attacked[color] & chess.BB_SQUARES[square]) == board.is_attacked_by(color, square)
+
+    def test_pins_and_hanging_match_definitions(self):
+        for board in _random_positions(300, seed=9):
+            features = TacticalFeatures(board)
+            for color in chess.COLORS:
+                expected_pins = [
+                    square for square in chess.scan_forward(board.occupied_co[color])
+                    if board.is_pinned(color, square) and board.piece_type_at(square) != chess.KING
+                ]
+                assert [pin.pinned for pin in features.pins[color]] == expected_pins, board.fen()
+
+                expected_hanging = [
+                    square for square in chess.scan_forward(board.occupied_co[color] & ~board.kings)
+                    if len(board.attackers(not color, square)) > len(board.attackers(color, square))
+                ]
+                assert features.hanging[color] == expected_hanging, board.fen()
+
+    def test_xrays_forks_and_pins(self):
+        # Rook on a1 hits the knight on a4 with the king behind it; knight on c7 forks a8 and e8
+        board = chess.Board("r3k3/2N5/8/8/n7/8/8/R3K3 w - - 0 1")
+        features = TacticalFeatures(board)
+        assert XRay(chess.A1, chess.A4, chess.A8) in features.xrays
+        assert features.forks[chess.C7] == [chess.A8, chess.E8]
+
+        board = chess.Board("4k3/4r3/8/8/8/8/8/4QK2 b - - 0 1")
+        pins = TacticalFeatures(board).pins[chess.BLACK]
+        assert [(pin.pinned, pin.pinner, pin.king) for pin in pins] == [(chess.E7, chess.E1, chess.E8)]
+
+    def test_features_are_memoized_by_placement(self):
+        board = chess.Board()
+        board.push_san("e4")
+        transposed = chess.Board(board.fen().replace(" b ", " w "))
+        assert get_tactical_features(board) is get_tactical_features(transposed)
+
+    def test_position_analyzer_uses_shared_features(self):
+        # Knight fork of king and rook, with the black rook hanging
+        board = chess.Board("r3k3/2N5/8/8/8/8/8/4K3 b - - 0 1")
+        move = chess.Move.from_uci("b5c7")
+        analyzer = PositionAnalyzer()
+        forks = analyzer._detect_forks(board, move)
+        assert forks and forks[0].target_squares == [chess.A8, chess.E8]
+        assert [square for square, _, _ in analyzer.detect_hanging_pieces(board, chess.BLACK)] == [chess.A8]
+
+    def test_pins_are_credited_to_the_moved_piece_only(self):
+        # Bishop to b5 pins the d7 knight; the rook on e1 already pinned the e7 knight
+        board = chess.Board("4k3/3nn3/8/1B6/8/8/8/4R1K1 b - - 0 1")
+        pins = PositionAnalyzer()._detect_pins(board, chess.Move.from_uci("f1b5"))
+        assert [pin.target_squares for pin in pins] == [[chess.D7]]
+
+    def test_kings_are_never_hanging(self):
+        # The attacked, undefended king is in check, not a hanging piece
+        board = chess.Board("4k3/8/8/8/8/8/8/4R1K1 b - - 0 1")
+        assert get_tactical_features(board).hanging[chess.BLACK] == []
+        assert PositionAnalyzer().detect_hanging_pieces(board, chess.BLACK) == []
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the on-disk upstream HTTP cache.
+
+These tests verify that fresh entries skip the network, that stale entries
+are revalidated with conditional GETs, that completed Chess.com archives are
+immutable, and that concurrent identical fetches share one request.
+"""
+
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+
+# Add the python directory to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.upstream_cache import HIT, MISS, REVALIDATED, STALE, UpstreamCache, chesscom_archive_is_complete
+
+
+class FakeResponse:
+    def __init__(self, status, body=b"", headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+    async def read(self):
+        return self.body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """aiohttp session stand-in serving one resource with an ETag."""
+
+    def __init__(self, body=b'{"games": []}', etag='"v1"', delay=0.0):
+        self.body = body
+        self.etag = etag
+        self.delay = delay
+        self.fail = False
+        self.requests = []
+
+    def get(self, url, params=None, headers=None):
+        self.requests.append(dict(headers or {}))
+        session = self
+
+        class _Request:
+            async def __aenter__(self):
+                if session.delay:
+                    await asyncio.sleep(session.delay)
+                if session.fail:
+                    raise OSError("connection reset")
+                if (headers or {}).get("If-None-Match") == session.etag:
+                    return FakeResponse(304, headers={"etag": session.etag})
+                return FakeResponse(200, session.body, {"etag": session.etag, "content-type": "application/json"})
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Request()
+
+
+URL = "https://api.chess.com/pub/player/alice/games/2026/10"
+
+
+class TestUpstreamCache:
+    """Test cases for freshness, revalidation and deduplication."""
+
+    def test_conditional_revalidation_then_fresh_hit(self, tmp_path):
+        cache = UpstreamCache(str(tmp_path / "upstream.db"))
+        session = FakeSession()
+
+        async def run():
+            first = await cache.get(session, URL, ttl=0)  # Stale as soon as it is stored
+            revalidated = await cache.get(session, URL, ttl=60)
+            hit = await cache.get(session, URL, ttl=60)
+            return first, revalidated, hit
+
+        first, revalidated, hit = asyncio.run(run())
+        assert first.source == MISS
+        assert revalidated.source == REVALIDATED
+        assert revalidated.body == b'{"games": []}'
+        assert hit.source == HIT and hit.json() == {"games": []}
+        assert len(session.requests) == 2
+        assert session.requests[1]["If-None-Match"] == '"v1"'
+
+    def test_changed_resource_and_stale_on_error(self, tmp_path):
+        cache = UpstreamCache(str(tmp_path / "upstream.db"))
+        session = FakeSession()
+
+        async def run():
+            await cache.get(session, URL, ttl=0)
+            session.body, session.etag = b'{"games": [1]}', '"v2"'
+            updated = await cache.get(session, URL, ttl=0)
+            session.fail = True
+            stale = await cache.get(session, URL, ttl=0)
+            return updated, stale
+
+        updated, stale = asyncio.run(run())
+        assert updated.source == MISS and updated.json() == {"games": [1]}
+        assert stale.source == STALE and stale.json() == {"games": [1]}
+
+    def test_immutable_entries_are_never_revalidated(self, tmp_path):
+        cache = UpstreamCache(str(tmp_path / "upstream.db"))
+        session = FakeSession()
+
+        async def run():
+            await cache.get(session, URL, ttl=0, immutable=True)
+            return await cache.get(session, URL, ttl=0, immutable=True)
+
+        assert asyncio.run(run()).source == HIT
+        assert len(session.requests) == 1
+
+        now = datetime(2026, 10, 18, tzinfo=timezone.utc)
+        assert chesscom_archive_is_complete(2026, 9, now)
+        assert not chesscom_archive_is_complete(2026, 10, now)
+        assert not chesscom_archive_is_complete(2026, 9, datetime(2026, 10, 1, 12, tzinfo=timezone.utc))
+        assert chesscom_archive_is_complete(2025, 12, now)
+
+    def test_concurrent_fetches_share_one_request(self, tmp_path):
+        cache = UpstreamCache(str(tmp_path / "upstream.db"))
+        session = FakeSession(delay=0.05)
+
+        async def run():
+            return await asyncio.gather(*(cache.get(session, URL, ttl=60) for _ in range(5)))
+
+        responses = asyncio.run(run())
+        assert len(session.requests) == 1
+        assert all(response.status == 200 for response in responses)
+        assert cache.stats()["deduplicated"] == 4
+
+    def test_size_bound_evicts_least_recently_used(self, tmp_path):
+        cache = UpstreamCache(str(tmp_path / "upstream.db"), max_bytes=2000)
+        session = FakeSession(body=os.urandom(900))  # Incompressible
+
+        async def run():
+            for month in range(1, 5):
+                await cache.get(session, f"{URL[:-2]}{month:02d}", ttl=60)
+
+        asyncio.run(run())
+        stats = cache.stats()
+        assert stats["bytes"] <= 2000
+        assert stats["evicted"] >= 2
+        assert cache.invalidate(f"{URL[:-2]}04")
+
+    def test_running_total_matches_stored_bytes(self, tmp_path):
+        path = str(tmp_path / "upstream.db")
+        cache = UpstreamCache(path, max_bytes=2000)
+        session = FakeSession(body=os.urandom(900))
+
+        def stored_bytes():
+            return cache._conn().execute("SELECT COALESCE(SUM(size), 0) FROM upstream_responses").fetchone()[0]
+
+        async def run():
+            await cache.get(session, URL, ttl=0)
+            session.body, session.etag = os.urandom(500), '"v2"'
+            await cache.get(session, URL, ttl=0)  # Replaces the stored body
+            for month in range(1, 4):
+                await cache.get(session, f"{URL[:-2]}{month:02d}", ttl=60)
+
+        asyncio.run(run())
+        assert cache.stats()["bytes"] == stored_bytes() <= 2000
+        cache.invalidate(f"{URL[:-2]}03")
+        assert cache.stats()["bytes"] == stored_bytes()
+        # A second cache on the same file picks up the existing total
+        assert UpstreamCache(path, max_bytes=2000).stats()["bytes"] == stored_bytes()
+
+    def test_reads_touch_last_used_at_most_once_a_minute(self, tmp_path):
+        cache = UpstreamCache(str(tmp_path / "upstream.db"))
+        session = FakeSession()
+
+        def last_used():
+            return cache._conn().execute("SELECT last_used FROM upstream_responses").fetchone()[0]
+
+        async def run():
+            await cache.get(session, URL, ttl=60)
+            stored = last_used()
+            await cache.get(session, URL, ttl=60)
+            assert last_used() == stored
+            cache._conn().execute("UPDATE upstream_responses SET last_used = last_used - 120")
+            await cache.get(session, URL, ttl=60)
+            assert last_used() > stored - 120
+
+        asyncio.run(run())
+        assert cache.stats()[HIT] == 2
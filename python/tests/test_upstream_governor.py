@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the adaptive upstream rate governor.
+
+These tests verify that slots are reserved in order at the current rate,
+that successes raise the rate and 429s halve it and pause the provider,
+and that advertised rate-limit headers cap the rate.
+"""
+
+import asyncio
+import os
+import sys
+
+# Add the python directory to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.upstream_governor import UpstreamGovernor, get_upstream_governor, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _governor(clock, **overrides):
+    settings = dict(rate=2.0, min_rate=0.5, max_rate=4.0, burst=2, increase=0.5)
+    settings.update(overrides)
+    return UpstreamGovernor("lichess", clock=clock, **settings)
+
+
+class TestUpstreamGovernor:
+    """Test cases for pacing and AIMD feedback."""
+
+    def test_reservations_are_spaced_at_the_current_rate(self):
+        governor = _governor(FakeClock())
+        waits = [governor.reserve() for _ in range(5)]
+        # Burst of two, then one slot every 1 / rate seconds
+        assert waits == [0.0, 0.0, 0.5, 1.0, 1.5]
+        assert governor.reserve(timeout=1.0) is None  # Too far away; nothing reserved
+        assert governor.stats()["requests"] == 5
+
+    def test_additive_increase_and_multiplicative_decrease(self):
+        clock = FakeClock()
+        governor = _governor(clock)
+        for _ in range(10):
+            governor.observe(200)
+        assert governor.rate == 4.0  # Capped at max_rate
+
+        governor.observe(429, {"Retry-After": "30"})
+        assert governor.rate == 2.0
+        governor.observe(429)  # In flight before the pause: extends it, no second decrease
+        assert governor.rate == 2.0
+        assert governor.stats()["decreases"] == 1
+
+        # Requests resume after the pause one interval apart, not in a burst
+        clock.now += 10
+        assert [governor.reserve() for _ in range(3)] == [50.0, 50.5, 51.0]
+
+        clock.now += 60  # Past the default backoff of the header-less 429
+        for _ in range(5):
+            governor.observe(429, {"Retry-After": "0"})
+            clock.now += 1
+        assert governor.rate == 0.5  # Floor at min_rate
+
+    def test_rate_limit_headers_cap_the_rate(self):
+        governor = _governor(FakeClock(), rate=3.0)
+        governor.observe(200, {"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": "20"})
+        assert governor.rate == 0.5
+        governor.observe(200, {"X-RateLimit-Remaining": "100", "X-RateLimit-Reset": "10"})
+        assert governor.rate == 1.0
+
+    def test_acquire_waits_for_its_slot(self):
+        governor = _governor(FakeClock(), rate=4.0, max_rate=4.0, burst=1)
+
+        async def run():
+            async with governor.request():
+                pass
+            return await governor.wait_for_token(tokens=2, timeout=5.0)
+
+        assert asyncio.run(run())
+        assert governor.stats()["waited_seconds"] == 0.75
+
+    def test_retry_after_formats(self):
+        assert parse_retry_after("120") == 120.0
+        assert parse_retry_after("Wed, 21 Oct 2026 07:28:00 GMT", now=1792567670.0) == 10.0
+        assert parse_retry_after("soon") is None
+        assert parse_retry_after(None) is None
+
+    def test_governors_are_shared_per_platform(self):
+        assert get_upstream_governor("lichess") is get_upstream_governor("lichess")
+        assert get_upstream_governor("chess.com") is not get_upstream_governor("lichess")
+        assert get_upstream_governor("unknown") is None
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the write-behind usage ledger.
+
+These tests verify that increments are aggregated into one database call per
+user and action, that failed deltas stay pending until they are
+dead-lettered after repeated failures, that the journal restores
+unflushed usage after a crash, and that limit checks count unflushed usage.
+"""
+
+import asyncio
+import json
+import os
+import sys
+from unittest.mock import Mock
+
+# Add the python directory to the path before importing application modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from core.entitlements import EntitlementService
+from core.usage_ledger import ANONYMOUS, USER, UsageLedger
+from core.usage_tracker import UsageTracker
+
+USER_ID = "0f8fad5b-d9cb-469f-a165-70867728950e"
+
+
+class RecordingApply:
+    """apply() stand-in that records calls and can be told to fail."""
+
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+
+    async def __call__(self, subject, key, action_type, count):
+        if self.fail:
+            return False
+        self.calls.append((subject, key, action_type, count))
+        return True
+
+
+class TestUsageLedger:
+    """Test cases for aggregation, flushing and journaling."""
+
+    def test_flush_aggregates_deltas(self):
+        apply = RecordingApply()
+        ledger = UsageLedger(apply)
+        for _ in range(5):
+            ledger.record(USER, USER_ID, 'analyze', 1)
+        ledger.record(USER, USER_ID, 'import', 1500)
+        ledger.record(ANONYMOUS, '10.0.0.1', 'import', 20)
+        assert ledger.pending(USER, USER_ID, 'analyze') == 5
+
+        assert asyncio.run(ledger.flush()) == 3
+        assert sorted(apply.calls) == sorted([
+            (USER, USER_ID, 'analyze', 5),
+            (USER, USER_ID, 'import', 1000),  # Split at the RPC's per-call maximum
+            (USER, USER_ID, 'import', 500),
+            (ANONYMOUS, '10.0.0.1', 'import', 20),
+        ])
+        assert ledger.pending(USER, USER_ID, 'analyze') == 0
+
+    def test_failed_deltas_stay_pending(self):
+        apply = RecordingApply()
+        ledger = UsageLedger(apply)
+        ledger.record(USER, USER_ID, 'analyze', 2)
+        apply.fail = True
+        assert asyncio.run(ledger.flush()) == 0
+        assert ledger.pending(USER, USER_ID, 'analyze') == 2
+        assert ledger.stats()["apply_failures"] == 1
+
+        apply.fail = False
+        ledger.record(USER, USER_ID, 'analyze', 1)
+        assert asyncio.run(ledger.flush()) == 1
+        assert apply.calls == [(USER, USER_ID, 'analyze', 3)]
+
+    def test_repeatedly_failing_delta_is_dead_lettered(self, tmp_path):
+        journal = str(tmp_path / "usage_ledger.jsonl")
+        apply = RecordingApply()
+        apply.fail = True
+        ledger = UsageLedger(apply, journal_path=journal, max_attempts=3)
+        ledger.record(USER, USER_ID, 'analyze', 4)
+        for _ in range(2):
+            asyncio.run(ledger.flush())
+        assert ledger.pending(USER, USER_ID, 'analyze') == 4
+
+        # Attempts survive a restart through the journal
+        ledger.close()
+        ledger = UsageLedger(apply, journal_path=journal, max_attempts=3)
+        asyncio.run(ledger.flush())
+        assert ledger.pending(USER, USER_ID, 'analyze') == 0  # No longer counted toward limits
+        assert ledger.stats()["dead_lettered"] == 1
+        dead = [json.loads(line) for line in open(str(tmp_path / "usage_ledger.dead.jsonl"), encoding='utf-8')]
+        assert [(d["key"], d["action"], d["count"], d["attempts"]) for d in dead] == [(USER_ID, 'analyze', 4, 3)]
+
+        # New usage for the same user starts over
+        ledger.record(USER, USER_ID, 'analyze', 1)
+        asyncio.run(ledger.flush())
+        assert ledger.pending(USER, USER_ID, 'analyze') == 1
+        ledger.close()
+
+    def test_journal_recovers_unflushed_usage(self, tmp_path):
+        journal = str(tmp_path / "usage_ledger.jsonl")
+        apply = RecordingApply()
+        ledger = UsageLedger(apply, journal_path=journal)
+        ledger.record(USER, USER_ID, 'import', 7)
+        asyncio.run(ledger.flush())
+        ledger.record(USER, USER_ID, 'analyze', 2)
+        ledger.record(USER, USER_ID, 'analyze', 1)
+        ledger.close()  # Crash: nothing flushed since the last batch
+
+        with open(journal, 'a', encoding='utf-8') as f:
+            f.write('{"subject": "user", "key"')  # Torn last line
+
+        recovered = UsageLedger(apply, journal_path=journal)
+        assert recovered.pending(USER, USER_ID, 'analyze') == 3
+        assert recovered.pending(USER, USER_ID, 'import') == 0
+        asyncio.run(recovered.flush())
+        assert apply.calls[-1] == (USER, USER_ID, 'analyze', 3)
+        assert open(journal, encoding='utf-8').read() == ""
+
+    def test_each_process_slot_is_locked(self, tmp_path):
+        journal = str(tmp_path / "usage_ledger.jsonl")
+        first = UsageLedger(RecordingApply(), journal_path=journal)
+        second = UsageLedger(RecordingApply(), journal_path=journal)
+        assert first.journal_path != second.journal_path
+        first.close()
+        second.close()
+
+
+class TestUsageTrackerWriteBehind:
+    """Test cases for optimistic limit enforcement with a ledger."""
+
+    def _tracker(self, rows):
+        client = Mock()
+        client.rpc.side_effect = lambda name, params: Mock(execute=Mock(return_value=Mock(data=rows[name])))
+        tracker = UsageTracker(client, entitlements=EntitlementService(client))
+        tracker.enable_write_behind()
+        return client, tracker
+
+    def test_limits_count_unflushed_usage(self):
+        rows = {
+            'get_user_entitlements': {'found': True, 'auth_user_id': USER_ID, 'account_tier': 'free',
+                                      'import_limit': 100, 'analysis_limit': 5, 'current_imports': 0, 'current_analyses': 3},
+            'increment_usage_atomic': {'success': True, 'new_value': 5},
+            'check_anonymous_usage_limits': {'can_proceed': True, 'current_imports': 45, 'current_analyses': 0,
+                                             'import_limit': 50, 'analysis_limit': 2},
+            'increment_anonymous_usage': {'success': True, 'new_value': 50},
+        }
+        client, tracker = self._tracker(rows)
+
+        async def run():
+            assert (await tracker.check_analysis_limit(USER_ID))[0]
+            await tracker.increment_usage(USER_ID, 'analyze', count=2)
+            can_proceed, stats = await tracker.check_analysis_limit(USER_ID)
+            assert not can_proceed
+            assert stats['current_analyses'] == 5 and stats['pending_usage'] == 2
+
+            await tracker.increment_anonymous_usage('10.0.0.1', 'import', count=5)
+            assert not (await tracker.check_anonymous_import_limit('10.0.0.1'))[0]
+
+            rows['get_user_entitlements'] = {**rows['get_user_entitlements'], 'current_analyses': 5}
+            await tracker.ledger.flush()
+            can_proceed, stats = await tracker.check_analysis_limit(USER_ID)
+            assert not can_proceed and 'pending_usage' not in stats
+
+        asyncio.run(run())
+        names = [call.args[0] for call in client.rpc.call_args_list]
+        # One entitlement lookup before the flush, one after it invalidated the snapshot
+        assert names.count('get_user_entitlements') == 2
+        assert names.count('increment_usage_atomic') == 1
+
+    def test_reconcile_refreshes_drifted_snapshots(self):
+        rows = {
+            'get_user_entitlements': {'found': True, 'auth_user_id': USER_ID, 'import_limit': 100,
+                                      'analysis_limit': 5, 'current_imports': 10, 'current_analyses': 1},
+            'check_usage_limits': {'can_proceed': True, 'current_imports': 10, 'current_analyses': 4},
+        }
+        client, tracker = self._tracker(rows)
+        service = tracker.entitlements
+
+        async def run():
+            await service.resolve(USER_ID)
+            return await tracker.reconcile_usage({(USER, USER_ID), (ANONYMOUS, '10.0.0.1')})
+
+        assert asyncio.run(run()) == 1
+        assert service.peek(USER_ID) is None
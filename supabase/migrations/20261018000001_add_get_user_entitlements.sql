@@ -0,0 +1,85 @@
+-- Migration: Single-query entitlement lookup
+-- Purpose: Resolve everything premium and usage-limit checks need (auth user,
+-- linked usernames, tier, subscription status, tier limits and current
+-- 24-hour usage) in one round trip. Replaces the user_profiles ->
+-- authenticated_users lookup chain in premium checks and the per-request
+-- check_usage_limits call; the API server caches the result briefly
+-- (core/entitlements.py).
+--
+-- p_user_id is either the auth user UUID or a platform username; usernames are
+-- resolved through user_profiles.auth_user_id and need p_platform.
+
+CREATE OR REPLACE FUNCTION get_user_entitlements(
+    p_user_id TEXT,
+    p_platform TEXT DEFAULT NULL
+)
+RETURNS JSON AS $$
+DECLARE
+    v_auth_user_id UUID;
+    v_user RECORD;
+    v_tier RECORD;
+    v_usage RECORD;
+BEGIN
+    IF p_user_id ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$' THEN
+        v_auth_user_id := p_user_id::UUID;
+    ELSIF p_platform IS NOT NULL THEN
+        SELECT auth_user_id INTO v_auth_user_id
+        FROM user_profiles
+        WHERE platform = p_platform
+          AND user_id = p_user_id
+          AND auth_user_id IS NOT NULL
+        LIMIT 1;
+    END IF;
+
+    IF v_auth_user_id IS NULL THEN
+        RETURN json_build_object('found', false);
+    END IF;
+
+    SELECT account_tier, subscription_status, subscription_end_date,
+           chess_com_username, lichess_username
+    INTO v_user
+    FROM authenticated_users
+    WHERE id = v_auth_user_id;
+
+    IF NOT FOUND THEN
+        RETURN json_build_object('found', false, 'auth_user_id', v_auth_user_id);
+    END IF;
+
+    SELECT import_limit, analysis_limit INTO v_tier
+    FROM payment_tiers
+    WHERE id = v_user.account_tier;
+
+    IF NOT FOUND THEN
+        SELECT import_limit, analysis_limit INTO v_tier
+        FROM payment_tiers
+        WHERE id = 'free';
+    END IF;
+
+    SELECT COALESCE(games_imported, 0) AS games_imported,
+           COALESCE(games_analyzed, 0) AS games_analyzed,
+           reset_at
+    INTO v_usage
+    FROM usage_tracking
+    WHERE user_id = v_auth_user_id
+      AND reset_at > NOW() - INTERVAL '24 hours'
+    ORDER BY reset_at DESC
+    LIMIT 1;
+
+    RETURN json_build_object(
+        'found', true,
+        'auth_user_id', v_auth_user_id,
+        'account_tier', v_user.account_tier,
+        'subscription_status', v_user.subscription_status,
+        'subscription_end_date', v_user.subscription_end_date,
+        'chess_com_username', v_user.chess_com_username,
+        'lichess_username', v_user.lichess_username,
+        'import_limit', v_tier.import_limit,
+        'analysis_limit', v_tier.analysis_limit,
+        'current_imports', COALESCE(v_usage.games_imported, 0),
+        'current_analyses', COALESCE(v_usage.games_analyzed, 0),
+        'reset_at', v_usage.reset_at
+    );
+END;
+$$ LANGUAGE plpgsql STABLE SECURITY DEFINER SET search_path = public;
+
+GRANT EXECUTE ON FUNCTION get_user_entitlements(TEXT, TEXT) TO service_role;